@@ -1,5 +1,6 @@
 # Copyright 2017-present Kensho Technologies, LLC.
 from collections import namedtuple
+from functools import partial
 
 from .. import backend
 from ..schema.schema_info import CommonSchemaInfo
@@ -92,7 +93,8 @@ def compile_graphql_to_sql(sql_schema_info, graphql_string):
     return _compile_graphql_generic(backend.sql_backend, sql_schema_info, graphql_string)
 
 
-def compile_graphql_to_cypher(schema, graphql_string, type_equivalence_hints=None):
+def compile_graphql_to_cypher(schema, graphql_string, type_equivalence_hints=None,
+                              subclass_sets=None):
     """Compile the GraphQL input using the schema into a Cypher query and associated metadata.
 
     Args:
@@ -113,12 +115,22 @@ def compile_graphql_to_cypher(schema, graphql_string, type_equivalence_hints=Non
                                 Be very careful with this option, as bad input here will
                                 lead to incorrect output queries being generated.
                                 *****
+        subclass_sets: optional dict mapping class names to the set of their subclass names,
+                       as returned by compute_subclass_sets(). If provided, every vertex in the
+                       generated query pattern is labeled with all of its supertypes, so that
+                       the database can use the most selective label index. Only use this if
+                       every vertex in the database carries the labels of all its supertypes
+                       (RedisGraph, for example, supports only a single label per node).
 
     Returns:
         a CompilationResult object
     """
     schema_info = CommonSchemaInfo(schema, type_equivalence_hints)
-    return _compile_graphql_generic(backend.cypher_backend, schema_info, graphql_string)
+    target_backend = backend.cypher_backend
+    if subclass_sets is not None:
+        target_backend = target_backend._replace(
+            lower_func=partial(target_backend.lower_func, subclass_sets=subclass_sets))
+    return _compile_graphql_generic(target_backend, schema_info, graphql_string)
 
 
 def _compile_graphql_generic(target_backend, schema_info, graphql_string):
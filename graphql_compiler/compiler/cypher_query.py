@@ -3,6 +3,8 @@
 
 from collections import namedtuple
 
+import six
+
 from .blocks import (
     Backtrack, CoerceType, ConstructResult, EndOptional, Filter, Fold, GlobalOperationsStart,
     MarkLocation, OutputSource, QueryRoot, Recurse, Traverse, Unfold
@@ -46,20 +48,43 @@ linked_location_source_types = (MarkLocation, Backtrack)
 discarded_block_types = (Unfold, OutputSource, EndOptional)
 
 
-def _get_all_supertypes_of_exact_type(query_metadata_table, exact_type):
-    """Return the set of all supertypes of the given exact type."""
-    # TODO(predrag): Plumb the SchemaGraph work through here.
-    return {exact_type}
+def _compute_supertype_sets(subclass_sets):
+    """Invert the given subclass sets, returning a dict of class name -> set of its supertypes."""
+    supertype_sets = {}
+    for class_name, subclass_names in six.iteritems(subclass_sets):
+        for subclass_name in subclass_names:
+            supertype_sets.setdefault(subclass_name, set()).add(class_name)
+    return supertype_sets
+
+
+def _get_all_supertypes_of_exact_type(supertype_sets, exact_type):
+    """Return the set of all supertypes of the given exact type.
+
+    Args:
+        supertype_sets: optional dict mapping class names to the set of their supertype names.
+                        If None, no inheritance information is available and only the exact type
+                        is returned.
+        exact_type: str, name of the type whose supertypes are requested
+
+    Returns:
+        set of str type names, including the exact type itself
+    """
+    if supertype_sets is None:
+        return {exact_type}
+
+    supertypes = set(supertype_sets.get(exact_type, set()))
+    supertypes.add(exact_type)
+    return supertypes
 
 
-def _make_cypher_step(query_metadata_table, linked_location, current_step_blocks):
+def _make_cypher_step(query_metadata_table, supertype_sets, linked_location, current_step_blocks):
     """Return a CypherStep for the current list of IR blocks and metadata."""
     step_block = current_step_blocks[0]
     remaining_blocks = current_step_blocks[1:]
 
     if isinstance(step_block, QueryRoot):
         return _make_query_root_cypher_step(
-            query_metadata_table, linked_location, current_step_blocks)
+            query_metadata_table, supertype_sets, linked_location, current_step_blocks)
 
     remaining_block_types = tuple(type(block) for block in remaining_blocks)
     if remaining_block_types == (CoerceType, Filter, MarkLocation):
@@ -72,14 +97,15 @@ def _make_cypher_step(query_metadata_table, linked_location, current_step_blocks
                              .format(current_step_blocks))
 
     exact_step_type = get_only_element_from_collection(coercion_block.target_class)
-    step_types = _get_all_supertypes_of_exact_type(query_metadata_table, exact_step_type)
+    step_types = _get_all_supertypes_of_exact_type(supertype_sets, exact_step_type)
 
     return CypherStep(
         linked_location=linked_location, step_block=step_block, step_types=step_types,
         where_block=where_block, as_block=as_block)
 
 
-def _make_query_root_cypher_step(query_metadata_table, linked_location, current_step_blocks):
+def _make_query_root_cypher_step(query_metadata_table, supertype_sets, linked_location,
+                                 current_step_blocks):
     """Return a CypherStep for a list of IR blocks that start with a QueryRoot block."""
     current_step_block_types = tuple(type(block) for block in current_step_blocks)
 
@@ -96,20 +122,22 @@ def _make_query_root_cypher_step(query_metadata_table, linked_location, current_
                              .format(current_step_blocks))
 
     exact_step_type = get_only_element_from_collection(step_block.start_class)
-    step_types = _get_all_supertypes_of_exact_type(query_metadata_table, exact_step_type)
+    step_types = _get_all_supertypes_of_exact_type(supertype_sets, exact_step_type)
 
     return CypherStep(
         linked_location=linked_location, step_block=step_block, step_types=step_types,
         where_block=where_block, as_block=as_block)
 
 
-def _generate_cypher_step_list_from_ir_blocks(fold_scope_location, ir_blocks, query_metadata_table):
+def _generate_cypher_step_list_from_ir_blocks(fold_scope_location, ir_blocks, query_metadata_table,
+                                              supertype_sets):
     """Given FoldScopeLocation and list of IR blocks, generate corresponding CypherStep objects.
 
     Args:
         fold_scope_location: FoldScopeLocation object
         ir_blocks: list of IR blocks corresponding to that fold scope.
         query_metadata_table: QueryMetadataTable object that captures information about the query
+        supertype_sets: optional dict mapping class names to the set of their supertype names
 
     Returns:
         list of CypherStep objects corresponding to those IR blocks.
@@ -126,7 +154,7 @@ def _generate_cypher_step_list_from_ir_blocks(fold_scope_location, ir_blocks, qu
             # MarkLocation is the last block needed for the next CypherStep object.
             continue
 
-        cypher_step = _make_cypher_step(query_metadata_table, linked_location,
+        cypher_step = _make_cypher_step(query_metadata_table, supertype_sets, linked_location,
                                         current_step_ir_blocks)
         folded_cypher_steps.append(cypher_step)
 
@@ -149,8 +177,27 @@ def _generate_cypher_step_list_from_ir_blocks(fold_scope_location, ir_blocks, qu
 # Public API #
 ##############
 
-def convert_to_cypher_query(ir_blocks, query_metadata_table, type_equivalence_hints=None):
-    """Convert the list of IR blocks into a CypherQuery object, for easier manipulation."""
+def convert_to_cypher_query(ir_blocks, query_metadata_table, type_equivalence_hints=None,
+                            subclass_sets=None):
+    """Convert the list of IR blocks into a CypherQuery object, for easier manipulation.
+
+    Args:
+        ir_blocks: list of IR blocks to convert
+        query_metadata_table: QueryMetadataTable object that captures information about the query
+        type_equivalence_hints: optional dict of GraphQL interface or type -> GraphQL union
+        subclass_sets: optional dict mapping class names to the set of their subclass names,
+                       as computed by compute_subclass_sets(). If provided, every CypherStep is
+                       annotated with the labels of all supertypes of the vertex's type, rather
+                       than just the label of the type itself. This is only correct if every
+                       vertex in the database carries the labels of all its supertypes.
+
+    Returns:
+        CypherQuery object
+    """
+    supertype_sets = None
+    if subclass_sets is not None:
+        supertype_sets = _compute_supertype_sets(subclass_sets)
+
     steps = []
     current_step_blocks = None
     linked_location = None
@@ -161,7 +208,8 @@ def convert_to_cypher_query(ir_blocks, query_metadata_table, type_equivalence_hi
         fold_scope_location: _generate_cypher_step_list_from_ir_blocks(
             fold_scope_location,
             fold_scope_ir_blocks_dict[fold_scope_location],
-            query_metadata_table
+            query_metadata_table,
+            supertype_sets
         )
         for fold_scope_location in fold_scope_ir_blocks_dict
     }
@@ -174,7 +222,7 @@ def convert_to_cypher_query(ir_blocks, query_metadata_table, type_equivalence_hi
             # and we are about to start the global operations section. Finish adding
             # the last CypherStep, then break out of the loop.
             cypher_step = _make_cypher_step(
-                query_metadata_table, linked_location, current_step_blocks)
+                query_metadata_table, supertype_sets, linked_location, current_step_blocks)
             steps.append(cypher_step)
             current_step_blocks = None
 
@@ -189,7 +237,7 @@ def convert_to_cypher_query(ir_blocks, query_metadata_table, type_equivalence_hi
             current_step_blocks = [block]
         elif isinstance(block, step_block_types):
             cypher_step = _make_cypher_step(
-                query_metadata_table, linked_location, current_step_blocks)
+                query_metadata_table, supertype_sets, linked_location, current_step_blocks)
             steps.append(cypher_step)
 
             linked_location = next_linked_location
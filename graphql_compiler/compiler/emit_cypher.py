@@ -20,8 +20,12 @@ def _emit_code_from_cypher_step(cypher_step):
 
     has_where_block = cypher_step.where_block is not None
     is_optional_step = (
-        isinstance(cypher_step.step_block, Traverse) and
-        (cypher_step.step_block.optional or
+        (isinstance(cypher_step.step_block, Traverse) and
+         (cypher_step.step_block.optional or
+          cypher_step.step_block.within_optional_scope)) or
+        # A @recurse within an @optional scope has to tolerate a missing (null) starting vertex,
+        # otherwise the whole result row would be dropped when the optional edge does not exist.
+        (isinstance(cypher_step.step_block, Recurse) and
          cypher_step.step_block.within_optional_scope)
     )
     if has_where_block and is_optional_step:
@@ -83,6 +87,9 @@ def _emit_code_from_cypher_step(cypher_step):
         template_data[direction_symbol_name] = direction_symbol
 
     if isinstance(cypher_step.step_block, Recurse):
+        # Recursion is lowered to a variable-length relationship pattern, which lets the database
+        # evaluate the recursion natively. The lower bound of 0 hops corresponds to the @recurse
+        # semantics of including the starting vertex itself in the results.
         template_data['quantifier'] = u'*0..%d' % cypher_step.step_block.depth
 
     # Comply with Cypher style guidebook on whitespace a bit.
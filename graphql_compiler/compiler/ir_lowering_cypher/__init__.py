@@ -16,12 +16,15 @@ from .ir_lowering import (
 # Public API #
 ##############
 
-def lower_ir(schema_info, ir):
+def lower_ir(schema_info, ir, subclass_sets=None):
     """Lower the IR into an IR form that can be represented in Cypher queries.
 
     Args:
         schema_info: CommonSchemaInfo containing all relevant schema information
         ir: IrAndMetadata representing the query to lower into Cypher-compatible form
+        subclass_sets: optional dict mapping class names to the set of their subclass names.
+                       If provided, each vertex in the emitted pattern is labeled with all of its
+                       supertypes, which allows the database to use label indexes directly.
 
     Returns:
         CypherQuery object
@@ -41,7 +44,8 @@ def lower_ir(schema_info, ir):
 
     cypher_query = convert_to_cypher_query(
         ir_blocks, ir.query_metadata_table,
-        type_equivalence_hints=schema_info.type_equivalence_hints)
+        type_equivalence_hints=schema_info.type_equivalence_hints,
+        subclass_sets=subclass_sets)
 
     cypher_query = move_filters_in_optional_locations_to_global_operations(
         cypher_query, ir.query_metadata_table)
@@ -6,7 +6,8 @@ from ..ir_lowering_common.common import (
 from ..ir_sanity_checks import sanity_check_ir_blocks_from_frontend
 from .ir_lowering import (
     lower_coerce_type_block_type_data, lower_coerce_type_blocks,
-    lower_folded_outputs_and_context_fields, rewrite_filters_in_optional_blocks
+    lower_folded_outputs_and_context_fields, lower_global_context_fields,
+    rewrite_filters_in_optional_blocks
 )
 
 
@@ -36,5 +37,6 @@ def lower_ir(schema_info, ir):
     ir_blocks = rewrite_filters_in_optional_blocks(ir_blocks)
     ir_blocks = merge_consecutive_filter_clauses(ir_blocks)
     ir_blocks = lower_folded_outputs_and_context_fields(ir_blocks)
+    ir_blocks = lower_global_context_fields(ir_blocks)
 
     return ir_blocks
@@ -13,12 +13,12 @@ from graphql.type import GraphQLInterfaceType, GraphQLObjectType, GraphQLUnionTy
 import six
 
 from ...exceptions import GraphQLCompilationError
-from ...schema import GraphQLDate, GraphQLDateTime
+from ...schema import COUNT_META_FIELD_NAME, GraphQLDate, GraphQLDateTime
 from ..blocks import Backtrack, CoerceType, Filter, GlobalOperationsStart, MarkLocation, Traverse
 from ..compiler_entities import Expression
 from ..expressions import (
-    BinaryComposition, FoldedContextField, Literal, LocalField, NullLiteral,
-    make_type_replacement_visitor
+    BinaryComposition, ContextField, FoldCountContextField, FoldedContextField, GlobalContextField,
+    Literal, LocalField, NullLiteral, make_type_replacement_visitor
 )
 from ..helpers import (
     STANDARD_DATE_FORMAT, STANDARD_DATETIME_FORMAT, FoldScopeLocation,
@@ -156,14 +156,21 @@ class GremlinFoldedContextField(Expression):
 
         bare_field_type = strip_non_null_from_type(self.field_type)
         if isinstance(bare_field_type, GraphQLList):
+            if self.fold_scope_location.field == COUNT_META_FIELD_NAME:
+                raise TypeError(u'Expected the _x_count meta-field to be of GraphQLInt type, but '
+                                u'encountered type {} instead: {}'
+                                .format(self.field_type, self.fold_scope_location))
+
             inner_type = strip_non_null_from_type(bare_field_type.of_type)
             if isinstance(inner_type, GraphQLList):
                 raise GraphQLCompilationError(
                     u'Outputting list-valued fields in a @fold context is currently not supported: '
                     u'{} {}'.format(self.fold_scope_location, bare_field_type.of_type))
         elif GraphQLInt.is_same_type(bare_field_type):
-            # This needs to be implemented for @fold _x_count support.
-            raise NotImplementedError()
+            if self.fold_scope_location.field != COUNT_META_FIELD_NAME:
+                raise ValueError(u'Invalid value of "field_type" for a field that is not the '
+                                 u'_x_count meta-field, expected a list type but got: {} {}'
+                                 .format(self.field_type, self.fold_scope_location))
         else:
             raise ValueError(u'Invalid value of "field_type", expected a (possibly non-null) '
                              u'list or int type but got: {}'.format(self.field_type))
@@ -190,6 +197,10 @@ class GremlinFoldedContextField(Expression):
         _, field_name = self.fold_scope_location.get_location_name()
         validate_safe_string(field_name)
 
+        if field_name == COUNT_META_FIELD_NAME:
+            return self._to_gremlin_count(base_location_name, edge_direction, edge_name,
+                                          inverse_direction)
+
         if not self.folded_ir_blocks:
             # There is no filtering nor type coercions applied to this @fold scope.
             #
@@ -251,6 +262,58 @@ class GremlinFoldedContextField(Expression):
         }
         return template.format(**template_data)
 
+    def _to_gremlin_count(self, base_location_name, edge_direction, edge_name, inverse_direction):
+        """Return the Gremlin representation of the number of elements in the @fold scope."""
+        if not self.folded_ir_blocks:
+            # There is no filtering nor type coercions applied to this @fold scope,
+            # so the number of elements is simply the number of edges at the base location.
+            #
+            # This template generates code like:
+            # (
+            #     (m.base.in_Animal_ParentOf == null) ?
+            #     0 : m.base.in_Animal_ParentOf.size()
+            # )
+            template = (
+                u'((m.{base_location_name}.{direction}_{edge_name} == null) ? 0 : ('
+                u'm.{base_location_name}.{direction}_{edge_name}.size()'
+                u'))'
+            )
+            filter_and_traverse_data = ''
+        else:
+            # There is filtering or type coercions in this @fold scope, so they are applied
+            # to the folded vertices before counting them.
+            #
+            # This template generates code like:
+            # (
+            #     (m.base.in_Animal_ParentOf == null) ?
+            #     0 : (
+            #         m.base.in_Animal_ParentOf
+            #          .collect{entry -> entry.outV.next()}
+            #          .findAll{it.alias.contains($wanted)}
+            #          .size()
+            #     )
+            # )
+            template = (
+                u'((m.{base_location_name}.{direction}_{edge_name} == null) ? 0 : ('
+                u'm.{base_location_name}.{direction}_{edge_name}.collect{{'
+                u'entry -> entry.{inverse_direction}V.next()'
+                u'}}'
+                u'.{filters_and_traverses}'
+                u'.size()'
+                u'))'
+            )
+            filter_and_traverse_data = u'.'.join(block.to_gremlin()
+                                                 for block in self.folded_ir_blocks)
+
+        template_data = {
+            'base_location_name': base_location_name,
+            'direction': edge_direction,
+            'edge_name': edge_name,
+            'inverse_direction': inverse_direction,
+            'filters_and_traverses': filter_and_traverse_data,
+        }
+        return template.format(**template_data)
+
 
 class GremlinFoldedFilter(Filter):
     """A Gremlin-specific Filter block to be used only within @fold scopes."""
@@ -341,15 +404,19 @@ def lower_folded_outputs_and_context_fields(ir_blocks):
     }
 
     def rewriter_fn(folded_context_field):
-        """Rewrite FoldedContextField objects into GremlinFoldedContextField ones."""
+        """Rewrite FoldedContextField and FoldCountContextField objects for Gremlin."""
         # Get the matching folded IR blocks and put them in the new context field.
         base_fold_location_name = folded_context_field.fold_scope_location.get_location_name()[0]
         folded_ir_blocks = converted_folds[base_fold_location_name]
+        if isinstance(folded_context_field, FoldCountContextField):
+            field_type = GraphQLInt
+        else:
+            field_type = folded_context_field.field_type
         return GremlinFoldedContextField(
-            folded_context_field.fold_scope_location, folded_ir_blocks,
-            folded_context_field.field_type)
+            folded_context_field.fold_scope_location, folded_ir_blocks, field_type)
 
-    visitor_fn = make_type_replacement_visitor(FoldedContextField, rewriter_fn)
+    visitor_fn = make_type_replacement_visitor(
+        (FoldedContextField, FoldCountContextField), rewriter_fn)
 
     # Start by just appending blocks to the output list.
     new_ir_blocks = []
@@ -365,3 +432,36 @@ def lower_folded_outputs_and_context_fields(ir_blocks):
         new_ir_blocks.append(block.visit_and_update_expressions(visitor_fn))
 
     return new_ir_blocks
+
+
+def lower_global_context_fields(ir_blocks):
+    """Lower GlobalContextField objects in the global operations section into ContextFields.
+
+    The frontend uses GlobalContextField objects to reference tagged values in global filters,
+    e.g. in filters on the "_x_count" meta-field of a @fold scope. Since Gremlin global filters
+    have access to all marked locations, these can be represented as regular ContextFields.
+
+    Args:
+        ir_blocks: list of IR blocks to lower into Gremlin-compatible form
+
+    Returns:
+        new list of IR blocks with this lowering step applied
+    """
+    def rewriter_fn(global_context_field):
+        """Rewrite GlobalContextField objects into ContextField ones."""
+        return ContextField(global_context_field.location, global_context_field.field_type)
+
+    visitor_fn = make_type_replacement_visitor(GlobalContextField, rewriter_fn)
+
+    new_ir_blocks = []
+    seen_global_operations_start = False
+    for block in ir_blocks:
+        new_block = block
+        if isinstance(block, GlobalOperationsStart):
+            seen_global_operations_start = True
+        elif seen_global_operations_start:
+            new_block = block.visit_and_update_expressions(visitor_fn)
+
+        new_ir_blocks.append(new_block)
+
+    return new_ir_blocks
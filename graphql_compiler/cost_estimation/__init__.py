@@ -69,10 +69,26 @@ Approach Details:
     handle type casting, as well as optional, fold, recurse, and some filter directives. Additional
     statistics can be recorded to improve the coverage and accuracy of these adjustments.
 
+Estimating Execution Cost
+=========================
+
+The *execution cost* of a query is a rough measure of the work the database does while executing
+the query, which can be much larger than the query's cardinality when filters discard most of the
+vertices reached.
+
+We estimate execution cost by following the same expansion model as for cardinality, and
+estimating the number of *intermediate tuples* (vertices read before any filters are applied) at
+each location of the query:
+    - At the root location, every vertex of the root type is scanned, unless the root location has
+      an equality filter over the fields of a unique index, in which case only the matching
+      vertices are looked up using the index.
+    - At every other location, one edge is traversed per vertex reached from each result set of
+      the parent location.
+The numbers of scanned vertices, index lookups, traversed edges and result rows are then weighted
+by their relative cost on the backend executing the query, and summed up.
+
 TODOs
 =====
-    - Estimate execution cost by augmenting the cardinality calculation.
-    - Add recurse handling.
     - Add additional statistics to improve directive coverage (e.g. histograms
       to better model more filter operations).
 """
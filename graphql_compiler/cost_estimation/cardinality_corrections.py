@@ -0,0 +1,304 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+"""Correct cardinality estimates using the result sizes observed when executing queries.
+
+Statistics are only refreshed from time to time, so estimates drift as the data changes in the
+meantime. To counter this, the actual number of result rows of executed queries can be recorded,
+and the estimator learns multiplicative adjustments from the ratio between the observed and
+estimated cardinalities:
+- one adjustment per vertex class, applied to the count of root vertices of that class,
+- one adjustment per edge traversal, i.e. per (outbound vertex class, edge class, inbound vertex
+  class, edge direction, recursion depth) tuple, applied to the number of children per parent.
+
+After each observation, the logarithm of the error is split evenly between all adjustments used
+by the query, scaled by the learning rate. Adjustments decay towards 1 as new observations are
+recorded, so that old observations are eventually forgotten, and are bounded so that a few
+outliers cannot make estimates arbitrarily wrong.
+"""
+from collections import deque, namedtuple
+import json
+import math
+
+import six
+
+from .cardinality_estimator import (
+    correct_cardinality_estimation_plan, estimate_query_result_cardinality_using_plan
+)
+
+
+DEFAULT_LEARNING_RATE = 0.5
+DEFAULT_DECAY_RATE = 0.001
+DEFAULT_MAX_ADJUSTMENT = 100.0
+DEFAULT_MAX_LOGGED_OBSERVATIONS = 1000
+
+CARDINALITY_CORRECTIONS_FORMAT_VERSION = 1
+
+# Adjustments closer to 1 than this, in log space, are dropped to keep the corrections small.
+_MIN_LOG_ADJUSTMENT = 1e-6
+
+# CardinalityObservation namedtuples describe one executed query's estimated and observed
+# cardinalities.
+CardinalityObservation = namedtuple(
+    'CardinalityObservation',
+    (
+        'uncorrected_estimate',     # float, estimated cardinality without any corrections.
+        'corrected_estimate',       # float, estimated cardinality with the corrections learned
+                                    # before this observation was recorded.
+        'observed_cardinality',     # int, actual number of result rows of the query.
+    ),
+)
+
+# EstimateErrorReport namedtuples summarize the errors of the estimates of all logged observations.
+# Errors are measured using the q-error, the factor by which an estimate is off in either
+# direction, i.e. max(estimate / observed, observed / estimate). One is added to both the estimate
+# and the observed cardinality, so that the q-error is defined for empty results.
+EstimateErrorReport = namedtuple(
+    'EstimateErrorReport',
+    (
+        'num_observations',             # int, number of logged observations.
+        'uncorrected_mean_q_error',     # float, geometric mean q-error of uncorrected estimates.
+        'corrected_mean_q_error',       # float, geometric mean q-error of corrected estimates.
+        'uncorrected_max_q_error',      # float, largest q-error of uncorrected estimates.
+        'corrected_max_q_error',        # float, largest q-error of corrected estimates.
+    ),
+)
+
+
+def _get_log_q_error(estimate, observed_cardinality):
+    """Return the logarithm of the q-error of an estimate."""
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    return abs(math.log((estimate + 1.0) / (observed_cardinality + 1.0)))
+    # pylint: enable=old-division
+
+
+def _get_subexpansion_edge_traversals(subexpansion_plans):
+    """Return the edge traversals of all subexpansions, including nested ones, in a list."""
+    edge_traversals = []
+    for subexpansion_plan in subexpansion_plans:
+        edge_traversals.append(subexpansion_plan.edge_traversal)
+        edge_traversals.extend(_get_subexpansion_edge_traversals(subexpansion_plan.child_plans))
+    return edge_traversals
+
+
+class CardinalityCorrections(object):
+    """Multiplicative corrections to cardinality estimates, learned from observed result sizes."""
+
+    def __init__(self, learning_rate=DEFAULT_LEARNING_RATE, decay_rate=DEFAULT_DECAY_RATE,
+                 max_adjustment=DEFAULT_MAX_ADJUSTMENT,
+                 max_logged_observations=DEFAULT_MAX_LOGGED_OBSERVATIONS,
+                 vertex_log_adjustments=None, edge_traversal_log_adjustments=None,
+                 observations=None):
+        """Create corrections, without any adjustments unless initial ones are given.
+
+        Args:
+            learning_rate: optional float in (0, 1], fraction of the (log) error of an estimate
+                           that is corrected after observing the actual cardinality.
+            decay_rate: optional float in [0, 1), fraction by which all (log) adjustments decay
+                        towards 1 whenever a new observation is recorded.
+            max_adjustment: optional float, at least 1. Each adjustment is between
+                            1 / max_adjustment and max_adjustment.
+            max_logged_observations: optional int, number of most recent observations that are
+                                     kept for the error report.
+            vertex_log_adjustments: optional dict, vertex name -> float, the initial logarithms
+                                    of the vertex adjustments.
+            edge_traversal_log_adjustments: optional dict, edge traversal tuple -> float, the
+                                            initial logarithms of the edge traversal adjustments.
+            observations: optional iterable of CardinalityObservation objects, the initially
+                          logged observations, oldest first.
+        """
+        if not 0 < learning_rate <= 1:
+            raise ValueError(u'Expected learning_rate to be in (0, 1], but got: {}'
+                             .format(learning_rate))
+        if not 0 <= decay_rate < 1:
+            raise ValueError(u'Expected decay_rate to be in [0, 1), but got: {}'
+                             .format(decay_rate))
+        if max_adjustment < 1:
+            raise ValueError(u'Expected max_adjustment to be at least 1, but got: {}'
+                             .format(max_adjustment))
+
+        self.learning_rate = learning_rate
+        self.decay_rate = decay_rate
+        self.max_adjustment = max_adjustment
+
+        # Adjustments are stored as logarithms, so that missing entries correspond to 0.
+        self._vertex_log_adjustments = dict()
+        if vertex_log_adjustments is not None:
+            self._vertex_log_adjustments.update(vertex_log_adjustments)
+        self._edge_traversal_log_adjustments = dict()
+        if edge_traversal_log_adjustments is not None:
+            self._edge_traversal_log_adjustments.update(edge_traversal_log_adjustments)
+        self._observations = deque(maxlen=max_logged_observations)
+        if observations is not None:
+            self._observations.extend(observations)
+
+    def get_vertex_adjustment(self, vertex_name):
+        """Return the factor by which counts of root vertices of the given class are multiplied."""
+        return math.exp(self._vertex_log_adjustments.get(vertex_name, 0.0))
+
+    def get_edge_traversal_adjustment(self, edge_traversal):
+        """Return the factor by which the children per parent of an edge traversal are multiplied.
+
+        Args:
+            edge_traversal: tuple, the edge_traversal of a SubexpansionEstimationPlan.
+
+        Returns:
+            float, the adjustment of the edge traversal.
+        """
+        return math.exp(self._edge_traversal_log_adjustments.get(edge_traversal, 0.0))
+
+    def _decay_adjustments(self):
+        """Move all adjustments towards 1, dropping the ones that are close enough to 1."""
+        for log_adjustments in (self._vertex_log_adjustments,
+                                self._edge_traversal_log_adjustments):
+            for key in list(log_adjustments):
+                log_adjustment = log_adjustments[key] * (1 - self.decay_rate)
+                if abs(log_adjustment) < _MIN_LOG_ADJUSTMENT:
+                    del log_adjustments[key]
+                else:
+                    log_adjustments[key] = log_adjustment
+
+    def _update_adjustment(self, log_adjustments, key, log_step):
+        """Add log_step to the logarithm of an adjustment, keeping it within the bounds."""
+        max_log_adjustment = math.log(self.max_adjustment)
+        log_adjustment = log_adjustments.get(key, 0.0) + log_step
+        log_adjustments[key] = max(-max_log_adjustment, min(max_log_adjustment, log_adjustment))
+
+    def record_observation(self, schema_info, plan, parameters, observed_cardinality):
+        """Learn from the actual number of result rows of an executed query.
+
+        Args:
+            schema_info: QueryPlanningSchemaInfo, the same one the plan was made with.
+            plan: CardinalityEstimationPlan namedtuple for the executed query, made without any
+                  corrections.
+            parameters: dict, parameters with which the query was executed.
+            observed_cardinality: int, number of result rows the query returned.
+
+        Returns:
+            CardinalityObservation namedtuple, with the estimates made before learning from it.
+        """
+        if observed_cardinality < 0:
+            raise ValueError(u'Expected observed_cardinality to be non-negative, but got: {}'
+                             .format(observed_cardinality))
+
+        uncorrected_estimate = estimate_query_result_cardinality_using_plan(
+            schema_info, plan, parameters)
+        corrected_estimate = estimate_query_result_cardinality_using_plan(
+            schema_info, correct_cardinality_estimation_plan(plan, self), parameters)
+        observation = CardinalityObservation(
+            uncorrected_estimate=uncorrected_estimate,
+            corrected_estimate=corrected_estimate,
+            observed_cardinality=observed_cardinality,
+        )
+        self._observations.append(observation)
+
+        self._decay_adjustments()
+
+        # Split the error evenly between the root vertex class and each edge traversal. An edge
+        # traversal used several times in the query is updated once per use, since its adjustment
+        # affects the estimate once per use.
+        edge_traversals = _get_subexpansion_edge_traversals(plan.child_plans)
+        # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+        # pylint: disable=old-division
+        log_error = math.log((observed_cardinality + 1.0) / (corrected_estimate + 1.0))
+        log_step = self.learning_rate * log_error / (1 + len(edge_traversals))
+        # pylint: enable=old-division
+
+        self._update_adjustment(self._vertex_log_adjustments, plan.root_location_name, log_step)
+        for edge_traversal in edge_traversals:
+            self._update_adjustment(self._edge_traversal_log_adjustments, edge_traversal, log_step)
+
+        return observation
+
+    def get_error_report(self):
+        """Return an EstimateErrorReport summarizing the errors of the logged observations."""
+        num_observations = len(self._observations)
+        if num_observations == 0:
+            return EstimateErrorReport(
+                num_observations=0,
+                uncorrected_mean_q_error=1.0,
+                corrected_mean_q_error=1.0,
+                uncorrected_max_q_error=1.0,
+                corrected_max_q_error=1.0,
+            )
+
+        uncorrected_log_q_errors = [
+            _get_log_q_error(observation.uncorrected_estimate, observation.observed_cardinality)
+            for observation in self._observations
+        ]
+        corrected_log_q_errors = [
+            _get_log_q_error(observation.corrected_estimate, observation.observed_cardinality)
+            for observation in self._observations
+        ]
+        # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+        # pylint: disable=old-division
+        return EstimateErrorReport(
+            num_observations=num_observations,
+            uncorrected_mean_q_error=math.exp(sum(uncorrected_log_q_errors) / num_observations),
+            corrected_mean_q_error=math.exp(sum(corrected_log_q_errors) / num_observations),
+            uncorrected_max_q_error=math.exp(max(uncorrected_log_q_errors)),
+            corrected_max_q_error=math.exp(max(corrected_log_q_errors)),
+        )
+        # pylint: enable=old-division
+
+    def save(self, file_path):
+        """Write the adjustments, settings and logged observations to a JSON file.
+
+        The corrections are only valid for the statistics they were learned with, so the file
+        should be stored alongside the statistics, and discarded when the statistics are refreshed.
+
+        Args:
+            file_path: str, path of the file to write. Existing files are overwritten.
+        """
+        corrections_data = {
+            'version': CARDINALITY_CORRECTIONS_FORMAT_VERSION,
+            'learning_rate': self.learning_rate,
+            'decay_rate': self.decay_rate,
+            'max_adjustment': self.max_adjustment,
+            'max_logged_observations': self._observations.maxlen,
+            'vertex_log_adjustments': [
+                [vertex_name, log_adjustment]
+                for vertex_name, log_adjustment in six.iteritems(self._vertex_log_adjustments)
+            ],
+            'edge_traversal_log_adjustments': [
+                [list(edge_traversal), log_adjustment]
+                for edge_traversal, log_adjustment in six.iteritems(
+                    self._edge_traversal_log_adjustments)
+            ],
+            'observations': [
+                list(observation)
+                for observation in self._observations
+            ],
+        }
+        with open(file_path, 'w') as corrections_file:
+            json.dump(corrections_data, corrections_file, sort_keys=True)
+
+    @classmethod
+    def load(cls, file_path):
+        """Return the CardinalityCorrections written to a file using save()."""
+        with open(file_path, 'r') as corrections_file:
+            corrections_data = json.load(corrections_file)
+
+        if corrections_data.get('version') != CARDINALITY_CORRECTIONS_FORMAT_VERSION:
+            raise ValueError(u'Cardinality corrections {} have unsupported version {}, expected '
+                             u'{}.'.format(file_path, corrections_data.get('version'),
+                                           CARDINALITY_CORRECTIONS_FORMAT_VERSION))
+
+        return cls(
+            learning_rate=corrections_data['learning_rate'],
+            decay_rate=corrections_data['decay_rate'],
+            max_adjustment=corrections_data['max_adjustment'],
+            max_logged_observations=corrections_data['max_logged_observations'],
+            vertex_log_adjustments={
+                vertex_name: log_adjustment
+                for vertex_name, log_adjustment in corrections_data['vertex_log_adjustments']
+            },
+            edge_traversal_log_adjustments={
+                tuple(edge_traversal): log_adjustment
+                for edge_traversal, log_adjustment in (
+                    corrections_data['edge_traversal_log_adjustments'])
+            },
+            observations=[
+                CardinalityObservation(*observation)
+                for observation in corrections_data['observations']
+            ],
+        )
@@ -1,12 +1,57 @@
 # Copyright 2019-present Kensho Technologies, LLC.
+from collections import namedtuple
 from itertools import chain
+import math
 
-from ..compiler.compiler_frontend import graphql_to_ir
+import six
+
+from ..compiler.compiler_frontend import ast_to_ir, graphql_to_ir
 from ..compiler.helpers import (
     INBOUND_EDGE_DIRECTION, OUTBOUND_EDGE_DIRECTION, FoldScopeLocation, Location,
     get_edge_direction_and_name
 )
-from .filter_selectivity_utils import adjust_counts_for_filters
+from .filter_selectivity_utils import (
+    adjust_counts_for_filters, adjust_counts_for_filters_for_parameter_batch
+)
+
+
+# SubexpansionEstimationPlan namedtuples contain the factors of the cardinality estimate of a
+# subexpansion that do not depend on the query parameters. A subexpansion consists of the result
+# sets found when a parent vertex is expanded via one of its child locations.
+SubexpansionEstimationPlan = namedtuple(
+    'SubexpansionEstimationPlan',
+    (
+        'location',                 # BaseLocation, the subexpansion's root location.
+        'location_name',            # str, type name of the subexpansion's root location.
+        'edge_traversal',           # tuple (outbound vertex class name, edge class name, inbound
+                                    # vertex class name, edge direction, recursion depth or None),
+                                    # identifying the edge traversal to the subexpansion's root.
+        'filter_infos',             # tuple of FilterInfo, filters at the subexpansion's root.
+        'children_per_parent',      # float, expected number of vertices at the subexpansion's
+                                    # root per parent vertex, not accounting for filters.
+        'has_at_least_one_result',  # bool, True if the subexpansion is optional or folded, so it
+                                    # produces at least one result set per parent vertex.
+        'degree_histogram',         # list or None, degree histogram of the parent vertices, used to
+                                    # estimate optional and folded subexpansions if available.
+        'child_plans',              # tuple of SubexpansionEstimationPlan, one for each child of the
+                                    # subexpansion's root location.
+    ),
+)
+
+# CardinalityEstimationPlan namedtuples contain the factors of the cardinality estimate of a query
+# that do not depend on the query parameters, and can be reused to estimate the query's cardinality
+# for any parameters.
+CardinalityEstimationPlan = namedtuple(
+    'CardinalityEstimationPlan',
+    (
+        'root_location',            # Location, the query's root location.
+        'root_location_name',       # str, type name of the query's root location.
+        'root_counts',              # int, count of vertices of the root location's type.
+        'root_filter_infos',        # tuple of FilterInfo, filters at the query's root location.
+        'child_plans',              # tuple of SubexpansionEstimationPlan, one for each child of
+                                    # the query's root location.
+    ),
+)
 
 
 def _is_subexpansion_optional(query_metadata, parent_location, child_location):
@@ -21,13 +66,13 @@ def _is_subexpansion_folded(location):
     return isinstance(location, FoldScopeLocation) and len(location.fold_path) == 1
 
 
-def _is_subexpansion_recursive(query_metadata, parent_location, child_location):
-    """Return True if child_location is the root of a recursive subexpansion."""
+def _get_subexpansion_recurse_info(query_metadata, parent_location, child_location):
+    """Return the RecurseInfo of a recursive subexpansion rooted at child_location, or None."""
     edge_direction, edge_name = _get_last_edge_direction_and_name_to_location(child_location)
     for recurse_info in query_metadata.get_recurse_infos(parent_location):
         if recurse_info.edge_direction == edge_direction and recurse_info.edge_name == edge_name:
-            return True
-    return False
+            return recurse_info
+    return None
 
 
 def _get_all_original_child_locations(query_metadata, start_location):
@@ -84,37 +129,27 @@ def _get_base_class_names_of_parent_and_child_from_edge(schema_graph, current_lo
     return parent_base_class_name, child_base_class_name
 
 
-def _query_statistics_for_vertex_edge_vertex_count(statistics, query_metadata,
-                                                   parent_location, child_location):
-    """Query statistics for the count of edges connecting parent and child_location vertices.
+def _get_edge_endpoint_vertex_names(query_metadata, parent_location, child_location):
+    """Return the classes of the vertices at each end of the edge from parent to child_location.
 
-    Given a parent location and a child location, there are three constraints on each edge directly
-    connecting the two:
-    1. The edge class must be the same as the target location's last traversed edge.
-    2. The parent_location vertex class must inherit from the edge endpoint the traversal began at.
-    3. The child_location vertex class must inherit from the edge endpoint the traversal ended at.
-    Using get_vertex_edge_vertex_count(), we find the number of edges satisfying these three
-    constraints.
+    Since statistics about edges expect the source vertex class and target vertex class in the same
+    order regardless of the direction of edge traversal, we first provide the class of the outbound
+    vertex (i.e. the vertex the edge starts from), then the class of the inbound vertex (i.e. the
+    vertex the edge ends at).
 
     Args:
-        statistics: Statistics object, used for querying over get_vertex_edge_vertex_count().
         query_metadata: QueryMetadataTable object.
         parent_location: BaseLocation, corresponding to the location the edge traversal begins from.
         child_location: BaseLocation, child of parent_location corresponding to the location the
                         edge traversal ends at.
 
     Returns:
-        - int, count of edges connecting parent and child_location vertices if the statistic exists.
-        - None otherwise.
+        tuple (outbound vertex class name, edge class name, inbound vertex class name)
     """
     edge_direction, edge_name = _get_last_edge_direction_and_name_to_location(child_location)
     parent_name_from_location = query_metadata.get_location_info(parent_location).type.name
     child_name_from_location = query_metadata.get_location_info(child_location).type.name
 
-    # Since we need to provide the source vertex class and target vertex class in the same order
-    # regardless of the direction of edge traversal, we first provide the class of the outbound
-    # vertex (i.e. the vertex the edge starts from), then the class of the inbound vertex(i.e. the
-    # vertex the edge ends at).
     if edge_direction == INBOUND_EDGE_DIRECTION:
         outbound_vertex_name = child_name_from_location
         inbound_vertex_name = parent_name_from_location
@@ -125,11 +160,138 @@ def _query_statistics_for_vertex_edge_vertex_count(statistics, query_metadata,
         raise AssertionError(u'Expected edge direction to be either inbound or outbound.'
                              u'Found: edge {} with direction {}'.format(edge_name, edge_direction))
 
+    return outbound_vertex_name, edge_name, inbound_vertex_name
+
+
+def _query_statistics_for_vertex_edge_vertex_count(statistics, query_metadata,
+                                                   parent_location, child_location):
+    """Query statistics for the count of edges connecting parent and child_location vertices.
+
+    Given a parent location and a child location, there are three constraints on each edge directly
+    connecting the two:
+    1. The edge class must be the same as the target location's last traversed edge.
+    2. The parent_location vertex class must inherit from the edge endpoint the traversal began at.
+    3. The child_location vertex class must inherit from the edge endpoint the traversal ended at.
+    Using get_vertex_edge_vertex_count(), we find the number of edges satisfying these three
+    constraints.
+
+    Args:
+        statistics: Statistics object, used for querying over get_vertex_edge_vertex_count().
+        query_metadata: QueryMetadataTable object.
+        parent_location: BaseLocation, corresponding to the location the edge traversal begins from.
+        child_location: BaseLocation, child of parent_location corresponding to the location the
+                        edge traversal ends at.
+
+    Returns:
+        - int, count of edges connecting parent and child_location vertices if the statistic exists.
+        - None otherwise.
+    """
+    outbound_vertex_name, edge_name, inbound_vertex_name = _get_edge_endpoint_vertex_names(
+        query_metadata, parent_location, child_location)
+
     query_result = statistics.get_vertex_edge_vertex_count(
         outbound_vertex_name, edge_name, inbound_vertex_name)
     return query_result
 
 
+def _query_statistics_for_parent_degree_histogram(statistics, query_metadata,
+                                                  parent_location, child_location):
+    """Query statistics for the distribution of edges to child_location vertices over parents.
+
+    Args:
+        statistics: Statistics object, used for querying over
+                    get_vertex_edge_vertex_degree_histogram().
+        query_metadata: QueryMetadataTable object.
+        parent_location: BaseLocation, corresponding to the location the edge traversal begins from.
+        child_location: BaseLocation, child of parent_location corresponding to the location the
+                        edge traversal ends at.
+
+    Returns:
+        - list of (smallest degree, largest degree, number of vertices) buckets, describing the
+          number of edges to child_location vertices each parent_location vertex has, if the
+          statistic exists.
+        - None otherwise.
+    """
+    edge_direction, _ = _get_last_edge_direction_and_name_to_location(child_location)
+    outbound_vertex_name, edge_name, inbound_vertex_name = _get_edge_endpoint_vertex_names(
+        query_metadata, parent_location, child_location)
+
+    # The parent vertex is the outbound vertex when traversing outbound edges, so its degree is
+    # the number of outbound edges it has, and vice versa.
+    query_result = statistics.get_vertex_edge_vertex_degree_histogram(
+        outbound_vertex_name, edge_name, inbound_vertex_name, edge_direction)
+    return query_result
+
+
+def _get_degree_histogram_vertex_and_edge_counts(degree_histogram):
+    """Return the number of vertices and the (estimated) number of edges in a degree histogram.
+
+    Within each bucket, degrees are assumed to be evenly distributed between the bucket's bounds.
+    """
+    vertex_counts = 0
+    edge_counts = 0.0
+    for min_degree, max_degree, bucket_vertex_counts in degree_histogram:
+        vertex_counts += bucket_vertex_counts
+        edge_counts += (min_degree + max_degree) / 2.0 * bucket_vertex_counts
+    return vertex_counts, edge_counts
+
+
+def _estimate_subexpansion_cardinality_with_at_least_one_result(
+        degree_histogram, subexpansion_cardinality):
+    """Estimate the mean over parents of max(1, subexpansion results) using a degree histogram.
+
+    The subexpansion of each parent vertex is estimated to produce a number of results proportional
+    to its degree, such that the mean over all parents is subexpansion_cardinality. Since optional
+    and folded subexpansions produce at least one result per parent, the parents with few or no
+    edges produce more results than their degree alone would suggest. Averaging over the uniform
+    distribution of edges hides this effect, since the average parent has some edges even if
+    most parents have none.
+
+    Args:
+        degree_histogram: list of (smallest degree, largest degree, number of vertices) buckets,
+                          describing the number of edges to the subexpansion root per parent.
+        subexpansion_cardinality: float, expected number of subexpansion results per parent, not
+                                  accounting for the subexpansion producing at least one result.
+
+    Returns:
+        float, expected number of subexpansion results per parent, where each parent produces at
+        least one result.
+    """
+    vertex_counts, edge_counts = _get_degree_histogram_vertex_and_edge_counts(degree_histogram)
+    if vertex_counts == 0 or edge_counts == 0 or subexpansion_cardinality == 0:
+        return 1.0
+
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    #
+    # The number of results per edge, such that a parent with degree d produces d * results_per_edge
+    # results. This also accounts for filters and type coercions at the subexpansion root.
+    results_per_edge = subexpansion_cardinality / (edge_counts / vertex_counts)
+    # Parents with a degree of at least min_degree_over_one produce more than one result each.
+    min_degree_over_one = int(math.ceil(1.0 / results_per_edge))
+
+    total_results = 0.0
+    for min_degree, max_degree, bucket_vertex_counts in degree_histogram:
+        bucket_size = max_degree - min_degree + 1
+
+        # Degrees below min_degree_over_one produce exactly one result.
+        min_degree_of_bucket_over_one = max(min_degree, min_degree_over_one)
+        degrees_with_one_result = max(0, min(max_degree + 1, min_degree_over_one) - min_degree)
+
+        # The remaining degrees produce degree * results_per_edge results each.
+        degrees_over_one = max(0, max_degree - min_degree_of_bucket_over_one + 1)
+        sum_of_degrees_over_one = (
+            (min_degree_of_bucket_over_one + max_degree) * degrees_over_one / 2.0)
+
+        mean_results_in_bucket = (
+            degrees_with_one_result + sum_of_degrees_over_one * results_per_edge
+        ) / bucket_size
+        total_results += mean_results_in_bucket * bucket_vertex_counts
+
+    return total_results / vertex_counts
+    # pylint: enable=old-division
+
+
 def _estimate_vertex_edge_vertex_count_using_class_count(
         schema_info, query_metadata, parent_location, child_location):
     """Estimate the count of edges connecting parent_location and child_location vertices.
@@ -182,74 +344,211 @@ def _estimate_vertex_edge_vertex_count_using_class_count(
     return edge_counts
 
 
-def _estimate_edges_to_children_per_parent(schema_info, query_metadata, parameters,
+def _query_statistics_for_recursive_traversal_vertex_count(statistics, query_metadata,
+                                                           parent_location, child_location, depth):
+    """Query statistics for the number of vertices reached by recursing from a parent vertex.
+
+    Args:
+        statistics: Statistics object, used for querying over
+                    get_recursive_traversal_vertex_count().
+        query_metadata: QueryMetadataTable object.
+        parent_location: BaseLocation, corresponding to the location the recursion begins from.
+        child_location: BaseLocation, child of parent_location corresponding to the root of the
+                        recursive subexpansion.
+        depth: int, maximum depth of the recursion.
+
+    Returns:
+        - float, mean number of vertices reached per parent_location vertex, if the statistic
+          exists.
+        - None otherwise.
+    """
+    edge_direction, _ = _get_last_edge_direction_and_name_to_location(child_location)
+    outbound_vertex_name, edge_name, inbound_vertex_name = _get_edge_endpoint_vertex_names(
+        query_metadata, parent_location, child_location)
+
+    query_result = statistics.get_recursive_traversal_vertex_count(
+        outbound_vertex_name, edge_name, inbound_vertex_name, edge_direction, depth)
+    return query_result
+
+
+def _estimate_recursive_vertex_counts_per_parent(schema_info, query_metadata, parent_location,
+                                                 child_location, depth, edges_per_vertex):
+    """Estimate the number of vertices reached per parent_location vertex by a recursion.
+
+    Recursion always starts with depth = 0, so the parent vertex itself is reached, followed by the
+    vertices reached at each depth up to the recursion's depth. If the
+    recursive_traversal_vertex_count statistic is not available, each vertex is assumed to have
+    edges_per_vertex edges to vertices that have not been reached yet, so the number of vertices
+    reached is the geometric sum (1 + b + b^2 + ... + b^depth) for b = edges_per_vertex.
+
+    Since each vertex is reached at most once, the estimate is at most the number of
+    child_location vertices, plus one for the parent vertex. This bounds the estimate when the
+    edges form cycles, in which case the geometric sum grows much faster than the number of
+    vertices actually reached.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: QueryMetadataTable object.
+        parent_location: BaseLocation, corresponding to the location the recursion begins from.
+        child_location: BaseLocation, child of parent_location corresponding to the root of the
+                        recursive subexpansion.
+        depth: int, maximum depth of the recursion.
+        edges_per_vertex: float, expected number of edges per parent_location vertex that connect
+                          to child_location vertices.
+
+    Returns:
+        float, expected number of vertices reached per parent_location vertex, including itself.
+    """
+    recursive_vertex_counts = _query_statistics_for_recursive_traversal_vertex_count(
+        schema_info.statistics, query_metadata, parent_location, child_location, depth)
+    if recursive_vertex_counts is not None:
+        return float(recursive_vertex_counts)
+
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    if edges_per_vertex == 1:
+        recursive_vertex_counts = float(depth + 1)
+    else:
+        recursive_vertex_counts = (edges_per_vertex ** (depth + 1) - 1) / (edges_per_vertex - 1)
+    # pylint: enable=old-division
+
+    child_name_from_location = query_metadata.get_location_info(child_location).type.name
+    max_recursive_vertex_counts = 1 + schema_info.statistics.get_class_count(
+        child_name_from_location)
+    return min(recursive_vertex_counts, float(max_recursive_vertex_counts))
+
+
+def _estimate_edges_to_children_per_parent(schema_info, query_metadata,
                                            parent_location, child_location):
     """Estimate the count of edges per parent_location that connect to child_location vertices.
 
-    Given a parent location of type A and child location of type B, assume all AB edges are
-    distributed evenly over A vertices, so the expected number of child edges per parent vertex is
-    (number of AB edges) / (number of A vertices).
+    Given a parent location of type A and child location of type B, the expected number of child
+    edges per parent vertex is (number of AB edges) / (number of A vertices). The number of AB edges
+    is taken from the vertex_edge_vertex_count statistic, or from the degree histogram of A vertices
+    if only that is available, or otherwise estimated using class counts. If the edge is recursed
+    over, the expected number of vertices reached by the recursion is estimated instead.
+
+    Filters at child_location are not taken into account, since their selectivity depends on the
+    query parameters.
 
     Args:
         schema_info: QueryPlanningSchemaInfo
         query_metadata: QueryMetadataTable object.
-        parameters: dict, parameters with which query will be executed.
         parent_location: BaseLocation, corresponding to the location the edge traversal begins from.
         child_location: BaseLocation, child of parent_location corresponding to the location the
                         edge traversal ends at.
 
     Returns:
         float, expected number of edges per parent_location vertex that connect to child_location
-        vertices.
+        vertices, or the expected number of vertices reached per parent_location vertex if the
+        edge is recursed over.
     """
     edge_counts = _query_statistics_for_vertex_edge_vertex_count(
         schema_info.statistics, query_metadata, parent_location, child_location
     )
 
+    if edge_counts is None:
+        degree_histogram = _query_statistics_for_parent_degree_histogram(
+            schema_info.statistics, query_metadata, parent_location, child_location
+        )
+        if degree_histogram is not None:
+            _, edge_counts = _get_degree_histogram_vertex_and_edge_counts(degree_histogram)
+
     if edge_counts is None:
         edge_counts = _estimate_vertex_edge_vertex_count_using_class_count(
             schema_info, query_metadata, parent_location, child_location)
 
     parent_name_from_location = query_metadata.get_location_info(parent_location).type.name
-    # Count the number of parents, over which we assume the edges are uniformly distributed.
     parent_location_counts = schema_info.statistics.get_class_count(parent_name_from_location)
 
     # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
     # pylint: disable=old-division
     #
-    # TODO(evan): edges are not necessarily uniformly distributed, so record more statistics
+    # The mean number of edges per parent does not depend on how the edges are distributed over
+    # the parents, so the degree histogram is only needed for optional and folded subexpansions.
     child_counts_per_parent = float(edge_counts) / parent_location_counts
     # pylint: enable=old-division
 
-    # TODO(evan): If edge is recursed over, we need a more detailed statistic
-    # Recursion always starts with depth = 0, so we should treat the parent result set itself as a
-    # child result set to be expanded (so add 1 to child_counts).
-    is_recursive = _is_subexpansion_recursive(query_metadata, parent_location, child_location)
-    if is_recursive:
-        child_counts_per_parent += 1
-
-    # Adjust the counts for filters at child_location.
-    child_name_from_location = query_metadata.get_location_info(child_location).type.name
-    child_filters = query_metadata.get_filter_infos(child_location)
-    child_counts_per_parent = adjust_counts_for_filters(
-        schema_info, child_filters, parameters, child_name_from_location,
-        child_counts_per_parent)
+    recurse_info = _get_subexpansion_recurse_info(query_metadata, parent_location, child_location)
+    if recurse_info is not None:
+        child_counts_per_parent = _estimate_recursive_vertex_counts_per_parent(
+            schema_info, query_metadata, parent_location, child_location, recurse_info.depth,
+            child_counts_per_parent)
 
     return child_counts_per_parent
 
 
-def _estimate_subexpansion_cardinality(schema_info, query_metadata, parameters,
+def _make_subexpansion_estimation_plan(schema_info, query_metadata,
                                        parent_location, child_location):
-    """Estimate the cardinality associated with the subexpansion of a child_location vertex.
+    """Return a SubexpansionEstimationPlan for the subexpansion of a child_location vertex.
 
     Args:
         schema_info: QueryPlanningSchemaInfo
         query_metadata: QueryMetadataTable object
-        parameters: dict, parameters with which query will be executed
         parent_location: BaseLocation object, location corresponding to the vertex being expanded
         child_location: BaseLocation object, child of parent_location corresponding to the
                         subexpansion root
 
+    Returns:
+        SubexpansionEstimationPlan namedtuple, with all parameter-independent factors of the
+        subexpansion's cardinality estimate.
+    """
+    children_per_parent = _estimate_edges_to_children_per_parent(
+        schema_info, query_metadata, parent_location, child_location)
+
+    # If child_location is the root of an optional or folded subexpansion, the empty result set will
+    # be returned if no other result sets exist, so there is at least 1 result per parent vertex.
+    # TODO(evan): @filters on _x_count inside @folds can reduce result size.
+    is_optional = _is_subexpansion_optional(query_metadata, parent_location, child_location)
+    is_folded = _is_subexpansion_folded(child_location)
+    has_at_least_one_result = is_optional or is_folded
+
+    recurse_info = _get_subexpansion_recurse_info(query_metadata, parent_location, child_location)
+
+    degree_histogram = None
+    if has_at_least_one_result and recurse_info is None:
+        degree_histogram = _query_statistics_for_parent_degree_histogram(
+            schema_info.statistics, query_metadata, parent_location, child_location
+        )
+
+    edge_direction, _ = _get_last_edge_direction_and_name_to_location(child_location)
+    outbound_vertex_name, edge_name, inbound_vertex_name = _get_edge_endpoint_vertex_names(
+        query_metadata, parent_location, child_location)
+    recursion_depth = None if recurse_info is None else recurse_info.depth
+    edge_traversal = (
+        outbound_vertex_name, edge_name, inbound_vertex_name, edge_direction, recursion_depth
+    )
+
+    return SubexpansionEstimationPlan(
+        location=child_location,
+        location_name=query_metadata.get_location_info(child_location).type.name,
+        edge_traversal=edge_traversal,
+        filter_infos=tuple(query_metadata.get_filter_infos(child_location)),
+        children_per_parent=children_per_parent,
+        has_at_least_one_result=has_at_least_one_result,
+        degree_histogram=degree_histogram,
+        child_plans=_make_expansion_estimation_plans(schema_info, query_metadata, child_location),
+    )
+
+
+def _make_expansion_estimation_plans(schema_info, query_metadata, current_location):
+    """Return a tuple of SubexpansionEstimationPlans, one for each child of current_location."""
+    return tuple(
+        _make_subexpansion_estimation_plan(
+            schema_info, query_metadata, current_location, child_location)
+        for child_location in _get_all_original_child_locations(query_metadata, current_location)
+    )
+
+
+def _estimate_subexpansion_cardinality(schema_info, parameters, subexpansion_plan):
+    """Estimate the cardinality associated with the subexpansion of a child_location vertex.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        parameters: dict, parameters with which query will be executed
+        subexpansion_plan: SubexpansionEstimationPlan namedtuple, describing the subexpansion rooted
+                           at a child_location of a parent_location
+
     Returns:
         float, number of expected result sets found when a vertex corresponding to parent_location
         is expanded via child_location. For example, if parent_location (type A) has children (types
@@ -258,49 +557,339 @@ def _estimate_subexpansion_cardinality(schema_info, query_metadata, parameters,
         estimate this recursively as:
         (expected number of B-vertices) * (expected number of result sets per B-vertex).
     """
-    child_counts_per_parent = _estimate_edges_to_children_per_parent(
-        schema_info, query_metadata, parameters, parent_location, child_location)
+    # Adjust the counts for filters at child_location.
+    child_counts_per_parent = adjust_counts_for_filters(
+        schema_info, subexpansion_plan.filter_infos, parameters, subexpansion_plan.location_name,
+        subexpansion_plan.children_per_parent)
 
     results_per_child = _estimate_expansion_cardinality(
-        schema_info, query_metadata, parameters, child_location)
+        schema_info, parameters, subexpansion_plan.child_plans)
 
     subexpansion_cardinality = child_counts_per_parent * results_per_child
 
-    # If child_location is the root of an optional or folded subexpansion, the empty result set will
-    # be returned if no other result sets exist, so return at least 1.
-    # TODO(evan): @filters on _x_count inside @folds can reduce result size.
-    is_optional = _is_subexpansion_optional(query_metadata, parent_location, child_location)
-    is_folded = _is_subexpansion_folded(child_location)
-    if is_optional or is_folded:
-        subexpansion_cardinality = max(subexpansion_cardinality, 1)
+    return _adjust_subexpansion_cardinality_for_at_least_one_result(
+        subexpansion_plan, subexpansion_cardinality)
+
+
+def _adjust_subexpansion_cardinality_for_at_least_one_result(subexpansion_plan,
+                                                             subexpansion_cardinality):
+    """Return the subexpansion cardinality, accounting for subexpansions with at least one result.
+
+    Args:
+        subexpansion_plan: SubexpansionEstimationPlan namedtuple, describing the subexpansion rooted
+                           at a child_location of a parent_location
+        subexpansion_cardinality: float, expected number of subexpansion results per parent vertex,
+                                  assuming that parent vertices without subexpansion results
+                                  produce no results.
+
+    Returns:
+        float, expected number of subexpansion results per parent vertex.
+    """
+    if subexpansion_plan.has_at_least_one_result:
+        if subexpansion_plan.degree_histogram is not None:
+            # Each parent vertex returns at least 1 result, so the expected number of results per
+            # parent depends on how many parents have few or no children.
+            subexpansion_cardinality = _estimate_subexpansion_cardinality_with_at_least_one_result(
+                subexpansion_plan.degree_histogram, subexpansion_cardinality)
+        else:
+            subexpansion_cardinality = max(subexpansion_cardinality, 1)
 
     return subexpansion_cardinality
 
 
-def _estimate_expansion_cardinality(schema_info, query_metadata, parameters, current_location):
-    """Estimate the cardinality of fully expanding a vertex corresponding to current_location.
+def estimate_subexpansion_root_counts_per_parent(schema_info, subexpansion_plan, parameters):
+    """Estimate the number of result sets per parent vertex at the root of a subexpansion.
+
+    Unlike the subexpansion cardinality, this only counts the vertices at the subexpansion's root
+    location that pass its filters, without expanding them any further. Optional and folded
+    subexpansions produce at least one result set per parent vertex, even without any such
+    vertices.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo, the same one the plan was made with.
+        subexpansion_plan: SubexpansionEstimationPlan namedtuple, describing the subexpansion rooted
+                           at a child_location of a parent_location
+        parameters: dict, parameters with which query will be executed
+
+    Returns:
+        float, expected number of result sets at the subexpansion's root location per parent vertex.
+    """
+    child_counts_per_parent = adjust_counts_for_filters(
+        schema_info, subexpansion_plan.filter_infos, parameters, subexpansion_plan.location_name,
+        subexpansion_plan.children_per_parent)
+    return _adjust_subexpansion_cardinality_for_at_least_one_result(
+        subexpansion_plan, child_counts_per_parent)
+
+
+def _estimate_expansion_cardinality(schema_info, parameters, child_plans):
+    """Estimate the cardinality of fully expanding a vertex corresponding to a location.
 
     Args:
         schema_info: QueryPlanningSchemaInfo
-        query_metadata: QueryMetadataTable object
         parameters: dict, parameters with which query will be executed
-        current_location: BaseLocation object, corresponding to the vertex we're expanding
+        child_plans: tuple of SubexpansionEstimationPlans, one for each child of the location
+                     corresponding to the vertex we're expanding
 
     Returns:
         float, expected cardinality associated with the full expansion of one current vertex.
     """
     expansion_cardinality = 1
-    child_locations = _get_all_original_child_locations(query_metadata, current_location)
-    for child_location in child_locations:
+    for subexpansion_plan in child_plans:
         # The expected cardinality per current vertex is the product of the expected cardinality for
         # each subexpansion (e.g. If we expect each current vertex to have 2 children of type A and
         # 3 children of type B, we'll return 6 distinct result sets per current vertex).
         subexpansion_cardinality = _estimate_subexpansion_cardinality(
-            schema_info, query_metadata, parameters, current_location, child_location)
+            schema_info, parameters, subexpansion_plan)
         expansion_cardinality *= subexpansion_cardinality
     return expansion_cardinality
 
 
+def make_cardinality_estimation_plan(schema_info, query_metadata):
+    """Return a CardinalityEstimationPlan, reusable for estimating a query with any parameters.
+
+    The plan contains all factors of the cardinality estimate that do not depend on the values of
+    the query parameters, i.e. everything except for filter selectivities. Estimating the
+    cardinality using a plan is therefore much faster than estimating it from scratch, so a plan
+    should be made once per query, and then reused for each set of parameters.
+
+    The plan is only valid as long as the schema_info and its statistics do not change.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: QueryMetadataTable object, the query_metadata_table of the IrAndMetadata
+                        for the query being estimated.
+
+    Returns:
+        CardinalityEstimationPlan namedtuple
+    """
+    root_location = query_metadata.root_location
+    root_name = query_metadata.get_location_info(root_location).type.name
+    return CardinalityEstimationPlan(
+        root_location=root_location,
+        root_location_name=root_name,
+        root_counts=schema_info.statistics.get_class_count(root_name),
+        root_filter_infos=tuple(query_metadata.get_filter_infos(root_location)),
+        child_plans=_make_expansion_estimation_plans(schema_info, query_metadata, root_location),
+    )
+
+
+def _correct_subexpansion_estimation_plan(subexpansion_plan, cardinality_corrections):
+    """Return a SubexpansionEstimationPlan with corrections applied to it and its child plans."""
+    adjustment = cardinality_corrections.get_edge_traversal_adjustment(
+        subexpansion_plan.edge_traversal)
+    return subexpansion_plan._replace(
+        children_per_parent=subexpansion_plan.children_per_parent * adjustment,
+        child_plans=tuple(
+            _correct_subexpansion_estimation_plan(child_plan, cardinality_corrections)
+            for child_plan in subexpansion_plan.child_plans
+        ),
+    )
+
+
+def correct_cardinality_estimation_plan(plan, cardinality_corrections):
+    """Return a CardinalityEstimationPlan with learned multiplicative corrections applied to it.
+
+    The count of root vertices is multiplied by the adjustment of the root vertex class, and the
+    number of children per parent of each subexpansion is multiplied by the adjustment of its
+    edge traversal. The corrected plan can be used like any other plan, e.g. with
+    estimate_query_result_cardinality_using_plan().
+
+    Args:
+        plan: CardinalityEstimationPlan namedtuple, made without any corrections.
+        cardinality_corrections: CardinalityCorrections object, whose adjustments are applied.
+
+    Returns:
+        CardinalityEstimationPlan namedtuple
+    """
+    adjustment = cardinality_corrections.get_vertex_adjustment(plan.root_location_name)
+    return plan._replace(
+        root_counts=plan.root_counts * adjustment,
+        child_plans=tuple(
+            _correct_subexpansion_estimation_plan(child_plan, cardinality_corrections)
+            for child_plan in plan.child_plans
+        ),
+    )
+
+
+def estimate_query_result_cardinality_using_plan(schema_info, plan, parameters):
+    """Estimate the cardinality of a query's result, given the query's CardinalityEstimationPlan.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo, the same one the plan was made with.
+        plan: CardinalityEstimationPlan namedtuple for the query being estimated.
+        parameters: dict, parameters with which query will be executed.
+
+    Returns:
+        float, expected query result cardinality. Equal to the number of root vertices multiplied by
+        the expected number of result sets per full expansion of a root vertex.
+    """
+    # First, count the vertices corresponding to the root location that pass relevant filters
+    root_counts = adjust_counts_for_filters(
+        schema_info, plan.root_filter_infos, parameters, plan.root_location_name, plan.root_counts)
+
+    # Next, find the number of expected result sets per root vertex when fully expanded
+    results_per_root = _estimate_expansion_cardinality(schema_info, parameters, plan.child_plans)
+
+    expected_query_result_cardinality = root_counts * results_per_root
+
+    return expected_query_result_cardinality
+
+
+def _estimate_subexpansion_cardinality_for_parameter_batch(
+        schema_info, parameter_columns, subexpansion_plan, batch_size):
+    """Estimate the cardinality of a subexpansion for each set of parameters in a batch.
+
+    See _estimate_subexpansion_cardinality() for details.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        parameter_columns: dict, parameter name -> sequence of that parameter's values, one for
+                           each set of parameters in the batch.
+        subexpansion_plan: SubexpansionEstimationPlan namedtuple, describing the subexpansion rooted
+                           at a child_location of a parent_location
+        batch_size: int, number of sets of parameters in the batch.
+
+    Returns:
+        list of floats, number of expected result sets found when a vertex corresponding to
+        parent_location is expanded via child_location, for each set of parameters.
+    """
+    child_counts_per_parent_batch = adjust_counts_for_filters_for_parameter_batch(
+        schema_info, subexpansion_plan.filter_infos, parameter_columns,
+        subexpansion_plan.location_name, subexpansion_plan.children_per_parent, batch_size)
+
+    results_per_child_batch = _estimate_expansion_cardinality_for_parameter_batch(
+        schema_info, parameter_columns, subexpansion_plan.child_plans, batch_size)
+
+    subexpansion_cardinalities = [
+        child_counts_per_parent * results_per_child
+        for child_counts_per_parent, results_per_child in zip(
+            child_counts_per_parent_batch, results_per_child_batch)
+    ]
+
+    if subexpansion_plan.has_at_least_one_result:
+        subexpansion_cardinalities = [
+            _adjust_subexpansion_cardinality_for_at_least_one_result(
+                subexpansion_plan, subexpansion_cardinality)
+            for subexpansion_cardinality in subexpansion_cardinalities
+        ]
+
+    return subexpansion_cardinalities
+
+
+def _estimate_expansion_cardinality_for_parameter_batch(
+        schema_info, parameter_columns, child_plans, batch_size):
+    """Estimate the cardinality of fully expanding a vertex for each set of parameters in a batch.
+
+    See _estimate_expansion_cardinality() for details.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        parameter_columns: dict, parameter name -> sequence of that parameter's values, one for
+                           each set of parameters in the batch.
+        child_plans: tuple of SubexpansionEstimationPlans, one for each child of the location
+                     corresponding to the vertex we're expanding
+        batch_size: int, number of sets of parameters in the batch.
+
+    Returns:
+        list of floats, expected cardinality associated with the full expansion of one current
+        vertex, for each set of parameters.
+    """
+    expansion_cardinalities = [1] * batch_size
+    for subexpansion_plan in child_plans:
+        subexpansion_cardinalities = _estimate_subexpansion_cardinality_for_parameter_batch(
+            schema_info, parameter_columns, subexpansion_plan, batch_size)
+        expansion_cardinalities = [
+            expansion_cardinality * subexpansion_cardinality
+            for expansion_cardinality, subexpansion_cardinality in zip(
+                expansion_cardinalities, subexpansion_cardinalities)
+        ]
+    return expansion_cardinalities
+
+
+def estimate_query_result_cardinalities_for_parameter_batch(schema_info, plan, parameter_columns):
+    """Estimate the cardinality of a query's result for each set of parameters in a batch.
+
+    This is equivalent to calling estimate_query_result_cardinality_using_plan() once for each set
+    of parameters, but work that does not depend on the parameter values, like looking up field
+    types and statistics for each filter, is only done once for the whole batch.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo, the same one the plan was made with.
+        plan: CardinalityEstimationPlan namedtuple for the query being estimated.
+        parameter_columns: dict, parameter name -> sequence of that parameter's values, one for
+                           each set of parameters in the batch. All sequences must have the same
+                           length, and there must be at least one parameter.
+
+    Returns:
+        list of floats, the expected query result cardinality for each set of parameters, in the
+        order in which they are given in parameter_columns.
+
+    Raises:
+        ValueError if parameter_columns is empty, or its sequences differ in length.
+    """
+    batch_sizes = set(len(column) for column in six.itervalues(parameter_columns))
+    if len(batch_sizes) != 1:
+        raise ValueError(u'Expected a non-empty dict of equally-long parameter columns, but got '
+                         u'columns of lengths {}: {}'
+                         .format({
+                             parameter_name: len(column)
+                             for parameter_name, column in six.iteritems(parameter_columns)
+                         }, plan))
+    batch_size = batch_sizes.pop()
+
+    root_counts_batch = adjust_counts_for_filters_for_parameter_batch(
+        schema_info, plan.root_filter_infos, parameter_columns, plan.root_location_name,
+        plan.root_counts, batch_size)
+
+    results_per_root_batch = _estimate_expansion_cardinality_for_parameter_batch(
+        schema_info, parameter_columns, plan.child_plans, batch_size)
+
+    return [
+        root_counts * results_per_root
+        for root_counts, results_per_root in zip(root_counts_batch, results_per_root_batch)
+    ]
+
+
+def estimate_query_result_cardinality_from_query_metadata(schema_info, query_metadata, parameters):
+    """Estimate the cardinality of a compiled GraphQL query's result using database statistics.
+
+    Use this function instead of estimate_query_result_cardinality() if the query has already been
+    compiled. When estimating the same query with many different parameters, use
+    make_cardinality_estimation_plan() and estimate_query_result_cardinality_using_plan() instead.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: QueryMetadataTable object, the query_metadata_table of the IrAndMetadata
+                        for the query being estimated.
+        parameters: dict, parameters with which query will be executed.
+
+    Returns:
+        float, expected query result cardinality. Equal to the number of root vertices multiplied by
+        the expected number of result sets per full expansion of a root vertex.
+    """
+    plan = make_cardinality_estimation_plan(schema_info, query_metadata)
+    return estimate_query_result_cardinality_using_plan(schema_info, plan, parameters)
+
+
+def estimate_query_result_cardinality_from_ast(schema_info, query_ast, parameters):
+    """Estimate the cardinality of a GraphQL query's result, given the query's AST.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_ast: Document, AST of a valid GraphQL query
+        parameters: dict, parameters with which query will be executed.
+
+    Returns:
+        float, expected query result cardinality. Equal to the number of root vertices multiplied by
+        the expected number of result sets per full expansion of a root vertex.
+    """
+    query_metadata = ast_to_ir(
+        schema_info.schema, query_ast, type_equivalence_hints=schema_info.type_equivalence_hints
+    ).query_metadata_table
+    return estimate_query_result_cardinality_from_query_metadata(
+        schema_info, query_metadata, parameters)
+
+
 def estimate_query_result_cardinality(schema_info, graphql_query, parameters):
     """Estimate the cardinality of a GraphQL query's result using database statistics.
 
@@ -316,23 +905,47 @@ def estimate_query_result_cardinality(schema_info, graphql_query, parameters):
     query_metadata = graphql_to_ir(
         schema_info.schema, graphql_query, type_equivalence_hints=schema_info.type_equivalence_hints
     ).query_metadata_table
+    return estimate_query_result_cardinality_from_query_metadata(
+        schema_info, query_metadata, parameters)
 
-    root_location = query_metadata.root_location
 
-    # First, count the vertices corresponding to the root location that pass relevant filters
-    root_name = query_metadata.get_location_info(root_location).type.name
-    root_counts = schema_info.statistics.get_class_count(root_name)
-    root_counts = adjust_counts_for_filters(
-        schema_info, query_metadata.get_filter_infos(root_location), parameters,
-        root_name, root_counts)
+def estimate_number_of_pages_from_query_metadata(schema_info, query_metadata, params, page_size):
+    """Estimate how many pages of results will be generated for a given compiled query.
 
-    # Next, find the number of expected result sets per root vertex when fully expanded
-    results_per_root = _estimate_expansion_cardinality(
-        schema_info, query_metadata, parameters, root_location)
+    See estimate_number_of_pages() for details. Use this function instead if the query has already
+    been compiled, e.g. when the compiled query is also used for paginating the query.
 
-    expected_query_result_cardinality = root_counts * results_per_root
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: QueryMetadataTable object, the query_metadata_table of the IrAndMetadata
+                        for the query being estimated.
+        params: dict, parameters for the given query.
+        page_size: int, desired number of result rows per page.
 
-    return expected_query_result_cardinality
+    Returns:
+        int, estimated number of pages if the query were executed.
+
+    Raises:
+        ValueError if page_size is below 1.
+    """
+    if page_size < 1:
+        raise ValueError(u'Could not estimate number of pages for query {}'
+                         u' with page size lower than 1: {} {}'
+                         .format(query_metadata, page_size, params))
+
+    result_size = estimate_query_result_cardinality_from_query_metadata(
+        schema_info, query_metadata, params)
+    if result_size < 0.0:
+        raise AssertionError(u'Received negative estimate {} for cardinality of query {}: {}'
+                             .format(result_size, query_metadata, params))
+
+    # Since using a // b returns the fraction rounded down, we instead use (a + b - 1) // b, which
+    # returns the fraction value rounded up, which is the desired functionality.
+    num_pages = int((result_size + page_size - 1) // page_size)
+    if num_pages == 0:
+        num_pages = 1
+
+    return num_pages
 
 
 def estimate_number_of_pages(schema_info, graphql_query, params, page_size):
@@ -362,15 +975,8 @@ def estimate_number_of_pages(schema_info, graphql_query, params, page_size):
                          u' with page size lower than 1: {} {}'
                          .format(graphql_query, page_size, params))
 
-    result_size = estimate_query_result_cardinality(schema_info, graphql_query, params)
-    if result_size < 0.0:
-        raise AssertionError(u'Received negative estimate {} for cardinality of query {}: {}'
-                             .format(result_size, graphql_query, params))
-
-    # Since using a // b returns the fraction rounded down, we instead use (a + b - 1) // b, which
-    # returns the fraction value rounded up, which is the desired functionality.
-    num_pages = int((result_size + page_size - 1) // page_size)
-    if num_pages == 0:
-        num_pages = 1
-
-    return num_pages
+    query_metadata = graphql_to_ir(
+        schema_info.schema, graphql_query, type_equivalence_hints=schema_info.type_equivalence_hints
+    ).query_metadata_table
+    return estimate_number_of_pages_from_query_metadata(
+        schema_info, query_metadata, params, page_size)
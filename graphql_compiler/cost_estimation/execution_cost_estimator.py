@@ -0,0 +1,245 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+from collections import namedtuple
+
+from ..compiler.common import CYPHER_LANGUAGE, GREMLIN_LANGUAGE, MATCH_LANGUAGE, SQL_LANGUAGE
+from ..compiler.compiler_frontend import graphql_to_ir
+from .cardinality_estimator import (
+    estimate_query_result_cardinality_using_plan, estimate_subexpansion_root_counts_per_parent,
+    make_cardinality_estimation_plan
+)
+from .filter_selectivity_utils import adjust_counts_for_filters
+
+
+# ExecutionCostWeights namedtuples contain the relative cost of each operation performed by a
+# backend while executing a query. Only the ratios between the weights are meaningful.
+ExecutionCostWeights = namedtuple(
+    'ExecutionCostWeights',
+    (
+        'scanned_vertex_cost',      # float, cost of reading one vertex while scanning all vertices
+                                    # of a type, e.g. for a root location without usable indexes.
+        'index_lookup_cost',        # float, cost of finding one vertex using an index.
+        'traversed_edge_cost',      # float, cost of traversing one edge, or equivalently, of
+                                    # producing one row of a join.
+        'result_row_cost',          # float, cost of producing and returning one result row.
+    ),
+)
+
+# Default weights for each backend. Graph databases follow edges using direct links between
+# vertices, so traversals are cheap compared to relational databases, which join rows using indexes
+# or hash tables. On the other hand, relational databases scan tables faster than graph databases
+# iterate over vertices.
+DEFAULT_EXECUTION_COST_WEIGHTS = {
+    MATCH_LANGUAGE: ExecutionCostWeights(
+        scanned_vertex_cost=1.0, index_lookup_cost=2.0, traversed_edge_cost=1.0,
+        result_row_cost=1.0),
+    GREMLIN_LANGUAGE: ExecutionCostWeights(
+        scanned_vertex_cost=1.0, index_lookup_cost=2.0, traversed_edge_cost=1.0,
+        result_row_cost=1.0),
+    CYPHER_LANGUAGE: ExecutionCostWeights(
+        scanned_vertex_cost=1.0, index_lookup_cost=2.0, traversed_edge_cost=0.5,
+        result_row_cost=1.0),
+    SQL_LANGUAGE: ExecutionCostWeights(
+        scanned_vertex_cost=0.2, index_lookup_cost=3.0, traversed_edge_cost=2.0,
+        result_row_cost=1.0),
+}
+
+# Filter operations whose matching vertices can be found using an index on the filtered fields.
+INDEXABLE_FILTER_OPERATIONS = frozenset({'=', 'in_collection'})
+
+# LocationExecutionCost namedtuples describe the work done at one location of a query.
+LocationExecutionCost = namedtuple(
+    'LocationExecutionCost',
+    (
+        'location',                 # BaseLocation, the location whose work is described.
+        'location_name',            # str, type name of the location.
+        'intermediate_tuples',      # float, expected number of vertices read at the location,
+                                    # before the location's filters are applied.
+        'result_sets',              # float, expected number of result sets at the location, after
+                                    # the location's filters are applied.
+        'index',                    # IndexDefinition or None, the unique index used to find the
+                                    # location's vertices, if any.
+        'cost',                     # float, weighted cost of the work done at the location.
+    ),
+)
+
+# QueryExecutionCost namedtuples describe the estimated execution cost of a whole query.
+QueryExecutionCost = namedtuple(
+    'QueryExecutionCost',
+    (
+        'location_costs',           # tuple of LocationExecutionCost, one for each location of the
+                                    # query, in the order the query's locations are expanded.
+        'result_cardinality',       # float, expected number of result rows.
+        'total_cost',               # float, sum of the location costs and the cost of returning
+                                    # the result rows.
+    ),
+)
+
+
+def _get_unique_index_for_filters(schema_info, location_name, filter_infos):
+    """Return a unique index that can be used to find the vertices passing the filters, or None.
+
+    A unique index can be used if one of the filters is an equality or in_collection filter over
+    exactly the index's fields. If several unique indexes can be used, the one whose name is first
+    in alphabetical order is returned, so that the result is deterministic.
+    """
+    unique_indexes = schema_info.schema_graph.get_unique_indexes_for_class(location_name)
+    usable_indexes = [
+        unique_index
+        for unique_index in unique_indexes
+        for filter_info in filter_infos
+        if (filter_info.op_name in INDEXABLE_FILTER_OPERATIONS and
+            frozenset(filter_info.fields) == unique_index.fields)
+    ]
+    if not usable_indexes:
+        return None
+    return min(usable_indexes, key=lambda unique_index: unique_index.name)
+
+
+def _estimate_subexpansion_execution_costs(schema_info, parameters, cost_weights,
+                                           subexpansion_plan, parent_result_sets, location_costs):
+    """Estimate the execution cost of each location in a subexpansion, appending it to a list.
+
+    Each location is expanded once per result set at its parent location: the edges from the parent
+    vertex are traversed, and the filters at the location are applied to the vertices reached.
+    The result sets of sibling locations are not multiplied together, since the expansion of one
+    sibling does not depend on the expansion of the others.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        parameters: dict, parameters with which query will be executed
+        cost_weights: ExecutionCostWeights namedtuple, the relative costs of each operation.
+        subexpansion_plan: SubexpansionEstimationPlan namedtuple, describing the subexpansion rooted
+                           at a child_location of a parent_location
+        parent_result_sets: float, expected number of result sets at the parent_location.
+        location_costs: list of LocationExecutionCost, to which the costs of the subexpansion's
+                        locations are appended.
+    """
+    intermediate_tuples = parent_result_sets * subexpansion_plan.children_per_parent
+    result_sets = parent_result_sets * estimate_subexpansion_root_counts_per_parent(
+        schema_info, subexpansion_plan, parameters)
+
+    location_costs.append(LocationExecutionCost(
+        location=subexpansion_plan.location,
+        location_name=subexpansion_plan.location_name,
+        intermediate_tuples=intermediate_tuples,
+        result_sets=result_sets,
+        index=None,
+        cost=intermediate_tuples * cost_weights.traversed_edge_cost,
+    ))
+
+    for child_plan in subexpansion_plan.child_plans:
+        _estimate_subexpansion_execution_costs(
+            schema_info, parameters, cost_weights, child_plan, result_sets, location_costs)
+
+
+def estimate_query_execution_cost_using_plan(schema_info, plan, parameters, cost_weights):
+    """Estimate the execution cost of a query, given the query's CardinalityEstimationPlan.
+
+    The execution cost of a query is the weighted sum of the operations a backend performs while
+    executing it:
+    - at the root location, either all vertices of the root type are scanned, or if the root
+      location has an equality or in_collection filter over the fields of a unique index, only the
+      vertices passing the filter are looked up using the index,
+    - at each other location, one edge is traversed for each vertex reached from the parent
+      location's result sets, before the filters at the location are applied,
+    - finally, each result row is produced and returned.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo, the same one the plan was made with.
+        plan: CardinalityEstimationPlan namedtuple for the query being estimated.
+        parameters: dict, parameters with which query will be executed.
+        cost_weights: ExecutionCostWeights namedtuple, the relative costs of each operation.
+
+    Returns:
+        QueryExecutionCost namedtuple
+    """
+    root_result_sets = adjust_counts_for_filters(
+        schema_info, plan.root_filter_infos, parameters, plan.root_location_name, plan.root_counts)
+
+    root_index = _get_unique_index_for_filters(
+        schema_info, plan.root_location_name, plan.root_filter_infos)
+    if root_index is None:
+        root_intermediate_tuples = float(plan.root_counts)
+        root_cost = root_intermediate_tuples * cost_weights.scanned_vertex_cost
+    else:
+        root_intermediate_tuples = float(root_result_sets)
+        root_cost = root_intermediate_tuples * cost_weights.index_lookup_cost
+
+    location_costs = [LocationExecutionCost(
+        location=plan.root_location,
+        location_name=plan.root_location_name,
+        intermediate_tuples=root_intermediate_tuples,
+        result_sets=root_result_sets,
+        index=root_index,
+        cost=root_cost,
+    )]
+    for child_plan in plan.child_plans:
+        _estimate_subexpansion_execution_costs(
+            schema_info, parameters, cost_weights, child_plan, root_result_sets, location_costs)
+
+    result_cardinality = estimate_query_result_cardinality_using_plan(
+        schema_info, plan, parameters)
+    total_cost = (
+        sum(location_cost.cost for location_cost in location_costs) +
+        result_cardinality * cost_weights.result_row_cost
+    )
+
+    return QueryExecutionCost(
+        location_costs=tuple(location_costs),
+        result_cardinality=result_cardinality,
+        total_cost=total_cost,
+    )
+
+
+def estimate_query_execution_cost_from_query_metadata(schema_info, query_metadata, parameters,
+                                                      language, cost_weights=None):
+    """Estimate the execution cost of a query on a backend, given its compiled query metadata.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: QueryMetadataTable object, the query_metadata_table of the IrAndMetadata
+                        for the query being estimated.
+        parameters: dict, parameters with which query will be executed.
+        language: str, the language of the backend executing the query, e.g. MATCH_LANGUAGE.
+        cost_weights: optional ExecutionCostWeights namedtuple, the relative costs of each
+                      operation on the backend. If not provided, the default weights of the
+                      backend are used.
+
+    Returns:
+        QueryExecutionCost namedtuple
+
+    Raises:
+        ValueError, if cost_weights is not provided and the language has no default weights.
+    """
+    if cost_weights is None:
+        if language not in DEFAULT_EXECUTION_COST_WEIGHTS:
+            raise ValueError(u'No default execution cost weights for language {}, expected one '
+                             u'of {}. Please provide the cost weights explicitly.'
+                             .format(language, sorted(DEFAULT_EXECUTION_COST_WEIGHTS)))
+        cost_weights = DEFAULT_EXECUTION_COST_WEIGHTS[language]
+
+    plan = make_cardinality_estimation_plan(schema_info, query_metadata)
+    return estimate_query_execution_cost_using_plan(schema_info, plan, parameters, cost_weights)
+
+
+def estimate_query_execution_cost(schema_info, graphql_query, parameters, language,
+                                  cost_weights=None):
+    """Estimate the execution cost of a GraphQL query on a backend using database statistics.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        graphql_query: string, a valid GraphQL query
+        parameters: dict, parameters with which query will be executed.
+        language: str, the language of the backend executing the query, e.g. MATCH_LANGUAGE.
+        cost_weights: optional ExecutionCostWeights namedtuple, the relative costs of each
+                      operation on the backend. If not provided, the default weights of the
+                      backend are used.
+
+    Returns:
+        QueryExecutionCost namedtuple
+    """
+    query_metadata = graphql_to_ir(
+        schema_info.schema, graphql_query, type_equivalence_hints=schema_info.type_equivalence_hints
+    ).query_metadata_table
+    return estimate_query_execution_cost_from_query_metadata(
+        schema_info, query_metadata, parameters, language, cost_weights=cost_weights)
@@ -1,9 +1,15 @@
 # Copyright 2019-present Kensho Technologies, LLC.
 from collections import namedtuple
+import decimal
 import sys
 from uuid import UUID
 
-from ..compiler.helpers import get_parameter_name
+import arrow
+from graphql import GraphQLFloat, GraphQLInt
+import six
+
+from ..compiler.helpers import get_parameter_name, is_runtime_parameter, strip_non_null_from_type
+from ..schema import GraphQLDate, GraphQLDateTime, GraphQLDecimal
 
 
 # The Selectivity represents the selectivity of a filter or a set of filters
@@ -25,12 +31,25 @@ ABSOLUTE_SELECTIVITY = 'absolute'
 FRACTIONAL_SELECTIVITY = 'fractional'
 
 INEQUALITY_OPERATORS = frozenset(['<', '<=', '>', '>=', 'between'])
+NULL_CHECK_OPERATORS = frozenset(['is_null', 'is_not_null'])
+NEGATED_EQUALITY_OPERATORS = frozenset(['!=', 'not_in_collection'])
+# Operators whose selectivity is estimated using the fraction of sampled field values that pass
+# through the filter.
+SAMPLED_VALUE_OPERATORS = frozenset([
+    'has_substring', 'starts_with', 'ends_with', 'contains', 'intersects'
+])
 
 # UUIDs are defined in RFC-4122 as a 128-bit identifier. This means that the minimum UUID value
 # (represented as a natural number) is 0, and the maximal value is 2^128-1.
 MIN_UUID_INT = 0
 MAX_UUID_INT = 2**128 - 1
 
+# Field types whose values are integers (or can be mapped onto the integers while preserving their
+# order), and field types whose values can be mapped onto the real numbers while preserving their
+# order. Inequality filters on fields of these types can be estimated using the field's quantiles.
+DISCRETE_QUANTILE_FIELD_TYPES = (GraphQLInt, GraphQLDate)
+CONTINUOUS_QUANTILE_FIELD_TYPES = (GraphQLFloat, GraphQLDecimal, GraphQLDateTime)
+
 
 def _is_absolute(selectivity):
     """Return True if selectivity has kind absolute."""
@@ -335,6 +354,199 @@ def _get_selectivity_of_integer_inequality_filter(
     return field_selectivity
 
 
+def _get_runtime_parameter_values(filter_info, parameters):
+    """Return the list of parameter values used by the filter, or None if any are not known.
+
+    Args:
+        filter_info: FilterInfo object, filter on the location being filtered
+        parameters: dict, parameters with which query will be executed
+
+    Returns:
+        - list of parameter values, in the order of the filter's arguments, if all arguments are
+          runtime parameters.
+        - None if any of the filter's arguments is a tagged parameter, since the values of tagged
+          parameters are only known while the query is being executed.
+    """
+    parameter_values = []
+    for filter_argument in filter_info.args:
+        if not is_runtime_parameter(filter_argument):
+            return None
+        parameter_values.append(parameters[get_parameter_name(filter_argument)])
+    return parameter_values
+
+
+def _get_field_type(schema_info, location_name, field_name):
+    """Return the GraphQL type of the given field, without any non-null wrapper, or None."""
+    location_type = schema_info.schema.get_type(location_name)
+    if location_type is None:
+        return None
+    field = location_type.fields.get(field_name)
+    if field is None:
+        return None
+    return strip_non_null_from_type(field.type)
+
+
+def _get_quantile_field_type_kind(field_type):
+    """Return 'discrete' or 'continuous' for field types supporting quantiles, or None otherwise."""
+    if field_type is None:
+        return None
+    for discrete_type in DISCRETE_QUANTILE_FIELD_TYPES:
+        if discrete_type.is_same_type(field_type):
+            return 'discrete'
+    for continuous_type in CONTINUOUS_QUANTILE_FIELD_TYPES:
+        if continuous_type.is_same_type(field_type):
+            return 'continuous'
+    return None
+
+
+def _convert_quantile_field_value_to_number(field_type, value):
+    """Return a number representing the given value, preserving the order of the field's values.
+
+    Args:
+        field_type: GraphQLScalarType, one of the types supported by field quantiles.
+        value: value of the field or a filter parameter of that field, e.g. int for GraphQLInt,
+               datetime.date for GraphQLDate and datetime.datetime for GraphQLDateTime.
+
+    Returns:
+        int for discrete field types, float for continuous field types.
+    """
+    if GraphQLInt.is_same_type(field_type):
+        return int(value)
+    elif GraphQLDate.is_same_type(field_type):
+        # Days since year 1 of the proleptic Gregorian calendar.
+        return value.toordinal()
+    elif GraphQLDateTime.is_same_type(field_type):
+        # Naive datetimes are assumed to be in UTC, consistent with the DateTime serialization.
+        return arrow.get(value).float_timestamp
+    elif GraphQLDecimal.is_same_type(field_type):
+        return float(decimal.Decimal(value))
+    elif GraphQLFloat.is_same_type(field_type):
+        return float(value)
+    else:
+        raise AssertionError(u'Field quantiles are not supported for field type {}: {}'
+                             .format(field_type, value))
+
+
+def _get_query_bounds_of_inequality_filter(parameter_values, filter_operator, is_discrete):
+    """Return the inclusive (lower, upper) bounds of values passing an inequality filter.
+
+    Args:
+        parameter_values: list of numbers, describing the parameters for the inequality filter.
+        filter_operator: str, describing the inequality filter operation being performed.
+        is_discrete: bool, whether the filtered values are integers. For integer values, strict
+                     inequalities are converted to non-strict ones e.g. '< 5' to '<= 4'. For real
+                     values, the difference between strict and non-strict inequalities is ignored.
+
+    Returns:
+        tuple (lower_bound, upper_bound), each of which is a number, or None if the filter does not
+        bound the values from that side.
+    """
+    if is_discrete:
+        query_interval = _get_query_interval_of_integer_inequality_filter(
+            parameter_values, filter_operator
+        )
+        if query_interval is None:
+            # The interval is empty, e.g. 'between 5 and 4', so we return bounds with no values.
+            return 1, 0
+        return query_interval.lower_bound, query_interval.upper_bound
+
+    lower_bound, upper_bound = None, None
+    if filter_operator in ('>', '>='):
+        lower_bound = parameter_values[0]
+    elif filter_operator in ('<', '<='):
+        upper_bound = parameter_values[0]
+    elif filter_operator == 'between':
+        lower_bound, upper_bound = parameter_values
+    else:
+        raise AssertionError(u'Cost estimator found unsupported inequality operator {}.'
+                             .format(filter_operator))
+    return lower_bound, upper_bound
+
+
+def _get_fraction_of_quantile_bucket_queried(bucket_bounds, query_bounds, is_discrete):
+    """Return the fraction of the values in a quantile bucket that lie within the query bounds.
+
+    Args:
+        bucket_bounds: tuple of two numbers, the inclusive lower and upper bound of the bucket.
+        query_bounds: tuple of two numbers or None, the inclusive lower and upper bound of values
+                      passing through the filter. None denotes that the side is unbounded.
+        is_discrete: bool, whether the values in the bucket are integers.
+
+    Returns:
+        float between 0 and 1, assuming values are evenly distributed within the bucket.
+    """
+    bucket_lower, bucket_upper = bucket_bounds
+    query_lower, query_upper = query_bounds
+
+    intersection_lower = bucket_lower
+    if query_lower is not None:
+        intersection_lower = max(intersection_lower, query_lower)
+    intersection_upper = bucket_upper
+    if query_upper is not None:
+        intersection_upper = min(intersection_upper, query_upper)
+
+    if intersection_lower > intersection_upper:
+        return 0.0
+
+    if is_discrete:
+        intersection_size = intersection_upper - intersection_lower + 1
+        bucket_size = bucket_upper - bucket_lower + 1
+    else:
+        intersection_size = intersection_upper - intersection_lower
+        bucket_size = bucket_upper - bucket_lower
+        if bucket_size == 0:
+            # All values in the bucket are equal, and the value is within the query bounds.
+            return 1.0
+
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    #
+    return float(intersection_size) / bucket_size
+    # pylint: enable=old-division
+
+
+def _get_selectivity_of_inequality_filter_using_quantile_numbers(
+    is_discrete, quantile_numbers, parameter_numbers, filter_operator
+):
+    """Return the selectivity of an inequality filter, given the quantiles of the filtered field.
+
+    The quantiles divide the field's values into buckets of equal size. We assume values are evenly
+    distributed within each bucket, so the fraction of a bucket's values that pass through the
+    filter is the fraction of the bucket's range that is within the filter's range. The
+    selectivity is then the average of those fractions over all buckets. This makes the estimate
+    accurate even for skewed distributions, as long as there are enough quantiles.
+
+    Args:
+        is_discrete: bool, whether the filtered field's values are converted to integers.
+        quantile_numbers: list of numbers, the field's quantiles converted to numbers.
+        parameter_numbers: list of numbers, the parameters for the inequality filter converted to
+                           numbers.
+        filter_operator: str, describing the inequality filter operation being performed.
+
+    Returns:
+        Selectivity object, describing the selectivity of the inequality filter.
+    """
+    query_bounds = _get_query_bounds_of_inequality_filter(
+        parameter_numbers, filter_operator, is_discrete
+    )
+    query_lower, query_upper = query_bounds
+    if query_lower is not None and query_upper is not None and query_lower > query_upper:
+        return Selectivity(kind=ABSOLUTE_SELECTIVITY, value=0.0)
+
+    fractions_queried = [
+        _get_fraction_of_quantile_bucket_queried(bucket_bounds, query_bounds, is_discrete)
+        for bucket_bounds in zip(quantile_numbers[:-1], quantile_numbers[1:])
+    ]
+
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    #
+    fraction_of_values_queried = sum(fractions_queried) / len(fractions_queried)
+    # pylint: enable=old-division
+
+    return Selectivity(kind=FRACTIONAL_SELECTIVITY, value=fraction_of_values_queried)
+
+
 def _estimate_inequality_filter_selectivity(schema_info, filter_info, parameters, location_name):
     """Calculate the selectivity of a specific inequality filter at a given location.
 
@@ -356,36 +568,94 @@ def _estimate_inequality_filter_selectivity(schema_info, filter_info, parameters
                          u'with non-inequality filter operator {}: {} {}'
                          .format(filter_operator, filter_info, location_name))
 
-    all_selectivities = []
-    for field_name in filter_info.fields:
-        field_selectivity = Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)
+    parameter_values = _get_runtime_parameter_values(filter_info, parameters)
+    if parameter_values is None:
+        # The filter uses a tagged parameter, whose value is not known ahead of time.
+        return Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)
+
+    all_selectivities = [
+        _make_inequality_filter_field_selectivity_function(
+            schema_info, location_name, field_name, filter_operator)(parameter_values)
+        for field_name in filter_info.fields
+    ]
+
+    result_selectivity = _combine_filter_selectivities(all_selectivities)
+    return result_selectivity
+
 
-        # TODO(vlad): Improve inequality estimation by implementing histograms.
-        # HACK(vlad): Currently, each UUID is assumed to have a name of 'uuid'. Using the schema
-        #             graph for knowledge about UUID fields would generalize better.
-        if field_name == 'uuid':
-            uuid_domain = IntegerInterval(MIN_UUID_INT, MAX_UUID_INT)
+def _make_inequality_filter_field_selectivity_function(
+    schema_info, location_name, field_name, filter_operator
+):
+    """Return a function estimating an inequality filter's selectivity on one field.
+
+    All the work that does not depend on the filter's parameter values, such as looking up the
+    field's type and statistics, is done once, so that the returned function can be efficiently
+    applied to many sets of parameter values.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        location_name: string, type of the location being filtered
+        field_name: string, name of the field being filtered
+        filter_operator: str, describing the inequality filter operation being performed.
 
+    Returns:
+        function, taking a list of the filter's parameter values, and returning the Selectivity of
+        the filter on the given field.
+    """
+    field_type = _get_field_type(schema_info, location_name, field_name)
+    quantile_field_type_kind = _get_quantile_field_type_kind(field_type)
+    quantiles = schema_info.statistics.get_field_quantiles(location_name, field_name)
+
+    if quantiles is not None and quantile_field_type_kind is not None:
+        if len(quantiles) < 2:
+            raise AssertionError(u'Expected at least two quantiles for field of type {}, but got: '
+                                 u'{}'.format(field_type, quantiles))
+
+        is_discrete = quantile_field_type_kind == 'discrete'
+        quantile_numbers = [
+            _convert_quantile_field_value_to_number(field_type, quantile)
+            for quantile in quantiles
+        ]
+
+        def get_selectivity_using_quantiles(parameter_values):
+            """Return the selectivity of the filter with the given parameter values."""
+            parameter_numbers = [
+                _convert_quantile_field_value_to_number(field_type, parameter_value)
+                for parameter_value in parameter_values
+            ]
+            return _get_selectivity_of_inequality_filter_using_quantile_numbers(
+                is_discrete, quantile_numbers, parameter_numbers, filter_operator)
+
+        return get_selectivity_using_quantiles
+
+    # HACK(vlad): Currently, each UUID is assumed to have a name of 'uuid'. Using the schema
+    #             graph for knowledge about UUID fields would generalize better.
+    if field_name == 'uuid':
+        uuid_domain = IntegerInterval(MIN_UUID_INT, MAX_UUID_INT)
+
+        def get_selectivity_of_uuid_filter(parameter_values):
+            """Return the selectivity of the filter with the given parameter values."""
             # Instead of working with UUIDs, we convert each occurence of UUID to its corresponding
             # integer representation.
-            parameter_values_as_integers = []
-            for filter_argument in filter_info.args:
-                parameter_name = get_parameter_name(filter_argument)
-                parameter_value = parameters[parameter_name]
-                parameter_value_as_integer = _convert_uuid_string_to_int(parameter_value)
-                parameter_values_as_integers.append(parameter_value_as_integer)
+            parameter_values_as_integers = [
+                _convert_uuid_string_to_int(parameter_value)
+                for parameter_value in parameter_values
+            ]
 
             # Assumption: UUID values are uniformly distributed among the set of valid UUIDs.
             # This implies e.g. if the query interval is half the size of the set of all valid
             # UUIDs, the Selectivity will be Fractional with a selectivity value of 0.5.
-            field_selectivity = _get_selectivity_of_integer_inequality_filter(
+            return _get_selectivity_of_integer_inequality_filter(
                 uuid_domain, parameter_values_as_integers, filter_operator
             )
 
-        all_selectivities.append(field_selectivity)
+        return get_selectivity_of_uuid_filter
 
-    result_selectivity = _combine_filter_selectivities(all_selectivities)
-    return result_selectivity
+    def get_default_selectivity(parameter_values):
+        """Return the selectivity of a filter for which no statistics are available."""
+        return Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)
+
+    return get_default_selectivity
 
 
 def _estimate_filter_selectivity_of_equality(schema_info, location_name, filter_fields):
@@ -426,6 +696,239 @@ def _estimate_filter_selectivity_of_equality(schema_info, location_name, filter_
     return result_selectivity
 
 
+def _get_selectivity_of_in_collection_filter(selectivity_per_entry_in_collection, collection_size):
+    """Return the selectivity of an in_collection filter, given the selectivity of each entry.
+
+    Args:
+        selectivity_per_entry_in_collection: Selectivity object, the selectivity of an equality
+                                             filter on the same fields.
+        collection_size: int, number of entries in the filter's collection.
+
+    Returns:
+        Selectivity object, the selectivity of the in_collection filter.
+    """
+    # Assumption: the selectivity is proportional to the number of entries in the collection.
+    # This will not hold in case of duplicates.
+    if _is_absolute(selectivity_per_entry_in_collection):
+        result_selectivity = Selectivity(
+            kind=ABSOLUTE_SELECTIVITY,
+            value=float(collection_size) * selectivity_per_entry_in_collection.value
+        )
+    elif _is_fractional(selectivity_per_entry_in_collection):
+        result_selectivity = Selectivity(
+            kind=FRACTIONAL_SELECTIVITY,
+            value=min(float(collection_size) * selectivity_per_entry_in_collection.value,
+                      1.0)
+            # The estimate may be above 1.0 in case of duplicates in the collection
+            # so we make sure the value is <= 1.0
+        )
+    else:
+        raise AssertionError(u'Unexpected selectivity kind: {}'
+                             .format(selectivity_per_entry_in_collection))
+    return result_selectivity
+
+
+def _estimate_null_check_filter_selectivity(schema_info, filter_info, location_name):
+    """Calculate the selectivity of an 'is_null' or 'is_not_null' filter at a given location.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        filter_info: FilterInfo object, null check filter on the location being filtered
+        location_name: string, type of the location being filtered
+
+    Returns:
+        Selectivity object, the selectivity of the null check filter at the given location.
+    """
+    all_selectivities = []
+    for field_name in filter_info.fields:
+        null_fraction = schema_info.statistics.get_field_null_fraction(location_name, field_name)
+        if null_fraction is not None:
+            if filter_info.op_name == 'is_null':
+                fraction_passing = null_fraction
+            elif filter_info.op_name == 'is_not_null':
+                fraction_passing = 1.0 - null_fraction
+            else:
+                raise AssertionError(u'Cost estimator found unsupported null check operator {}: '
+                                     u'{}'.format(filter_info.op_name, filter_info))
+            all_selectivities.append(Selectivity(
+                kind=FRACTIONAL_SELECTIVITY, value=fraction_passing))
+
+    result_selectivity = _combine_filter_selectivities(all_selectivities)
+    return result_selectivity
+
+
+def _make_negated_equality_filter_field_selectivity_function(
+    schema_info, location_name, field_name, filter_operator
+):
+    """Return a function estimating a '!=' or 'not_in_collection' filter's selectivity on one field.
+
+    The fraction of values equal to a most common value of the field is known from the statistics.
+    The remaining non-null values are assumed to be evenly distributed among the remaining
+    distinct values. Null values do not pass through the filter.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        location_name: string, type of the location being filtered
+        field_name: string, name of the field being filtered
+        filter_operator: str, either '!=' or 'not_in_collection'.
+
+    Returns:
+        function, taking a list of the filter's parameter values, and returning the Selectivity of
+        the filter on the given field.
+    """
+    statistics = schema_info.statistics
+    null_fraction = statistics.get_field_null_fraction(location_name, field_name)
+    most_common_values = statistics.get_field_most_common_values(location_name, field_name)
+    distinct_values_count = statistics.get_distinct_field_values_count(location_name, field_name)
+
+    if null_fraction is None and most_common_values is None and distinct_values_count is None:
+        def get_default_selectivity(parameter_values):
+            """Return the selectivity of a filter for which no statistics are available."""
+            return Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)
+
+        return get_default_selectivity
+
+    if null_fraction is None:
+        null_fraction = 0.0
+    if most_common_values is None:
+        most_common_values = []
+    most_common_value_fractions = dict(most_common_values)
+
+    # If the number of distinct values is unknown, values that are not among the most common ones
+    # are assumed to be rare enough to not affect the estimate.
+    other_value_fraction = 0.0
+    if distinct_values_count is not None:
+        num_other_values = distinct_values_count - len(most_common_value_fractions)
+        if num_other_values > 0:
+            other_values_total_fraction = max(
+                0.0, 1.0 - null_fraction - sum(six.itervalues(most_common_value_fractions)))
+            # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+            # pylint: disable=old-division
+            #
+            other_value_fraction = other_values_total_fraction / num_other_values
+            # pylint: enable=old-division
+
+    def get_selectivity_of_negated_equality_filter(parameter_values):
+        """Return the selectivity of the filter with the given parameter values."""
+        if filter_operator == '!=':
+            excluded_values = {parameter_values[0]}
+        elif filter_operator == 'not_in_collection':
+            excluded_values = set(parameter_values[0])
+        else:
+            raise AssertionError(u'Cost estimator found unsupported negated equality operator '
+                                 u'{}.'.format(filter_operator))
+
+        excluded_fraction = sum(
+            most_common_value_fractions.get(excluded_value, other_value_fraction)
+            for excluded_value in excluded_values
+        )
+        fraction_passing = max(0.0, 1.0 - null_fraction - excluded_fraction)
+        return Selectivity(kind=FRACTIONAL_SELECTIVITY, value=fraction_passing)
+
+    return get_selectivity_of_negated_equality_filter
+
+
+def _does_sampled_value_pass_filter(filter_operator, sampled_value, parameter_value):
+    """Return True if the sampled field value passes through the filter with the given parameter."""
+    if filter_operator == 'has_substring':
+        return parameter_value in sampled_value
+    elif filter_operator == 'starts_with':
+        return sampled_value.startswith(parameter_value)
+    elif filter_operator == 'ends_with':
+        return sampled_value.endswith(parameter_value)
+    elif filter_operator == 'contains':
+        return parameter_value in sampled_value
+    elif filter_operator == 'intersects':
+        return any(element in sampled_value for element in parameter_value)
+    else:
+        raise AssertionError(u'Cost estimator found unsupported sampled value operator {}.'
+                             .format(filter_operator))
+
+
+def _make_sampled_value_filter_field_selectivity_function(
+    schema_info, location_name, field_name, filter_operator
+):
+    """Return a function estimating a filter's selectivity on one field using sampled field values.
+
+    The selectivity is the fraction of sampled values that pass through the filter, scaled by the
+    fraction of non-null values, since null values do not pass through the filter. Half a match is
+    added to the count of matching values, so that filters that no sampled value passes through
+    are estimated to pass a small fraction of values, rather than none at all.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        location_name: string, type of the location being filtered
+        field_name: string, name of the field being filtered
+        filter_operator: str, one of the operators in SAMPLED_VALUE_OPERATORS.
+
+    Returns:
+        function, taking a list of the filter's parameter values, and returning the Selectivity of
+        the filter on the given field.
+    """
+    statistics = schema_info.statistics
+    sampled_values = statistics.get_field_value_sample(location_name, field_name)
+
+    if not sampled_values:
+        def get_default_selectivity(parameter_values):
+            """Return the selectivity of a filter for which no statistics are available."""
+            return Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)
+
+        return get_default_selectivity
+
+    null_fraction = statistics.get_field_null_fraction(location_name, field_name)
+    if null_fraction is None:
+        null_fraction = 0.0
+
+    def get_selectivity_using_sampled_values(parameter_values):
+        """Return the selectivity of the filter with the given parameter values."""
+        parameter_value = parameter_values[0]
+        num_matching_values = sum(
+            1
+            for sampled_value in sampled_values
+            if _does_sampled_value_pass_filter(filter_operator, sampled_value, parameter_value)
+        )
+
+        # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+        # pylint: disable=old-division
+        #
+        fraction_of_sample_passing = (num_matching_values + 0.5) / (len(sampled_values) + 1)
+        # pylint: enable=old-division
+
+        return Selectivity(
+            kind=FRACTIONAL_SELECTIVITY, value=(1.0 - null_fraction) * fraction_of_sample_passing)
+
+    return get_selectivity_using_sampled_values
+
+
+def _make_filter_field_selectivity_function(
+    schema_info, location_name, field_name, filter_operator
+):
+    """Return a function estimating the selectivity of a filter on one field from its parameters.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        location_name: string, type of the location being filtered
+        field_name: string, name of the field being filtered
+        filter_operator: str, one of the operators in INEQUALITY_OPERATORS,
+                         NEGATED_EQUALITY_OPERATORS or SAMPLED_VALUE_OPERATORS.
+
+    Returns:
+        function, taking a list of the filter's parameter values, and returning the Selectivity of
+        the filter on the given field.
+    """
+    if filter_operator in INEQUALITY_OPERATORS:
+        make_selectivity_function = _make_inequality_filter_field_selectivity_function
+    elif filter_operator in NEGATED_EQUALITY_OPERATORS:
+        make_selectivity_function = _make_negated_equality_filter_field_selectivity_function
+    elif filter_operator in SAMPLED_VALUE_OPERATORS:
+        make_selectivity_function = _make_sampled_value_filter_field_selectivity_function
+    else:
+        raise AssertionError(u'Cost estimator found filter operator {} whose selectivity does not '
+                             u'depend on its parameter values.'.format(filter_operator))
+
+    return make_selectivity_function(schema_info, location_name, field_name, filter_operator)
+
+
 def _get_filter_selectivity(schema_info, filter_info, parameters, location_name):
     """Calculate the selectivity of an individual filter at a given location.
 
@@ -439,34 +942,17 @@ def _get_filter_selectivity(schema_info, filter_info, parameters, location_name)
         Selectivity object, the selectivity of a specific filter at a given location.
     """
     result_selectivity = Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)
-    # TODO(vlad): Support for inequality operators like '>', '<', 'between' using histograms
-    # TODO(vlad): Support for other filters like '!='
 
     if filter_info.op_name == '=':
         result_selectivity = _estimate_filter_selectivity_of_equality(
             schema_info, location_name, filter_info.fields)
     elif filter_info.op_name == 'in_collection':
-        collection_name = get_parameter_name(filter_info.args[0])
-        collection_size = len(parameters[collection_name])
-
-        selectivity_per_entry_in_collection = _estimate_filter_selectivity_of_equality(
-            schema_info, location_name, filter_info.fields)
-
-        # Assumption: the selectivity is proportional to the number of entries in the collection.
-        # This will not hold in case of duplicates.
-        if _is_absolute(selectivity_per_entry_in_collection):
-            result_selectivity = Selectivity(
-                kind=ABSOLUTE_SELECTIVITY,
-                value=float(collection_size) * selectivity_per_entry_in_collection.value
-            )
-        elif _is_fractional(selectivity_per_entry_in_collection):
-            result_selectivity = Selectivity(
-                kind=FRACTIONAL_SELECTIVITY,
-                value=min(float(collection_size) * selectivity_per_entry_in_collection.value,
-                          1.0)
-                # The estimate may be above 1.0 in case of duplicates in the collection
-                # so we make sure the value is <= 1.0
-            )
+        parameter_values = _get_runtime_parameter_values(filter_info, parameters)
+        if parameter_values is not None:
+            selectivity_per_entry_in_collection = _estimate_filter_selectivity_of_equality(
+                schema_info, location_name, filter_info.fields)
+            result_selectivity = _get_selectivity_of_in_collection_filter(
+                selectivity_per_entry_in_collection, len(parameter_values[0]))
     elif filter_info.op_name in INEQUALITY_OPERATORS:
         # TODO(vlad): Since we assume each filter is independent, we don't consider the correlation
         #             inequality filters often have. For example, a 'between' filter and an
@@ -475,10 +961,87 @@ def _get_filter_selectivity(schema_info, filter_info, parameters, location_name)
         #             information.
         result_selectivity = _estimate_inequality_filter_selectivity(
             schema_info, filter_info, parameters, location_name)
+    elif filter_info.op_name in NULL_CHECK_OPERATORS:
+        result_selectivity = _estimate_null_check_filter_selectivity(
+            schema_info, filter_info, location_name)
+    elif filter_info.op_name in NEGATED_EQUALITY_OPERATORS | SAMPLED_VALUE_OPERATORS:
+        parameter_values = _get_runtime_parameter_values(filter_info, parameters)
+        if parameter_values is not None:
+            result_selectivity = _combine_filter_selectivities([
+                _make_filter_field_selectivity_function(
+                    schema_info, location_name, field_name, filter_info.op_name)(parameter_values)
+                for field_name in filter_info.fields
+            ])
 
     return result_selectivity
 
 
+def _get_filter_selectivities_for_parameter_batch(schema_info, filter_info, parameter_columns,
+                                                  location_name, batch_size):
+    """Calculate the selectivity of an individual filter for each set of parameters in a batch.
+
+    This is equivalent to calling _get_filter_selectivity() once for each set of parameters, but
+    the work that does not depend on parameter values is only done once per batch.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        filter_info: FilterInfo object, filter on the location being filtered
+        parameter_columns: dict, parameter name -> sequence of that parameter's values, one for
+                           each set of parameters in the batch.
+        location_name: string, type of the location being filtered
+        batch_size: int, number of sets of parameters in the batch.
+
+    Returns:
+        list of Selectivity objects, the selectivity of the filter for each set of parameters.
+    """
+    default_selectivities = [Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)] * batch_size
+
+    if filter_info.op_name == '=':
+        # The selectivity of equality filters does not depend on the parameter values.
+        return [_estimate_filter_selectivity_of_equality(
+            schema_info, location_name, filter_info.fields)] * batch_size
+    elif filter_info.op_name in NULL_CHECK_OPERATORS:
+        # Null check filters have no parameters.
+        return [_estimate_null_check_filter_selectivity(
+            schema_info, filter_info, location_name)] * batch_size
+
+    # Tagged parameters are only known during query execution, so filters using them can't be
+    # estimated using their parameter values.
+    if not all(is_runtime_parameter(filter_argument) for filter_argument in filter_info.args):
+        return default_selectivities
+
+    argument_columns = [
+        parameter_columns[get_parameter_name(filter_argument)]
+        for filter_argument in filter_info.args
+    ]
+
+    if filter_info.op_name == 'in_collection':
+        selectivity_per_entry_in_collection = _estimate_filter_selectivity_of_equality(
+            schema_info, location_name, filter_info.fields)
+        return [
+            _get_selectivity_of_in_collection_filter(
+                selectivity_per_entry_in_collection, len(collection))
+            for collection in argument_columns[0]
+        ]
+    elif filter_info.op_name in (
+        INEQUALITY_OPERATORS | NEGATED_EQUALITY_OPERATORS | SAMPLED_VALUE_OPERATORS
+    ):
+        field_selectivity_functions = [
+            _make_filter_field_selectivity_function(
+                schema_info, location_name, field_name, filter_info.op_name)
+            for field_name in filter_info.fields
+        ]
+        return [
+            _combine_filter_selectivities([
+                get_field_selectivity(list(parameter_values))
+                for get_field_selectivity in field_selectivity_functions
+            ])
+            for parameter_values in zip(*argument_columns)
+        ]
+
+    return default_selectivities
+
+
 def _combine_filter_selectivities(selectivities):
     """Calculate the combined selectivity given a set of selectivities.
 
@@ -534,3 +1097,42 @@ def adjust_counts_for_filters(schema_info, filter_infos, parameters, location_na
         adjusted_counts *= combined_selectivity.value
 
     return adjusted_counts
+
+
+def adjust_counts_for_filters_for_parameter_batch(schema_info, filter_infos, parameter_columns,
+                                                  location_name, counts, batch_size):
+    """Adjust result counts for filters on a given location, for each set of parameters in a batch.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        filter_infos: list of FilterInfos, filters on the location being filtered
+        parameter_columns: dict, parameter name -> sequence of that parameter's values, one for
+                           each set of parameters in the batch.
+        location_name: string, type of the location being filtered
+        counts: float, result count that we're adjusting for filters
+        batch_size: int, number of sets of parameters in the batch.
+
+    Returns:
+        list of floats, counts updated for filter selectivities for each set of parameters.
+    """
+    if not filter_infos:
+        return [counts] * batch_size
+
+    selectivity_columns = [
+        _get_filter_selectivities_for_parameter_batch(
+            schema_info, filter_info, parameter_columns, location_name, batch_size)
+        for filter_info in filter_infos
+    ]
+
+    adjusted_counts_batch = []
+    for selectivities in zip(*selectivity_columns):
+        combined_selectivity = _combine_filter_selectivities(selectivities)
+
+        adjusted_counts = counts
+        if _is_absolute(combined_selectivity):
+            adjusted_counts = combined_selectivity.value
+        elif _is_fractional(combined_selectivity):
+            adjusted_counts *= combined_selectivity.value
+        adjusted_counts_batch.append(adjusted_counts)
+
+    return adjusted_counts_batch
@@ -0,0 +1,477 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+"""Collect the statistics used for query cost estimation from a SQL database.
+
+All statistics are computed using a small number of bulk aggregate queries:
+- one query per table, computing the number of rows, and the number of distinct values and the
+  fraction of null values of each column corresponding to a property field,
+- one grouped query per join descriptor, computing the number of joined rows per row of the source
+  table, from which both the vertex_edge_vertex_count statistic and the degree histogram of the
+  vertex field's edge are derived,
+- one query per column corresponding to an orderable property field, computing the column's
+  quantiles using the NTILE() window function,
+- optionally, one grouped query per column corresponding to a property field, computing the
+  column's most common values.
+
+The queries are independent of each other, so they are executed in parallel using connections
+from the engine's connection pool.
+"""
+from multiprocessing.pool import ThreadPool
+
+import six
+import sqlalchemy
+
+from ..compiler.helpers import get_edge_direction_and_name, strip_non_null_and_list_from_type
+from ..schema import COUNT_META_FIELD_NAME, is_vertex_field_name
+from .filter_selectivity_utils import CONTINUOUS_QUANTILE_FIELD_TYPES, DISCRETE_QUANTILE_FIELD_TYPES
+from .statistics import LocalStatistics
+
+
+# Names of the functions that approximately count distinct values, for the dialects supporting them.
+# Dialects not listed here count distinct values exactly with COUNT(DISTINCT ...).
+APPROXIMATE_DISTINCT_COUNT_FUNCTION_NAMES = {
+    'bigquery': 'approx_count_distinct',
+    'mssql': 'approx_count_distinct',
+    'snowflake': 'approx_count_distinct',
+}
+
+DEFAULT_NUM_QUANTILES = 100
+DEFAULT_NUM_MOST_COMMON_VALUES = 0
+DEFAULT_NUM_WORKERS = 4
+
+
+def _is_quantile_field_type(field_type):
+    """Return True if quantiles can be used to estimate filters on fields of the given type."""
+    return any(
+        quantile_field_type.is_same_type(field_type)
+        for quantile_field_type in DISCRETE_QUANTILE_FIELD_TYPES + CONTINUOUS_QUANTILE_FIELD_TYPES
+    )
+
+
+def _get_property_field_names(sqlalchemy_schema_info, vertex_name):
+    """Return the names of the property fields of a vertex, which correspond to table columns."""
+    table = sqlalchemy_schema_info.vertex_name_to_table[vertex_name]
+    graphql_type = sqlalchemy_schema_info.schema.get_type(vertex_name)
+    return sorted(
+        field_name
+        for field_name in six.iterkeys(graphql_type.fields)
+        if (not is_vertex_field_name(field_name) and
+            field_name != COUNT_META_FIELD_NAME and
+            field_name in table.columns)
+    )
+
+
+def _get_sampled_table(table, sample_percent):
+    """Return the table, or a sample of its rows if sample_percent is not None."""
+    if sample_percent is None:
+        return table
+    return sqlalchemy.tablesample(table, sqlalchemy.func.bernoulli(sample_percent))
+
+
+def _make_degree_histogram(degree_counts):
+    """Return a degree histogram, given the number of vertices having each degree.
+
+    To keep the histogram compact, all degrees between consecutive powers of two are grouped into
+    one bucket, so that the histogram has a logarithmic number of buckets in the largest degree.
+
+    Args:
+        degree_counts: dict, int -> int, mapping each degree to the number of vertices with it.
+
+    Returns:
+        list of (smallest degree, largest degree, number of vertices) buckets, as expected by
+        Statistics.get_vertex_edge_vertex_degree_histogram().
+    """
+    if not degree_counts:
+        return []
+
+    degree_histogram = [(0, 0, degree_counts.get(0, 0))]
+    max_degree = max(degree_counts)
+    min_bucket_degree = 1
+    while min_bucket_degree <= max_degree:
+        max_bucket_degree = 2 * min_bucket_degree - 1
+        bucket_vertex_counts = sum(
+            vertex_counts
+            for degree, vertex_counts in six.iteritems(degree_counts)
+            if min_bucket_degree <= degree <= max_bucket_degree
+        )
+        degree_histogram.append((min_bucket_degree, max_bucket_degree, bucket_vertex_counts))
+        min_bucket_degree = max_bucket_degree + 1
+
+    # Drop empty buckets, except for the zero degree bucket which makes the histogram complete.
+    return [
+        bucket
+        for index, bucket in enumerate(degree_histogram)
+        if index == 0 or bucket[2] > 0
+    ]
+
+
+def _collect_table_statistics(sqlalchemy_schema_info, connection, vertex_name,
+                              sample_percent, use_approximate_distinct_counts):
+    """Return the row count, and the distinct value counts and null fractions of a vertex's fields.
+
+    Args:
+        sqlalchemy_schema_info: SQLAlchemySchemaInfo describing the database.
+        connection: SQLAlchemy Connection to the database.
+        vertex_name: str, name of the vertex whose table is being queried.
+        sample_percent: float or None, percentage of rows sampled when counting distinct values.
+        use_approximate_distinct_counts: bool, whether to count distinct values approximately, if
+                                         the dialect supports it.
+
+    Returns:
+        tuple (int, dict, dict), the number of rows of the vertex's table, a dict mapping each
+        property field name to the number of distinct values in the corresponding column, and a
+        dict mapping each property field name to the fraction of null values in the column.
+    """
+    table = sqlalchemy_schema_info.vertex_name_to_table[vertex_name]
+    field_names = _get_property_field_names(sqlalchemy_schema_info, vertex_name)
+
+    row_count = connection.execute(
+        sqlalchemy.select([sqlalchemy.func.count()]).select_from(table)
+    ).scalar()
+    if not field_names:
+        return row_count, dict(), dict()
+
+    dialect_name = sqlalchemy_schema_info.dialect.name
+    approximate_distinct_count_function_name = None
+    if use_approximate_distinct_counts:
+        approximate_distinct_count_function_name = APPROXIMATE_DISTINCT_COUNT_FUNCTION_NAMES.get(
+            dialect_name)
+
+    sampled_table = _get_sampled_table(table, sample_percent)
+    distinct_count_expressions = []
+    non_null_count_expressions = []
+    for field_name in field_names:
+        column = sampled_table.c[field_name]
+        if approximate_distinct_count_function_name is not None:
+            distinct_count_expression = getattr(
+                sqlalchemy.func, approximate_distinct_count_function_name)(column)
+        else:
+            distinct_count_expression = sqlalchemy.func.count(sqlalchemy.distinct(column))
+        distinct_count_expressions.append(distinct_count_expression)
+        non_null_count_expressions.append(sqlalchemy.func.count(column))
+
+    counts = connection.execute(
+        sqlalchemy.select(
+            [sqlalchemy.func.count()] + distinct_count_expressions + non_null_count_expressions
+        ).select_from(sampled_table)
+    ).first()
+    sampled_row_count = counts[0]
+    distinct_counts = counts[1:len(field_names) + 1]
+    non_null_counts = counts[len(field_names) + 1:]
+
+    distinct_field_values_counts = {
+        field_name: distinct_count
+        for field_name, distinct_count in zip(field_names, distinct_counts)
+        # Columns with only nulls have no distinct values, which is not a useful statistic.
+        if distinct_count
+    }
+
+    field_null_fractions = dict()
+    if sampled_row_count:
+        for field_name, non_null_count in zip(field_names, non_null_counts):
+            # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+            # pylint: disable=old-division
+            field_null_fractions[field_name] = 1.0 - float(non_null_count) / sampled_row_count
+            # pylint: enable=old-division
+
+    return row_count, distinct_field_values_counts, field_null_fractions
+
+
+def _collect_join_statistics(sqlalchemy_schema_info, connection, vertex_name, vertex_field_name):
+    """Return the number of vertices joined to each vertex of the source table, by degree.
+
+    Args:
+        sqlalchemy_schema_info: SQLAlchemySchemaInfo describing the database.
+        connection: SQLAlchemy Connection to the database.
+        vertex_name: str, name of the vertex the vertex field belongs to.
+        vertex_field_name: str, name of the vertex field whose join descriptor is used.
+
+    Returns:
+        dict, int -> int, mapping each degree to the number of source table rows that are joined
+        to that many destination table rows.
+    """
+    join_descriptor = sqlalchemy_schema_info.join_descriptors[vertex_name][vertex_field_name]
+    destination_vertex_name = _get_destination_vertex_name(
+        sqlalchemy_schema_info, vertex_name, vertex_field_name)
+
+    source_table = sqlalchemy_schema_info.vertex_name_to_table[vertex_name]
+    destination_table = sqlalchemy_schema_info.vertex_name_to_table[destination_vertex_name]
+
+    # Count the destination rows for each value of the destination join column once, and then
+    # find the count corresponding to each source row. Source rows without any destination rows
+    # have a degree of zero.
+    destination_counts = sqlalchemy.select([
+        destination_table.c[join_descriptor.to_column].label('join_value'),
+        sqlalchemy.func.count().label('degree'),
+    ]).group_by(destination_table.c[join_descriptor.to_column]).alias('destination_counts')
+    degree = sqlalchemy.func.coalesce(destination_counts.c.degree, 0).label('degree')
+
+    degree_query = sqlalchemy.select([
+        degree,
+        sqlalchemy.func.count().label('vertex_count'),
+    ]).select_from(
+        source_table.outerjoin(
+            destination_counts,
+            source_table.c[join_descriptor.from_column] == destination_counts.c.join_value
+        )
+    ).group_by(degree)
+
+    return {
+        int(row['degree']): int(row['vertex_count'])
+        for row in connection.execute(degree_query)
+    }
+
+
+def _collect_field_quantiles(sqlalchemy_schema_info, connection, vertex_name, field_name,
+                             num_quantiles, sample_percent):
+    """Return the quantiles of a vertex's property field, or None if it only has null values.
+
+    Args:
+        sqlalchemy_schema_info: SQLAlchemySchemaInfo describing the database.
+        connection: SQLAlchemy Connection to the database.
+        vertex_name: str, name of the vertex the property field belongs to.
+        field_name: str, name of the property field.
+        num_quantiles: int, number of equally-sized groups to divide the field's values into.
+        sample_percent: float or None, percentage of rows sampled when computing the quantiles.
+
+    Returns:
+        - list of values, as expected by Statistics.get_field_quantiles(), if the field has any
+          non-null values.
+        - None otherwise.
+    """
+    table = _get_sampled_table(
+        sqlalchemy_schema_info.vertex_name_to_table[vertex_name], sample_percent)
+    column = table.c[field_name]
+
+    buckets = sqlalchemy.select([
+        column.label('value'),
+        sqlalchemy.func.ntile(num_quantiles).over(order_by=column).label('bucket'),
+    ]).where(column.isnot(None)).alias('buckets')
+
+    quantiles_query = sqlalchemy.select([
+        sqlalchemy.func.min(buckets.c.value).label('min_value'),
+        sqlalchemy.func.max(buckets.c.value).label('max_value'),
+    ]).group_by(buckets.c.bucket).order_by(buckets.c.bucket)
+
+    rows = connection.execute(quantiles_query).fetchall()
+    if not rows:
+        return None
+
+    return [rows[0]['min_value']] + [row['max_value'] for row in rows]
+
+
+def _collect_field_most_common_values(sqlalchemy_schema_info, connection, vertex_name, field_name,
+                                      num_most_common_values, sample_percent):
+    """Return the most common values of a vertex's property field, and the fraction of each.
+
+    Args:
+        sqlalchemy_schema_info: SQLAlchemySchemaInfo describing the database.
+        connection: SQLAlchemy Connection to the database.
+        vertex_name: str, name of the vertex the property field belongs to.
+        field_name: str, name of the property field.
+        num_most_common_values: int, maximum number of values to return.
+        sample_percent: float or None, percentage of rows sampled when counting values.
+
+    Returns:
+        list of (value, float) tuples, as expected by Statistics.get_field_most_common_values().
+        The list is empty if the field only has null values.
+    """
+    table = _get_sampled_table(
+        sqlalchemy_schema_info.vertex_name_to_table[vertex_name], sample_percent)
+    column = table.c[field_name]
+
+    sampled_row_count = connection.execute(
+        sqlalchemy.select([sqlalchemy.func.count()]).select_from(table)
+    ).scalar()
+    if not sampled_row_count:
+        return []
+
+    value_count = sqlalchemy.func.count().label('value_count')
+    most_common_values_query = sqlalchemy.select([
+        column.label('value'),
+        value_count,
+    ]).where(column.isnot(None)).group_by(column).order_by(
+        value_count.desc(), column
+    ).limit(num_most_common_values)
+
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    return [
+        (row['value'], float(row['value_count']) / sampled_row_count)
+        for row in connection.execute(most_common_values_query)
+    ]
+    # pylint: enable=old-division
+
+
+def _get_destination_vertex_name(sqlalchemy_schema_info, vertex_name, vertex_field_name):
+    """Return the name of the vertex that the given vertex field leads to."""
+    vertex_field = sqlalchemy_schema_info.schema.get_type(vertex_name).fields[vertex_field_name]
+    return strip_non_null_and_list_from_type(vertex_field.type).name
+
+
+def _get_vertex_edge_vertex_key(sqlalchemy_schema_info, vertex_name, vertex_field_name):
+    """Return the (source vertex, edge, target vertex) statistic key and direction of a field."""
+    edge_direction, edge_name = get_edge_direction_and_name(vertex_field_name)
+    destination_vertex_name = _get_destination_vertex_name(
+        sqlalchemy_schema_info, vertex_name, vertex_field_name)
+    if edge_direction == 'out':
+        statistic_key = (vertex_name, edge_name, destination_vertex_name)
+    else:
+        statistic_key = (destination_vertex_name, edge_name, vertex_name)
+    return statistic_key, edge_direction
+
+
+def collect_statistics_from_sqlalchemy_database(
+    sqlalchemy_schema_info, engine, num_quantiles=DEFAULT_NUM_QUANTILES, sample_percent=None,
+    use_approximate_distinct_counts=False, num_workers=DEFAULT_NUM_WORKERS,
+    num_most_common_values=DEFAULT_NUM_MOST_COMMON_VALUES
+):
+    """Compute the statistics used for query cost estimation from the data in a SQL database.
+
+    Class counts of vertices are the row counts of their tables. For each vertex field, the join
+    descriptor is used to compute the vertex_edge_vertex_count and degree histogram statistics, and
+    the class count of each edge is the largest vertex_edge_vertex_count of that edge. The distinct
+    value counts and null fractions of all property fields, and the quantiles of property fields
+    whose type supports them, are also computed.
+
+    Args:
+        sqlalchemy_schema_info: SQLAlchemySchemaInfo describing the database.
+        engine: SQLAlchemy Engine connected to the database. Its connection pool should allow for
+                at least num_workers connections.
+        num_quantiles: optional int, number of equally-sized groups to divide the values of each
+                       orderable property field into. Set to 0 to skip computing quantiles.
+        sample_percent: optional float between 0 and 100, percentage of rows to sample with the
+                        SQL standard TABLESAMPLE BERNOULLI clause when computing distinct value
+                        counts, null fractions, quantiles and most common values. Row counts and
+                        join statistics are always exact.
+                        Note that distinct value counts computed over a sample underestimate the
+                        true counts. Only use this option with dialects supporting the clause,
+                        e.g. PostgreSQL.
+        use_approximate_distinct_counts: optional bool, whether to count distinct values using
+                                         the dialect's approximate distinct counting function,
+                                         if it has one.
+        num_workers: optional int, number of queries to execute in parallel.
+        num_most_common_values: optional int, number of most common values to compute for each
+                                property field. Each field requires an additional grouped query
+                                over its table, so this is disabled by default.
+
+    Returns:
+        LocalStatistics object with the computed statistics.
+    """
+    if sample_percent is not None and not 0 < sample_percent <= 100:
+        raise ValueError(u'Expected sample_percent to be between 0 and 100, but got: {}'
+                         .format(sample_percent))
+    if num_quantiles < 0 or num_quantiles == 1:
+        raise ValueError(u'Expected num_quantiles to be 0 or at least 2, but got: {}'
+                         .format(num_quantiles))
+    if num_most_common_values < 0:
+        raise ValueError(u'Expected num_most_common_values to be non-negative, but got: {}'
+                         .format(num_most_common_values))
+
+    vertex_names = sorted(sqlalchemy_schema_info.vertex_name_to_table)
+    vertex_fields = sorted(
+        (vertex_name, vertex_field_name)
+        for vertex_name, vertex_join_descriptors in six.iteritems(
+            sqlalchemy_schema_info.join_descriptors)
+        for vertex_field_name in vertex_join_descriptors
+    )
+    quantile_fields = []
+    if num_quantiles > 0:
+        for vertex_name in vertex_names:
+            graphql_type = sqlalchemy_schema_info.schema.get_type(vertex_name)
+            for field_name in _get_property_field_names(sqlalchemy_schema_info, vertex_name):
+                if _is_quantile_field_type(graphql_type.fields[field_name].type):
+                    quantile_fields.append((vertex_name, field_name))
+    most_common_values_fields = []
+    if num_most_common_values > 0:
+        most_common_values_fields = [
+            (vertex_name, field_name)
+            for vertex_name in vertex_names
+            for field_name in _get_property_field_names(sqlalchemy_schema_info, vertex_name)
+        ]
+
+    def run_task(task):
+        """Run one statistics query using a connection from the pool."""
+        task_kind, task_arguments = task
+        with engine.connect() as connection:
+            if task_kind == 'table':
+                return _collect_table_statistics(
+                    sqlalchemy_schema_info, connection, task_arguments[0], sample_percent,
+                    use_approximate_distinct_counts)
+            elif task_kind == 'join':
+                return _collect_join_statistics(
+                    sqlalchemy_schema_info, connection, *task_arguments)
+            elif task_kind == 'quantiles':
+                return _collect_field_quantiles(
+                    sqlalchemy_schema_info, connection, task_arguments[0], task_arguments[1],
+                    num_quantiles, sample_percent)
+            elif task_kind == 'most_common_values':
+                return _collect_field_most_common_values(
+                    sqlalchemy_schema_info, connection, task_arguments[0], task_arguments[1],
+                    num_most_common_values, sample_percent)
+            else:
+                raise AssertionError(u'Unknown statistics task: {}'.format(task))
+
+    tasks = (
+        [('table', (vertex_name,)) for vertex_name in vertex_names] +
+        [('join', vertex_field) for vertex_field in vertex_fields] +
+        [('quantiles', quantile_field) for quantile_field in quantile_fields] +
+        [('most_common_values', field) for field in most_common_values_fields]
+    )
+    pool = ThreadPool(num_workers)
+    try:
+        task_results = pool.map(run_task, tasks)
+    finally:
+        pool.close()
+        pool.join()
+    results = dict(zip(tasks, task_results))
+
+    class_counts = dict()
+    distinct_field_values_counts = dict()
+    field_null_fractions = dict()
+    for vertex_name in vertex_names:
+        row_count, field_distinct_counts, null_fractions = results[('table', (vertex_name,))]
+        class_counts[vertex_name] = row_count
+        for field_name, distinct_count in six.iteritems(field_distinct_counts):
+            distinct_field_values_counts[(vertex_name, field_name)] = distinct_count
+        for field_name, null_fraction in six.iteritems(null_fractions):
+            field_null_fractions[(vertex_name, field_name)] = null_fraction
+
+    vertex_edge_vertex_counts = dict()
+    vertex_edge_vertex_degree_histograms = dict()
+    for vertex_name, vertex_field_name in vertex_fields:
+        degree_counts = results[('join', (vertex_name, vertex_field_name))]
+        statistic_key, edge_direction = _get_vertex_edge_vertex_key(
+            sqlalchemy_schema_info, vertex_name, vertex_field_name)
+        edge_count = sum(
+            degree * vertex_counts
+            for degree, vertex_counts in six.iteritems(degree_counts)
+        )
+
+        vertex_edge_vertex_counts[statistic_key] = edge_count
+        vertex_edge_vertex_degree_histograms[statistic_key + (edge_direction,)] = (
+            _make_degree_histogram(degree_counts))
+
+        _, edge_name, _ = statistic_key
+        class_counts[edge_name] = max(class_counts.get(edge_name, 0), edge_count)
+
+    field_quantiles = dict()
+    for quantile_field in quantile_fields:
+        quantiles = results[('quantiles', quantile_field)]
+        if quantiles is not None:
+            field_quantiles[quantile_field] = quantiles
+
+    field_most_common_values = dict()
+    for most_common_values_field in most_common_values_fields:
+        most_common_values = results[('most_common_values', most_common_values_field)]
+        if most_common_values:
+            field_most_common_values[most_common_values_field] = most_common_values
+
+    return LocalStatistics(
+        class_counts,
+        vertex_edge_vertex_counts=vertex_edge_vertex_counts,
+        distinct_field_values_counts=distinct_field_values_counts,
+        field_quantiles=field_quantiles,
+        vertex_edge_vertex_degree_histograms=vertex_edge_vertex_degree_histograms,
+        field_null_fractions=field_null_fractions,
+        field_most_common_values=field_most_common_values,
+    )
@@ -66,6 +66,74 @@ class Statistics(object):
         """
         return None
 
+    def get_vertex_edge_vertex_degree_histogram(
+        self, vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction
+    ):
+        """Return a histogram of the number of edges per vertex between the given vertex classes.
+
+        This statistic is optional, and describes how the edges counted by
+        get_vertex_edge_vertex_count() are distributed over the vertices at one of their endpoints.
+        Without it, the edges are assumed to be evenly distributed over the vertices, which is
+        inaccurate when a small number of vertices have most of the edges. For example, in that
+        case most vertices have no edges at all, so @optional and @fold traversals over the edge
+        produce many more results than the even distribution suggests.
+
+        For edge_direction 'out', the histogram describes the vertex_source vertices, and the degree
+        of each vertex is the number of its outbound edge_class edges to vertex_target vertices.
+        For edge_direction 'in', it describes the vertex_target vertices and their inbound
+        edge_class edges from vertex_source vertices. As with get_vertex_edge_vertex_count(),
+        vertices that inherit from vertex_source and vertex_target should also be included.
+
+        To keep the histogram compact, vertices with similar degrees should be grouped into one
+        bucket, e.g. using buckets whose bounds are consecutive powers of two.
+
+        Args:
+            vertex_source_class_name: str, vertex class name defined in the GraphQL schema.
+            edge_class_name: str, edge class name defined in the GraphQL schema.
+            vertex_target_class_name: str, vertex class name defined in the GraphQL schema.
+            edge_direction: str, either 'out' or 'in', selecting which endpoint's vertices
+                            are described by the histogram.
+
+        Returns:
+            - list of (int, int, int) tuples, sorted and disjoint buckets of the form
+                   (smallest degree, largest degree, number of vertices). Every vertex, including
+                   vertices with a degree of zero, must belong to exactly one bucket, if the
+                   statistic exists.
+            - None otherwise.
+        """
+        return None
+
+    def get_recursive_traversal_vertex_count(
+        self, vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction,
+        depth
+    ):
+        """Return the mean number of vertices reached by recursively traversing the given edges.
+
+        This statistic is optional, and helps estimate the result size of @recurse directives.
+        Without it, the number of vertices reached at each depth is assumed to grow geometrically
+        with the mean number of edges per vertex, which is inaccurate when the edges form cycles
+        or when the vertices with many edges are rarely reached.
+
+        The traversal starts at a vertex_source vertex for edge_direction 'out', and at a
+        vertex_target vertex for edge_direction 'in', and follows edge_class edges in that
+        direction. Each vertex reached within the given depth is counted once, including the
+        starting vertex itself at depth 0. As with get_vertex_edge_vertex_count(), vertices that
+        inherit from vertex_source and vertex_target should also be considered.
+
+        Args:
+            vertex_source_class_name: str, vertex class name defined in the GraphQL schema.
+            edge_class_name: str, edge class name defined in the GraphQL schema.
+            vertex_target_class_name: str, vertex class name defined in the GraphQL schema.
+            edge_direction: str, either 'out' or 'in', the direction in which edges are traversed.
+            depth: int, maximum number of edges traversed from the starting vertex.
+
+        Returns:
+            - float, mean number of vertices reached from each starting vertex, if the statistic
+                     exists.
+            - None otherwise.
+        """
+        return None
+
     def get_distinct_field_values_count(self, vertex_name, field_name):
         """Return the count of distinct values a vertex's property field has over all instances.
 
@@ -82,13 +150,97 @@ class Statistics(object):
         """
         return None
 
+    def get_field_quantiles(self, vertex_name, field_name):
+        """Return a list of values dividing a vertex's property field values into equal groups.
+
+        This statistic is an equi-depth histogram of the field's values, and helps estimate the
+        result size of @filter directives that use inequality operators like '<', '<=', '>', '>='
+        and 'between'. The first and last elements of the list are the smallest and largest values
+        of the field, and the i-th group contains all values between the (i-1)-th and i-th element.
+        Null values should be ignored when computing the quantiles.
+
+        Args:
+            vertex_name: str, name of a vertex defined in the GraphQL schema.
+            field_name: str, name of a vertex field.
+
+        Returns:
+            - list, sorted list of N + 1 values (N >= 1), dividing the field's values into N groups
+                    of (approximately) equal size, if the statistic exists. The values must be of
+                    the same type as the query parameters for that field would be, e.g. int for
+                    Int fields and datetime.date for Date fields.
+            - None otherwise.
+        """
+        return None
+
+    def get_field_null_fraction(self, vertex_name, field_name):
+        """Return the fraction of a vertex's instances whose property field value is null.
+
+        This statistic helps estimate the result size of @filter directives using the 'is_null'
+        and 'is_not_null' operators. It also improves the estimates of other filters, since null
+        values do not pass filters like '!=' or 'has_substring'.
+
+        Args:
+            vertex_name: str, name of a vertex defined in the GraphQL schema.
+            field_name: str, name of a vertex field.
+
+        Returns:
+            - float between 0 and 1, fraction of instances of the vertex with a null value of that
+                    property field, if the statistic exists.
+            - None otherwise.
+        """
+        return None
+
+    def get_field_most_common_values(self, vertex_name, field_name):
+        """Return the most common values of a vertex's property field, and how often they occur.
+
+        This statistic helps estimate the result size of @filter directives using the '!=' and
+        'not_in_collection' operators. Without it, the distinct field values are assumed to occur
+        equally often, which is inaccurate for skewed fields, e.g. a status field where almost all
+        instances have the same value.
+
+        Args:
+            vertex_name: str, name of a vertex defined in the GraphQL schema.
+            field_name: str, name of a vertex field.
+
+        Returns:
+            - list of (value, float) tuples, each containing one of the most common non-null values
+                    of the field and the fraction of all instances of the vertex having that
+                    value, if the statistic exists. As with get_field_quantiles(), the values
+                    must be of the same type as the query parameters for that field would be.
+            - None otherwise.
+        """
+        return None
+
+    def get_field_value_sample(self, vertex_name, field_name):
+        """Return a uniform random sample of the non-null values of a vertex's property field.
+
+        This statistic helps estimate the result size of @filter directives whose selectivity
+        depends on the structure of the values, rather than just on their order or equality. The
+        fraction of sampled values passing the filter is used as the estimate for the operators
+        'has_substring', 'starts_with' and 'ends_with' on String fields, and 'contains' and
+        'intersects' on list fields. A few hundred values are usually enough, and the estimates
+        of filters passing fewer values than roughly one in the sample size remain imprecise.
+
+        Args:
+            vertex_name: str, name of a vertex defined in the GraphQL schema.
+            field_name: str, name of a vertex field.
+
+        Returns:
+            - list, non-null values of the field of randomly sampled instances of the vertex, if
+                    the statistic exists. Values of list fields are lists themselves.
+            - None otherwise.
+        """
+        return None
+
 
 class LocalStatistics(Statistics):
     """Statistics class that receives all statistics at initialization, storing them in-memory."""
 
     def __init__(
         self, class_counts, vertex_edge_vertex_counts=None,
-        distinct_field_values_counts=None
+        distinct_field_values_counts=None, field_quantiles=None,
+        vertex_edge_vertex_degree_histograms=None, recursive_traversal_vertex_counts=None,
+        field_null_fractions=None, field_most_common_values=None, field_value_samples=None
     ):
         """Initialize statistics with the given data.
 
@@ -102,15 +254,57 @@ class LocalStatistics(Statistics):
             distinct_field_values_counts: optional dict, (str, str) -> int, mapping vertex class
                                           name and property field name to the count of distinct
                                           values of that vertex class's property field.
+            field_quantiles: optional dict, (str, str) -> list, mapping vertex class name and
+                             property field name to a sorted list of values dividing the values
+                             of that vertex class's property field into equally-sized groups.
+            vertex_edge_vertex_degree_histograms: optional dict, (str, str, str, str) -> list,
+                                                  mapping tuple of (vertex source class name, edge
+                                                  class name, vertex target class name, edge
+                                                  direction) to a list of (smallest degree, largest
+                                                  degree, number of vertices) buckets describing
+                                                  the number of edges per vertex.
+            recursive_traversal_vertex_counts: optional dict, (str, str, str, str, int) -> float,
+                                               mapping tuple of (vertex source class name, edge
+                                               class name, vertex target class name, edge
+                                               direction, depth) to the mean number of vertices
+                                               reached by recursively traversing the edges.
+            field_null_fractions: optional dict, (str, str) -> float, mapping vertex class name and
+                                  property field name to the fraction of instances of that vertex
+                                  class whose property field is null.
+            field_most_common_values: optional dict, (str, str) -> list, mapping vertex class name
+                                      and property field name to a list of (value, fraction of
+                                      instances) tuples for the most common values of the field.
+            field_value_samples: optional dict, (str, str) -> list, mapping vertex class name and
+                                 property field name to a random sample of the field's non-null
+                                 values.
         """
         if vertex_edge_vertex_counts is None:
             vertex_edge_vertex_counts = dict()
         if distinct_field_values_counts is None:
             distinct_field_values_counts = dict()
+        if field_quantiles is None:
+            field_quantiles = dict()
+        if vertex_edge_vertex_degree_histograms is None:
+            vertex_edge_vertex_degree_histograms = dict()
+        if recursive_traversal_vertex_counts is None:
+            recursive_traversal_vertex_counts = dict()
+        if field_null_fractions is None:
+            field_null_fractions = dict()
+        if field_most_common_values is None:
+            field_most_common_values = dict()
+        if field_value_samples is None:
+            field_value_samples = dict()
 
         self._class_counts = frozendict(class_counts)
         self._vertex_edge_vertex_counts = frozendict(vertex_edge_vertex_counts)
         self._distinct_field_values_counts = frozendict(distinct_field_values_counts)
+        self._field_quantiles = frozendict(field_quantiles)
+        self._vertex_edge_vertex_degree_histograms = frozendict(
+            vertex_edge_vertex_degree_histograms)
+        self._recursive_traversal_vertex_counts = frozendict(recursive_traversal_vertex_counts)
+        self._field_null_fractions = frozendict(field_null_fractions)
+        self._field_most_common_values = frozendict(field_most_common_values)
+        self._field_value_samples = frozendict(field_value_samples)
 
     def get_class_count(self, class_name):
         """See base class."""
@@ -126,7 +320,47 @@ class LocalStatistics(Statistics):
         statistic_key = (vertex_source_class_name, edge_class_name, vertex_target_class_name)
         return self._vertex_edge_vertex_counts.get(statistic_key)
 
+    def get_vertex_edge_vertex_degree_histogram(
+        self, vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction
+    ):
+        """See base class."""
+        statistic_key = (
+            vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction
+        )
+        return self._vertex_edge_vertex_degree_histograms.get(statistic_key)
+
+    def get_recursive_traversal_vertex_count(
+        self, vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction,
+        depth
+    ):
+        """See base class."""
+        statistic_key = (
+            vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction,
+            depth
+        )
+        return self._recursive_traversal_vertex_counts.get(statistic_key)
+
     def get_distinct_field_values_count(self, vertex_name, field_name):
         """See base class."""
         statistic_key = (vertex_name, field_name)
         return self._distinct_field_values_counts.get(statistic_key)
+
+    def get_field_quantiles(self, vertex_name, field_name):
+        """See base class."""
+        statistic_key = (vertex_name, field_name)
+        return self._field_quantiles.get(statistic_key)
+
+    def get_field_null_fraction(self, vertex_name, field_name):
+        """See base class."""
+        statistic_key = (vertex_name, field_name)
+        return self._field_null_fractions.get(statistic_key)
+
+    def get_field_most_common_values(self, vertex_name, field_name):
+        """See base class."""
+        statistic_key = (vertex_name, field_name)
+        return self._field_most_common_values.get(statistic_key)
+
+    def get_field_value_sample(self, vertex_name, field_name):
+        """See base class."""
+        statistic_key = (vertex_name, field_name)
+        return self._field_value_samples.get(statistic_key)
@@ -0,0 +1,523 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+"""Compact binary snapshots of statistics, which are loaded lazily using a memory-mapped file.
+
+Loading statistics into a LocalStatistics object requires building dicts containing every
+statistic, which becomes slow and memory-hungry for schemas with many classes. Snapshots store
+the statistics in a binary file instead, so that loading a snapshot only requires reading its
+header, and each statistic is read from the memory-mapped file when it is requested. Since the
+file is memory-mapped read-only, its pages are shared by all processes loading the same snapshot.
+
+A snapshot file has the following layout, with all integers stored in little-endian byte order:
+- a fixed-size preamble, containing the file format's magic bytes and version, and the length of
+  the header,
+- the header, a UTF-8 encoded JSON object containing the interned names of all classes and fields,
+  and the offset and number of records of each section of the file,
+- the sections, each of which is an array of fixed-size records sorted by their key. Names are
+  stored as indices into the list of interned names, so records can be found using binary search.
+  Degree histograms, field quantiles, most common field values and field value samples have
+  variable size, so their records point into separate data sections containing the histogram
+  buckets and the JSON-encoded field values.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+import json
+import mmap
+import struct
+
+import arrow
+import six
+
+from ..compiler.helpers import INBOUND_EDGE_DIRECTION, OUTBOUND_EDGE_DIRECTION
+from .statistics import Statistics
+
+
+SNAPSHOT_MAGIC = b'GQLSTATS'
+SNAPSHOT_VERSION = 2
+
+_PREAMBLE_STRUCT = struct.Struct('<8sII')  # magic, version, header length
+
+# Records start with the key they are sorted by, followed by their values.
+_CLASS_COUNT_STRUCT = struct.Struct('<Iq')  # class name, count
+_VERTEX_EDGE_VERTEX_COUNT_STRUCT = struct.Struct('<IIIq')  # source, edge, target, count
+_DISTINCT_FIELD_VALUES_COUNT_STRUCT = struct.Struct('<IIq')  # vertex, field, count
+_DEGREE_HISTOGRAM_INDEX_STRUCT = struct.Struct(
+    '<IIIIQI')  # source, edge, target, direction, first bucket index, number of buckets
+_DEGREE_HISTOGRAM_BUCKET_STRUCT = struct.Struct('<qqq')  # smallest degree, largest degree, count
+_FIELD_NULL_FRACTION_STRUCT = struct.Struct('<IId')  # vertex, field, null fraction
+_FIELD_JSON_INDEX_STRUCT = struct.Struct('<IIQI')  # vertex, field, data offset, data length
+_RECURSIVE_TRAVERSAL_VERTEX_COUNT_STRUCT = struct.Struct(
+    '<IIIIId')  # source, edge, target, direction, depth, count
+
+_EDGE_DIRECTION_IDS = {
+    OUTBOUND_EDGE_DIRECTION: 0,
+    INBOUND_EDGE_DIRECTION: 1,
+}
+
+_SECTION_ALIGNMENT = 8
+
+_CLASS_COUNTS_SECTION = 'class_counts'
+_VERTEX_EDGE_VERTEX_COUNTS_SECTION = 'vertex_edge_vertex_counts'
+_DISTINCT_FIELD_VALUES_COUNTS_SECTION = 'distinct_field_values_counts'
+_DEGREE_HISTOGRAM_INDEX_SECTION = 'degree_histogram_index'
+_DEGREE_HISTOGRAM_BUCKETS_SECTION = 'degree_histogram_buckets'
+_FIELD_QUANTILES_INDEX_SECTION = 'field_quantiles_index'
+_FIELD_QUANTILES_DATA_SECTION = 'field_quantiles_data'
+_FIELD_NULL_FRACTIONS_SECTION = 'field_null_fractions'
+_FIELD_MOST_COMMON_VALUES_INDEX_SECTION = 'field_most_common_values_index'
+_FIELD_MOST_COMMON_VALUES_DATA_SECTION = 'field_most_common_values_data'
+_FIELD_VALUE_SAMPLES_INDEX_SECTION = 'field_value_samples_index'
+_FIELD_VALUE_SAMPLES_DATA_SECTION = 'field_value_samples_data'
+_RECURSIVE_TRAVERSAL_VERTEX_COUNTS_SECTION = 'recursive_traversal_vertex_counts'
+
+
+def _encode_field_value(value):
+    """Return a JSON-serializable representation of a field value, tagged with its type."""
+    # bool is a subclass of int, and datetime is a subclass of date, so check them first.
+    if isinstance(value, bool):
+        return ['bool', value]
+    elif isinstance(value, datetime):
+        if value.tzinfo is None:
+            return ['datetime', value.isoformat()]
+        return ['datetime_tz', value.isoformat()]
+    elif isinstance(value, date):
+        return ['date', value.isoformat()]
+    elif isinstance(value, Decimal):
+        return ['decimal', str(value)]
+    elif isinstance(value, float):
+        return ['float', value]
+    elif isinstance(value, six.integer_types):
+        return ['int', value]
+    elif isinstance(value, six.string_types):
+        return ['string', value]
+    elif isinstance(value, (list, tuple)):
+        return ['list', [_encode_field_value(element) for element in value]]
+    else:
+        raise ValueError(u'Unsupported type of field value: {} {}'.format(type(value), value))
+
+
+def _decode_field_value(encoded_value):
+    """Return the field value corresponding to the output of _encode_field_value()."""
+    value_type, value = encoded_value
+    if value_type == 'datetime':
+        return arrow.get(value).naive
+    elif value_type == 'datetime_tz':
+        return arrow.get(value).datetime
+    elif value_type == 'date':
+        return arrow.get(value, 'YYYY-MM-DD').date()
+    elif value_type == 'decimal':
+        return Decimal(value)
+    elif value_type in ('bool', 'float', 'int', 'string'):
+        return value
+    elif value_type == 'list':
+        return [_decode_field_value(element) for element in value]
+    else:
+        raise AssertionError(u'Unknown type of encoded field value: {}'.format(encoded_value))
+
+
+def _align_offset(offset):
+    """Return the smallest offset at which a section can start that is not before the given one."""
+    return -(-offset // _SECTION_ALIGNMENT) * _SECTION_ALIGNMENT
+
+
+def _make_records_section(record_struct, records):
+    """Return the bytes of a section containing the given records, in sorted order."""
+    return b''.join(record_struct.pack(*record) for record in sorted(records))
+
+
+def _make_field_json_statistic_sections(index_section_name, data_section_name, name_ids,
+                                        field_statistics, encode_statistic):
+    """Return the index and data sections of a field statistic that is stored as JSON.
+
+    Args:
+        index_section_name: str, name of the section containing the index records.
+        data_section_name: str, name of the section containing the JSON-encoded statistics.
+        name_ids: dict, str -> int, mapping each name to its interned id.
+        field_statistics: dict, (str, str) -> statistic, mapping vertex class name and property
+                          field name to the value of the statistic.
+        encode_statistic: function, converting a value of the statistic to a JSON-serializable
+                          value.
+
+    Returns:
+        list of two (section name, number of records, bytes) tuples, the index and data sections.
+    """
+    index_records = []
+    data = []
+    data_length = 0
+    for statistic_key, statistic in six.iteritems(field_statistics):
+        vertex_name, field_name = statistic_key
+        encoded_statistic = json.dumps(encode_statistic(statistic)).encode('utf-8')
+        index_records.append((
+            name_ids[vertex_name], name_ids[field_name], data_length, len(encoded_statistic),
+        ))
+        data.append(encoded_statistic)
+        data_length += len(encoded_statistic)
+
+    return [
+        (index_section_name, len(index_records),
+         _make_records_section(_FIELD_JSON_INDEX_STRUCT, index_records)),
+        (data_section_name, data_length, b''.join(data)),
+    ]
+
+
+def save_statistics_snapshot(
+    file_path, class_counts, vertex_edge_vertex_counts=None,
+    distinct_field_values_counts=None, field_quantiles=None,
+    vertex_edge_vertex_degree_histograms=None, recursive_traversal_vertex_counts=None,
+    field_null_fractions=None, field_most_common_values=None, field_value_samples=None
+):
+    """Write a snapshot of the given statistics to a file, for use with SnapshotStatistics.
+
+    Args:
+        file_path: str, path of the snapshot file to write. Existing files are overwritten.
+        class_counts: dict, in the format expected by LocalStatistics.
+        vertex_edge_vertex_counts: optional dict, in the format expected by LocalStatistics.
+        distinct_field_values_counts: optional dict, in the format expected by LocalStatistics.
+        field_quantiles: optional dict, in the format expected by LocalStatistics. Quantile
+                         values must be ints, floats, Decimals, strings, dates or datetimes.
+        vertex_edge_vertex_degree_histograms: optional dict, in the format expected by
+                                              LocalStatistics.
+        recursive_traversal_vertex_counts: optional dict, in the format expected by
+                                           LocalStatistics.
+        field_null_fractions: optional dict, in the format expected by LocalStatistics.
+        field_most_common_values: optional dict, in the format expected by LocalStatistics.
+                                  Values must be of the types supported for quantile values, or
+                                  booleans.
+        field_value_samples: optional dict, in the format expected by LocalStatistics. Values
+                             must be of the types supported for most common values, or lists
+                             of such values.
+    """
+    if vertex_edge_vertex_counts is None:
+        vertex_edge_vertex_counts = dict()
+    if distinct_field_values_counts is None:
+        distinct_field_values_counts = dict()
+    if field_quantiles is None:
+        field_quantiles = dict()
+    if vertex_edge_vertex_degree_histograms is None:
+        vertex_edge_vertex_degree_histograms = dict()
+    if recursive_traversal_vertex_counts is None:
+        recursive_traversal_vertex_counts = dict()
+    if field_null_fractions is None:
+        field_null_fractions = dict()
+    if field_most_common_values is None:
+        field_most_common_values = dict()
+    if field_value_samples is None:
+        field_value_samples = dict()
+
+    names = set(class_counts)
+    for statistic_key in vertex_edge_vertex_counts:
+        names.update(statistic_key)
+    for statistic_key in distinct_field_values_counts:
+        names.update(statistic_key)
+    for field_statistics in (field_quantiles, field_null_fractions, field_most_common_values,
+                             field_value_samples):
+        for statistic_key in field_statistics:
+            names.update(statistic_key)
+    for source_name, edge_name, target_name, _ in vertex_edge_vertex_degree_histograms:
+        names.update((source_name, edge_name, target_name))
+    for source_name, edge_name, target_name, _, _ in recursive_traversal_vertex_counts:
+        names.update((source_name, edge_name, target_name))
+    names = sorted(names)
+    name_ids = {name: name_id for name_id, name in enumerate(names)}
+
+    degree_histogram_index_records = []
+    degree_histogram_bucket_records = []
+    for statistic_key, degree_histogram in six.iteritems(vertex_edge_vertex_degree_histograms):
+        source_name, edge_name, target_name, edge_direction = statistic_key
+        if edge_direction not in _EDGE_DIRECTION_IDS:
+            raise ValueError(u'Invalid edge direction in degree histogram key: {}'
+                             .format(statistic_key))
+        degree_histogram_index_records.append((
+            name_ids[source_name], name_ids[edge_name], name_ids[target_name],
+            _EDGE_DIRECTION_IDS[edge_direction],
+            len(degree_histogram_bucket_records), len(degree_histogram),
+        ))
+        degree_histogram_bucket_records.extend(degree_histogram)
+
+    recursive_traversal_vertex_count_records = []
+    for statistic_key, count in six.iteritems(recursive_traversal_vertex_counts):
+        source_name, edge_name, target_name, edge_direction, depth = statistic_key
+        if edge_direction not in _EDGE_DIRECTION_IDS:
+            raise ValueError(u'Invalid edge direction in recursive traversal vertex count key: {}'
+                             .format(statistic_key))
+        recursive_traversal_vertex_count_records.append((
+            name_ids[source_name], name_ids[edge_name], name_ids[target_name],
+            _EDGE_DIRECTION_IDS[edge_direction], depth, count,
+        ))
+
+    class_count_records = [
+        (name_ids[class_name], count)
+        for class_name, count in six.iteritems(class_counts)
+    ]
+    vertex_edge_vertex_count_records = [
+        tuple(name_ids[name] for name in statistic_key) + (count,)
+        for statistic_key, count in six.iteritems(vertex_edge_vertex_counts)
+    ]
+    distinct_field_values_count_records = [
+        tuple(name_ids[name] for name in statistic_key) + (count,)
+        for statistic_key, count in six.iteritems(distinct_field_values_counts)
+    ]
+    field_null_fraction_records = [
+        tuple(name_ids[name] for name in statistic_key) + (null_fraction,)
+        for statistic_key, null_fraction in six.iteritems(field_null_fractions)
+    ]
+
+    # Each section is described by its name, its number of records and its bytes.
+    # Degree histogram buckets are not sorted, since they are found using the histogram index.
+    sections = [
+        (_CLASS_COUNTS_SECTION, len(class_count_records),
+         _make_records_section(_CLASS_COUNT_STRUCT, class_count_records)),
+        (_VERTEX_EDGE_VERTEX_COUNTS_SECTION, len(vertex_edge_vertex_count_records),
+         _make_records_section(_VERTEX_EDGE_VERTEX_COUNT_STRUCT, vertex_edge_vertex_count_records)),
+        (_DISTINCT_FIELD_VALUES_COUNTS_SECTION, len(distinct_field_values_count_records),
+         _make_records_section(
+             _DISTINCT_FIELD_VALUES_COUNT_STRUCT, distinct_field_values_count_records)),
+        (_DEGREE_HISTOGRAM_INDEX_SECTION, len(degree_histogram_index_records),
+         _make_records_section(_DEGREE_HISTOGRAM_INDEX_STRUCT, degree_histogram_index_records)),
+        (_DEGREE_HISTOGRAM_BUCKETS_SECTION, len(degree_histogram_bucket_records),
+         b''.join(_DEGREE_HISTOGRAM_BUCKET_STRUCT.pack(*bucket)
+                  for bucket in degree_histogram_bucket_records)),
+        (_RECURSIVE_TRAVERSAL_VERTEX_COUNTS_SECTION, len(recursive_traversal_vertex_count_records),
+         _make_records_section(
+             _RECURSIVE_TRAVERSAL_VERTEX_COUNT_STRUCT, recursive_traversal_vertex_count_records)),
+        (_FIELD_NULL_FRACTIONS_SECTION, len(field_null_fraction_records),
+         _make_records_section(_FIELD_NULL_FRACTION_STRUCT, field_null_fraction_records)),
+    ]
+    sections.extend(_make_field_json_statistic_sections(
+        _FIELD_QUANTILES_INDEX_SECTION, _FIELD_QUANTILES_DATA_SECTION, name_ids, field_quantiles,
+        lambda quantiles: [_encode_field_value(value) for value in quantiles]))
+    sections.extend(_make_field_json_statistic_sections(
+        _FIELD_MOST_COMMON_VALUES_INDEX_SECTION, _FIELD_MOST_COMMON_VALUES_DATA_SECTION, name_ids,
+        field_most_common_values,
+        lambda most_common_values: [
+            [_encode_field_value(value), fraction]
+            for value, fraction in most_common_values
+        ]))
+    sections.extend(_make_field_json_statistic_sections(
+        _FIELD_VALUE_SAMPLES_INDEX_SECTION, _FIELD_VALUE_SAMPLES_DATA_SECTION, name_ids,
+        field_value_samples,
+        lambda sampled_values: [_encode_field_value(value) for value in sampled_values]))
+
+    # Section offsets are relative to the start of the data, which follows the header.
+    section_offsets = dict()
+    offset = 0
+    for section_name, _, section_bytes in sections:
+        section_offsets[section_name] = offset
+        offset = _align_offset(offset + len(section_bytes))
+
+    header = json.dumps({
+        'names': names,
+        'sections': {
+            section_name: [section_offsets[section_name], num_records]
+            for section_name, num_records, _ in sections
+        },
+    }, sort_keys=True).encode('utf-8')
+    data_start = _align_offset(_PREAMBLE_STRUCT.size + len(header))
+
+    with open(file_path, 'wb') as snapshot_file:
+        snapshot_file.write(_PREAMBLE_STRUCT.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        snapshot_file.write(header)
+        for section_name, _, section_bytes in sections:
+            section_start = data_start + section_offsets[section_name]
+            snapshot_file.write(b'\x00' * (section_start - snapshot_file.tell()))
+            snapshot_file.write(section_bytes)
+
+
+class SnapshotStatistics(Statistics):
+    """Statistics class that lazily reads statistics from a memory-mapped snapshot file."""
+
+    def __init__(self, file_path):
+        """Load the header of a snapshot file written using save_statistics_snapshot().
+
+        Args:
+            file_path: str, path of the snapshot file. The file must not be modified while the
+                       SnapshotStatistics object is used.
+
+        Raises:
+            ValueError, if the file is not a snapshot in a supported version of the file format.
+        """
+        with open(file_path, 'rb') as snapshot_file:
+            # The mapping remains valid after the file is closed.
+            self._buffer = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._buffer) < _PREAMBLE_STRUCT.size:
+            raise ValueError(u'File {} is not a statistics snapshot.'.format(file_path))
+        magic, version, header_length = _PREAMBLE_STRUCT.unpack_from(self._buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(u'File {} is not a statistics snapshot.'.format(file_path))
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(u'Statistics snapshot {} has unsupported version {}, expected {}.'
+                             .format(file_path, version, SNAPSHOT_VERSION))
+
+        header_start = _PREAMBLE_STRUCT.size
+        header = json.loads(
+            self._buffer[header_start:header_start + header_length].decode('utf-8'))
+        self._name_ids = {name: name_id for name_id, name in enumerate(header['names'])}
+        data_start = _align_offset(header_start + header_length)
+        self._sections = {
+            section_name: (data_start + section_offset, num_records)
+            for section_name, (section_offset, num_records) in six.iteritems(header['sections'])
+        }
+
+        # Statistics stored as JSON are decoded on first use, and cached since decoding them is
+        # relatively slow. Each cache maps (vertex name, field name) to the decoded statistic.
+        self._field_quantiles_cache = dict()
+        self._field_most_common_values_cache = dict()
+        self._field_value_samples_cache = dict()
+
+    def _get_name_ids(self, names):
+        """Return the interned ids of the given names, or None if any of them is unknown."""
+        name_ids = []
+        for name in names:
+            name_id = self._name_ids.get(name)
+            if name_id is None:
+                return None
+            name_ids.append(name_id)
+        return tuple(name_ids)
+
+    def _find_record(self, section_name, record_struct, names, key_suffix=()):
+        """Return the record of a section with the given key using binary search, or None."""
+        name_ids = self._get_name_ids(names)
+        if name_ids is None:
+            return None
+        key = name_ids + key_suffix
+
+        section_offset, num_records = self._sections[section_name]
+        low, high = 0, num_records
+        while low < high:
+            middle = (low + high) // 2
+            record = record_struct.unpack_from(
+                self._buffer, section_offset + middle * record_struct.size)
+            record_key = record[:len(key)]
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return record
+        return None
+
+    def _get_field_json_statistic(self, index_section_name, data_section_name, cache,
+                                  statistic_key, decode_statistic):
+        """Return a field statistic stored as JSON, decoding and caching it on first use.
+
+        Args:
+            index_section_name: str, name of the section containing the index records.
+            data_section_name: str, name of the section containing the JSON-encoded statistics.
+            cache: dict, mapping statistic keys to already decoded statistics.
+            statistic_key: tuple (str, str), the vertex class name and property field name.
+            decode_statistic: function, converting the decoded JSON value to the statistic.
+
+        Returns:
+            the statistic, or None if it does not exist.
+        """
+        if statistic_key not in cache:
+            record = self._find_record(index_section_name, _FIELD_JSON_INDEX_STRUCT, statistic_key)
+            statistic = None
+            if record is not None:
+                data_offset, data_length = record[-2:]
+                section_offset, _ = self._sections[data_section_name]
+                start = section_offset + data_offset
+                statistic = decode_statistic(
+                    json.loads(self._buffer[start:start + data_length].decode('utf-8')))
+            cache[statistic_key] = statistic
+        return cache[statistic_key]
+
+    def get_class_count(self, class_name):
+        """See base class."""
+        record = self._find_record(_CLASS_COUNTS_SECTION, _CLASS_COUNT_STRUCT, (class_name,))
+        if record is None:
+            raise AssertionError(u'Class count statistic is required, but entry not found for: '
+                                 u'{}'.format(class_name))
+        return record[-1]
+
+    def get_vertex_edge_vertex_count(
+        self, vertex_source_class_name, edge_class_name, vertex_target_class_name
+    ):
+        """See base class."""
+        record = self._find_record(
+            _VERTEX_EDGE_VERTEX_COUNTS_SECTION, _VERTEX_EDGE_VERTEX_COUNT_STRUCT,
+            (vertex_source_class_name, edge_class_name, vertex_target_class_name))
+        if record is None:
+            return None
+        return record[-1]
+
+    def get_vertex_edge_vertex_degree_histogram(
+        self, vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction
+    ):
+        """See base class."""
+        if edge_direction not in _EDGE_DIRECTION_IDS:
+            return None
+        record = self._find_record(
+            _DEGREE_HISTOGRAM_INDEX_SECTION, _DEGREE_HISTOGRAM_INDEX_STRUCT,
+            (vertex_source_class_name, edge_class_name, vertex_target_class_name),
+            key_suffix=(_EDGE_DIRECTION_IDS[edge_direction],))
+        if record is None:
+            return None
+
+        first_bucket_index, num_buckets = record[-2:]
+        buckets_offset, _ = self._sections[_DEGREE_HISTOGRAM_BUCKETS_SECTION]
+        bucket_size = _DEGREE_HISTOGRAM_BUCKET_STRUCT.size
+        return [
+            _DEGREE_HISTOGRAM_BUCKET_STRUCT.unpack_from(
+                self._buffer, buckets_offset + bucket_index * bucket_size)
+            for bucket_index in six.moves.xrange(
+                first_bucket_index, first_bucket_index + num_buckets)
+        ]
+
+    def get_recursive_traversal_vertex_count(
+        self, vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction,
+        depth
+    ):
+        """See base class."""
+        if edge_direction not in _EDGE_DIRECTION_IDS:
+            return None
+        record = self._find_record(
+            _RECURSIVE_TRAVERSAL_VERTEX_COUNTS_SECTION, _RECURSIVE_TRAVERSAL_VERTEX_COUNT_STRUCT,
+            (vertex_source_class_name, edge_class_name, vertex_target_class_name),
+            key_suffix=(_EDGE_DIRECTION_IDS[edge_direction], depth))
+        if record is None:
+            return None
+        return record[-1]
+
+    def get_distinct_field_values_count(self, vertex_name, field_name):
+        """See base class."""
+        record = self._find_record(
+            _DISTINCT_FIELD_VALUES_COUNTS_SECTION, _DISTINCT_FIELD_VALUES_COUNT_STRUCT,
+            (vertex_name, field_name))
+        if record is None:
+            return None
+        return record[-1]
+
+    def get_field_quantiles(self, vertex_name, field_name):
+        """See base class."""
+        return self._get_field_json_statistic(
+            _FIELD_QUANTILES_INDEX_SECTION, _FIELD_QUANTILES_DATA_SECTION,
+            self._field_quantiles_cache, (vertex_name, field_name),
+            lambda encoded_quantiles: [_decode_field_value(value) for value in encoded_quantiles])
+
+    def get_field_null_fraction(self, vertex_name, field_name):
+        """See base class."""
+        record = self._find_record(
+            _FIELD_NULL_FRACTIONS_SECTION, _FIELD_NULL_FRACTION_STRUCT, (vertex_name, field_name))
+        if record is None:
+            return None
+        return record[-1]
+
+    def get_field_most_common_values(self, vertex_name, field_name):
+        """See base class."""
+        return self._get_field_json_statistic(
+            _FIELD_MOST_COMMON_VALUES_INDEX_SECTION, _FIELD_MOST_COMMON_VALUES_DATA_SECTION,
+            self._field_most_common_values_cache, (vertex_name, field_name),
+            lambda encoded_most_common_values: [
+                (_decode_field_value(value), fraction)
+                for value, fraction in encoded_most_common_values
+            ])
+
+    def get_field_value_sample(self, vertex_name, field_name):
+        """See base class."""
+        return self._get_field_json_statistic(
+            _FIELD_VALUE_SAMPLES_INDEX_SECTION, _FIELD_VALUE_SAMPLES_DATA_SECTION,
+            self._field_value_samples_cache, (vertex_name, field_name),
+            lambda encoded_sampled_values: [
+                _decode_field_value(value) for value in encoded_sampled_values
+            ])
@@ -4,9 +4,12 @@ from collections import namedtuple
 from graphql.language.printer import print_ast
 
 from graphql_compiler.ast_manipulation import safe_parse_graphql
-from graphql_compiler.cost_estimation.cardinality_estimator import estimate_number_of_pages
+from graphql_compiler.compiler.compiler_frontend import ast_to_ir
+from graphql_compiler.cost_estimation.cardinality_estimator import (
+    estimate_number_of_pages_from_query_metadata
+)
 from graphql_compiler.query_pagination.query_splitter import (
-    ASTWithParameters, split_into_page_query_and_remainder_query
+    ASTWithParameters, split_into_page_queries, split_into_page_query_and_remainder_query
 )
 
 
@@ -54,13 +57,16 @@ def paginate_query_ast(schema_info, query_ast, parameters, page_size):
         None,
     )
 
-    # HACK(vlad): Since the current cost estimator expects GraphQL queries given as a string, we
-    #             print the given AST and provide that to the cost estimator.
-    graphql_query_string = print_ast(query_ast)
-    num_pages = estimate_number_of_pages(schema_info, graphql_query_string, parameters, page_size)
+    # The query is compiled only once, and the resulting metadata is shared by the cost estimator
+    # and the query splitter.
+    query_metadata = ast_to_ir(
+        schema_info.schema, query_ast, type_equivalence_hints=schema_info.type_equivalence_hints
+    ).query_metadata_table
+    num_pages = estimate_number_of_pages_from_query_metadata(
+        schema_info, query_metadata, parameters, page_size)
     if num_pages > 1:
         result_queries = split_into_page_query_and_remainder_query(
-            schema_info, query_ast, parameters, num_pages)
+            schema_info, query_ast, query_metadata, parameters, num_pages)
 
     return result_queries
 
@@ -74,8 +80,6 @@ def paginate_query(schema_info, query_string, parameters, page_size):
 
     Args:
         schema_info: QueryPlanningSchemaInfo
-        schema_graph: SchemaGraph instance.
-        statistics: Statistics object.
         query_string: str, valid GraphQL query to be paginated.
         parameters: dict, parameters with which query will be estimated.
         page_size: int, describes the desired number of result rows per page.
@@ -98,9 +102,46 @@ def paginate_query(schema_info, query_string, parameters, page_size):
         print_ast(next_page_ast_with_parameters.query_ast),
         next_page_ast_with_parameters.parameters,
     )
-    remainder_query_with_parameters = QueryStringWithParameters(
-        print_ast(remainder_ast_with_parameters.query_ast),
-        remainder_ast_with_parameters.parameters,
-    )
+    remainder_query_with_parameters = None
+    if remainder_ast_with_parameters is not None:
+        remainder_query_with_parameters = QueryStringWithParameters(
+            print_ast(remainder_ast_with_parameters.query_ast),
+            remainder_ast_with_parameters.parameters,
+        )
 
     return page_query_with_parameters, remainder_query_with_parameters
+
+
+def split_into_pages(schema_info, query_string, parameters, num_pages):
+    """Split a query string into num_pages disjoint queries that may be executed concurrently.
+
+    Unlike paginate_query(), which produces one page at a time, all page boundaries are computed at
+    once from the statistics of the pagination key of the query's root vertex, so the resulting
+    queries can be distributed over a pool of workers. Since the statistics may not match the data
+    exactly, you should expect the number of results of each page to differ from the others.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_string: str, valid GraphQL query to be split.
+        parameters: dict, parameters with which query will be estimated.
+        num_pages: int, number of pages to split the query into.
+
+    Returns:
+        list of QueryStringWithParameters namedtuples, whose result data are disjoint and whose
+        union is equivalent to the given query's result data. There are num_pages queries, unless
+        the query's filters allow fewer values of the pagination key, in which case there are fewer.
+
+    Raises:
+        ValueError if num_pages is below 1, or if the query can't be split into pages.
+    """
+    query_ast = safe_parse_graphql(query_string)
+    query_metadata = ast_to_ir(
+        schema_info.schema, query_ast, type_equivalence_hints=schema_info.type_equivalence_hints
+    ).query_metadata_table
+
+    return [
+        QueryStringWithParameters(print_ast(page_ast_with_parameters.query_ast),
+                                  page_ast_with_parameters.parameters)
+        for page_ast_with_parameters in split_into_page_queries(
+            schema_info, query_ast, query_metadata, parameters, num_pages)
+    ]
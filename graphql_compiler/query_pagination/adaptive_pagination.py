@@ -0,0 +1,346 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+"""Paginate a query adaptively, using the actual sizes of the pages executed so far.
+
+The cardinality estimator may be off by orders of magnitude, so pages whose boundaries are all
+chosen upfront may be tiny or enormous. Instead, the adaptive paginator produces one page at a
+time, in increasing order of the pagination key, and chooses the boundary of each page using the
+number of result rows of the previous pages:
+- after a page is executed, the fraction of the pagination key domain covered by the next page is
+  scaled by the ratio between the target page size and the observed page size. Undersized pages
+  thus cause the following pages to cover more values, effectively merging them together, while
+  oversized pages cause the following pages to cover fewer values.
+- if a maximum page size is given, pages exceeding it are rejected, and their range of pagination
+  key values is bisected until the resulting pages are small enough, or cannot be bisected further.
+
+The paginator's state is described by a PaginationCursor namedtuple made only of JSON-serializable
+values. Long-running exports can persist the cursor after processing each page, and resume from it
+after a failure by passing it to a new paginator for the same query, parameters and statistics.
+"""
+from collections import namedtuple
+
+from graphql.language.printer import print_ast
+
+from graphql_compiler.ast_manipulation import safe_parse_graphql
+from graphql_compiler.compiler.compiler_frontend import ast_to_ir
+from graphql_compiler.cost_estimation.cardinality_estimator import (
+    estimate_query_result_cardinality_from_query_metadata
+)
+from graphql_compiler.query_pagination import QueryStringWithParameters
+from graphql_compiler.query_pagination.parameter_generator import (
+    convert_int_to_pagination_key_value, convert_pagination_key_value_to_int,
+    get_fraction_of_domain_below, get_pagination_key_domain, get_pagination_parameter_names,
+    get_smallest_int_value_with_fraction_of_domain_below
+)
+from graphql_compiler.query_pagination.query_parameterizer import generate_parameterized_queries
+
+
+# The fraction of the domain covered by consecutive pages grows at most by this factor, so that a
+# few undersized pages in a sparse range of values don't produce an enormous page afterwards.
+DEFAULT_MAX_PAGE_GROWTH = 4.0
+
+# PaginationCursor namedtuples describe how far an adaptive pagination has progressed.
+PaginationCursor = namedtuple(
+    'PaginationCursor',
+    (
+        'next_lower_bound',     # int, str or None, inclusive lower bound of the pagination key
+                                # values of the next page, or None if all pages have been accepted.
+        'next_upper_bound',     # int, str or None, exclusive upper bound of the pagination key
+                                # values of the next page, if it was fixed by bisecting a rejected
+                                # page. Otherwise None, and the bound is chosen using page_fraction.
+        'page_fraction',        # float, fraction of the pagination key domain the next page is
+                                # expected to cover to contain the target number of rows.
+        'num_pages',            # int, number of pages accepted so far.
+        'num_rows',             # int, total number of result rows of the accepted pages.
+    ),
+)
+
+# PaginationProgress namedtuples summarize the progress of an adaptive pagination.
+PaginationProgress = namedtuple(
+    'PaginationProgress',
+    (
+        'num_pages',                        # int, number of pages accepted so far.
+        'num_rows',                         # int, total number of result rows of those pages.
+        'fraction_done',                    # float between 0 and 1, estimated fraction of the
+                                            # pagination key domain covered by those pages.
+        'estimated_num_rows_remaining',     # float, estimated number of result rows that the
+                                            # remaining pages will return.
+    ),
+)
+
+# AdaptivePage namedtuples describe a page of results accepted by the adaptive paginator.
+AdaptivePage = namedtuple(
+    'AdaptivePage',
+    (
+        'query',                # QueryStringWithParameters namedtuple, the executed page query.
+        'rows',                 # list, the result rows of the page query.
+        'progress',             # PaginationProgress namedtuple, after accepting the page.
+        'cursor',               # PaginationCursor namedtuple, from which the pagination can be
+                                # resumed once the page has been processed.
+    ),
+)
+
+
+class AdaptivePaginator(object):
+    """Produce page queries one at a time, adapting page boundaries to the observed page sizes."""
+
+    def __init__(self, schema_info, query_string, parameters, target_page_size,
+                 max_page_size=None, cursor=None, max_page_growth=DEFAULT_MAX_PAGE_GROWTH):
+        """Create a paginator for the given query, starting from its beginning or from a cursor.
+
+        Args:
+            schema_info: QueryPlanningSchemaInfo
+            query_string: str, valid GraphQL query to be paginated.
+            parameters: dict, parameters with which query will be executed.
+            target_page_size: int, the desired number of result rows per page.
+            max_page_size: optional int, at least target_page_size. Pages with more result rows
+                           are rejected and bisected, unless they cover a single pagination key
+                           value. If not provided, pages are never rejected.
+            cursor: optional PaginationCursor namedtuple, produced by a paginator for the same
+                    query, parameters and schema_info, from which the pagination is resumed.
+            max_page_growth: optional float greater than 1, the factor by which the fraction of
+                             the domain covered by a page may grow from one page to the next.
+
+        Raises:
+            ValueError if the page sizes are invalid, or if the query can't be paginated.
+        """
+        if target_page_size < 1:
+            raise ValueError(u'Could not page query {} with page size lower than 1: {}'
+                             .format(query_string, target_page_size))
+        if max_page_size is not None and max_page_size < target_page_size:
+            raise ValueError(u'Expected max_page_size to be at least the target page size {}, '
+                             u'but got: {}'.format(target_page_size, max_page_size))
+        if max_page_growth <= 1:
+            raise ValueError(u'Expected max_page_growth to be greater than 1, but got: {}'
+                             .format(max_page_growth))
+
+        self.target_page_size = target_page_size
+        self.max_page_size = max_page_size
+        self.max_page_growth = max_page_growth
+
+        self._query_ast = safe_parse_graphql(query_string)
+        self._parameters = parameters
+        query_metadata = ast_to_ir(
+            schema_info.schema, self._query_ast,
+            type_equivalence_hints=schema_info.type_equivalence_hints
+        ).query_metadata_table
+        self._parameterized_queries = generate_parameterized_queries(
+            schema_info, self._query_ast, query_metadata, parameters)
+        self._domain = get_pagination_key_domain(schema_info, self._parameterized_queries)
+        self._estimated_num_rows = estimate_query_result_cardinality_from_query_metadata(
+            schema_info, query_metadata, parameters)
+
+        if cursor is None:
+            # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+            # pylint: disable=old-division
+            #
+            page_fraction = min(1.0, target_page_size / max(1.0, self._estimated_num_rows))
+            # pylint: enable=old-division
+            cursor = PaginationCursor(
+                next_lower_bound=convert_int_to_pagination_key_value(
+                    self._domain, self._domain.lower_bound),
+                next_upper_bound=None,
+                page_fraction=page_fraction,
+                num_pages=0,
+                num_rows=0,
+            )
+        self._cursor = cursor
+
+        # Bounds of the page returned by get_next_page_query(), whose size has yet to be recorded.
+        self._pending_page_bounds = None
+
+    @property
+    def cursor(self):
+        """Return the PaginationCursor describing the pages accepted so far."""
+        return self._cursor
+
+    def is_finished(self):
+        """Return True if the pages accepted so far cover all the query's results."""
+        return self._cursor.next_lower_bound is None
+
+    def get_progress(self):
+        """Return a PaginationProgress namedtuple describing the pages accepted so far."""
+        if self.is_finished():
+            fraction_done = 1.0
+        elif self._cursor.num_pages == 0:
+            fraction_done = 0.0
+        else:
+            fraction_done = get_fraction_of_domain_below(
+                self._domain, convert_pagination_key_value_to_int(
+                    self._domain, self._cursor.next_lower_bound))
+
+        # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+        # pylint: disable=old-division
+        if fraction_done == 0.0:
+            estimated_num_rows_remaining = float(self._estimated_num_rows)
+        else:
+            estimated_num_rows_remaining = (
+                self._cursor.num_rows * (1.0 - fraction_done) / fraction_done)
+        # pylint: enable=old-division
+
+        return PaginationProgress(
+            num_pages=self._cursor.num_pages,
+            num_rows=self._cursor.num_rows,
+            fraction_done=fraction_done,
+            estimated_num_rows_remaining=estimated_num_rows_remaining,
+        )
+
+    def get_next_page_query(self):
+        """Return the query for the next page of results, or None if all pages were accepted.
+
+        The number of result rows of the returned query must be recorded using
+        record_page_size() before asking for another page.
+
+        Returns:
+            QueryStringWithParameters namedtuple or None
+        """
+        if self._pending_page_bounds is not None:
+            raise AssertionError(u'The size of the previous page must be recorded before asking '
+                                 u'for the next page: {}'.format(self._pending_page_bounds))
+        if self.is_finished():
+            return None
+
+        lower_bound = convert_pagination_key_value_to_int(
+            self._domain, self._cursor.next_lower_bound)
+        if self._cursor.next_upper_bound is not None:
+            upper_bound = convert_pagination_key_value_to_int(
+                self._domain, self._cursor.next_upper_bound)
+        else:
+            upper_bound = get_smallest_int_value_with_fraction_of_domain_below(
+                self._domain, lower_bound + 1,
+                get_fraction_of_domain_below(self._domain, lower_bound) +
+                self._cursor.page_fraction)
+        if upper_bound >= self._domain.upper_bound:
+            # The last page has no upper bound, so that it also covers any values above the
+            # domain's upper bound, e.g. if the statistics are out of date.
+            upper_bound = None
+
+        self._pending_page_bounds = (lower_bound, upper_bound)
+
+        # Likewise, the first page has no lower bound.
+        page_lower_bound = lower_bound if self._cursor.num_pages > 0 else None
+        return self._make_page_query(page_lower_bound, upper_bound)
+
+    def record_page_size(self, num_rows):
+        """Record the number of result rows of the query returned by get_next_page_query().
+
+        Args:
+            num_rows: int, the number of result rows of the page query.
+
+        Returns:
+            bool, True if the page was accepted. False if the page exceeded max_page_size and was
+            rejected, in which case its rows must be discarded, and the next page query covers
+            half of the rejected page's pagination key values.
+        """
+        if self._pending_page_bounds is None:
+            raise AssertionError(u'Expected a page query to have been produced by '
+                                 u'get_next_page_query() before recording its size.')
+        lower_bound, upper_bound = self._pending_page_bounds
+        self._pending_page_bounds = None
+
+        span_upper_bound = self._domain.upper_bound if upper_bound is None else upper_bound
+        is_oversized = self.max_page_size is not None and num_rows > self.max_page_size
+        if is_oversized and span_upper_bound - lower_bound >= 2:
+            # Bisecting in the space of pagination key values, rather than in the space of domain
+            # fractions, ensures progress even where the statistics suggest there are no values.
+            bisection_point = lower_bound + (span_upper_bound - lower_bound) // 2
+            self._cursor = self._cursor._replace(
+                next_upper_bound=convert_int_to_pagination_key_value(
+                    self._domain, bisection_point))
+            return False
+
+        covered_fraction = (
+            get_fraction_of_domain_below(self._domain, span_upper_bound) -
+            get_fraction_of_domain_below(self._domain, lower_bound))
+        if covered_fraction <= 0.0:
+            covered_fraction = self._cursor.page_fraction
+
+        # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+        # pylint: disable=old-division
+        #
+        if num_rows == 0:
+            growth = self.max_page_growth
+        else:
+            growth = min(self.max_page_growth, float(self.target_page_size) / num_rows)
+        # pylint: enable=old-division
+
+        next_lower_bound = None
+        if upper_bound is not None:
+            next_lower_bound = convert_int_to_pagination_key_value(self._domain, upper_bound)
+        self._cursor = PaginationCursor(
+            next_lower_bound=next_lower_bound,
+            next_upper_bound=None,
+            page_fraction=min(1.0, covered_fraction * growth),
+            num_pages=self._cursor.num_pages + 1,
+            num_rows=self._cursor.num_rows + num_rows,
+        )
+        return True
+
+    def _make_page_query(self, lower_bound, upper_bound):
+        """Return the QueryStringWithParameters selecting the pagination key values in bounds.
+
+        Args:
+            lower_bound: int or None, inclusive lower bound of the page's pagination key values.
+                         If None, the page has no lower bound.
+            upper_bound: int or None, exclusive upper bound of the page's pagination key values.
+                         If None, the page has no upper bound.
+
+        Returns:
+            QueryStringWithParameters namedtuple
+        """
+        upper_parameter_name, lower_parameter_name = get_pagination_parameter_names(
+            self._parameterized_queries)
+        page_parameters = dict(self._parameterized_queries.user_parameters)
+        if lower_bound is not None:
+            page_parameters[lower_parameter_name] = convert_int_to_pagination_key_value(
+                self._domain, lower_bound)
+        if upper_bound is not None:
+            page_parameters[upper_parameter_name] = convert_int_to_pagination_key_value(
+                self._domain, upper_bound)
+
+        if lower_bound is None and upper_bound is None:
+            page_query_ast = self._query_ast
+            page_parameters = self._parameters
+        elif lower_bound is None:
+            page_query_ast = self._parameterized_queries.next_page_query
+        elif upper_bound is None:
+            page_query_ast = self._parameterized_queries.remainder_query
+        else:
+            page_query_ast = self._parameterized_queries.bounded_page_query
+
+        return QueryStringWithParameters(print_ast(page_query_ast), page_parameters)
+
+
+def execute_adaptively_paginated_query(schema_info, query_string, parameters, target_page_size,
+                                       execute_query, max_page_size=None, cursor=None):
+    """Execute a query page by page, adapting the page boundaries to the observed page sizes.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_string: str, valid GraphQL query to be paginated.
+        parameters: dict, parameters with which query will be executed.
+        target_page_size: int, the desired number of result rows per page.
+        execute_query: function taking a GraphQL query string and its parameters, and returning
+                       the list of its result rows, e.g. by compiling and running it on a backend.
+        max_page_size: optional int, at least target_page_size. Pages with more result rows are
+                       discarded and re-executed as two smaller pages, unless they cover a single
+                       pagination key value. If not provided, pages are never discarded.
+        cursor: optional PaginationCursor namedtuple, taken from a page produced by an earlier call
+                for the same query, parameters and schema_info, from which the pagination resumes.
+
+    Yields:
+        AdaptivePage namedtuples, in increasing order of the pagination key. The result rows of all
+        pages are together equivalent to the query's result rows.
+    """
+    paginator = AdaptivePaginator(
+        schema_info, query_string, parameters, target_page_size,
+        max_page_size=max_page_size, cursor=cursor)
+    while not paginator.is_finished():
+        page_query = paginator.get_next_page_query()
+        rows = list(execute_query(page_query.query_string, page_query.parameters))
+        if paginator.record_page_size(len(rows)):
+            yield AdaptivePage(
+                query=page_query,
+                rows=rows,
+                progress=paginator.get_progress(),
+                cursor=paginator.cursor,
+            )
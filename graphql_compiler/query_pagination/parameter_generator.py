@@ -1,4 +1,439 @@
 # Copyright 2019-present Kensho Technologies, LLC.
+from collections import namedtuple
+import math
+from uuid import UUID
+
+from graphql import GraphQLInt
+import six
+
+from graphql_compiler.compiler.helpers import (
+    get_parameter_name, is_runtime_parameter, strip_non_null_from_type
+)
+from graphql_compiler.cost_estimation.filter_selectivity_utils import MAX_UUID_INT, MIN_UUID_INT
+from graphql_compiler.query_pagination.query_parameterizer import (
+    get_filter_directive_operation_and_arguments
+)
+
+
+def _is_int_pagination_key(schema_info, vertex_class, property_field):
+    """Return True if the pagination key is an Int field, and False if it is an ID field."""
+    field_type = schema_info.schema.get_type(vertex_class).fields[property_field].type
+    return GraphQLInt.is_same_type(strip_non_null_from_type(field_type))
+
+
+def _get_parameter_name_of_filter(filter_directive):
+    """Return the name of the single runtime parameter of a pagination filter directive."""
+    _, filter_arguments = get_filter_directive_operation_and_arguments(filter_directive)
+    if len(filter_arguments) != 1 or not is_runtime_parameter(filter_arguments[0]):
+        raise AssertionError(u'Expected pagination filter to have exactly one runtime parameter, '
+                             u'but got: {}'.format(filter_directive))
+    return get_parameter_name(filter_arguments[0])
+
+
+def _get_bounds_of_related_filters(related_filters, user_parameters, convert_to_int):
+    """Return the interval of pagination key values allowed by the filters on the pagination key.
+
+    Args:
+        related_filters: List[Directive], filter directives on the pagination key property field.
+        user_parameters: dict, parameters of the query being paginated.
+        convert_to_int: function, converting a parameter value to the integer it is ordered as.
+
+    Returns:
+        tuple (lower_bound, upper_bound), the inclusive lower bound and exclusive upper bound of
+        the allowed values. Either bound is None if no filter bounds the values from that side.
+        Filters whose operation does not describe an interval, or that use tagged parameters,
+        are ignored.
+    """
+    lower_bound, upper_bound = None, None
+
+    def tighten_bounds(new_lower_bound, new_upper_bound):
+        """Intersect the current bounds with the given ones."""
+        result_lower_bound, result_upper_bound = lower_bound, upper_bound
+        if new_lower_bound is not None:
+            if result_lower_bound is None or new_lower_bound > result_lower_bound:
+                result_lower_bound = new_lower_bound
+        if new_upper_bound is not None:
+            if result_upper_bound is None or new_upper_bound < result_upper_bound:
+                result_upper_bound = new_upper_bound
+        return result_lower_bound, result_upper_bound
+
+    for filter_directive in related_filters:
+        op_name, filter_arguments = get_filter_directive_operation_and_arguments(filter_directive)
+        if not all(is_runtime_parameter(argument) for argument in filter_arguments):
+            continue
+        parameter_names = [get_parameter_name(argument) for argument in filter_arguments]
+        if not all(parameter_name in user_parameters for parameter_name in parameter_names):
+            continue
+        values = [convert_to_int(user_parameters[parameter_name])
+                  for parameter_name in parameter_names]
+
+        if op_name == '>=':
+            lower_bound, upper_bound = tighten_bounds(values[0], None)
+        elif op_name == '>':
+            lower_bound, upper_bound = tighten_bounds(values[0] + 1, None)
+        elif op_name == '<':
+            lower_bound, upper_bound = tighten_bounds(None, values[0])
+        elif op_name == '<=':
+            lower_bound, upper_bound = tighten_bounds(None, values[0] + 1)
+        elif op_name == 'between':
+            lower_bound, upper_bound = tighten_bounds(values[0], values[1] + 1)
+        elif op_name == '=':
+            lower_bound, upper_bound = tighten_bounds(values[0], values[0] + 1)
+
+    return lower_bound, upper_bound
+
+
+def _get_fraction_of_values_below(quantiles, value):
+    """Return the estimated fraction of integer values smaller than the given value.
+
+    Args:
+        quantiles: list of ints, the field quantiles of the pagination key.
+        value: int, the value being compared against.
+
+    Returns:
+        float between 0 and 1, assuming values are evenly distributed within each quantile bucket.
+    """
+    num_buckets = len(quantiles) - 1
+    total_fraction = 0.0
+    for bucket_lower, bucket_upper in zip(quantiles[:-1], quantiles[1:]):
+        if value > bucket_upper:
+            total_fraction += 1.0
+        elif value > bucket_lower:
+            # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+            # pylint: disable=old-division
+            #
+            total_fraction += float(value - bucket_lower) / (bucket_upper - bucket_lower + 1)
+            # pylint: enable=old-division
+
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    #
+    return total_fraction / num_buckets
+    # pylint: enable=old-division
+
+
+def _get_smallest_value_with_fraction_below(quantiles, low, high, target_fraction):
+    """Return the smallest value in [low, high] with at least target_fraction of values below it.
+
+    Args:
+        quantiles: list of ints, the field quantiles of the pagination key.
+        low: int, smallest value that may be returned.
+        high: int, largest value that may be returned. It is returned if no value in the interval
+              has at least target_fraction of values below it.
+        target_fraction: float, the fraction of values that should be below the returned value.
+
+    Returns:
+        int
+    """
+    # The fraction of values below a value grows with the value, so binary search can be used.
+    while low < high:
+        middle = (low + high) // 2
+        if _get_fraction_of_values_below(quantiles, middle) >= target_fraction:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _get_split_points_using_quantiles(quantiles, lower_bound, upper_bound, num_pages):
+    """Return the values splitting the values within the bounds into num_pages equal groups.
+
+    The quantiles must suggest that there are values within the bounds.
+
+    Args:
+        quantiles: list of ints, the field quantiles of the pagination key.
+        lower_bound: int, inclusive lower bound of the values being split.
+        upper_bound: int, exclusive upper bound of the values being split. Must be at least two
+                     more than the lower bound.
+        num_pages: int, number of pages the values are split into.
+
+    Returns:
+        list of at most num_pages - 1 strictly increasing ints, strictly between lower_bound and
+        upper_bound. The i-th page contains the values between the (i-1)-th and i-th split point.
+        Fewer split points are returned if the values within the bounds can't be split into
+        num_pages groups.
+    """
+    fraction_below_lower_bound = _get_fraction_of_values_below(quantiles, lower_bound)
+    fraction_below_upper_bound = _get_fraction_of_values_below(quantiles, upper_bound)
+
+    split_points = []
+    for page_index in six.moves.xrange(1, num_pages):
+        # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+        # pylint: disable=old-division
+        #
+        target_fraction = fraction_below_lower_bound + (
+            (fraction_below_upper_bound - fraction_below_lower_bound) * page_index / num_pages)
+        # pylint: enable=old-division
+
+        # Split points are strictly increasing, so no page is empty.
+        low = lower_bound + 1 if not split_points else split_points[-1] + 1
+        high = upper_bound - 1
+        if low > high:
+            break
+        split_points.append(_get_smallest_value_with_fraction_below(
+            quantiles, low, high, target_fraction))
+    return split_points
+
+
+def _get_uniform_split_points(lower_bound, upper_bound, num_pages):
+    """Return the values splitting the bounds into num_pages equally-sized intervals.
+
+    Args:
+        lower_bound: int, inclusive lower bound of the values being split.
+        upper_bound: int, exclusive upper bound of the values being split.
+        num_pages: int, number of pages the values are split into.
+
+    Returns:
+        list of at most num_pages - 1 strictly increasing ints, strictly between lower_bound and
+        upper_bound. Fewer split points are returned if there are fewer than num_pages values
+        within the bounds.
+    """
+    split_points = []
+    for page_index in six.moves.xrange(1, num_pages):
+        split_point = lower_bound + (upper_bound - lower_bound) * page_index // num_pages
+        if split_points:
+            split_point = max(split_point, split_points[-1] + 1)
+        else:
+            split_point = max(split_point, lower_bound + 1)
+        if split_point >= upper_bound:
+            break
+        split_points.append(split_point)
+    return split_points
+
+
+# PaginationKeyDomain namedtuples describe the values of a pagination key that a query may return,
+# mapped to integers so that they can be split into intervals.
+PaginationKeyDomain = namedtuple(
+    'PaginationKeyDomain',
+    (
+        'vertex_class',         # str, vertex class to which the pagination key belongs.
+        'property_field',       # str, name of the pagination key property field.
+        'is_int_key',           # bool, True if the pagination key is an Int field, and False if
+                                # it is an ID field whose values are uuid4s.
+        'quantiles',            # list of ints or None, the field quantiles of the pagination key
+                                # if they are available and suggest that there are values within
+                                # the bounds. Otherwise, values are assumed to be evenly
+                                # distributed between the bounds.
+        'lower_bound',          # int, inclusive lower bound of the allowed values.
+        'upper_bound',          # int, exclusive upper bound of the allowed values.
+    ),
+)
+
+
+def get_pagination_key_domain(schema_info, parameterized_pagination_queries):
+    """Return the PaginationKeyDomain of the values the paginated query may return.
+
+    The domain is bounded by the query's filters on the pagination key. Where the filters don't
+    bound it, ID pagination keys are bounded by the smallest and largest uuid, and Int pagination
+    keys by the smallest and largest field quantiles.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        parameterized_pagination_queries: ParameterizedPaginationQueries namedtuple.
+
+    Returns:
+        PaginationKeyDomain namedtuple
+
+    Raises:
+        ValueError if no statistics are available to bound the values of the pagination key, or if
+        the query's filters on the pagination key allow fewer than two values.
+    """
+    if len(parameterized_pagination_queries.pagination_filters) != 1:
+        raise AssertionError(u'Expected exactly one pagination filter, but got: {}'
+                             .format(parameterized_pagination_queries.pagination_filters))
+    pagination_filter = parameterized_pagination_queries.pagination_filters[0]
+    vertex_class = pagination_filter.vertex_class
+    property_field = pagination_filter.property_field
+    user_parameters = parameterized_pagination_queries.user_parameters
+
+    is_int_key = _is_int_pagination_key(schema_info, vertex_class, property_field)
+    if is_int_key:
+        quantiles = schema_info.statistics.get_field_quantiles(vertex_class, property_field)
+        if quantiles is not None:
+            quantiles = [int(quantile) for quantile in quantiles]
+            domain_lower_bound, domain_upper_bound = quantiles[0], quantiles[-1] + 1
+        else:
+            domain_lower_bound, domain_upper_bound = None, None
+    else:
+        # As documented for pagination_keys, ID keys are assumed to be uniformly-distributed uuid4s.
+        quantiles = None
+        domain_lower_bound, domain_upper_bound = MIN_UUID_INT, MAX_UUID_INT + 1
+
+    lower_bound, upper_bound = _get_bounds_of_related_filters(
+        pagination_filter.related_filters, user_parameters,
+        lambda value: _convert_pagination_key_value_to_int(is_int_key, value))
+    if lower_bound is None:
+        lower_bound = domain_lower_bound
+    if upper_bound is None:
+        upper_bound = domain_upper_bound
+
+    if lower_bound is None or upper_bound is None:
+        raise ValueError(u'Cannot paginate over {}.{}, since no field quantiles are available and '
+                         u'the query does not bound its values from both sides: {}'
+                         .format(vertex_class, property_field, user_parameters))
+    if upper_bound - lower_bound < 2:
+        raise ValueError(u'Cannot paginate over {}.{}, since the query allows fewer than two '
+                         u'values: {}'.format(vertex_class, property_field, user_parameters))
+
+    if quantiles is not None:
+        fraction_below_lower_bound = _get_fraction_of_values_below(quantiles, lower_bound)
+        fraction_below_upper_bound = _get_fraction_of_values_below(quantiles, upper_bound)
+        if fraction_below_upper_bound <= fraction_below_lower_bound:
+            # The quantiles are out of date, or the filters select a range without values.
+            quantiles = None
+
+    return PaginationKeyDomain(
+        vertex_class=vertex_class,
+        property_field=property_field,
+        is_int_key=is_int_key,
+        quantiles=quantiles,
+        lower_bound=lower_bound,
+        upper_bound=upper_bound,
+    )
+
+
+def _convert_pagination_key_value_to_int(is_int_key, value):
+    """Return the integer that the given Int or uuid pagination key value is ordered as."""
+    if is_int_key:
+        return int(value)
+    return UUID(value).int
+
+
+def convert_pagination_key_value_to_int(domain, value):
+    """Return the integer that the given pagination key value is ordered as."""
+    return _convert_pagination_key_value_to_int(domain.is_int_key, value)
+
+
+def convert_int_to_pagination_key_value(domain, int_value):
+    """Return the pagination key value, usable as a query parameter, ordered as the given int."""
+    if domain.is_int_key:
+        return int_value
+    return str(UUID(int=int_value))
+
+
+def get_fraction_of_domain_below(domain, int_value):
+    """Return the estimated fraction of the domain's values smaller than the given int value.
+
+    Args:
+        domain: PaginationKeyDomain namedtuple.
+        int_value: int, the value being compared against.
+
+    Returns:
+        float between 0 and 1. It is 0 for values at or below the domain's lower bound, and 1 for
+        values at or above its upper bound.
+    """
+    if int_value <= domain.lower_bound:
+        return 0.0
+    if int_value >= domain.upper_bound:
+        return 1.0
+
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    #
+    if domain.quantiles is None:
+        return float(int_value - domain.lower_bound) / (domain.upper_bound - domain.lower_bound)
+
+    fraction_below_lower_bound = _get_fraction_of_values_below(
+        domain.quantiles, domain.lower_bound)
+    fraction_below_upper_bound = _get_fraction_of_values_below(
+        domain.quantiles, domain.upper_bound)
+    return (
+        (_get_fraction_of_values_below(domain.quantiles, int_value) - fraction_below_lower_bound) /
+        (fraction_below_upper_bound - fraction_below_lower_bound)
+    )
+    # pylint: enable=old-division
+
+
+def get_smallest_int_value_with_fraction_of_domain_below(domain, low, target_fraction):
+    """Return the smallest int value in [low, upper_bound] with target_fraction of the domain below.
+
+    Args:
+        domain: PaginationKeyDomain namedtuple.
+        low: int, smallest value that may be returned.
+        target_fraction: float, the fraction of the domain's values that should be below the
+                         returned value.
+
+    Returns:
+        int, at most the domain's upper bound.
+    """
+    high = domain.upper_bound
+    if low >= high:
+        return high
+    if domain.quantiles is None:
+        # Avoid the binary search, since uuids have 128 bits.
+        value = domain.lower_bound + int(
+            math.ceil(target_fraction * (domain.upper_bound - domain.lower_bound)))
+        return min(high, max(low, value))
+
+    fraction_below_lower_bound = _get_fraction_of_values_below(
+        domain.quantiles, domain.lower_bound)
+    fraction_below_upper_bound = _get_fraction_of_values_below(
+        domain.quantiles, domain.upper_bound)
+    return _get_smallest_value_with_fraction_below(
+        domain.quantiles, low, high,
+        fraction_below_lower_bound +
+        target_fraction * (fraction_below_upper_bound - fraction_below_lower_bound))
+
+
+def generate_split_values_for_parameterized_query(
+    schema_info, parameterized_pagination_queries, num_pages
+):
+    """Return the pagination key values splitting the query's results into num_pages pages.
+
+    The split values are chosen such that roughly the same number of the pagination key values
+    allowed by the query's other filters on the pagination key lie between consecutive values:
+    - values of ID pagination keys are assumed to be uniformly-distributed uuid4s,
+    - values of Int pagination keys are assumed to follow the field quantiles statistic. If it is
+      not available, the query's filters must bound the values from both sides, and the values are
+      assumed to be evenly distributed between the bounds.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        parameterized_pagination_queries: ParameterizedPaginationQueries namedtuple, parameterized
+                                          queries for which split values are being generated.
+        num_pages: int, number of pages to split the query into.
+
+    Returns:
+        list of strictly increasing values of the pagination key, usable as parameter values of
+        the pagination filters. There are num_pages - 1 values, unless the query's filters allow
+        fewer than num_pages pagination key values, in which case there are fewer.
+
+    Raises:
+        ValueError if the values of the pagination key can't be split, either because no
+        statistics are available to find split values, or because the query's filters on the
+        pagination key allow fewer than two values.
+    """
+    domain = get_pagination_key_domain(schema_info, parameterized_pagination_queries)
+
+    if domain.quantiles is not None:
+        split_points = _get_split_points_using_quantiles(
+            domain.quantiles, domain.lower_bound, domain.upper_bound, num_pages)
+    else:
+        split_points = _get_uniform_split_points(
+            domain.lower_bound, domain.upper_bound, num_pages)
+
+    return [
+        convert_int_to_pagination_key_value(domain, split_point)
+        for split_point in split_points
+    ]
+
+
+def get_pagination_parameter_names(parameterized_pagination_queries):
+    """Return the names of the upper and lower bound parameters of the pagination filter.
+
+    Args:
+        parameterized_pagination_queries: ParameterizedPaginationQueries namedtuple.
+
+    Returns:
+        tuple (str, str), the name of the parameter of the next page query's filter, which is the
+        exclusive upper bound of the pagination key, and the name of the parameter of the
+        remainder query's filter, which is the inclusive lower bound of the pagination key.
+    """
+    pagination_filter = parameterized_pagination_queries.pagination_filters[0]
+    return (
+        _get_parameter_name_of_filter(pagination_filter.next_page_query_filter),
+        _get_parameter_name_of_filter(pagination_filter.remainder_query_filter),
+    )
 
 
 def generate_parameters_for_parameterized_query(
@@ -6,6 +441,11 @@ def generate_parameters_for_parameterized_query(
 ):
     """Generate parameters for the given parameterized pagination queries.
 
+    The values of the pagination key are split at a single point: the next page query returns the
+    results whose pagination key is smaller than the split point, and the remainder query the rest.
+    The split point is the first of the values splitting the query into num_pages pages, as
+    described in generate_split_values_for_parameterized_query().
+
     Args:
         schema_info: QueryPlanningSchemaInfo
         parameterized_pagination_queries: ParameterizedPaginationQueries namedtuple, parameterized
@@ -20,5 +460,19 @@ def generate_parameters_for_parameterized_query(
             - dict, parameters with which to execute the remainder query. The remainder query
               parameters are generated such that they produce the remainder of the original query's
               result data when executed.
+
+    Raises:
+        ValueError if the values of the pagination key can't be split.
     """
-    raise NotImplementedError()
+    split_values = generate_split_values_for_parameterized_query(
+        schema_info, parameterized_pagination_queries, num_pages)
+    split_value = split_values[0]
+    upper_parameter_name, lower_parameter_name = get_pagination_parameter_names(
+        parameterized_pagination_queries)
+
+    next_page_parameters = dict(parameterized_pagination_queries.user_parameters)
+    next_page_parameters[upper_parameter_name] = split_value
+    remainder_parameters = dict(parameterized_pagination_queries.user_parameters)
+    remainder_parameters[lower_parameter_name] = split_value
+
+    return next_page_parameters, remainder_parameters
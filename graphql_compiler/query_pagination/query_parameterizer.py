@@ -1,10 +1,21 @@
 # Copyright 2019-present Kensho Technologies, LLC.
 from collections import namedtuple
+from copy import deepcopy
+
+from graphql.language.ast import (
+    Argument, Directive, Field, InlineFragment, ListValue, Name, SelectionSet, StringValue
+)
+
+from graphql_compiler.ast_manipulation import (
+    get_ast_field_name, get_only_query_definition, get_only_selection_from_ast
+)
+from graphql_compiler.exceptions import GraphQLValidationError
+from graphql_compiler.schema import FilterDirective
 
 
 RESERVED_PARAMETER_PREFIX = '_paged_'
 
-# ParameterizedPaginationQueries namedtuple, describing two query ASTs that have PaginationFilters
+# ParameterizedPaginationQueries namedtuple, describing query ASTs that have PaginationFilters
 # describing filters with which the query result size can be controlled. Note that these filters are
 # returned parameterized i.e. values for the filters' parameters have yet to be generated.
 # Additionally, a dict containing user-defined parameters is stored. Since this function may modify
@@ -17,6 +28,9 @@ ParameterizedPaginationQueries = namedtuple(
                                     # results when combined with pagination parameters.
         'remainder_query',          # Document, AST of query that will return the remainder of
                                     # results when combined with pagination parameters.
+        'bounded_page_query',       # Document, AST of query with both the next page query's and
+                                    # the remainder query's pagination filters, that will return
+                                    # the results between two pagination parameters.
         'pagination_filters',       # List[PaginationFilter], filters usable for pagination.
         'user_parameters',          # dict, parameters that the user has defined for other filters.
     ),
@@ -42,7 +56,7 @@ PaginationFilter = namedtuple(
 )
 
 
-def generate_parameterized_queries(schema_info, query_ast, parameters):
+def generate_parameterized_queries(schema_info, query_ast, query_metadata, parameters):
     """Generate two parameterized queries that can be used to paginate over a given query.
 
     In order to paginate arbitrary GraphQL queries, additional filters may need to be added to be
@@ -53,9 +67,150 @@ def generate_parameterized_queries(schema_info, query_ast, parameters):
     Args:
         schema_info: QueryPlanningSchemaInfo
         query_ast: Document, query that is being paginated.
+        query_metadata: QueryMetadataTable object, the query_metadata_table of the IrAndMetadata
+                        compiled from query_ast.
         parameters: dict, list of parameters for the given query.
 
     Returns:
         ParameterizedPaginationQueries namedtuple
+
+    Raises:
+        ValueError if the query's root vertex has no pagination key.
+    """
+    root_location_info = query_metadata.get_location_info(query_metadata.root_location)
+    vertex_class = root_location_info.type.name
+    property_field = schema_info.pagination_keys.get(vertex_class)
+    if property_field is None:
+        raise ValueError(u'Cannot paginate query, since its root vertex {} does not have a '
+                         u'pagination key: {}'.format(vertex_class, query_ast))
+
+    existing_field = _get_property_field_ast(_get_root_vertex_scope_ast(query_ast), property_field)
+    related_filters = []
+    if existing_field is not None and existing_field.directives is not None:
+        related_filters = [
+            directive
+            for directive in existing_field.directives
+            if directive.name.value == FilterDirective.name
+        ]
+
+    next_page_query, next_page_query_filter = _get_query_with_pagination_filter(
+        query_ast, property_field, u'<',
+        _get_pagination_parameter_name(u'upper', vertex_class, property_field))
+    remainder_query, remainder_query_filter = _get_query_with_pagination_filter(
+        query_ast, property_field, u'>=',
+        _get_pagination_parameter_name(u'lower', vertex_class, property_field))
+    bounded_page_query, _ = _get_query_with_pagination_filter(
+        remainder_query, property_field, u'<',
+        _get_pagination_parameter_name(u'upper', vertex_class, property_field))
+
+    pagination_filter = PaginationFilter(
+        vertex_class=vertex_class,
+        property_field=property_field,
+        next_page_query_filter=next_page_query_filter,
+        remainder_query_filter=remainder_query_filter,
+        related_filters=related_filters,
+    )
+    return ParameterizedPaginationQueries(
+        next_page_query=next_page_query,
+        remainder_query=remainder_query,
+        bounded_page_query=bounded_page_query,
+        pagination_filters=[pagination_filter],
+        user_parameters=dict(parameters),
+    )
+
+
+def get_filter_directive_operation_and_arguments(filter_directive):
+    """Return the op_name and the list of argument strings of a @filter directive AST."""
+    op_name = None
+    filter_arguments = []
+    for argument in filter_directive.arguments:
+        if argument.name.value == u'op_name':
+            op_name = argument.value.value
+        elif argument.name.value == u'value':
+            filter_arguments = [value.value for value in argument.value.values]
+    return op_name, filter_arguments
+
+
+def _get_pagination_parameter_name(bound_kind, vertex_class, property_field):
+    """Return the name of the parameter holding a pagination bound, e.g. for an 'upper' bound."""
+    return u'{}{}_param_on_{}_{}'.format(
+        RESERVED_PARAMETER_PREFIX, bound_kind, vertex_class, property_field)
+
+
+def _get_root_vertex_scope_ast(query_ast):
+    """Return the AST whose selections are the property fields of the query's root vertex.
+
+    This is the root vertex field itself, or the inline fragment within it if the root vertex is
+    coerced to a subtype.
     """
-    raise NotImplementedError()
+    definition_ast = get_only_query_definition(query_ast, GraphQLValidationError)
+    root_vertex_ast = get_only_selection_from_ast(definition_ast, GraphQLValidationError)
+    for selection in root_vertex_ast.selection_set.selections:
+        if isinstance(selection, InlineFragment):
+            return selection
+    return root_vertex_ast
+
+
+def _get_property_field_ast(scope_ast, field_name):
+    """Return the property field with the given name in the given scope, or None if not found."""
+    for selection in scope_ast.selection_set.selections:
+        if isinstance(selection, Field) and get_ast_field_name(selection) == field_name:
+            return selection
+    return None
+
+
+def _make_filter_directive(op_name, parameter_name):
+    """Return a @filter directive AST with the given operation and a single runtime parameter."""
+    return Directive(
+        name=Name(value=FilterDirective.name),
+        arguments=[
+            Argument(
+                name=Name(value=u'op_name'),
+                value=StringValue(value=op_name),
+            ),
+            Argument(
+                name=Name(value=u'value'),
+                value=ListValue(values=[StringValue(value=u'$' + parameter_name)]),
+            ),
+        ],
+    )
+
+
+def _get_query_with_pagination_filter(query_ast, property_field, op_name, parameter_name):
+    """Return a copy of the query with a pagination filter on the root vertex's property field.
+
+    If the property field already has a @filter directive with the given operation and parameter,
+    e.g. because the query was produced by an earlier pagination of a larger query, that directive
+    is reused instead of adding a duplicate one. Otherwise, the directive is added to the property
+    field's directives, and the property field is added as the first selection of the root vertex
+    if the query does not select it yet.
+
+    Args:
+        query_ast: Document, query that is being paginated. It is not modified.
+        property_field: str, name of the root vertex's pagination key property field.
+        op_name: str, the filter operation, either '<' or '>='.
+        parameter_name: str, name of the runtime parameter of the filter.
+
+    Returns:
+        tuple (Document, Directive), the new query and its pagination filter directive.
+    """
+    new_query_ast = deepcopy(query_ast)
+    scope_ast = _get_root_vertex_scope_ast(new_query_ast)
+    field_ast = _get_property_field_ast(scope_ast, property_field)
+    if field_ast is None:
+        field_ast = Field(name=Name(value=property_field), directives=[])
+        scope_ast.selection_set = SelectionSet(
+            selections=[field_ast] + list(scope_ast.selection_set.selections))
+    elif field_ast.directives is None:
+        field_ast.directives = []
+
+    for directive in field_ast.directives:
+        if directive.name.value == FilterDirective.name:
+            existing_op_name, existing_arguments = get_filter_directive_operation_and_arguments(
+                directive)
+            if existing_op_name == op_name and existing_arguments == [u'$' + parameter_name]:
+                return new_query_ast, directive
+
+    pagination_directive = _make_filter_directive(op_name, parameter_name)
+    field_ast.directives.append(pagination_directive)
+    return new_query_ast, pagination_directive
@@ -2,7 +2,8 @@
 from collections import namedtuple
 
 from graphql_compiler.query_pagination.parameter_generator import (
-    generate_parameters_for_parameterized_query
+    generate_parameters_for_parameterized_query, generate_split_values_for_parameterized_query,
+    get_pagination_parameter_names
 )
 from graphql_compiler.query_pagination.query_parameterizer import generate_parameterized_queries
 
@@ -16,7 +17,9 @@ ASTWithParameters = namedtuple(
 )
 
 
-def split_into_page_query_and_remainder_query(schema_info, query_ast, parameters, num_pages):
+def split_into_page_query_and_remainder_query(
+    schema_info, query_ast, query_metadata, parameters, num_pages
+):
     """Split a query into two equivalent queries, one of which will return roughly a page of data.
 
     First, two parameterized queries are generated that contain filters usable for pagination i.e.
@@ -28,6 +31,8 @@ def split_into_page_query_and_remainder_query(schema_info, query_ast, parameters
     Args:
         schema_info: QueryPlanningSchemaInfo
         query_ast: Document, AST of the GraphQL query that will be split.
+        query_metadata: QueryMetadataTable object, the query_metadata_table of the IrAndMetadata
+                        compiled from query_ast.
         parameters: dict, parameters with which query will be estimated.
         num_pages: int, number of pages to split the query into.
 
@@ -43,13 +48,14 @@ def split_into_page_query_and_remainder_query(schema_info, query_ast, parameters
                              u' of results, as the number of pages {} must be greater than 1: {}'
                              .format(query_ast, num_pages, parameters))
 
-    parameterized_queries = generate_parameterized_queries(schema_info, query_ast, parameters)
+    parameterized_queries = generate_parameterized_queries(
+        schema_info, query_ast, query_metadata, parameters)
 
     next_page_parameters, remainder_parameters = generate_parameters_for_parameterized_query(
         schema_info, parameterized_queries, num_pages)
 
     next_page_ast_with_parameters = ASTWithParameters(
-        parameterized_queries.page_query,
+        parameterized_queries.next_page_query,
         next_page_parameters
     )
     remainder_ast_with_parameters = ASTWithParameters(
@@ -58,3 +64,64 @@ def split_into_page_query_and_remainder_query(schema_info, query_ast, parameters
     )
 
     return next_page_ast_with_parameters, remainder_ast_with_parameters
+
+
+def split_into_page_queries(schema_info, query_ast, query_metadata, parameters, num_pages):
+    """Split a query into num_pages disjoint queries, each returning roughly a page of data.
+
+    All boundaries between pages are computed at once from the statistics of the pagination key of
+    the query's root vertex, as described in generate_split_values_for_parameterized_query(). Each
+    page query selects the results whose pagination key is within a half-open interval between two
+    consecutive boundaries, so the page queries are independent of each other and may be executed
+    concurrently, in any order.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_ast: Document, AST of the GraphQL query that will be split.
+        query_metadata: QueryMetadataTable object, the query_metadata_table of the IrAndMetadata
+                        compiled from query_ast.
+        parameters: dict, parameters with which query will be estimated.
+        num_pages: int, number of pages to split the query into.
+
+    Returns:
+        list of ASTWithParameters namedtuples, describing queries whose result data are disjoint and
+        whose union is equivalent to the given query and parameter's result data. There are
+        num_pages queries, unless the query's filters allow fewer than num_pages values of the
+        pagination key, in which case there is one query per allowed value. The queries are ordered
+        by the pagination key values they select. There are no guarantees on the order of the result
+        rows within each query.
+
+    Raises:
+        ValueError if num_pages is below 1, or if the query can't be split into pages.
+    """
+    if num_pages < 1:
+        raise ValueError(u'Could not split query {} into fewer than 1 page: {}'
+                         .format(query_ast, num_pages))
+    if num_pages == 1:
+        return [ASTWithParameters(query_ast, parameters)]
+
+    parameterized_queries = generate_parameterized_queries(
+        schema_info, query_ast, query_metadata, parameters)
+    split_values = generate_split_values_for_parameterized_query(
+        schema_info, parameterized_queries, num_pages)
+    upper_parameter_name, lower_parameter_name = get_pagination_parameter_names(
+        parameterized_queries)
+    user_parameters = parameterized_queries.user_parameters
+
+    first_page_parameters = dict(user_parameters)
+    first_page_parameters[upper_parameter_name] = split_values[0]
+    page_queries = [ASTWithParameters(parameterized_queries.next_page_query, first_page_parameters)]
+
+    for lower_split_value, upper_split_value in zip(split_values[:-1], split_values[1:]):
+        page_parameters = dict(user_parameters)
+        page_parameters[lower_parameter_name] = lower_split_value
+        page_parameters[upper_parameter_name] = upper_split_value
+        page_queries.append(
+            ASTWithParameters(parameterized_queries.bounded_page_query, page_parameters))
+
+    last_page_parameters = dict(user_parameters)
+    last_page_parameters[lower_parameter_name] = split_values[-1]
+    page_queries.append(
+        ASTWithParameters(parameterized_queries.remainder_query, last_page_parameters))
+
+    return page_queries
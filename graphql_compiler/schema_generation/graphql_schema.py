@@ -1,5 +1,5 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from itertools import chain
 import warnings
 
@@ -7,6 +7,9 @@ from graphql.type import (
     GraphQLField, GraphQLInterfaceType, GraphQLList, GraphQLObjectType, GraphQLScalarType,
     GraphQLSchema, GraphQLUnionType
 )
+from graphql.type.definition import get_named_type
+from graphql.type.introspection import IntrospectionSchema
+from graphql.type.typemap import GraphQLTypeMap
 from graphql.utils.assert_valid_name import COMPILED_NAME_PATTERN
 import six
 
@@ -78,9 +81,8 @@ def _get_union_type_name(type_names_to_union):
     return u'Union__' + u'__'.join(sorted(type_names_to_union))
 
 
-def _get_fields_for_class(schema_graph, graphql_types, field_type_overrides, hidden_classes,
-                          cls_name):
-    """Return a dict from field name to GraphQL field type, for the specified graph class."""
+def _get_property_fields_for_class(schema_graph, cls_name):
+    """Return a dict from field name to GraphQL field type, for the properties of the class."""
     properties = schema_graph.get_element_by_class_name(cls_name).properties
 
     # Add leaf GraphQL fields (class properties).
@@ -107,13 +109,40 @@ def _get_fields_for_class(schema_graph, graphql_types, field_type_overrides, hid
                       .format(collections_of_non_graphql_scalars, cls_name))
 
     # Filter collections of non-GraphQLScalarTypes. They are currently not supported.
-    result = {
+    return {
         property_name: graphql_type
         for property_name, graphql_type in six.iteritems(all_properties)
         if property_name not in collections_of_non_graphql_scalars
     }
 
-    # Add edge GraphQL fields.
+
+def _get_edge_endpoint_type_name(schema_graph, hidden_classes, to_type_name):
+    """Return the name of the GraphQL type of edge endpoints of the class, or None if hidden."""
+    subclasses = schema_graph.get_subclass_set(to_type_name)
+
+    to_type_abstract = schema_graph.get_element_by_class_name(to_type_name).abstract
+    if not to_type_abstract and len(subclasses) > 1:
+        # If the edge endpoint type has no subclasses, it can't be coerced into any other
+        # type. If the edge endpoint type is abstract (an interface type), we can already
+        # coerce it to the proper type with a GraphQL fragment. However, if the endpoint
+        # type is non-abstract and has subclasses, we need to return its subclasses as an
+        # union type. This is because GraphQL fragments cannot be applied on concrete
+        # types, and GraphQL does not support inheritance of concrete types.
+        type_names_to_union = [
+            subclass
+            for subclass in subclasses
+            if subclass not in hidden_classes
+        ]
+        if type_names_to_union:
+            return _get_union_type_name(type_names_to_union)
+    else:
+        if to_type_name not in hidden_classes:
+            return to_type_name
+    return None
+
+
+def _get_edge_field_endpoint_type_names(schema_graph, hidden_classes, cls_name):
+    """Return a dict from edge field name to the name of its endpoint type, for the class."""
     schema_element = schema_graph.get_element_by_class_name(cls_name)
     outbound_edges = (
         ('out_{}'.format(out_edge_name),
@@ -125,34 +154,29 @@ def _get_fields_for_class(schema_graph, graphql_types, field_type_overrides, hid
          schema_graph.get_element_by_class_name(in_edge_name).base_in_connection)
         for in_edge_name in schema_element.in_connections
     )
-    for field_name, to_type_name in chain(outbound_edges, inbound_edges):
-        edge_endpoint_type_name = None
-        subclasses = schema_graph.get_subclass_set(to_type_name)
-
-        to_type_abstract = schema_graph.get_element_by_class_name(to_type_name).abstract
-        if not to_type_abstract and len(subclasses) > 1:
-            # If the edge endpoint type has no subclasses, it can't be coerced into any other
-            # type. If the edge endpoint type is abstract (an interface type), we can already
-            # coerce it to the proper type with a GraphQL fragment. However, if the endpoint
-            # type is non-abstract and has subclasses, we need to return its subclasses as an
-            # union type. This is because GraphQL fragments cannot be applied on concrete
-            # types, and GraphQL does not support inheritance of concrete types.
-            type_names_to_union = [
-                subclass
-                for subclass in subclasses
-                if subclass not in hidden_classes
-            ]
-            if type_names_to_union:
-                edge_endpoint_type_name = _get_union_type_name(type_names_to_union)
-        else:
-            if to_type_name not in hidden_classes:
-                edge_endpoint_type_name = to_type_name
 
+    result = {}
+    for field_name, to_type_name in chain(outbound_edges, inbound_edges):
+        edge_endpoint_type_name = _get_edge_endpoint_type_name(
+            schema_graph, hidden_classes, to_type_name)
         if edge_endpoint_type_name is not None:
             # If we decided to not hide this edge due to its endpoint type being
-            # non-representable, represent the edge field as the GraphQL type
-            # List(edge_endpoint_type_name).
-            result[field_name] = GraphQLList(graphql_types[edge_endpoint_type_name])
+            # non-representable, the edge field is represented as a list of the endpoint type.
+            result[field_name] = edge_endpoint_type_name
+
+    return result
+
+
+def _get_fields_for_class(schema_graph, graphql_types, field_type_overrides, hidden_classes,
+                          cls_name):
+    """Return a dict from field name to GraphQL field type, for the specified graph class."""
+    result = _get_property_fields_for_class(schema_graph, cls_name)
+
+    # Add edge GraphQL fields, represented as the GraphQL type List(edge_endpoint_type_name).
+    edge_field_endpoint_type_names = _get_edge_field_endpoint_type_names(
+        schema_graph, hidden_classes, cls_name)
+    for field_name, edge_endpoint_type_name in six.iteritems(edge_field_endpoint_type_names):
+        result[field_name] = GraphQLList(graphql_types[edge_endpoint_type_name])
 
     for field_name, field_type in six.iteritems(field_type_overrides):
         if field_name not in result:
@@ -220,8 +244,137 @@ def _create_union_types_specification(schema_graph, graphql_types, hidden_classe
     return types_spec
 
 
+class LazyGraphQLTypeMap(GraphQLTypeMap):
+    """GraphQLTypeMap given all its named types, which doesn't access the fields of the types.
+
+    GraphQLTypeMap finds the named types of a schema by traversing the fields of the types it is
+    given, and validates that object types implement the fields of their interfaces, both of which
+    require creating the fields of every type.
+    """
+
+    def __init__(self, types):  # pylint: disable=super-init-not-called
+        """Create a type map of the given named types, which must include all types in the schema.
+
+        Args:
+            types: iterable of named GraphQL types, containing every type that is referenced by the
+                   fields, interfaces or union members of another type in the schema.
+        """
+        # GraphQLTypeMap's constructor traverses the fields of the types, so it is not called.
+        OrderedDict.__init__(self)  # pylint: disable=non-parent-init-called
+        for graphql_type in types:
+            if self.setdefault(graphql_type.name, graphql_type) is not graphql_type:
+                raise AssertionError(u'Schema must contain unique named types but contains '
+                                     u'multiple types named "{}".'.format(graphql_type.name))
+
+        self._possible_type_map = defaultdict(set)
+        self._implementations = defaultdict(list)
+        for graphql_type in self.values():
+            if isinstance(graphql_type, GraphQLObjectType):
+                for interface in graphql_type.interfaces:
+                    self._implementations[interface.name].append(graphql_type)
+
+
+class LazyGraphQLSchema(GraphQLSchema):
+    """GraphQLSchema whose types only create their fields when the fields are first accessed.
+
+    GraphQLSchema creates the fields of every type in the schema when it is constructed, to find
+    the types that the schema contains. A LazyGraphQLSchema is instead given all of its types, so
+    the field thunk of each type is only called when its fields are used, e.g. by compiling a query
+    that selects them. Services that only query a small part of a large schema thus never create
+    the fields of most of its types. The fields of all types are created when the schema is
+    printed or introspected, since its type map is used to do so.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, query, types, directives):  # pylint: disable=super-init-not-called
+        """Create a schema with the given query type, directives and other named types.
+
+        Args:
+            query: GraphQLObjectType, the schema's root query type.
+            types: iterable of named GraphQL types, containing every type that is referenced by the
+                   fields, interfaces or union members of another type in the schema, other than
+                   the query type and the types used by introspection.
+            directives: list of GraphQLDirectives supported by the schema.
+        """
+        # GraphQLSchema's constructor creates a GraphQLTypeMap, so it is not called.
+        self._query = query
+        self._mutation = None
+        self._subscription = None
+        self._directives = directives
+
+        introspection_types = GraphQLTypeMap.reducer(OrderedDict(), IntrospectionSchema)
+        self._type_map = LazyGraphQLTypeMap(
+            chain([query], types, six.itervalues(introspection_types)))
+
+
+def _get_lazy_schema_types(schema_graph, graphql_types, inherited_field_type_overrides,
+                           hidden_classes):
+    """Return the named types of the schema, other than the query and introspection types.
+
+    Args:
+        schema_graph: SchemaGraph, from which the GraphQL types were generated.
+        graphql_types: OrderedDict, type name -> GraphQL type, the types generated for the classes
+                       of the schema graph and their union types.
+        inherited_field_type_overrides: dict, class name -> {field name -> field type}, the field
+                                        type overrides of each class, including inherited ones.
+        hidden_classes: set of strings, classes not included in the GraphQL schema.
+
+    Returns:
+        list of the named GraphQL types that the eagerly created GraphQL schema would contain,
+        other than its query type and introspection types, found without creating any fields.
+        The only types it may include that the eagerly created schema would not contain are union
+        types whose edge fields are all overridden.
+    """
+    class_names = [
+        type_name
+        for type_name, graphql_type in six.iteritems(graphql_types)
+        if not isinstance(graphql_type, GraphQLUnionType)
+    ]
+
+    # Union types are only part of the schema if they are the endpoint type of some edge field.
+    # Each edge is visited once in each direction, since its endpoint types are the same for all
+    # classes it connects.
+    edge_fields = set()
+    for class_name in class_names:
+        schema_element = schema_graph.get_element_by_class_name(class_name)
+        edge_fields.update(
+            (out_edge_name, True) for out_edge_name in schema_element.out_connections)
+        edge_fields.update(
+            (in_edge_name, False) for in_edge_name in schema_element.in_connections)
+    referenced_type_names = set()
+    for edge_name, is_outbound in edge_fields:
+        edge_element = schema_graph.get_element_by_class_name(edge_name)
+        to_type_name = (
+            edge_element.base_out_connection if is_outbound else edge_element.base_in_connection)
+        referenced_type_names.add(
+            _get_edge_endpoint_type_name(schema_graph, hidden_classes, to_type_name))
+
+    types = [
+        graphql_type
+        for type_name, graphql_type in six.iteritems(graphql_types)
+        if not isinstance(graphql_type, GraphQLUnionType) or type_name in referenced_type_names
+    ]
+
+    # Add the scalar types of the properties, which are the only other types of property fields.
+    # Overridden field types may be of any kind, so their types are found by traversing them.
+    other_types = OrderedDict()
+    for class_name in class_names:
+        properties = schema_graph.get_element_by_class_name(class_name).properties
+        for property_name, property_obj in six.iteritems(properties):
+            property_type = get_named_type(property_obj.type)
+            if (isinstance(property_type, GraphQLScalarType) and
+                    COMPILED_NAME_PATTERN.match(property_name)):
+                other_types[property_type.name] = property_type
+        for field_type in six.itervalues(inherited_field_type_overrides.get(class_name, {})):
+            if get_named_type(field_type).name not in graphql_types:
+                other_types = GraphQLTypeMap.reducer(other_types, field_type)
+    types.extend(six.itervalues(other_types))
+    return types
+
+
 def get_graphql_schema_from_schema_graph(schema_graph, class_to_field_type_overrides=None,
-                                         hidden_classes=None):
+                                         hidden_classes=None, lazy=False):
     """Return a GraphQL schema object corresponding to the schema of the given schema graph.
 
     Args:
@@ -231,6 +384,10 @@ def get_graphql_schema_from_schema_graph(schema_graph, class_to_field_type_overr
                                        type of a field in the class where it's first defined and all
                                        the class's subclasses.
         hidden_classes: optional set of strings, classes to not include in the GraphQL schema.
+        lazy: optional bool, whether to return a LazyGraphQLSchema, whose types only create their
+              fields when they are first accessed, instead of creating the fields of all types.
+              Errors in the field definitions, e.g. overrides of non-existent fields, are then
+              only raised when the fields of the affected type are first accessed.
 
     Returns:
         tuple of (GraphQL schema object, GraphQL type equivalence hints dict).
@@ -357,6 +514,16 @@ def get_graphql_schema_from_schema_graph(schema_graph, class_to_field_type_overr
         if not isinstance(value, GraphQLUnionType)
     ]))
 
+    if lazy:
+        lazy_schema_types = _get_lazy_schema_types(
+            schema_graph, graphql_types, inherited_field_type_overrides, hidden_classes)
+        lazy_schema = LazyGraphQLSchema(RootSchemaQuery, lazy_schema_types, DIRECTIVES)
+        return lazy_schema, {
+            original: union
+            for original, union in six.iteritems(type_equivalence_hints)
+            if lazy_schema.get_type(union.name) is union
+        }
+
     schema = GraphQLSchema(RootSchemaQuery, directives=DIRECTIVES)
 
     # Note that the GraphQLSchema reconstructs the set of types in the schema by recursively
@@ -1,10 +1,14 @@
 # Copyright 2019-present Kensho Technologies, LLC.
 from ..graphql_schema import get_graphql_schema_from_schema_graph
+from ..schema_snapshot import (
+    SchemaSnapshot, get_schema_content_hash, get_schema_snapshot_content_hash, load_schema_snapshot,
+    save_schema_snapshot
+)
 from .schema_graph_builder import get_orientdb_schema_graph
 
 
 def get_graphql_schema_from_orientdb_schema_data(schema_data, class_to_field_type_overrides=None,
-                                                 hidden_classes=None):
+                                                 hidden_classes=None, lazy=False):
     """Construct a GraphQL schema from an OrientDB schema.
 
     Args:
@@ -51,6 +55,8 @@ def get_graphql_schema_from_orientdb_schema_data(schema_data, class_to_field_typ
                                        type of a field in the class where it's first defined and all
                                        the class's subclasses.
         hidden_classes: optional set of strings, classes to not include in the GraphQL schema.
+        lazy: optional bool, whether the fields of each GraphQL type are only created when they
+              are first accessed. See get_graphql_schema_from_schema_graph() for details.
 
     Returns:
         tuple of (GraphQL schema object, GraphQL type equivalence hints dict).
@@ -58,5 +64,55 @@ def get_graphql_schema_from_orientdb_schema_data(schema_data, class_to_field_typ
     """
     schema_graph = get_orientdb_schema_graph(schema_data, [])
     return get_graphql_schema_from_schema_graph(
+        schema_graph, class_to_field_type_overrides=class_to_field_type_overrides,
+        hidden_classes=hidden_classes, lazy=lazy)
+
+
+def get_orientdb_schema_snapshot(file_path, schema_data, index_data=None,
+                                 class_to_field_type_overrides=None, hidden_classes=None):
+    """Return the schema generated from an OrientDB schema, using a snapshot file if up to date.
+
+    If the snapshot file was saved from the same inputs, the schema is loaded from it, which is
+    much faster than generating it. Otherwise, the schema is generated and the snapshot file is
+    overwritten with it, so that other processes using the same inputs can load it.
+
+    Args:
+        file_path: str, path of the snapshot file, which need not exist.
+        schema_data: list of dicts describing the classes in the OrientDB schema, in the format
+                     expected by get_graphql_schema_from_orientdb_schema_data().
+        index_data: optional list of dicts describing the indexes in the OrientDB schema, in the
+                    format expected by get_orientdb_schema_graph().
+        class_to_field_type_overrides: optional dict, class name -> {field name -> field type},
+                                       as expected by
+                                       get_graphql_schema_from_orientdb_schema_data().
+        hidden_classes: optional set of strings, classes to not include in the GraphQL schema.
+
+    Returns:
+        SchemaSnapshot namedtuple, containing the SchemaGraph, the GraphQL schema and its type
+        equivalence hints.
+    """
+    if index_data is None:
+        index_data = []
+
+    content_hash = get_schema_content_hash(
+        schema_data, index_data=index_data,
+        class_to_field_type_overrides=class_to_field_type_overrides,
+        hidden_classes=hidden_classes)
+    if get_schema_snapshot_content_hash(file_path) == content_hash:
+        schema_snapshot = load_schema_snapshot(file_path)
+        # The file may have been replaced by another process since its hash was checked.
+        if schema_snapshot.content_hash == content_hash:
+            return schema_snapshot
+
+    schema_graph = get_orientdb_schema_graph(schema_data, index_data)
+    graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(
         schema_graph, class_to_field_type_overrides=class_to_field_type_overrides,
         hidden_classes=hidden_classes)
+    schema_snapshot = SchemaSnapshot(
+        content_hash=content_hash,
+        schema_graph=schema_graph,
+        graphql_schema=graphql_schema,
+        type_equivalence_hints=type_equivalence_hints,
+    )
+    save_schema_snapshot(file_path, schema_snapshot)
+    return schema_snapshot
@@ -440,20 +440,43 @@ def _validate_property_names(class_name, properties):
 
 class InheritanceStructure(object):
 
-    def __init__(self, direct_superclass_sets):
+    def __init__(self, direct_superclass_sets, _superclass_sets=None):
         """Create a new InheritanceStructure object.
 
         Args:
             direct_superclass_sets: dict, string -> set of strings, mapping a class
                                     to its direct superclasses.
+            _superclass_sets: optional dict, string -> frozenset of strings, the already computed
+                              transitive superclass sets, in which case direct_superclass_sets
+                              is ignored. Private, use from_superclass_sets() instead.
 
         Returns:
             an InheritanceStructure object.
         """
-        direct_superclass_sets = _get_toposorted_direct_superclass_sets(direct_superclass_sets)
-        self._superclass_sets = _get_transitive_superclass_sets(direct_superclass_sets)
+        if _superclass_sets is None:
+            direct_superclass_sets = _get_toposorted_direct_superclass_sets(
+                direct_superclass_sets)
+            _superclass_sets = _get_transitive_superclass_sets(direct_superclass_sets)
+        self._superclass_sets = _superclass_sets
         self._subclass_sets = _get_subclass_sets_from_superclass_sets(self._superclass_sets)
 
+    @classmethod
+    def from_superclass_sets(cls, superclass_sets):
+        """Return an InheritanceStructure with already computed transitive superclass sets.
+
+        Args:
+            superclass_sets: dict, string -> set of strings, mapping each class to all classes it
+                             inherits from, including itself, e.g. as given by the superclass_sets
+                             property of another InheritanceStructure.
+
+        Returns:
+            an InheritanceStructure object.
+        """
+        return cls(None, _superclass_sets={
+            class_name: frozenset(superclass_set)
+            for class_name, superclass_set in six.iteritems(superclass_sets)
+        })
+
     @property
     def superclass_sets(self):
         """Return a dict mapping each class to all classes it inherit from, including itself."""
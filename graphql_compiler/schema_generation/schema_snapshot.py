@@ -0,0 +1,622 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+"""Snapshots of generated schemas, which are loaded without generating the schema again.
+
+Generating a schema from a database's schema data requires building the SchemaGraph, computing
+its inheritance structure, and deriving the fields, interfaces and union types of every GraphQL
+type, which is slow for schemas with many classes. Since the schema data rarely changes, processes
+can instead load a snapshot of the SchemaGraph, GraphQL schema and type equivalence hints that a
+previous process generated. Loading a snapshot only constructs the objects it describes, and its
+GraphQL schema is a LazyGraphQLSchema, so the fields of each GraphQL type are only created when
+they are first used.
+
+Each snapshot records the content hash of the inputs it was generated from, as computed by
+get_schema_content_hash(), which includes the version of the compiler, since schema generation may
+change between versions. Comparing it to the hash of the current inputs tells whether the
+snapshot is up to date, and only requires reading the start of the snapshot file.
+
+A snapshot file has the following layout:
+- a fixed-size preamble, containing the file format's magic bytes and version, and the length of
+  the header, with all integers stored in little-endian byte order,
+- the header, a UTF-8 encoded JSON object containing the content hash,
+- the body, a UTF-8 encoded JSON object describing the SchemaGraph, the GraphQL schema and the
+  type equivalence hints. GraphQL types are referenced by their printed names, e.g. "[Animal]".
+
+Only the kinds of GraphQL types and fields that schema generation produces are supported: object,
+interface and union types, the builtin and compiler-defined scalar types, fields without
+arguments, and the compiler's meta fields. The GraphQL object types of embedded non-graph classes
+in SchemaGraph properties are rebuilt from the properties of those classes, in the same way as
+when the SchemaGraph is built from OrientDB schema data.
+"""
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime
+import hashlib
+from itertools import chain
+import json
+import os
+import struct
+from tempfile import NamedTemporaryFile
+
+import arrow
+from graphql.type import (
+    GraphQLBoolean, GraphQLField, GraphQLFloat, GraphQLID, GraphQLInt, GraphQLInterfaceType,
+    GraphQLList, GraphQLNonNull, GraphQLObjectType, GraphQLScalarType, GraphQLString,
+    GraphQLUnionType
+)
+from graphql.type.directives import specified_directives
+import six
+
+from ..schema import (
+    DIRECTIVES, EXTENDED_META_FIELD_DEFINITIONS, GraphQLDate, GraphQLDateTime, GraphQLDecimal
+)
+from .graphql_schema import LazyGraphQLSchema
+from .schema_graph import (
+    EdgeType, IndexDefinition, InheritanceStructure, NonGraphElement, PropertyDescriptor,
+    SchemaGraph, VertexType
+)
+
+
+SCHEMA_SNAPSHOT_MAGIC = b'GQLSCHEM'
+SCHEMA_SNAPSHOT_VERSION = 2
+
+_PREAMBLE_STRUCT = struct.Struct('<8sII')  # magic, version, header length
+
+_SCALAR_TYPES = {
+    scalar_type.name: scalar_type
+    for scalar_type in (
+        GraphQLBoolean, GraphQLFloat, GraphQLID, GraphQLInt, GraphQLString,
+        GraphQLDate, GraphQLDateTime, GraphQLDecimal,
+    )
+}
+
+_DIRECTIVES = OrderedDict(
+    (directive.name, directive)
+    for directive in list(specified_directives) + list(DIRECTIVES)
+)
+
+_VERTEX_ELEMENT_KIND = 'vertex'
+_EDGE_ELEMENT_KIND = 'edge'
+_NON_GRAPH_ELEMENT_KIND = 'non_graph'
+
+_OBJECT_TYPE_KIND = 'object'
+_INTERFACE_TYPE_KIND = 'interface'
+_UNION_TYPE_KIND = 'union'
+
+
+# SchemaSnapshot namedtuples hold a generated schema, along with the hash of its inputs.
+SchemaSnapshot = namedtuple(
+    'SchemaSnapshot',
+    (
+        'content_hash',                 # str, the content hash of the inputs the schema was
+                                        # generated from, as given by get_schema_content_hash().
+        'schema_graph',                 # SchemaGraph, describing the schema.
+        'graphql_schema',               # GraphQLSchema, generated from the SchemaGraph. It is a
+                                        # LazyGraphQLSchema when the snapshot was loaded.
+        'type_equivalence_hints',       # dict, GraphQLObjectType -> GraphQLUnionType, the type
+                                        # equivalence hints of the GraphQL schema.
+    ),
+)
+
+
+def _get_json_serializable_value(value):
+    """Return a canonical JSON-serializable representation of a set or mapping, for hashing."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    elif hasattr(value, 'items'):
+        return dict(value)
+    else:
+        raise TypeError(u'Unsupported type of schema data value: {} {}'
+                        .format(type(value), value))
+
+
+def get_schema_content_hash(schema_data, index_data=None, class_to_field_type_overrides=None,
+                            hidden_classes=None):
+    """Return a hash of the inputs of schema generation, to detect when a snapshot is out of date.
+
+    The hash also covers the version of the compiler, so that snapshots generated by a different
+    version are generated again.
+
+    Args:
+        schema_data: JSON-serializable description of the schema, e.g. the list of dicts describing
+                     the classes of an OrientDB schema. Sets are treated as sorted lists, and
+                     mappings as dicts, so the hash doesn't depend on their iteration order.
+        index_data: optional JSON-serializable description of the indexes of the schema.
+        class_to_field_type_overrides: optional dict, class name -> {field name -> field type},
+                                       as passed to get_graphql_schema_from_schema_graph().
+        hidden_classes: optional set of strings, as passed to
+                        get_graphql_schema_from_schema_graph().
+
+    Returns:
+        str, the hex digest of the SHA-256 hash of the inputs.
+    """
+    if class_to_field_type_overrides is None:
+        class_to_field_type_overrides = dict()
+    if hidden_classes is None:
+        hidden_classes = set()
+
+    # The package imports this module before defining its version, so it is imported here.
+    from .. import __version__
+
+    hashed_inputs = {
+        'compiler_version': __version__,
+        'schema_data': schema_data,
+        'index_data': index_data,
+        'class_to_field_type_overrides': {
+            class_name: {
+                field_name: str(field_type)
+                for field_name, field_type in six.iteritems(field_type_overrides)
+            }
+            for class_name, field_type_overrides in six.iteritems(class_to_field_type_overrides)
+        },
+        'hidden_classes': hidden_classes,
+    }
+    serialized_inputs = json.dumps(
+        hashed_inputs, sort_keys=True, separators=(',', ':'),
+        default=_get_json_serializable_value)
+    return hashlib.sha256(serialized_inputs.encode('utf-8')).hexdigest()
+
+
+def _get_type_reference(graphql_type):
+    """Return the printed name of a GraphQL type, e.g. "[Animal]" for a list of Animal."""
+    if isinstance(graphql_type, GraphQLNonNull):
+        return _get_type_reference(graphql_type.of_type) + u'!'
+    elif isinstance(graphql_type, GraphQLList):
+        return u'[' + _get_type_reference(graphql_type.of_type) + u']'
+    elif isinstance(graphql_type, GraphQLScalarType):
+        if _SCALAR_TYPES.get(graphql_type.name) is not graphql_type:
+            raise ValueError(u'Schema snapshots only support the builtin and compiler-defined '
+                             u'scalar types, but got: {}'.format(graphql_type))
+        return graphql_type.name
+    else:
+        return graphql_type.name
+
+
+def _resolve_type_reference(type_reference, name_to_graphql_type):
+    """Return the GraphQL type with the given printed name, as given by _get_type_reference()."""
+    if type_reference.endswith(u'!'):
+        return GraphQLNonNull(
+            _resolve_type_reference(type_reference[:-1], name_to_graphql_type))
+    elif type_reference.startswith(u'['):
+        return GraphQLList(
+            _resolve_type_reference(type_reference[1:-1], name_to_graphql_type))
+    elif type_reference in _SCALAR_TYPES:
+        return _SCALAR_TYPES[type_reference]
+    else:
+        return name_to_graphql_type[type_reference]
+
+
+def _encode_default_value(value):
+    """Return a JSON-serializable representation of a property's default value."""
+    # bool is a subclass of int, and datetime is a subclass of date, so check them first.
+    if value is None:
+        return None
+    elif isinstance(value, bool):
+        return ['bool', value]
+    elif isinstance(value, datetime):
+        return ['datetime', value.isoformat()]
+    elif isinstance(value, date):
+        return ['date', value.isoformat()]
+    elif isinstance(value, float):
+        return ['float', value]
+    elif isinstance(value, six.integer_types):
+        return ['int', value]
+    elif isinstance(value, six.string_types):
+        return ['string', value]
+    elif isinstance(value, (set, frozenset)):
+        return ['set', [_encode_default_value(element) for element in value]]
+    elif isinstance(value, list):
+        return ['list', [_encode_default_value(element) for element in value]]
+    else:
+        raise ValueError(u'Unsupported type of property default value: {} {}'
+                         .format(type(value), value))
+
+
+def _decode_default_value(encoded_value):
+    """Return the default value corresponding to the output of _encode_default_value()."""
+    if encoded_value is None:
+        return None
+
+    value_type, value = encoded_value
+    if value_type == 'datetime':
+        return arrow.get(value).naive
+    elif value_type == 'date':
+        return arrow.get(value, 'YYYY-MM-DD').date()
+    elif value_type in ('bool', 'float', 'int', 'string'):
+        return value
+    elif value_type == 'set':
+        return {_decode_default_value(element) for element in value}
+    elif value_type == 'list':
+        return [_decode_default_value(element) for element in value]
+    else:
+        raise AssertionError(u'Unknown type of encoded default value: {}'.format(encoded_value))
+
+
+def _get_schema_graph_description(schema_graph):
+    """Return a JSON-serializable description of the SchemaGraph."""
+    element_descriptions = []
+    for class_name in sorted(schema_graph.class_names):
+        element = schema_graph.get_element_by_class_name(class_name)
+        element_description = {
+            'class_name': class_name,
+            'abstract': element.abstract,
+            'properties': [
+                [
+                    property_name,
+                    _get_type_reference(property_descriptor.type),
+                    _encode_default_value(property_descriptor.default),
+                ]
+                for property_name, property_descriptor in sorted(six.iteritems(element.properties))
+            ],
+            'class_fields': dict(element.class_fields),
+            'in_connections': sorted(element.in_connections),
+            'out_connections': sorted(element.out_connections),
+        }
+        if element.is_vertex:
+            element_description['kind'] = _VERTEX_ELEMENT_KIND
+        elif element.is_edge:
+            element_description['kind'] = _EDGE_ELEMENT_KIND
+            element_description['base_in_connection'] = element.base_in_connection
+            element_description['base_out_connection'] = element.base_out_connection
+        elif element.is_non_graph:
+            element_description['kind'] = _NON_GRAPH_ELEMENT_KIND
+        else:
+            raise AssertionError(u'Unexpected schema element: {}'.format(element))
+        element_descriptions.append(element_description)
+
+    return {
+        'elements': element_descriptions,
+        'superclass_sets': {
+            class_name: sorted(schema_graph.get_superclass_set(class_name))
+            for class_name in schema_graph.class_names
+        },
+        'indexes': [
+            [
+                index_definition.name,
+                index_definition.base_classname,
+                sorted(index_definition.fields),
+                index_definition.unique,
+                index_definition.ordered,
+                index_definition.ignore_nulls,
+            ]
+            for index_definition in sorted(
+                schema_graph.all_indexes,
+                key=lambda index_definition: (index_definition.name,
+                                              index_definition.base_classname))
+        ],
+    }
+
+
+def _get_schema_graph_from_description(schema_graph_description):
+    """Return the SchemaGraph described by the output of _get_schema_graph_description()."""
+    class_name_to_description = {
+        element_description['class_name']: element_description
+        for element_description in schema_graph_description['elements']
+    }
+
+    # The GraphQL object types of embedded non-graph classes are shared by all properties
+    # referencing them, as when the SchemaGraph is built from OrientDB schema data.
+    embedded_graphql_types = dict()
+
+    def get_property_descriptors(element_description):
+        """Return a dict of property name to PropertyDescriptor for the described element."""
+        return {
+            property_name: PropertyDescriptor(
+                _resolve_type_reference(type_reference, embedded_graphql_types),
+                _decode_default_value(encoded_default))
+            for property_name, type_reference, encoded_default in element_description['properties']
+        }
+
+    for element_description in schema_graph_description['elements']:
+        for _, type_reference, _ in element_description['properties']:
+            embedded_class_name = type_reference.strip(u'[]!')
+            embedded_class_description = class_name_to_description.get(embedded_class_name)
+            if (embedded_class_description is not None and
+                    embedded_class_description['kind'] == _NON_GRAPH_ELEMENT_KIND):
+                if embedded_class_name not in embedded_graphql_types:
+                    embedded_properties = get_property_descriptors(embedded_class_description)
+                    embedded_graphql_types[embedded_class_name] = GraphQLObjectType(
+                        embedded_class_name, {
+                            property_name: property_descriptor.type
+                            for property_name, property_descriptor in six.iteritems(
+                                embedded_properties)
+                        }, [])
+
+    elements = dict()
+    for element_description in schema_graph_description['elements']:
+        class_name = element_description['class_name']
+        element_args = (
+            class_name,
+            element_description['abstract'],
+            get_property_descriptors(element_description),
+            element_description['class_fields'],
+        )
+        kind = element_description['kind']
+        if kind == _VERTEX_ELEMENT_KIND:
+            element = VertexType(*element_args)
+        elif kind == _EDGE_ELEMENT_KIND:
+            element = EdgeType(*element_args,
+                               base_in_connection=element_description['base_in_connection'],
+                               base_out_connection=element_description['base_out_connection'])
+        elif kind == _NON_GRAPH_ELEMENT_KIND:
+            element = NonGraphElement(*element_args)
+        else:
+            raise AssertionError(u'Unknown kind of schema element: {}'.format(element_description))
+        element.in_connections.update(element_description['in_connections'])
+        element.out_connections.update(element_description['out_connections'])
+        element.freeze()
+        elements[class_name] = element
+
+    inheritance_structure = InheritanceStructure.from_superclass_sets(
+        schema_graph_description['superclass_sets'])
+    all_indexes = {
+        IndexDefinition(
+            name=name,
+            base_classname=base_classname,
+            fields=frozenset(fields),
+            unique=unique,
+            ordered=ordered,
+            ignore_nulls=ignore_nulls,
+        )
+        for name, base_classname, fields, unique, ordered, ignore_nulls
+        in schema_graph_description['indexes']
+    }
+    return SchemaGraph(elements, inheritance_structure, all_indexes)
+
+
+def _get_field_descriptions(graphql_type):
+    """Return a list of [field name, type reference] pairs describing the fields of the type.
+
+    Meta fields are described with a type reference of None, since they are shared by all types.
+    """
+    field_descriptions = []
+    for field_name, field in six.iteritems(graphql_type.fields):
+        if EXTENDED_META_FIELD_DEFINITIONS.get(field_name) is field:
+            field_descriptions.append([field_name, None])
+            continue
+
+        has_unsupported_attributes = (
+            field.args or field.resolver is not None or field.description is not None or
+            field.deprecation_reason is not None
+        )
+        if has_unsupported_attributes:
+            raise ValueError(u'Schema snapshots only support fields without arguments, resolvers, '
+                             u'descriptions or deprecation reasons, but field {} of type {} has '
+                             u'them.'
+                             .format(field_name, graphql_type.name))
+        field_descriptions.append([field_name, _get_type_reference(field.type)])
+    return field_descriptions
+
+
+def _get_graphql_schema_description(graphql_schema, type_equivalence_hints):
+    """Return a JSON-serializable description of the GraphQL schema and type equivalence hints."""
+    for directive in graphql_schema.get_directives():
+        if _DIRECTIVES.get(directive.name) is not directive:
+            raise ValueError(u'Schema snapshots only support the builtin and compiler-defined '
+                             u'directives, but got: {}'.format(directive.name))
+
+    scalar_type_names = []
+    type_descriptions = []
+    for type_name, graphql_type in sorted(six.iteritems(graphql_schema.get_type_map())):
+        if type_name.startswith(u'__'):
+            # Introspection types are part of every schema.
+            continue
+        elif isinstance(graphql_type, GraphQLScalarType):
+            # Raise an error if the scalar type is not supported.
+            scalar_type_names.append(_get_type_reference(graphql_type))
+        elif isinstance(graphql_type, GraphQLObjectType):
+            type_descriptions.append({
+                'name': type_name,
+                'kind': _OBJECT_TYPE_KIND,
+                'fields': _get_field_descriptions(graphql_type),
+                'interfaces': [interface.name for interface in graphql_type.interfaces],
+            })
+        elif isinstance(graphql_type, GraphQLInterfaceType):
+            type_descriptions.append({
+                'name': type_name,
+                'kind': _INTERFACE_TYPE_KIND,
+                'fields': _get_field_descriptions(graphql_type),
+            })
+        elif isinstance(graphql_type, GraphQLUnionType):
+            type_descriptions.append({
+                'name': type_name,
+                'kind': _UNION_TYPE_KIND,
+                'types': [member_type.name for member_type in graphql_type.types],
+            })
+        else:
+            raise ValueError(u'Schema snapshots do not support GraphQL type {}.'.format(type_name))
+
+    return {
+        'query_type': graphql_schema.get_query_type().name,
+        'directives': [directive.name for directive in graphql_schema.get_directives()],
+        'scalar_types': scalar_type_names,
+        'types': type_descriptions,
+        'type_equivalence_hints': sorted(
+            [object_type.name, union_type.name]
+            for object_type, union_type in six.iteritems(type_equivalence_hints)
+        ),
+    }
+
+
+def _create_field_specification(name_to_graphql_type, field_descriptions):
+    """Return a function that creates the described fields, once all types exist."""
+    def field_maker_func():
+        """Create and return the fields of the GraphQL type."""
+        return OrderedDict(
+            (
+                field_name,
+                EXTENDED_META_FIELD_DEFINITIONS[field_name] if type_reference is None else
+                GraphQLField(_resolve_type_reference(type_reference, name_to_graphql_type)),
+            )
+            for field_name, type_reference in field_descriptions
+        )
+
+    return field_maker_func
+
+
+def _create_type_list_specification(name_to_graphql_type, type_names):
+    """Return a function that returns the named types, once all types exist."""
+    def type_list_spec():
+        """Return a list of the GraphQL types with the given names."""
+        return [name_to_graphql_type[type_name] for type_name in type_names]
+
+    return type_list_spec
+
+
+def _get_graphql_schema_from_description(graphql_schema_description):
+    """Return the GraphQL schema and hints described by _get_graphql_schema_description()."""
+    # The fields, interfaces and union members of each type are only resolved once all types have
+    # been created. The schema is given all of its types, so that it is a LazyGraphQLSchema whose
+    # types only create their fields when they are used.
+    name_to_graphql_type = dict()
+    for type_description in graphql_schema_description['types']:
+        type_name = type_description['name']
+        kind = type_description['kind']
+        if kind == _OBJECT_TYPE_KIND:
+            graphql_type = GraphQLObjectType(
+                type_name,
+                _create_field_specification(name_to_graphql_type, type_description['fields']),
+                interfaces=_create_type_list_specification(
+                    name_to_graphql_type, type_description['interfaces']),
+                is_type_of=lambda: None)
+        elif kind == _INTERFACE_TYPE_KIND:
+            graphql_type = GraphQLInterfaceType(
+                type_name,
+                fields=_create_field_specification(
+                    name_to_graphql_type, type_description['fields']))
+        elif kind == _UNION_TYPE_KIND:
+            graphql_type = GraphQLUnionType(
+                type_name,
+                types=_create_type_list_specification(
+                    name_to_graphql_type, type_description['types']))
+        else:
+            raise AssertionError(u'Unknown kind of GraphQL type: {}'.format(type_description))
+        name_to_graphql_type[type_name] = graphql_type
+
+    graphql_schema = LazyGraphQLSchema(
+        name_to_graphql_type[graphql_schema_description['query_type']],
+        chain(
+            (
+                _SCALAR_TYPES[scalar_type_name]
+                for scalar_type_name in graphql_schema_description['scalar_types']
+            ),
+            six.itervalues(name_to_graphql_type),
+        ),
+        [
+            _DIRECTIVES[directive_name]
+            for directive_name in graphql_schema_description['directives']
+        ])
+    type_equivalence_hints = {
+        name_to_graphql_type[object_type_name]: name_to_graphql_type[union_type_name]
+        for object_type_name, union_type_name
+        in graphql_schema_description['type_equivalence_hints']
+    }
+    return graphql_schema, type_equivalence_hints
+
+
+def _read_preamble_and_header(snapshot_file, file_path):
+    """Return the version and header of the snapshot file, leaving the file at the body's start.
+
+    Raises:
+        ValueError, if the file is not a schema snapshot.
+    """
+    preamble = snapshot_file.read(_PREAMBLE_STRUCT.size)
+    if len(preamble) < _PREAMBLE_STRUCT.size:
+        raise ValueError(u'File {} is not a schema snapshot.'.format(file_path))
+    magic, version, header_length = _PREAMBLE_STRUCT.unpack(preamble)
+    if magic != SCHEMA_SNAPSHOT_MAGIC:
+        raise ValueError(u'File {} is not a schema snapshot.'.format(file_path))
+    if version != SCHEMA_SNAPSHOT_VERSION:
+        return version, None
+    return version, json.loads(snapshot_file.read(header_length).decode('utf-8'))
+
+
+def save_schema_snapshot(file_path, schema_snapshot):
+    """Write a schema snapshot to a file, for use with load_schema_snapshot().
+
+    The snapshot is written to a temporary file that then replaces the given file, so processes
+    loading the snapshot concurrently never read a partially written file.
+
+    Args:
+        file_path: str, path of the snapshot file to write. Existing files are overwritten.
+        schema_snapshot: SchemaSnapshot namedtuple, whose GraphQL schema only contains the kinds of
+                         types and fields produced by get_graphql_schema_from_schema_graph().
+
+    Raises:
+        ValueError, if the schema contains types, fields, directives or property default values
+        that snapshots don't support.
+    """
+    body = json.dumps({
+        'schema_graph': _get_schema_graph_description(schema_snapshot.schema_graph),
+        'graphql_schema': _get_graphql_schema_description(
+            schema_snapshot.graphql_schema, schema_snapshot.type_equivalence_hints),
+    }, sort_keys=True).encode('utf-8')
+    header = json.dumps({
+        'content_hash': schema_snapshot.content_hash,
+    }, sort_keys=True).encode('utf-8')
+
+    snapshot_directory = os.path.dirname(os.path.abspath(file_path))
+    with NamedTemporaryFile(mode='wb', dir=snapshot_directory, delete=False) as snapshot_file:
+        snapshot_file.write(_PREAMBLE_STRUCT.pack(
+            SCHEMA_SNAPSHOT_MAGIC, SCHEMA_SNAPSHOT_VERSION, len(header)))
+        snapshot_file.write(header)
+        snapshot_file.write(body)
+    try:
+        # os.replace() is not available on Python 2, where os.rename() replaces existing files
+        # on all platforms other than Windows.
+        getattr(os, 'replace', os.rename)(snapshot_file.name, file_path)
+    except Exception:
+        os.remove(snapshot_file.name)
+        raise
+
+
+def get_schema_snapshot_content_hash(file_path):
+    """Return the content hash of the schema snapshot file, without loading the snapshot.
+
+    Args:
+        file_path: str, path of the snapshot file.
+
+    Returns:
+        str, the content hash the snapshot was saved with, or None if the file doesn't exist or
+        was written in a different version of the snapshot file format. In both cases, the
+        snapshot must be generated and saved again.
+
+    Raises:
+        ValueError, if the file exists but is not a schema snapshot.
+    """
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'rb') as snapshot_file:
+        _, header = _read_preamble_and_header(snapshot_file, file_path)
+    if header is None:
+        return None
+    return header['content_hash']
+
+
+def load_schema_snapshot(file_path):
+    """Load a schema snapshot written using save_schema_snapshot().
+
+    Args:
+        file_path: str, path of the snapshot file.
+
+    Returns:
+        SchemaSnapshot namedtuple, equivalent to the saved one.
+
+    Raises:
+        ValueError, if the file is not a schema snapshot in the supported version of the file
+        format.
+    """
+    with open(file_path, 'rb') as snapshot_file:
+        version, header = _read_preamble_and_header(snapshot_file, file_path)
+        if header is None:
+            raise ValueError(u'Schema snapshot {} has unsupported version {}, expected {}.'
+                             .format(file_path, version, SCHEMA_SNAPSHOT_VERSION))
+        body = json.loads(snapshot_file.read().decode('utf-8'))
+
+    schema_graph = _get_schema_graph_from_description(body['schema_graph'])
+    graphql_schema, type_equivalence_hints = _get_graphql_schema_from_description(
+        body['graphql_schema'])
+    return SchemaSnapshot(
+        content_hash=header['content_hash'],
+        schema_graph=schema_graph,
+        graphql_schema=graphql_schema,
+        type_equivalence_hints=type_equivalence_hints,
+    )
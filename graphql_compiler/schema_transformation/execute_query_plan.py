@@ -0,0 +1,274 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from threading import Lock
+
+from graphql import print_ast
+from graphql.language.ast import ListValue, StringValue
+from graphql.language.visitor import Visitor, visit
+import six
+
+from ..compiler.helpers import get_parameter_name, is_runtime_parameter
+from ..schema import FilterDirective, OutputDirective
+from .hash_join import DEFAULT_MAX_ROWS_IN_MEMORY, SpooledRows, hash_join_rows
+from .make_query_plan import get_sub_query_plans_in_dfs_order
+
+
+DEFAULT_NUM_WORKERS = 4
+
+# Databases reject or poorly plan queries with very large in_collection filters, so by default the
+# values passed to a child sub-query are split into chunks of at most this many values.
+DEFAULT_MAX_COLLECTION_SIZE = 10000
+
+
+def _get_runtime_parameter_names(query_ast):
+    """Return the set of names of the runtime parameters used in the @filters of the query AST."""
+    visitor = RuntimeParameterCollectorVisitor()
+    visit(query_ast, visitor)
+    return visitor.parameter_names
+
+
+def _get_output_names(query_ast):
+    """Return the set of out_names of the @output directives of the query AST."""
+    visitor = OutputNameCollectorVisitor()
+    visit(query_ast, visitor)
+    return visitor.output_names
+
+
+def _get_distinct_output_values(rows, out_name):
+    """Return the distinct non-null values of the output in the rows, in order of appearance."""
+    distinct_values = OrderedDict()
+    for row in rows:
+        value = row.get(out_name)
+        if value is not None:
+            distinct_values[value] = None
+    return list(distinct_values)
+
+
+def _split_into_chunks(values, max_chunk_size):
+    """Return the values split into consecutive lists of at most max_chunk_size values each."""
+    return [
+        values[chunk_start:chunk_start + max_chunk_size]
+        for chunk_start in six.moves.xrange(0, len(values), max_chunk_size)
+    ]
+
+
+def execute_query_plan(schema_id_to_execution_func, query_plan_descriptor, query_parameters,
+                       num_workers=DEFAULT_NUM_WORKERS,
+                       max_collection_size=DEFAULT_MAX_COLLECTION_SIZE,
+                       max_rows_in_memory=DEFAULT_MAX_ROWS_IN_MEMORY, sub_query_strings=None):
+    """Execute a QueryPlanDescriptor, yielding the rows of the original cross-schema query.
+
+    The root sub-query is executed first. Then, level by level, each child sub-query is executed
+    with its in_collection filter's parameter set to the distinct values of the parent output it
+    is joined on. If there are more than max_collection_size such values, the child sub-query is
+    executed once per chunk of at most max_collection_size values, and the results of the chunks
+    are concatenated. Since the values are distinct, the results of different chunks are disjoint.
+    All sub-queries and chunks at the same depth of the plan depend only on sub-queries closer
+    to the root, so they are executed concurrently. Sub-queries whose parent produced no values to
+    join on are not executed at all. The result rows of each sub-query are streamed into a
+    SpooledRows object, which holds at most max_rows_in_memory of them in memory and writes them
+    to a temporary file beyond that.
+
+    Finally, the results are hash-joined bottom-up according to the OutputJoinDescriptors, joining
+    the rows of each sub-query with the joined rows of each of its children's subtrees in turn.
+    The joins are inner joins, except for optional stitched edges, whose joins are left outer
+    joins: parent rows without matching child rows are kept, with the outputs of the child's
+    subtree set to None. Each join holds at most max_rows_in_memory rows in its hash table, and
+    spills the rows to temporary files beyond that, as described in hash_join_rows(). The joined
+    rows of the root sub-query are produced one at a time, with the intermediate outputs removed.
+
+    Args:
+        schema_id_to_execution_func: Dict[str, function], mapping each schema_id of the plan to a
+                                     function that executes a GraphQL query string with the given
+                                     parameters against that schema, e.g. by compiling it and
+                                     running it on the schema's backend, and returns an iterable of
+                                     result rows, each a dict from output name to value.
+        query_plan_descriptor: QueryPlanDescriptor namedtuple, produced by make_query_plan().
+        query_parameters: dict, parameters of the original cross-schema query. Each sub-query
+                          receives only the parameters its filters use.
+        num_workers: optional int, the maximum number of sub-queries executed concurrently.
+        max_collection_size: optional int, the maximum number of values passed to the
+                             in_collection filter of a single child sub-query execution. If None,
+                             all values are passed at once.
+        max_rows_in_memory: optional int, the maximum number of result rows of each sub-query,
+                            and of rows in the hash table of each join, held in memory before the
+                            rows are spilled to temporary files.
+        sub_query_strings: optional tuple of str, the printed query ASTs of the plan's
+                           SubQueryPlans in depth-first pre-order, e.g. from a CachedQueryPlan.
+                           If not provided, the query ASTs are printed.
+
+    Yields:
+        dicts, the result rows of the original query, mapping each output name to its value.
+
+    Raises:
+        ValueError if a sub-query targets a schema without an execution function, or if
+        max_collection_size or max_rows_in_memory is below 1.
+    """
+    if max_collection_size is not None and max_collection_size < 1:
+        raise ValueError(u'Expected max_collection_size to be at least 1, but got: {}'
+                         .format(max_collection_size))
+
+    root_sub_query_plan = query_plan_descriptor.root_sub_query_plan
+    sub_query_plans = get_sub_query_plans_in_dfs_order(root_sub_query_plan)
+    for sub_query_plan in sub_query_plans:
+        if sub_query_plan.schema_id not in schema_id_to_execution_func:
+            raise ValueError(u'No execution function was provided for schema {}, targeted by '
+                             u'sub-query {}.'.format(sub_query_plan.schema_id,
+                                                     print_ast(sub_query_plan.query_ast)))
+
+    # make_query_plan() creates the join descriptors in depth-first pre-order of the child plans.
+    child_sub_query_plans = sub_query_plans[1:]
+    if len(child_sub_query_plans) != len(query_plan_descriptor.output_join_descriptors):
+        raise AssertionError(u'Expected one OutputJoinDescriptor per child sub-query, but got {} '
+                             u'descriptors for {} child sub-queries: {}'
+                             .format(len(query_plan_descriptor.output_join_descriptors),
+                                     len(child_sub_query_plans), query_plan_descriptor))
+    plan_id_to_output_join_descriptor = {
+        id(child_sub_query_plan): output_join_descriptor
+        for child_sub_query_plan, output_join_descriptor in zip(
+            child_sub_query_plans, query_plan_descriptor.output_join_descriptors)
+    }
+
+    if sub_query_strings is None:
+        sub_query_strings = [
+            print_ast(sub_query_plan.query_ast)
+            for sub_query_plan in sub_query_plans
+        ]
+    elif len(sub_query_strings) != len(sub_query_plans):
+        raise AssertionError(u'Expected one query string per sub-query, but got {} query strings '
+                             u'for {} sub-queries.'
+                             .format(len(sub_query_strings), len(sub_query_plans)))
+    plan_id_to_query_string = {
+        id(sub_query_plan): sub_query_string
+        for sub_query_plan, sub_query_string in zip(sub_query_plans, sub_query_strings)
+    }
+
+    # Each sub-query's rows are written to its SpooledRows as they are produced. Sub-queries
+    # executed concurrently may write to the same SpooledRows, if they are chunks of one sub-query.
+    plan_id_to_rows = {
+        id(sub_query_plan): SpooledRows(max_rows_in_memory=max_rows_in_memory)
+        for sub_query_plan in sub_query_plans
+    }
+    rows_lock = Lock()
+
+    def execute_sub_query(sub_query_plan, parameters):
+        """Execute one sub-query, appending its result rows to the rows of the sub-query."""
+        execution_func = schema_id_to_execution_func[sub_query_plan.schema_id]
+        sub_query_rows = plan_id_to_rows[id(sub_query_plan)]
+        for row in execution_func(plan_id_to_query_string[id(sub_query_plan)], parameters):
+            with rows_lock:
+                sub_query_rows.append(row)
+
+    def get_sub_query_parameters(sub_query_plan, extra_parameters):
+        """Return the query parameters used by the sub-query, along with the extra parameters."""
+        parameters = {
+            parameter_name: query_parameters[parameter_name]
+            for parameter_name in _get_runtime_parameter_names(sub_query_plan.query_ast)
+            if parameter_name in query_parameters
+        }
+        parameters.update(extra_parameters)
+        return parameters
+
+    def execute_sub_queries():
+        """Execute the sub-queries level by level, starting from the root."""
+        execute_sub_query(
+            root_sub_query_plan, get_sub_query_parameters(root_sub_query_plan, {}))
+
+        pool = ThreadPool(num_workers)
+        try:
+            current_level = [root_sub_query_plan]
+            while current_level:
+                tasks = []
+                for parent_query_plan in current_level:
+                    parent_rows = plan_id_to_rows[id(parent_query_plan)]
+                    for child_query_plan in parent_query_plan.child_query_plans:
+                        parent_out_name, _ = (
+                            plan_id_to_output_join_descriptor[id(child_query_plan)].output_names)
+                        parent_values = _get_distinct_output_values(parent_rows, parent_out_name)
+                        if max_collection_size is None:
+                            parent_value_chunks = [parent_values] if parent_values else []
+                        else:
+                            parent_value_chunks = _split_into_chunks(
+                                parent_values, max_collection_size)
+                        for parent_value_chunk in parent_value_chunks:
+                            child_parameters = get_sub_query_parameters(
+                                child_query_plan, {parent_out_name: parent_value_chunk})
+                            tasks.append((child_query_plan, child_parameters))
+
+                pool.map(lambda task: execute_sub_query(*task), tasks)
+
+                current_level = [
+                    child_query_plan
+                    for parent_query_plan in current_level
+                    for child_query_plan in parent_query_plan.child_query_plans
+                ]
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_subtree_output_names(sub_query_plan):
+        """Return the set of output names of the sub-queries in the subtree rooted at the plan."""
+        return set().union(*(
+            _get_output_names(subtree_query_plan.query_ast)
+            for subtree_query_plan in get_sub_query_plans_in_dfs_order(sub_query_plan)
+        ))
+
+    def get_joined_rows(sub_query_plan):
+        """Return an iterable of the joined rows of the subtree rooted at the sub-query."""
+        joined_rows = plan_id_to_rows[id(sub_query_plan)]
+        for child_query_plan in sub_query_plan.child_query_plans:
+            output_join_descriptor = plan_id_to_output_join_descriptor[id(child_query_plan)]
+            parent_out_name, child_out_name = output_join_descriptor.output_names
+            if output_join_descriptor.is_optional:
+                unmatched_child_out_names = get_subtree_output_names(child_query_plan)
+            else:
+                unmatched_child_out_names = None
+            joined_rows = hash_join_rows(
+                joined_rows, parent_out_name, get_joined_rows(child_query_plan), child_out_name,
+                max_rows_in_memory=max_rows_in_memory,
+                unmatched_right_out_names=unmatched_child_out_names)
+        return joined_rows
+
+    intermediate_output_names = query_plan_descriptor.intermediate_output_names
+    try:
+        execute_sub_queries()
+        for joined_row in get_joined_rows(root_sub_query_plan):
+            yield {
+                out_name: value
+                for out_name, value in six.iteritems(joined_row)
+                if out_name not in intermediate_output_names
+            }
+    finally:
+        for sub_query_rows in six.itervalues(plan_id_to_rows):
+            sub_query_rows.close()
+
+
+class RuntimeParameterCollectorVisitor(Visitor):
+    def __init__(self):
+        """Create a visitor for collecting the names of runtime parameters used by @filters."""
+        self.parameter_names = set()
+
+    def enter_Directive(self, node, *args):
+        """Record the runtime parameters of @filter directives."""
+        if node.name.value != FilterDirective.name:
+            return
+        for argument in node.arguments:
+            if isinstance(argument.value, ListValue):
+                for value in argument.value.values:
+                    if isinstance(value, StringValue) and is_runtime_parameter(value.value):
+                        self.parameter_names.add(get_parameter_name(value.value))
+
+
+class OutputNameCollectorVisitor(Visitor):
+    def __init__(self):
+        """Create a visitor for collecting the out_names of @output directives."""
+        self.output_names = set()
+
+    def enter_Directive(self, node, *args):
+        """Record the out_name of @output directives."""
+        if node.name.value != OutputDirective.name:
+            return
+        for argument in node.arguments:
+            if argument.name.value == 'out_name':
+                self.output_names.add(argument.value.value)
@@ -0,0 +1,408 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+"""Join the result rows of stitched sub-queries using a hash join with bounded memory.
+
+The rows of one side of the join, the build side, are put into a hash table keyed by the value of
+the output being joined on, and the rows of the other side, the probe side, are streamed through
+it. If the build side has more rows than fit in the memory budget, both sides are split into
+partitions by the hash of the joined value and written to temporary files, so that matching rows
+end up in the same partition (a grace hash join). The partitions are then joined one at a time,
+recursively partitioning them further if they are still too large. Partitions that can't be split
+further, e.g. because most rows share the same value, are joined by loading their build side one
+budget-sized chunk at a time and scanning their probe side once per chunk.
+
+Rows written to temporary files are serialized as JSON, with each value tagged with its type, so
+that values such as dates and decimals are read back unchanged. Only the types of values that
+result rows contain are supported: None, bools, ints, floats, strings, dates, datetimes, decimals,
+and lists of such values.
+
+Left outer joins, used for optional stitched edges, always build the hash table on the right side
+and keep track of the left (probe) rows that matched, so that the unmatched ones can be produced
+afterwards.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain
+import json
+from tempfile import TemporaryFile
+
+import arrow
+import six
+
+
+DEFAULT_MAX_ROWS_IN_MEMORY = 1000000
+DEFAULT_NUM_PARTITIONS = 16
+
+# Partitions are split at most this many times, after which they are joined in chunks.
+MAX_PARTITIONING_DEPTH = 3
+
+
+def _encode_row_value(value):
+    """Return a JSON-serializable representation of a row's value, tagged with its type."""
+    # bool is a subclass of int, and datetime is a subclass of date, so check them first.
+    if value is None:
+        return ['null', None]
+    elif isinstance(value, bool):
+        return ['bool', value]
+    elif isinstance(value, datetime):
+        if value.tzinfo is None:
+            return ['datetime', value.isoformat()]
+        return ['datetime_tz', value.isoformat()]
+    elif isinstance(value, date):
+        return ['date', value.isoformat()]
+    elif isinstance(value, Decimal):
+        return ['decimal', str(value)]
+    elif isinstance(value, float):
+        return ['float', value]
+    elif isinstance(value, six.integer_types):
+        return ['int', value]
+    elif isinstance(value, six.string_types):
+        return ['string', value]
+    elif isinstance(value, (list, tuple)):
+        return ['list', [_encode_row_value(element) for element in value]]
+    else:
+        raise ValueError(u'Unsupported type of row value: {} {}'.format(type(value), value))
+
+
+def _decode_row_value(encoded_value):
+    """Return the row value corresponding to the output of _encode_row_value()."""
+    value_type, value = encoded_value
+    if value_type == 'datetime':
+        return arrow.get(value).naive
+    elif value_type == 'datetime_tz':
+        return arrow.get(value).datetime
+    elif value_type == 'date':
+        return arrow.get(value, 'YYYY-MM-DD').date()
+    elif value_type == 'decimal':
+        return Decimal(value)
+    elif value_type in ('null', 'bool', 'float', 'int', 'string'):
+        return value
+    elif value_type == 'list':
+        return [_decode_row_value(element) for element in value]
+    else:
+        raise AssertionError(u'Unknown type of encoded row value: {}'.format(encoded_value))
+
+
+def _write_row(row_file, row):
+    """Write the row to the file, as a line of JSON."""
+    encoded_row = {
+        out_name: _encode_row_value(value)
+        for out_name, value in six.iteritems(row)
+    }
+    # The JSON is ASCII-only, since non-ASCII characters are escaped by default.
+    row_file.write(json.dumps(encoded_row, separators=(',', ':')).encode('ascii') + b'\n')
+
+
+def _read_row(line):
+    """Return the row written as the given line of JSON by _write_row()."""
+    return {
+        out_name: _decode_row_value(encoded_value)
+        for out_name, encoded_value in six.iteritems(json.loads(line.decode('ascii')))
+    }
+
+
+class SpooledRows(object):
+    """Rows held in memory up to a budget, and in a temporary file beyond it.
+
+    Rows can be appended until the SpooledRows are first iterated over, after which they can be
+    iterated over any number of times, also concurrently. Once the rows are no longer needed,
+    close() removes the temporary file.
+    """
+
+    def __init__(self, max_rows_in_memory=DEFAULT_MAX_ROWS_IN_MEMORY):
+        """Create SpooledRows without any rows.
+
+        Args:
+            max_rows_in_memory: optional int, the maximum number of rows held in memory. Once more
+                                rows are appended, all rows are written to a temporary file. The
+                                values of the rows must then be of the supported types.
+        """
+        if max_rows_in_memory < 1:
+            raise ValueError(u'Expected max_rows_in_memory to be at least 1, but got: {}'
+                             .format(max_rows_in_memory))
+        self._max_rows_in_memory = max_rows_in_memory
+        self._rows = []
+        self._row_file = None
+        self._num_rows = 0
+        self._is_read = False
+
+    def append(self, row):
+        """Append a row, spilling all rows to a temporary file if they exceed the budget."""
+        if self._is_read:
+            raise AssertionError(u'Rows cannot be appended after being read.')
+        if self._row_file is not None:
+            _write_row(self._row_file, row)
+        elif len(self._rows) < self._max_rows_in_memory:
+            self._rows.append(row)
+        else:
+            self._row_file = TemporaryFile(mode='w+b')
+            for spooled_row in chain(self._rows, (row,)):
+                _write_row(self._row_file, spooled_row)
+            self._rows = None
+        self._num_rows += 1
+
+    def extend(self, rows):
+        """Append each of the rows in turn."""
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        """Return the number of rows."""
+        return self._num_rows
+
+    def __iter__(self):
+        """Return an iterator over the rows, in the order they were appended."""
+        self._is_read = True
+        if self._row_file is None:
+            return iter(self._rows)
+        return self._read_rows_from_file()
+
+    def _read_rows_from_file(self):
+        """Yield the rows of the temporary file, starting from its beginning."""
+        # Each iterator keeps its own position, since several may read the file at the same time.
+        position = 0
+        while True:
+            self._row_file.seek(position)
+            line = self._row_file.readline()
+            if not line:
+                return
+            position = self._row_file.tell()
+            yield _read_row(line)
+
+    def close(self):
+        """Discard the rows, removing the temporary file if there is one."""
+        if self._row_file is not None:
+            self._row_file.close()
+            self._row_file = None
+        self._rows = []
+        self._num_rows = 0
+
+
+def _write_rows_to_partitions(rows, out_name, num_partitions, depth, keep_null_rows):
+    """Write the rows into temporary partition files, by the value of the output.
+
+    Args:
+        rows: iterable of dicts, the rows to partition.
+        out_name: str, the output whose value the rows are partitioned by.
+        num_partitions: int, number of partitions.
+        depth: int, number of times the rows were partitioned before. It is hashed along with the
+               value, so that rows in the same partition at one depth are spread out at the next.
+        keep_null_rows: bool, whether rows whose value is None are kept. Otherwise, they are
+                        dropped, since they don't match any row.
+
+    Returns:
+        list of num_partitions temporary files, each rewound to its beginning and containing the
+        rows of its partition, one line of JSON per row.
+    """
+    partition_files = [TemporaryFile(mode='w+b') for _ in six.moves.xrange(num_partitions)]
+    for row in rows:
+        value = row.get(out_name)
+        if value is not None or keep_null_rows:
+            partition_index = hash((depth, value)) % num_partitions
+            _write_row(partition_files[partition_index], row)
+    for partition_file in partition_files:
+        partition_file.seek(0)
+    return partition_files
+
+
+def _read_rows_from_partition(partition_file):
+    """Yield the rows of a partition file, starting from its beginning."""
+    partition_file.seek(0)
+    for line in partition_file:
+        yield _read_row(line)
+
+
+def _build_hash_table(build_rows, build_out_name, max_rows_in_memory):
+    """Read build rows into a hash table until it exceeds the memory budget.
+
+    Args:
+        build_rows: iterator of dicts, the rows of the build side. Rows are consumed from it.
+        build_out_name: str, the output of the build side being joined on.
+        max_rows_in_memory: int, the maximum number of rows in the hash table.
+
+    Returns:
+        tuple (dict, bool). The dict maps each joined value to the list of build rows with that
+        value. The bool is True if all build rows were read, and False if the hash table exceeded
+        the budget, in which case it holds max_rows_in_memory + 1 rows, and the remaining rows are
+        left in the iterator.
+    """
+    hash_table = {}
+    num_rows = 0
+    for build_row in build_rows:
+        value = build_row.get(build_out_name)
+        if value is None:
+            continue
+        hash_table.setdefault(value, []).append(build_row)
+        num_rows += 1
+        if num_rows > max_rows_in_memory:
+            return hash_table, False
+    return hash_table, True
+
+
+def _get_matching_build_rows(hash_table, probe_row, probe_out_name):
+    """Return the build rows in the hash table whose joined value equals that of the probe row."""
+    value = probe_row.get(probe_out_name)
+    if value is None:
+        return ()
+    return hash_table.get(value, ())
+
+
+def _probe_hash_table(hash_table, probe_rows, probe_out_name, keep_unmatched_probe_rows):
+    """Yield the (build row, probe row) pairs with equal joined values.
+
+    If keep_unmatched_probe_rows is True, each probe row without a matching build row is also
+    yielded once, paired with None.
+    """
+    for probe_row in probe_rows:
+        build_rows = _get_matching_build_rows(hash_table, probe_row, probe_out_name)
+        for build_row in build_rows:
+            yield build_row, probe_row
+        if keep_unmatched_probe_rows and not build_rows:
+            yield None, probe_row
+
+
+def _join_partition_in_chunks(build_file, build_out_name, probe_file, probe_out_name,
+                              max_rows_in_memory, keep_unmatched_probe_rows):
+    """Yield the matching (build row, probe row) pairs of a partition, one build chunk at a time.
+
+    If keep_unmatched_probe_rows is True, the probe rows that matched any build chunk are tracked
+    using one byte per probe row of the partition, and each probe row without a matching build row
+    is yielded once, paired with None, after all chunks are joined.
+    """
+    build_rows = _read_rows_from_partition(build_file)
+    probe_row_matched = bytearray()
+    is_first_chunk = True
+    all_build_rows_read = False
+    while not all_build_rows_read:
+        hash_table, all_build_rows_read = _build_hash_table(
+            build_rows, build_out_name, max_rows_in_memory)
+        for probe_index, probe_row in enumerate(_read_rows_from_partition(probe_file)):
+            if is_first_chunk:
+                probe_row_matched.append(0)
+            for build_row in _get_matching_build_rows(hash_table, probe_row, probe_out_name):
+                probe_row_matched[probe_index] = 1
+                yield build_row, probe_row
+        is_first_chunk = False
+
+    if keep_unmatched_probe_rows:
+        for probe_index, probe_row in enumerate(_read_rows_from_partition(probe_file)):
+            if not probe_row_matched[probe_index]:
+                yield None, probe_row
+
+
+def _grace_hash_join(build_rows, build_out_name, probe_rows, probe_out_name,
+                     max_rows_in_memory, num_partitions, depth, keep_unmatched_probe_rows):
+    """Yield the (build row, probe row) pairs with equal non-null joined values.
+
+    If keep_unmatched_probe_rows is True, each probe row without a matching build row is also
+    yielded once, paired with None.
+    """
+    build_rows = iter(build_rows)
+    hash_table, all_build_rows_read = _build_hash_table(
+        build_rows, build_out_name, max_rows_in_memory)
+    if all_build_rows_read:
+        for build_row, probe_row in _probe_hash_table(
+            hash_table, probe_rows, probe_out_name, keep_unmatched_probe_rows
+        ):
+            yield build_row, probe_row
+        return
+
+    # The build side doesn't fit in memory, so both sides are spilled to disk in partitions.
+    build_rows_read = chain.from_iterable(six.itervalues(hash_table))
+    build_partition_files = _write_rows_to_partitions(
+        chain(build_rows_read, build_rows), build_out_name, num_partitions, depth, False)
+    hash_table = None
+    probe_partition_files = _write_rows_to_partitions(
+        probe_rows, probe_out_name, num_partitions, depth, keep_unmatched_probe_rows)
+
+    try:
+        for build_file, probe_file in zip(build_partition_files, probe_partition_files):
+            if depth + 1 < MAX_PARTITIONING_DEPTH:
+                partition_pairs = _grace_hash_join(
+                    _read_rows_from_partition(build_file), build_out_name,
+                    _read_rows_from_partition(probe_file), probe_out_name,
+                    max_rows_in_memory, num_partitions, depth + 1, keep_unmatched_probe_rows)
+            else:
+                partition_pairs = _join_partition_in_chunks(
+                    build_file, build_out_name, probe_file, probe_out_name, max_rows_in_memory,
+                    keep_unmatched_probe_rows)
+            for build_row, probe_row in partition_pairs:
+                yield build_row, probe_row
+    finally:
+        for partition_file in build_partition_files + probe_partition_files:
+            partition_file.close()
+
+
+def _hash_join_rows(left_rows, left_out_name, right_rows, right_out_name,
+                    max_rows_in_memory, num_partitions, unmatched_right_out_names):
+    """Yield the joined rows, as described in hash_join_rows()."""
+    is_outer_join = unmatched_right_out_names is not None
+    build_on_left = (
+        not is_outer_join and
+        hasattr(left_rows, '__len__') and hasattr(right_rows, '__len__') and
+        len(left_rows) < len(right_rows)
+    )
+    if build_on_left:
+        row_pairs = _grace_hash_join(
+            left_rows, left_out_name, right_rows, right_out_name,
+            max_rows_in_memory, num_partitions, 0, False)
+    else:
+        row_pairs = (
+            (left_row, right_row)
+            for right_row, left_row in _grace_hash_join(
+                right_rows, right_out_name, left_rows, left_out_name,
+                max_rows_in_memory, num_partitions, 0, is_outer_join)
+        )
+
+    unmatched_right_row = dict.fromkeys(unmatched_right_out_names or ())
+    for left_row, right_row in row_pairs:
+        joined_row = dict(left_row)
+        if right_row is None:
+            joined_row.update(unmatched_right_row)
+        else:
+            joined_row.update(right_row)
+        yield joined_row
+
+
+def hash_join_rows(left_rows, left_out_name, right_rows, right_out_name,
+                   max_rows_in_memory=DEFAULT_MAX_ROWS_IN_MEMORY,
+                   num_partitions=DEFAULT_NUM_PARTITIONS, unmatched_right_out_names=None):
+    """Return an iterator over the inner or left outer join of two iterables of result rows.
+
+    For inner joins, the hash table is built on the smaller side if both sides have a known length,
+    and on the right side otherwise, while the other side is streamed. For left outer joins, it is
+    always built on the right side. Rows are compared by the value of the joined output, and rows
+    whose value is None don't match any row. The rows are joined lazily, as the returned iterator
+    is consumed.
+
+    Args:
+        left_rows: iterable of dicts, e.g. the rows of a parent sub-query.
+        left_out_name: str, the output of the left rows being joined on.
+        right_rows: iterable of dicts, e.g. the rows of a child sub-query.
+        right_out_name: str, the output of the right rows being joined on.
+        max_rows_in_memory: optional int, the maximum number of rows held in the hash table. If the
+                            build side has more rows, the rows are spilled to temporary files.
+                            The values of the rows must then be of the supported types.
+        num_partitions: optional int, the number of partitions the rows are split into when
+                        spilling, at least 2.
+        unmatched_right_out_names: optional iterable of str, the outputs of the right rows. If
+                                   given, the left outer join is computed, e.g. for an optional
+                                   edge to the right rows' sub-query: each left row that doesn't
+                                   match any right row is also produced once, with these outputs
+                                   set to None.
+
+    Returns:
+        iterator of dicts, the union of the outputs of each pair of left and right rows with equal
+        values of the joined outputs. The order of the rows is not defined.
+
+    Raises:
+        ValueError if max_rows_in_memory is below 1 or num_partitions is below 2.
+    """
+    if max_rows_in_memory < 1:
+        raise ValueError(u'Expected max_rows_in_memory to be at least 1, but got: {}'
+                         .format(max_rows_in_memory))
+    if num_partitions < 2:
+        raise ValueError(u'Expected num_partitions to be at least 2, but got: {}'
+                         .format(num_partitions))
+
+    return _hash_join_rows(left_rows, left_out_name, right_rows, right_out_name,
+                           max_rows_in_memory, num_partitions, unmatched_right_out_names)
@@ -9,8 +9,9 @@ from graphql.language.ast import (
 )
 
 from ..ast_manipulation import get_only_query_definition
+from ..cost_estimation.cardinality_estimator import estimate_query_result_cardinality_from_ast
 from ..exceptions import GraphQLValidationError
-from ..schema import FilterDirective, OutputDirective
+from ..schema import FilterDirective, OptionalDirective, OutputDirective
 
 
 SubQueryPlan = namedtuple(
@@ -26,10 +27,13 @@ SubQueryPlan = namedtuple(
 OutputJoinDescriptor = namedtuple(
     'OutputJoinDescriptor', (
         'output_names',  # Tuple[str, str], (parent output name, child output name)
-        # May be expanded to have more attributes, e.g. is_optional, describing how the join
-        # should be made
+        'is_optional',  # bool, whether the parent's field with the output is marked @optional,
+                        # in which case parent rows without matching child rows are kept
+        # May be expanded to have more attributes, describing how the join should be made
     )
 )
+# Descriptors constructed without is_optional describe the inner join of non-optional edges.
+OutputJoinDescriptor.__new__.__defaults__ = (False,)
 
 
 QueryPlanDescriptor = namedtuple(
@@ -42,7 +46,8 @@ QueryPlanDescriptor = namedtuple(
 )
 
 
-def make_query_plan(root_sub_query_node, intermediate_output_names):
+def make_query_plan(root_sub_query_node, intermediate_output_names,
+                    schema_id_to_schema_info=None, query_parameters=None):
     """Return a QueryPlanDescriptor, whose query ASTs have @filters added.
 
     For each parent of parent and child SubQueryNodes, a new @filter directive will be added
@@ -51,19 +56,47 @@ def make_query_plan(root_sub_query_node, intermediate_output_names):
     will be a 'in_collection' type filter, and the name of the local variable is guaranteed to
     be the same as the out_name of the @output on the parent.
 
+    By default, the root of the query plan is the input root SubQueryNode, and each child
+    SubQueryNode is filtered by the outputs of its parent. If statistics of the schemas are
+    provided, the plan is instead rooted at the SubQueryNode that minimizes the estimated
+    intermediate transfer, and every QueryConnection on the path from that node to the input root
+    is reversed, so that e.g. a selective child sub-query is executed first and its outputs
+    filter the original parent. The joins of non-optional edges are inner joins, which produce the
+    same results in either direction. The joins of optional edges keep the parent rows without
+    matching child rows, which a reversed plan would instead filter out, so the plan is never
+    rooted at a SubQueryNode whose path to the input root contains an optional edge. Thus, all
+    plans produce the same results.
+
     ASTs contained in the input node and its children nodes will not be modified.
 
     Args:
         root_sub_query_node: SubQueryNode, representing the base of a query split into pieces
                              that we want to turn into a query plan
         intermediate_output_names: frozenset[str], names of outputs to be removed at the end
+        schema_id_to_schema_info: optional Dict[str, QueryPlanningSchemaInfo], mapping the id of
+                                  each schema targeted by the query to the schema info used to
+                                  estimate the cardinalities of its sub-queries. If None, the plan
+                                  is rooted at root_sub_query_node
+        query_parameters: optional dict, parameters with which the query will be executed, used
+                          to estimate the selectivity of filters. Only used if
+                          schema_id_to_schema_info is provided
 
     Returns:
         QueryPlanDescriptor namedtuple, containing a tree of SubQueryPlans that wrap
         around each individual query AST, the set of intermediate output names that are
         to be removed at the end, and information on which outputs are to be connect to which
         in what manner
+
+    Raises:
+        ValueError if schema_id_to_schema_info is provided, but is missing some schema targeted
+        by the query
     """
+    if schema_id_to_schema_info is not None:
+        if query_parameters is None:
+            query_parameters = {}
+        root_sub_query_node = _get_cheapest_root_sub_query_node(
+            root_sub_query_node, schema_id_to_schema_info, query_parameters)
+
     output_join_descriptors = []
 
     root_sub_query_plan = SubQueryPlan(
@@ -73,7 +106,8 @@ def make_query_plan(root_sub_query_node, intermediate_output_names):
         child_query_plans=[],
     )
 
-    _make_query_plan_recursive(root_sub_query_node, root_sub_query_plan, output_join_descriptors)
+    _make_query_plan_recursive(
+        root_sub_query_node, None, root_sub_query_plan, output_join_descriptors)
 
     return QueryPlanDescriptor(
         root_sub_query_plan=root_sub_query_plan,
@@ -82,25 +116,214 @@ def make_query_plan(root_sub_query_node, intermediate_output_names):
     )
 
 
-def _make_query_plan_recursive(sub_query_node, sub_query_plan, output_join_descriptors):
+def _get_query_connections(sub_query_node):
+    """Return the QueryConnections from the SubQueryNode to its children, then to its parent."""
+    query_connections = list(sub_query_node.child_query_connections)
+    if sub_query_node.parent_query_connection is not None:
+        query_connections.append(sub_query_node.parent_query_connection)
+    return query_connections
+
+
+def _get_sub_query_nodes(root_sub_query_node):
+    """Return all SubQueryNodes of the tree rooted at the given node, in depth-first pre-order."""
+    sub_query_nodes = [root_sub_query_node]
+    for child_query_connection in root_sub_query_node.child_query_connections:
+        sub_query_nodes.extend(_get_sub_query_nodes(child_query_connection.sink_query_node))
+    return sub_query_nodes
+
+
+def _estimate_intermediate_transfer(root_sub_query_node, node_id_to_cardinality):
+    """Estimate the number of rows and values transferred by the plan rooted at the given node.
+
+    The root sub-query returns its estimated number of rows. Each other sub-query is sent the
+    values of the stitched output of the sub-query it is filtered by, at most one per row of that
+    sub-query, and is assumed to return at most one row per value it is sent, as stitched fields
+    usually identify the vertices that they belong to.
+
+    Args:
+        root_sub_query_node: SubQueryNode, the node that the plan is rooted at. The tree of
+                             SubQueryNodes is traversed along all its QueryConnections from it
+        node_id_to_cardinality: Dict[int, float], mapping the id of each SubQueryNode to the
+                                estimated number of rows of its query without in_collection
+                                filters added
+
+    Returns:
+        float, the estimated number of rows returned by all sub-queries plus the estimated number
+        of values sent to their in_collection filters
+    """
+    intermediate_transfer = 0.0
+    # Stack of tuples (SubQueryNode, SubQueryNode that it is filtered by, number of rows of the
+    # latter), where the root node is not filtered by any node
+    nodes_to_visit = [(root_sub_query_node, None, None)]
+    while nodes_to_visit:
+        sub_query_node, filtering_sub_query_node, num_filtering_rows = nodes_to_visit.pop()
+        num_rows = node_id_to_cardinality[id(sub_query_node)]
+        if filtering_sub_query_node is not None:
+            num_rows = min(num_rows, num_filtering_rows)
+            intermediate_transfer += num_filtering_rows
+        intermediate_transfer += num_rows
+
+        for query_connection in _get_query_connections(sub_query_node):
+            if query_connection.sink_query_node is not filtering_sub_query_node:
+                nodes_to_visit.append((query_connection.sink_query_node, sub_query_node, num_rows))
+
+    return intermediate_transfer
+
+
+def _get_cheapest_root_sub_query_node(root_sub_query_node, schema_id_to_schema_info,
+                                      query_parameters):
+    """Return the SubQueryNode at which to root the plan with the least intermediate transfer.
+
+    Rooting the plan at a node determines the direction of every QueryConnection, since each
+    sub-query other than the root is filtered by the neighbor on its path to the root. Choosing
+    the direction of each QueryConnection independently could instead require filtering a
+    sub-query by several others, which query plans don't support.
+
+    Nodes whose path to the root contains an optional edge are not considered, since rooting the
+    plan at them would reverse the optional edge, changing the results of the query.
+
+    Args:
+        root_sub_query_node: SubQueryNode, the root of the tree of SubQueryNodes
+        schema_id_to_schema_info: Dict[str, QueryPlanningSchemaInfo], the schema info of each
+                                  schema targeted by the query
+        query_parameters: dict, parameters with which the query will be executed
+
+    Returns:
+        SubQueryNode, the node to root the plan at. In case of ties, root_sub_query_node is
+        preferred
+
+    Raises:
+        ValueError if schema_id_to_schema_info is missing some schema targeted by the query
+    """
+    sub_query_nodes = _get_sub_query_nodes(root_sub_query_node)
+
+    node_id_to_cardinality = {}
+    for sub_query_node in sub_query_nodes:
+        schema_info = schema_id_to_schema_info.get(sub_query_node.schema_id)
+        if schema_info is None:
+            raise ValueError(u'No schema info was provided for schema {}, targeted by sub-query {}.'
+                             .format(sub_query_node.schema_id, print_ast(sub_query_node.query_ast)))
+        node_id_to_cardinality[id(sub_query_node)] = estimate_query_result_cardinality_from_ast(
+            schema_info, _get_query_ast_without_optional_property_fields(sub_query_node.query_ast),
+            query_parameters)
+
+    cheapest_root_sub_query_node = root_sub_query_node
+    least_intermediate_transfer = _estimate_intermediate_transfer(
+        root_sub_query_node, node_id_to_cardinality)
+    for sub_query_node in sub_query_nodes[1:]:
+        if _has_optional_edge_to_root(sub_query_node):
+            continue
+        intermediate_transfer = _estimate_intermediate_transfer(
+            sub_query_node, node_id_to_cardinality)
+        if intermediate_transfer < least_intermediate_transfer:
+            cheapest_root_sub_query_node = sub_query_node
+            least_intermediate_transfer = intermediate_transfer
+
+    return cheapest_root_sub_query_node
+
+
+def _get_query_ast_without_optional_property_fields(ast):
+    """Return an AST with the @optional directives of property fields removed, to estimate it.
+
+    split_query() marks the property field that an @optional cross-schema edge is stitched from
+    with @optional, which the compiler doesn't allow on property fields. The directive doesn't
+    change the results of the sub-query itself, only how they are joined.
+
+    Args:
+        ast: Document, Field, InlineFragment, or OperationDefinition. It is not modified by this
+             function
+
+    Returns:
+        AST of the same type, without @optional directives on fields without selections. If there
+        were no such directives, this is the same object as the input
+    """
+    if isinstance(ast, Document):
+        new_definitions = [
+            _get_query_ast_without_optional_property_fields(definition)
+            for definition in ast.definitions
+        ]
+        if all(
+            new_definition is definition
+            for new_definition, definition in zip(new_definitions, ast.definitions)
+        ):
+            return ast
+        return Document(definitions=new_definitions)
+
+    if ast.selection_set is None:
+        if isinstance(ast, Field) and ast.directives is not None and any(
+            directive.name.value == OptionalDirective.name
+            for directive in ast.directives
+        ):
+            new_ast = copy(ast)
+            new_ast.directives = [
+                directive
+                for directive in ast.directives
+                if directive.name.value != OptionalDirective.name
+            ]
+            return new_ast
+        return ast
+
+    new_selections = [
+        _get_query_ast_without_optional_property_fields(selection)
+        for selection in ast.selection_set.selections
+    ]
+    if all(
+        new_selection is selection
+        for new_selection, selection in zip(new_selections, ast.selection_set.selections)
+    ):
+        return ast
+    new_ast = copy(ast)
+    new_ast.selection_set = SelectionSet(selections=new_selections)
+    return new_ast
+
+
+def _has_optional_edge_to_root(sub_query_node):
+    """Return whether any QueryConnection on the path from the node to the root is optional.
+
+    Args:
+        sub_query_node: SubQueryNode, a node of a tree of SubQueryNodes
+
+    Returns:
+        bool, True if the parent's field of any QueryConnection between the node and the root of
+        its tree is marked @optional
+    """
+    while sub_query_node.parent_query_connection is not None:
+        parent_query_connection = sub_query_node.parent_query_connection
+        parent_sub_query_node = parent_query_connection.sink_query_node
+        if _is_field_with_output_optional(
+            parent_sub_query_node.query_ast, parent_query_connection.sink_field_out_name
+        ):
+            return True
+        sub_query_node = parent_sub_query_node
+    return False
+
+
+def _make_query_plan_recursive(sub_query_node, previous_sub_query_node, sub_query_plan,
+                               output_join_descriptors):
     """Recursively copy the structure of sub_query_node onto sub_query_plan.
 
-    For each child connection contained in sub_query_node, create a new SubQueryPlan for
-    the corresponding child SubQueryNode, add appropriate @filter directive to the child AST,
-    and attach the new SubQueryPlan to the list of children of the input sub-query plan.
+    For each connection of sub_query_node to another SubQueryNode, other than the one that
+    sub_query_node was reached from, create a new SubQueryPlan for the connected SubQueryNode,
+    add appropriate @filter directive to its AST, and attach the new SubQueryPlan to the list of
+    children of the input sub-query plan. When the plan is rooted at the root of the tree of
+    SubQueryNodes, these are exactly the child connections of sub_query_node.
 
     Args:
-        sub_query_node: SubQueryNode, whose descendents are copied over onto sub_query_plan.
+        sub_query_node: SubQueryNode, whose connected nodes are copied over onto sub_query_plan.
                         It is not modified by this function
+        previous_sub_query_node: SubQueryNode or None, the node that the recursion reached
+                                 sub_query_node from, whose plan is the parent of sub_query_plan
         sub_query_plan: SubQueryPlan, whose list of child query plans and query AST are
                         modified
         output_join_descriptors: List[OutputJoinDescriptor], describing which outputs should be
                                  joined and how
 
     """
-    # Iterate through child connections of query node
-    for child_query_connection in sub_query_node.child_query_connections:
+    # Iterate through connections of query node, excluding the one to the parent plan's node
+    for child_query_connection in _get_query_connections(sub_query_node):
         child_sub_query_node = child_query_connection.sink_query_node
+        if child_sub_query_node is previous_sub_query_node:
+            continue
         parent_out_name = child_query_connection.source_field_out_name
         child_out_name = child_query_connection.sink_field_out_name
 
@@ -135,12 +358,13 @@ def _make_query_plan_recursive(sub_query_node, sub_query_plan, output_join_descr
         # Add information about this edge
         new_output_join_descriptor = OutputJoinDescriptor(
             output_names=(parent_out_name, child_out_name),
+            is_optional=_is_field_with_output_optional(sub_query_node.query_ast, parent_out_name),
         )
         output_join_descriptors.append(new_output_join_descriptor)
 
         # Recursively repeat on child SubQueryPlans
         _make_query_plan_recursive(
-            child_sub_query_node, child_sub_query_plan, output_join_descriptors
+            child_sub_query_node, sub_query_node, child_sub_query_plan, output_join_descriptors
         )
 
 
@@ -213,6 +437,63 @@ def _add_filter_at_field_with_output(ast, field_out_name, input_filter_name):
         return ast
 
 
+def _get_field_with_output(ast, field_out_name):
+    """Return the Field with the @output directive with the given out_name, or None if not found.
+
+    Args:
+        ast: Document, Field, InlineFragment, or OperationDefinition, the AST to search
+        field_out_name: str, the out_name of an @output directive
+
+    Returns:
+        Field with an @output directive with the given out_name, or None if the AST has no
+        such field
+    """
+    if isinstance(ast, Document):
+        return _get_field_with_output(
+            get_only_query_definition(ast, GraphQLValidationError), field_out_name)
+
+    if isinstance(ast, Field) and ast.directives is not None:
+        if any(
+            _is_output_directive_with_name(directive, field_out_name)
+            for directive in ast.directives
+        ):
+            return ast
+
+    if ast.selection_set is None:
+        return None
+
+    for selection in ast.selection_set.selections:
+        field = _get_field_with_output(selection, field_out_name)
+        if field is not None:
+            return field
+    return None
+
+
+def _is_field_with_output_optional(query_ast, field_out_name):
+    """Return whether the field with the @output with the given out_name is marked @optional.
+
+    The field an @optional cross-schema edge is stitched from is marked @optional by
+    split_query(), so this also tells whether the edge is optional.
+
+    Args:
+        query_ast: Document, the query AST of a SubQueryNode
+        field_out_name: str, the out_name of an @output directive in the query AST
+
+    Returns:
+        bool, True if the field with the @output has an @optional directive
+    """
+    field = _get_field_with_output(query_ast, field_out_name)
+    if field is None:
+        raise AssertionError(
+            u'An @output directive with out_name "{}" is unexpectedly not found in the '
+            u'AST "{}".'.format(field_out_name, print_ast(query_ast))
+        )
+    return any(
+        directive.name.value == OptionalDirective.name
+        for directive in field.directives
+    )
+
+
 def _is_output_directive_with_name(directive, out_name):
     """Return whether or not the input is an @output directive with the desired out_name."""
     if not isinstance(directive, Directive):
@@ -266,6 +547,14 @@ def print_query_plan(query_plan_descriptor, indentation_depth=4):
     return ''.join(query_plan_strings)
 
 
+def get_sub_query_plans_in_dfs_order(sub_query_plan):
+    """Return the SubQueryPlans of the tree rooted at the given plan, in depth-first pre-order."""
+    sub_query_plans = [sub_query_plan]
+    for child_query_plan in sub_query_plan.child_query_plans:
+        sub_query_plans.extend(get_sub_query_plans_in_dfs_order(child_query_plan))
+    return sub_query_plans
+
+
 def _get_plan_and_depth_in_dfs_order(query_plan):
     """Return a list of topologically sorted (query plan, depth) tuples."""
     def _get_plan_and_depth_in_dfs_order_helper(query_plan, depth):
@@ -1,15 +1,15 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-from collections import namedtuple
-from copy import deepcopy
+from collections import OrderedDict, namedtuple
+from copy import copy, deepcopy
 
 from graphql import build_ast_schema
 from graphql.language import ast as ast_types
 from graphql.language.printer import print_ast
+from graphql.type.definition import GraphQLUnionType
 import six
 
 from ..ast_manipulation import get_ast_with_non_null_stripped
 from ..compiler.helpers import INBOUND_EDGE_DIRECTION, OUTBOUND_EDGE_DIRECTION
-from ..compiler.subclass import compute_subclass_sets
 from .utils import (
     InvalidCrossSchemaEdgeError, SchemaNameConflictError, check_ast_schema_is_valid,
     check_schema_identifier_is_valid, get_query_type_name
@@ -23,8 +23,21 @@ MergedSchemaDescriptor = namedtuple(
         'type_name_to_schema_id',
         # Dict[str, str], mapping type name to the id of its schema, includes Interface, Object,
         # Union, and Enum types
+        'schema_id_to_ast',
+        # OrderedDict[str, Document], mapping the id of each merged schema to its AST, or None if
+        # the descriptor was not created by merge_schemas. Used to update the merged schema
+        # incrementally, see add_schema, remove_schema and replace_schema
+        'cross_schema_edges',
+        # Tuple[CrossSchemaEdgeDescriptor], all cross-schema edges of the merged schema, or None
+        # if the descriptor was not created by merge_schemas
+        'type_equivalence_hints',
+        # Dict[GraphQLObjectType, GraphQLUnionType], the type equivalence hints that the merged
+        # schema was created with, or None if the descriptor was not created by merge_schemas
     )
 )
+# The fields used for incremental updates default to None, so that descriptors can still be
+# constructed from just the merged schema and its type_name_to_schema_id.
+MergedSchemaDescriptor.__new__.__defaults__ = (None, None, None)
 
 
 CrossSchemaEdgeDescriptor = namedtuple(
@@ -46,6 +59,10 @@ FieldReference = namedtuple(
 )
 
 
+_MERGED_QUERY_TYPE_NAME = 'RootSchemaQuery'
+_BUILTIN_SCALAR_NAMES = frozenset({'String', 'Int', 'Float', 'Boolean', 'ID'})
+
+
 def merge_schemas(schema_id_to_ast, cross_schema_edges, type_equivalence_hints=None):
     """Merge all input schemas and add all cross-schema edges.
 
@@ -76,7 +93,9 @@ def merge_schemas(schema_id_to_ast, cross_schema_edges, type_equivalence_hints=N
         MergedSchemaDescriptor, a namedtuple that contains the AST of the merged schema,
         and the map from names of types/query type fields to the id of the schema that they
         came from. Scalars and directives will not appear in the map, as the same set of
-        scalars and directives are expected to be defined in every schema.
+        scalars and directives are expected to be defined in every schema. It also records the
+        input schemas, edges and hints, so that schemas can later be added, removed or replaced
+        without merging all schemas again
 
     Raises:
         - ValueError if some schema identifier is not a nonempty string of alphanumeric
@@ -96,11 +115,11 @@ def merge_schemas(schema_id_to_ast, cross_schema_edges, type_equivalence_hints=N
     if len(schema_id_to_ast) <= 1:
         raise ValueError(u'Expected at least two schemas to merge.')
 
-    query_type = 'RootSchemaQuery'
+    query_type = _MERGED_QUERY_TYPE_NAME
     merged_schema_ast = _get_basic_schema_ast(query_type)  # Document
 
     type_name_to_schema_id = {}  # Dict[str, str], name of object/interface/enum/union to schema id
-    scalars = {'String', 'Int', 'Float', 'Boolean', 'ID'}  # Set[str], user defined + builtins
+    scalars = set(_BUILTIN_SCALAR_NAMES)  # Set[str], user defined + builtins
     directives = {}  # Dict[str, DirectiveDefinition]
 
     for current_schema_id, current_ast in six.iteritems(schema_id_to_ast):
@@ -116,10 +135,354 @@ def merge_schemas(schema_id_to_ast, cross_schema_edges, type_equivalence_hints=N
     return MergedSchemaDescriptor(
         schema_ast=merged_schema_ast,
         schema=build_ast_schema(merged_schema_ast),
-        type_name_to_schema_id=type_name_to_schema_id
+        type_name_to_schema_id=type_name_to_schema_id,
+        schema_id_to_ast=OrderedDict(schema_id_to_ast),
+        cross_schema_edges=tuple(cross_schema_edges),
+        type_equivalence_hints=dict(type_equivalence_hints),
+    )
+
+
+def add_schema(merged_schema_descriptor, schema_id, schema_ast, cross_schema_edges,
+               type_equivalence_hints=None):
+    """Add a schema and its cross-schema edges to a merged schema, without merging all schemas.
+
+    Only the added schema and its cross-schema edges are validated. The types of the other schemas
+    are reused as they are, except for those that gain fields from the new edges. The result is
+    the same as calling merge_schemas with the new schema appended to the input schemas, and the
+    new edges and hints appended to the input edges and hints.
+
+    Args:
+        merged_schema_descriptor: MergedSchemaDescriptor, created by merge_schemas or by one of
+                                  the functions updating a merged schema. It is not modified
+                                  by this function
+        schema_id: str, identifier of the schema to add, not used by any of the merged schemas
+        schema_ast: Document, representing the schema to add. It is not modified by this function
+        cross_schema_edges: List[CrossSchemaEdgeDescriptor], edges connecting fields of the added
+                            schema to fields of the merged schemas
+        type_equivalence_hints: optional Dict[GraphQLObjectType, GraphQLUnionType], the type
+                                equivalence hints of the types of the added schema, see
+                                merge_schemas
+
+    Returns:
+        MergedSchemaDescriptor, describing the merged schema with the added schema. It shares the
+        AST nodes of the unaffected types with the input descriptor, so neither one's AST may be
+        modified
+
+    Raises:
+        - ValueError if the descriptor was not created by merge_schemas, if a schema with the
+          same identifier was already merged, or if the identifier is invalid
+        - SchemaStructureError, SchemaNameConflictError or InvalidCrossSchemaEdgeError if the
+          added schema or its edges are invalid, as in merge_schemas. Edges not connecting the
+          added schema also cause an InvalidCrossSchemaEdgeError
+    """
+    _check_merged_schema_can_be_updated(merged_schema_descriptor)
+    if schema_id in merged_schema_descriptor.schema_id_to_ast:
+        raise ValueError(u'Schema "{}" has already been merged. Use replace_schema to update '
+                         u'it.'.format(schema_id))
+
+    merged_type_equivalence_hints = dict(merged_schema_descriptor.type_equivalence_hints)
+    if type_equivalence_hints is not None:
+        merged_type_equivalence_hints.update(type_equivalence_hints)
+
+    return _update_merged_schema(merged_schema_descriptor, schema_id, schema_ast,
+                                 cross_schema_edges, merged_type_equivalence_hints)
+
+
+def remove_schema(merged_schema_descriptor, schema_id):
+    """Remove a schema and all of its cross-schema edges from a merged schema.
+
+    No types or edges are validated again. The fields created by the removed edges are removed
+    from the types of the other schemas, as are the type equivalence hints of the removed types.
+
+    Args:
+        merged_schema_descriptor: MergedSchemaDescriptor, created by merge_schemas or by one of
+                                  the functions updating a merged schema. It is not modified
+                                  by this function
+        schema_id: str, identifier of the merged schema to remove
+
+    Returns:
+        MergedSchemaDescriptor, describing the merged schema without the removed schema. It
+        shares the AST nodes of the unaffected types with the input descriptor, so neither one's
+        AST may be modified
+
+    Raises:
+        - ValueError if the descriptor was not created by merge_schemas, if there is no merged
+          schema with the identifier, or if fewer than two schemas would remain
+    """
+    _check_merged_schema_can_be_updated(merged_schema_descriptor)
+    _check_schema_is_merged(merged_schema_descriptor, schema_id)
+    if len(merged_schema_descriptor.schema_id_to_ast) <= 2:
+        raise ValueError(u'Expected at least two schemas to remain after removing schema '
+                         u'"{}".'.format(schema_id))
+
+    type_equivalence_hints = _get_type_equivalence_hints_of_other_schemas(
+        merged_schema_descriptor, schema_id)
+    return _update_merged_schema(merged_schema_descriptor, schema_id, None, [],
+                                 type_equivalence_hints)
+
+
+def replace_schema(merged_schema_descriptor, schema_id, schema_ast, cross_schema_edges=None,
+                   type_equivalence_hints=None):
+    """Replace one schema of a merged schema with a new version, without merging all schemas.
+
+    Only the new version of the schema and the cross-schema edges connecting it to other schemas
+    are validated. The types of the other schemas are reused as they are, except for those with
+    fields from these edges. The result is equivalent to calling merge_schemas with the new
+    version of the schema, though the new types and edge fields are placed after the others.
+
+    Args:
+        merged_schema_descriptor: MergedSchemaDescriptor, created by merge_schemas or by one of
+                                  the functions updating a merged schema. It is not modified
+                                  by this function
+        schema_id: str, identifier of the merged schema to replace
+        schema_ast: Document, representing the new version of the schema. It is not modified by
+                    this function
+        cross_schema_edges: optional List[CrossSchemaEdgeDescriptor], the edges connecting fields
+                            of the new version of the schema to fields of the other schemas. If
+                            None, the edges of the replaced schema are kept and validated against
+                            the new version
+        type_equivalence_hints: optional Dict[GraphQLObjectType, GraphQLUnionType], the type
+                                equivalence hints of the types of the new version of the schema.
+                                If None, the hints of the replaced schema are kept
+
+    Returns:
+        MergedSchemaDescriptor, describing the merged schema with the replaced schema. It shares
+        the AST nodes of the unaffected types with the input descriptor, so neither one's AST may
+        be modified
+
+    Raises:
+        - ValueError if the descriptor was not created by merge_schemas, or if there is no merged
+          schema with the identifier
+        - SchemaStructureError, SchemaNameConflictError or InvalidCrossSchemaEdgeError if the new
+          version of the schema or its edges are invalid, as in merge_schemas. Edges not
+          connecting the replaced schema also cause an InvalidCrossSchemaEdgeError
+    """
+    _check_merged_schema_can_be_updated(merged_schema_descriptor)
+    _check_schema_is_merged(merged_schema_descriptor, schema_id)
+
+    if cross_schema_edges is None:
+        cross_schema_edges = [
+            cross_schema_edge
+            for cross_schema_edge in merged_schema_descriptor.cross_schema_edges
+            if _edge_connects_schema(cross_schema_edge, schema_id)
+        ]
+
+    if type_equivalence_hints is None:
+        merged_type_equivalence_hints = dict(merged_schema_descriptor.type_equivalence_hints)
+    else:
+        merged_type_equivalence_hints = _get_type_equivalence_hints_of_other_schemas(
+            merged_schema_descriptor, schema_id)
+        merged_type_equivalence_hints.update(type_equivalence_hints)
+
+    return _update_merged_schema(merged_schema_descriptor, schema_id, schema_ast,
+                                 cross_schema_edges, merged_type_equivalence_hints)
+
+
+def _check_merged_schema_can_be_updated(merged_schema_descriptor):
+    """Raise ValueError if the descriptor doesn't record the schemas that it was merged from."""
+    if merged_schema_descriptor.schema_id_to_ast is None:
+        raise ValueError(u'The merged schema does not record the schemas, edges and hints that it '
+                         u'was merged from, so it cannot be updated incrementally. Merged schemas '
+                         u'created by merge_schemas record them.')
+
+
+def _check_schema_is_merged(merged_schema_descriptor, schema_id):
+    """Raise ValueError if the merged schema doesn't include a schema with the given id."""
+    if schema_id not in merged_schema_descriptor.schema_id_to_ast:
+        raise ValueError(u'Schema "{}" is not part of the merged schema, whose schemas are: '
+                         u'{}'.format(schema_id, list(merged_schema_descriptor.schema_id_to_ast)))
+
+
+def _edge_connects_schema(cross_schema_edge, schema_id):
+    """Return whether either side of the cross-schema edge is in the schema with the given id."""
+    return schema_id in (
+        cross_schema_edge.outbound_field_reference.schema_id,
+        cross_schema_edge.inbound_field_reference.schema_id,
     )
 
 
+def _get_type_equivalence_hints_of_other_schemas(merged_schema_descriptor, schema_id):
+    """Return a dict of the merged schema's hints whose types are not in the given schema."""
+    type_name_to_schema_id = merged_schema_descriptor.type_name_to_schema_id
+    return {
+        object_type: union_type
+        for object_type, union_type in six.iteritems(
+            merged_schema_descriptor.type_equivalence_hints)
+        if type_name_to_schema_id.get(object_type.name) != schema_id
+    }
+
+
+def _update_merged_schema(merged_schema_descriptor, schema_id, schema_ast, cross_schema_edges,
+                          type_equivalence_hints):
+    """Return a new merged schema, where the schema with the given id is added, removed or replaced.
+
+    The definitions of the other schemas are reused, in the same order. Only the types of the
+    schemas connected to the updated schema by cross-schema edges, old or new, are copied, since
+    the fields of the old edges are removed from them and the fields of the new edges are added.
+    The definitions and the query type fields of the updated schema, if any, come last, followed
+    by the fields of its cross-schema edges.
+
+    Args:
+        merged_schema_descriptor: MergedSchemaDescriptor, the merged schema to update. It is not
+                                  modified by this function
+        schema_id: str, identifier of the schema to add, remove or replace
+        schema_ast: Document, the schema to add or the new version of the schema to replace, or
+                    None if the schema is removed
+        cross_schema_edges: List[CrossSchemaEdgeDescriptor], all edges connecting the updated
+                            schema in the new merged schema
+        type_equivalence_hints: Dict[GraphQLObjectType, GraphQLUnionType], all type equivalence
+                                hints of the new merged schema
+
+    Returns:
+        MergedSchemaDescriptor, describing the updated merged schema
+    """
+    for cross_schema_edge in cross_schema_edges:
+        if not _edge_connects_schema(cross_schema_edge, schema_id):
+            raise InvalidCrossSchemaEdgeError(
+                u'Edge "{}" does not connect schema "{}". Only edges connecting the schema being '
+                u'added or replaced may be provided.'.format(cross_schema_edge, schema_id)
+            )
+
+    old_schema_ast = merged_schema_descriptor.schema_ast
+    old_type_name_to_schema_id = merged_schema_descriptor.type_name_to_schema_id
+
+    schema_id_to_ast = OrderedDict()
+    for current_schema_id, current_ast in six.iteritems(
+        merged_schema_descriptor.schema_id_to_ast
+    ):
+        if current_schema_id != schema_id:
+            schema_id_to_ast[current_schema_id] = current_ast
+        elif schema_ast is not None:  # keep the position of the replaced schema
+            schema_id_to_ast[current_schema_id] = schema_ast
+    if schema_ast is not None and schema_id not in schema_id_to_ast:
+        schema_id_to_ast[schema_id] = schema_ast
+
+    unaffected_cross_schema_edges = []
+    connected_schema_ids = set()  # Set[str], ids of schemas whose types gain or lose edge fields
+    for cross_schema_edge in merged_schema_descriptor.cross_schema_edges:
+        if not _edge_connects_schema(cross_schema_edge, schema_id):
+            unaffected_cross_schema_edges.append(cross_schema_edge)
+    for cross_schema_edge in merged_schema_descriptor.cross_schema_edges + tuple(
+        cross_schema_edges
+    ):
+        if _edge_connects_schema(cross_schema_edge, schema_id):
+            connected_schema_ids.add(cross_schema_edge.outbound_field_reference.schema_id)
+            connected_schema_ids.add(cross_schema_edge.inbound_field_reference.schema_id)
+    connected_schema_ids.discard(schema_id)
+
+    # Scalars and directives may be defined by several schemas, so those of the updated schema
+    # are only removed if no other schema defines them.
+    other_scalar_names = set()
+    other_directive_names = set()
+    for current_schema_id, current_ast in six.iteritems(schema_id_to_ast):
+        if current_schema_id == schema_id:
+            continue
+        for definition in current_ast.definitions:
+            if isinstance(definition, ast_types.ScalarTypeDefinition):
+                other_scalar_names.add(definition.name.value)
+            elif isinstance(definition, ast_types.DirectiveDefinition):
+                other_directive_names.add(definition.name.value)
+
+    # Query type is the second entry in the list of definitions of the merged schema AST,
+    # as guaranteed by _get_basic_schema_ast()
+    query_type_index = 1
+    old_query_type_definition = old_schema_ast.definitions[query_type_index]
+    query_type = old_query_type_definition.name.value
+    merged_schema_ast = _get_basic_schema_ast(query_type)  # Document
+    # Query type fields have the same name as the type that they query
+    merged_schema_ast.definitions[query_type_index].fields.extend(
+        field
+        for field in old_query_type_definition.fields
+        if old_type_name_to_schema_id[field.name.value] != schema_id
+    )
+
+    type_name_to_schema_id = {}  # Dict[str, str], name of object/interface/enum/union to schema id
+    scalars = set(_BUILTIN_SCALAR_NAMES)  # Set[str], user defined + builtins
+    directives = {}  # Dict[str, DirectiveDefinition]
+
+    for definition in old_schema_ast.definitions[query_type_index + 1:]:
+        definition_name = definition.name.value
+        if isinstance(definition, ast_types.DirectiveDefinition):
+            if definition_name in other_directive_names:
+                merged_schema_ast.definitions.append(definition)
+                directives[definition_name] = definition
+        elif isinstance(definition, ast_types.ScalarTypeDefinition):
+            if definition_name in other_scalar_names:
+                merged_schema_ast.definitions.append(definition)
+                scalars.add(definition_name)
+        elif isinstance(definition, (
+            ast_types.EnumTypeDefinition,
+            ast_types.InterfaceTypeDefinition,
+            ast_types.ObjectTypeDefinition,
+            ast_types.UnionTypeDefinition,
+        )):
+            definition_schema_id = old_type_name_to_schema_id[definition_name]
+            if definition_schema_id == schema_id:
+                continue
+            if definition_schema_id in connected_schema_ids and isinstance(definition, (
+                ast_types.InterfaceTypeDefinition,
+                ast_types.ObjectTypeDefinition,
+            )):
+                definition = _copy_type_definition_without_edge_fields_to_schema(
+                    definition, old_type_name_to_schema_id, schema_id)
+            merged_schema_ast.definitions.append(definition)
+            type_name_to_schema_id[definition_name] = definition_schema_id
+        else:  # All definition types should've been covered
+            raise AssertionError(
+                u'Unreachable code reached. Missed definition type: '
+                u'"{}"'.format(type(definition).__name__)
+            )
+
+    if schema_ast is not None:
+        _accumulate_types(merged_schema_ast, query_type, type_name_to_schema_id, scalars,
+                          directives, schema_id, deepcopy(schema_ast))
+
+    _add_cross_schema_edges(merged_schema_ast, type_name_to_schema_id, scalars,
+                            cross_schema_edges, type_equivalence_hints, query_type)
+
+    return MergedSchemaDescriptor(
+        schema_ast=merged_schema_ast,
+        schema=build_ast_schema(merged_schema_ast),
+        type_name_to_schema_id=type_name_to_schema_id,
+        schema_id_to_ast=schema_id_to_ast,
+        cross_schema_edges=tuple(unaffected_cross_schema_edges) + tuple(cross_schema_edges),
+        type_equivalence_hints=type_equivalence_hints,
+    )
+
+
+def _copy_type_definition_without_edge_fields_to_schema(type_definition, type_name_to_schema_id,
+                                                        schema_id):
+    """Return a copy of the type definition, without fields of edges leading to the given schema.
+
+    Args:
+        type_definition: (Interface/Object)TypeDefinition, the definition to copy. It is not
+                         modified by this function
+        type_name_to_schema_id: Dict[str, str], mapping type name to the id of the schema that
+                                the type is from, in the merged schema containing the definition
+        schema_id: str, identifier of the schema whose cross-schema edge fields are removed
+
+    Returns:
+        (Interface/Object)TypeDefinition, with a new list of fields, which may be modified
+    """
+    new_fields = []
+    for field in type_definition.fields:
+        is_stitched_field = any(
+            directive.name.value == 'stitch'
+            for directive in field.directives or ()
+        )
+        if is_stitched_field:
+            field_type = field.type
+            while not isinstance(field_type, ast_types.NamedType):
+                field_type = field_type.type
+            if type_name_to_schema_id.get(field_type.name.value) == schema_id:
+                continue
+        new_fields.append(field)
+
+    new_type_definition = copy(type_definition)
+    new_type_definition.fields = new_fields
+    return new_type_definition
+
+
 def _get_basic_schema_ast(query_type):
     """Create a basic AST Document representing a nearly blank schema.
 
@@ -420,7 +783,7 @@ def _add_cross_schema_edges(schema_ast, type_name_to_schema_id, scalars, cross_s
         object_type.name: union_type.name
         for object_type, union_type in six.iteritems(type_equivalence_hints)
     }
-    subclass_sets = compute_subclass_sets(build_ast_schema(schema_ast), type_equivalence_hints)
+    subclass_sets = _get_subclass_sets(type_name_to_definition, type_equivalence_hints)
 
     # Iterate through edges list, incorporate each edge on one or both sides
     for cross_schema_edge in cross_schema_edges:
@@ -461,6 +824,36 @@ def _add_cross_schema_edges(schema_ast, type_name_to_schema_id, scalars, cross_s
                 )
 
 
+def _get_subclass_sets(type_name_to_definition, type_equivalence_hints):
+    """Return a dict mapping the names of object and interface types to their subclass names.
+
+    This is the same as compute_subclass_sets on the schema built from the definitions, but
+    without building the schema.
+
+    Args:
+        type_name_to_definition: Dict[str, (Interface/Object)TypeDefinition], mapping
+                                 names of Interface and Object types to their definitions
+        type_equivalence_hints: Dict[GraphQLObjectType, GraphQLUnionType], see merge_schemas
+
+    Returns:
+        Dict[str, Set[str]], mapping the name of each Interface and Object type to the set of
+        names of its subclasses, including itself
+    """
+    subclass_sets = {type_name: {type_name} for type_name in type_name_to_definition}
+
+    for type_name, definition in six.iteritems(type_name_to_definition):
+        if isinstance(definition, ast_types.ObjectTypeDefinition):
+            for interface in definition.interfaces or ():
+                subclass_sets[interface.name.value].add(type_name)
+
+    for object_type, union_type in six.iteritems(type_equivalence_hints):
+        if not isinstance(union_type, GraphQLUnionType):
+            raise AssertionError(u'Unexpected type {}'.format(type(union_type)))
+        subclass_sets[object_type.name].update(subclass.name for subclass in union_type.types)
+
+    return subclass_sets
+
+
 def _check_cross_schema_edge_is_valid(type_name_to_definition, type_name_to_schema_id, scalars,
                                       union_type_names, cross_schema_edge):
     """Check that the edge crosses schemas and has valid field references of correct types.
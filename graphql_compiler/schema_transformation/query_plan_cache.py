@@ -0,0 +1,124 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from graphql import print_ast
+
+from ..ast_manipulation import safe_parse_graphql
+from .make_query_plan import get_sub_query_plans_in_dfs_order, make_query_plan
+from .split_query import split_query
+
+
+DEFAULT_MAX_CACHED_QUERY_PLANS = 1000
+
+# CachedQueryPlan namedtuples describe the query plan of a cross-schema query, along with the
+# printed queries of its sub-query plans, so that they don't need to be printed on every execution.
+# They are shared by all users of the cache, and must not be modified.
+CachedQueryPlan = namedtuple(
+    'CachedQueryPlan',
+    (
+        'query_plan_descriptor',    # QueryPlanDescriptor namedtuple, the query's plan.
+        'sub_query_strings',        # tuple of str, the printed query ASTs of the plan's
+                                    # SubQueryPlans, in depth-first pre-order starting at the root.
+    ),
+)
+
+# QueryPlanCacheInfo namedtuples describe the usage of a QueryPlanCache.
+QueryPlanCacheInfo = namedtuple(
+    'QueryPlanCacheInfo',
+    (
+        'hits',             # int, number of query plans found in the cache.
+        'misses',           # int, number of query plans that had to be made.
+        'max_size',         # int, maximum number of cached query plans.
+        'current_size',     # int, current number of cached query plans.
+    ),
+)
+
+
+class QueryPlanCache(object):
+    """Least-recently-used cache of the query plans of cross-schema queries.
+
+    Splitting a query and making its plan requires traversing the merged schema and the query AST
+    several times. Cross-schema queries are usually executed many times with different parameters,
+    and the plan doesn't depend on the parameters, so plans are cached by merged schema and query.
+
+    Merged schemas are compared by identity, so the same MergedSchemaDescriptor object must be used
+    for the cache to be hit. Queries are compared by their normalized text, so queries that only
+    differ in whitespace and formatting share their plan. The cache may be used by several threads
+    at once.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_CACHED_QUERY_PLANS):
+        """Create an empty cache holding at most max_size query plans."""
+        if max_size < 1:
+            raise ValueError(u'Expected max_size to be at least 1, but got: {}'.format(max_size))
+        self.max_size = max_size
+        self._lock = Lock()
+        # Each entry is keyed by the merged schema descriptor's id and the normalized query, and
+        # holds the merged schema descriptor, which keeps its id from being reused while cached.
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get_query_plan(self, query_string, merged_schema_descriptor):
+        """Return the CachedQueryPlan of the query, making it if it's not cached yet.
+
+        Args:
+            query_string: str, the cross-schema GraphQL query to plan.
+            merged_schema_descriptor: MergedSchemaDescriptor namedtuple, the merged schema that the
+                                      query targets.
+
+        Returns:
+            CachedQueryPlan namedtuple, which must not be modified.
+
+        Raises:
+            the errors of split_query(), if the query can't be split.
+        """
+        query_ast = safe_parse_graphql(query_string)
+        cache_key = (id(merged_schema_descriptor), print_ast(query_ast))
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.pop(cache_key)
+                self._entries[cache_key] = entry
+                self._hits += 1
+                _, cached_query_plan = entry
+                return cached_query_plan
+            self._misses += 1
+
+        # The plan is made without holding the lock, so that other queries can be planned
+        # concurrently. If two threads make the same plan at once, both plans are equivalent.
+        root_sub_query_node, intermediate_output_names = split_query(
+            query_ast, merged_schema_descriptor)
+        query_plan_descriptor = make_query_plan(root_sub_query_node, intermediate_output_names)
+        cached_query_plan = CachedQueryPlan(
+            query_plan_descriptor=query_plan_descriptor,
+            sub_query_strings=tuple(
+                print_ast(sub_query_plan.query_ast)
+                for sub_query_plan in get_sub_query_plans_in_dfs_order(
+                    query_plan_descriptor.root_sub_query_plan)
+            ),
+        )
+
+        with self._lock:
+            self._entries.pop(cache_key, None)
+            self._entries[cache_key] = (merged_schema_descriptor, cached_query_plan)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return cached_query_plan
+
+    def clear(self):
+        """Remove all cached query plans, e.g. after a schema has been updated in place."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_cache_info(self):
+        """Return a QueryPlanCacheInfo namedtuple describing the usage of the cache."""
+        with self._lock:
+            return QueryPlanCacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                max_size=self.max_size,
+                current_size=len(self._entries),
+            )
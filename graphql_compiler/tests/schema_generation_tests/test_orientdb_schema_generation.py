@@ -1,17 +1,33 @@
 # Copyright 2018-present Kensho Technologies, LLC.
+import os
+import shutil
+import tempfile
 import unittest
 
 from frozendict import frozendict
 from graphql.type import GraphQLInterfaceType, GraphQLList, GraphQLObjectType, GraphQLString
+from graphql.utils.schema_printer import print_schema
 import pytest
 import six
 
-from ...schema_generation.graphql_schema import _get_union_type_name
-from ...schema_generation.orientdb import get_graphql_schema_from_orientdb_schema_data
+import graphql_compiler
+
+from ... import compile_graphql_to_match
+from ...schema_generation.graphql_schema import (
+    LazyGraphQLSchema, _get_union_type_name, get_graphql_schema_from_schema_graph
+)
+from ...schema_generation.orientdb import (
+    get_graphql_schema_from_orientdb_schema_data, get_orientdb_schema_snapshot
+)
 from ...schema_generation.orientdb.schema_graph_builder import get_orientdb_schema_graph
 from ...schema_generation.orientdb.schema_properties import (
-    ORIENTDB_BASE_EDGE_CLASS_NAME, ORIENTDB_BASE_VERTEX_CLASS_NAME, PROPERTY_TYPE_EMBEDDED_LIST_ID,
-    PROPERTY_TYPE_EMBEDDED_SET_ID, PROPERTY_TYPE_LINK_ID, PROPERTY_TYPE_STRING_ID
+    ORDERED_UNIQUE_INDEX_TYPE, ORIENTDB_BASE_EDGE_CLASS_NAME, ORIENTDB_BASE_VERTEX_CLASS_NAME,
+    PROPERTY_TYPE_EMBEDDED_LIST_ID, PROPERTY_TYPE_EMBEDDED_SET_ID, PROPERTY_TYPE_LINK_ID,
+    PROPERTY_TYPE_STRING_ID
+)
+from ...schema_generation.schema_snapshot import (
+    SchemaSnapshot, get_schema_content_hash, get_schema_snapshot_content_hash, load_schema_snapshot,
+    save_schema_snapshot
 )
 
 
@@ -240,6 +256,16 @@ ARBITRARY_CONCRETE_NON_GRAPH_CLASS = frozendict({
     ],
 })
 
+ENTITY_NAME_INDEX = frozendict({
+    'name': 'Entity.name',
+    'type': ORDERED_UNIQUE_INDEX_TYPE,
+    'indexDefinition': {
+        'className': 'Entity',
+        'field': 'name',
+        'nullValuesIgnored': False,
+    },
+})
+
 
 class GraphqlSchemaGenerationTests(unittest.TestCase):
     def test_parsed_vertex(self):
@@ -469,3 +495,294 @@ class GraphqlSchemaGenerationTests(unittest.TestCase):
         non_graph_class_type = graphql_schema.get_type(
             ABSTRACT_NON_GRAPH_CLASS_WITH_ONLY_VERTEX_CONCRETE_SUBCLASSES['name'])
         self.assertTrue(isinstance(non_graph_class_type, GraphQLInterfaceType))
+
+    def test_lazy_schema_is_equivalent_to_eager_schema(self):
+        schema_data = [
+            BASE_EDGE,
+            BABY_LIVES_IN_EDGE,
+            BASE_VERTEX,
+            BABY,
+            ENTITY,
+            LOCATION,
+            PERSON_LIVES_IN_EDGE,
+            PERSON,
+            ABSTRACT_NON_GRAPH_CLASS_WITH_NON_VERTEX_CONCRETE_SUBCLASS,
+            ABSTRACT_NON_GRAPH_CLASS_WITH_ONLY_VERTEX_CONCRETE_SUBCLASSES,
+            CONCRETE_NON_GRAPH_CLASS_WITH_NON_VERTEX_CONCRETE_SUBCLASS,
+            CONCRETE_NON_GRAPH_CLASS_WITH_ONLY_VERTEX_CONCRETE_SUBCLASSES,
+            ARBITRARY_CONCRETE_VERTEX_CLASS,
+        ]
+        schema_graph = get_orientdb_schema_graph(schema_data, [])
+        hidden_class_sets = (
+            None,
+            {'Location'},
+            {ABSTRACT_NON_GRAPH_CLASS_WITH_ONLY_VERTEX_CONCRETE_SUBCLASSES['name']},
+        )
+        for hidden_classes in hidden_class_sets:
+            eager_schema, eager_type_equivalence_hints = get_graphql_schema_from_schema_graph(
+                schema_graph, hidden_classes=hidden_classes)
+            lazy_schema, lazy_type_equivalence_hints = get_graphql_schema_from_schema_graph(
+                schema_graph, hidden_classes=hidden_classes, lazy=True)
+            self.assertIsInstance(lazy_schema, LazyGraphQLSchema)
+
+            # The possible types of interfaces and unions are known without creating fields.
+            entity = lazy_schema.get_type('Entity')
+            self.assertEqual(
+                {graphql_type.name for graphql_type in eager_schema.get_possible_types(
+                    eager_schema.get_type('Entity'))},
+                {graphql_type.name for graphql_type in lazy_schema.get_possible_types(entity)})
+            self.assertTrue(lazy_schema.is_possible_type(entity, lazy_schema.get_type('Person')))
+            self.assertEqual(
+                {
+                    object_type.name: union_type.name
+                    for object_type, union_type in six.iteritems(eager_type_equivalence_hints)
+                },
+                {
+                    object_type.name: union_type.name
+                    for object_type, union_type in six.iteritems(lazy_type_equivalence_hints)
+                })
+
+            self.assertEqual(print_schema(eager_schema), print_schema(lazy_schema))
+
+    def test_lazy_schema_compilation(self):
+        schema_data = [
+            BASE_EDGE,
+            BASE_VERTEX,
+            BABY,
+            ENTITY,
+            LOCATION,
+            PERSON_LIVES_IN_EDGE,
+            PERSON,
+        ]
+        graphql_query = '''{
+            Location {
+                description @output(out_name: "description")
+                in_Person_LivesIn {
+                    ... on Baby {
+                        name @output(out_name: "baby_name")
+                    }
+                }
+            }
+        }'''
+        eager_schema, eager_type_equivalence_hints = (
+            get_graphql_schema_from_orientdb_schema_data(schema_data))
+        lazy_schema, lazy_type_equivalence_hints = (
+            get_graphql_schema_from_orientdb_schema_data(schema_data, lazy=True))
+
+        expected_result = compile_graphql_to_match(
+            eager_schema, graphql_query, type_equivalence_hints=eager_type_equivalence_hints)
+        result = compile_graphql_to_match(
+            lazy_schema, graphql_query, type_equivalence_hints=lazy_type_equivalence_hints)
+        self.assertEqual(expected_result.query, result.query)
+        self.assertEqual(expected_result.output_metadata, result.output_metadata)
+
+    def test_lazy_schema_field_errors_are_raised_on_first_access(self):
+        schema_data = [
+            BASE_VERTEX,
+            ENTITY,
+            LOCATION,
+        ]
+        schema_graph = get_orientdb_schema_graph(schema_data, [])
+        class_to_field_type_overrides = {
+            'Location': {'non_existent_field': GraphQLString},
+        }
+        with self.assertRaises(AssertionError):
+            get_graphql_schema_from_schema_graph(
+                schema_graph, class_to_field_type_overrides=class_to_field_type_overrides)
+
+        lazy_schema, _ = get_graphql_schema_from_schema_graph(
+            schema_graph, class_to_field_type_overrides=class_to_field_type_overrides, lazy=True)
+        self.assertIn('name', lazy_schema.get_type('Entity').fields)
+        with self.assertRaises(AssertionError):
+            _ = lazy_schema.get_type('Location').fields
+
+
+class SchemaSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        """Create a temporary directory for the snapshot files."""
+        self.temporary_directory = tempfile.mkdtemp()
+        self.snapshot_path = os.path.join(self.temporary_directory, 'schema.snapshot')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temporary_directory)
+
+    def assert_schema_snapshots_equal(self, expected_snapshot, snapshot):
+        """Assert that the snapshots contain equivalent schema graphs, schemas and hints."""
+        self.assertEqual(expected_snapshot.content_hash, snapshot.content_hash)
+
+        expected_schema_graph = expected_snapshot.schema_graph
+        schema_graph = snapshot.schema_graph
+        self.assertEqual(expected_schema_graph.class_names, schema_graph.class_names)
+        self.assertEqual(expected_schema_graph.vertex_class_names, schema_graph.vertex_class_names)
+        self.assertEqual(expected_schema_graph.edge_class_names, schema_graph.edge_class_names)
+        self.assertEqual(expected_schema_graph.all_indexes, schema_graph.all_indexes)
+        for class_name in expected_schema_graph.class_names:
+            expected_element = expected_schema_graph.get_element_by_class_name(class_name)
+            element = schema_graph.get_element_by_class_name(class_name)
+            self.assertEqual(expected_element.abstract, element.abstract)
+            self.assertEqual(expected_element.class_fields, element.class_fields)
+            self.assertEqual(expected_element.in_connections, element.in_connections)
+            self.assertEqual(expected_element.out_connections, element.out_connections)
+            self.assertEqual(
+                {
+                    property_name: (str(property_descriptor.type), property_descriptor.default)
+                    for property_name, property_descriptor in six.iteritems(
+                        expected_element.properties)
+                },
+                {
+                    property_name: (str(property_descriptor.type), property_descriptor.default)
+                    for property_name, property_descriptor in six.iteritems(element.properties)
+                })
+            if expected_element.is_edge:
+                self.assertEqual(expected_element.base_in_connection, element.base_in_connection)
+                self.assertEqual(expected_element.base_out_connection,
+                                 element.base_out_connection)
+            self.assertEqual(expected_schema_graph.get_superclass_set(class_name),
+                             schema_graph.get_superclass_set(class_name))
+            self.assertEqual(expected_schema_graph.get_subclass_set(class_name),
+                             schema_graph.get_subclass_set(class_name))
+
+        self.assertEqual(print_schema(expected_snapshot.graphql_schema),
+                         print_schema(snapshot.graphql_schema))
+        self.assertEqual(
+            {
+                object_type.name: union_type.name
+                for object_type, union_type in six.iteritems(
+                    expected_snapshot.type_equivalence_hints)
+            },
+            {
+                object_type.name: union_type.name
+                for object_type, union_type in six.iteritems(snapshot.type_equivalence_hints)
+            })
+        for object_type, union_type in six.iteritems(snapshot.type_equivalence_hints):
+            self.assertIs(snapshot.graphql_schema.get_type(object_type.name), object_type)
+            self.assertIs(snapshot.graphql_schema.get_type(union_type.name), union_type)
+
+    def test_save_and_load_schema_snapshot(self):
+        schema_data = [
+            BASE_EDGE,
+            BASE_VERTEX,
+            BABY,
+            DATA_POINT,
+            ENTITY,
+            EXTERNAL_SOURCE,
+            LOCATION,
+            PERSON_LIVES_IN_EDGE,
+            PERSON,
+        ]
+        index_data = [ENTITY_NAME_INDEX]
+        schema_graph = get_orientdb_schema_graph(schema_data, index_data)
+        with pytest.warns(UserWarning):
+            graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(
+                schema_graph)
+        schema_snapshot = SchemaSnapshot(
+            content_hash=get_schema_content_hash(schema_data, index_data=index_data),
+            schema_graph=schema_graph,
+            graphql_schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+        )
+
+        save_schema_snapshot(self.snapshot_path, schema_snapshot)
+        self.assertEqual(schema_snapshot.content_hash,
+                         get_schema_snapshot_content_hash(self.snapshot_path))
+        loaded_snapshot = load_schema_snapshot(self.snapshot_path)
+        self.assertIsInstance(loaded_snapshot.graphql_schema, LazyGraphQLSchema)
+        self.assert_schema_snapshots_equal(schema_snapshot, loaded_snapshot)
+
+        # Embedded classes are represented by GraphQL object types in the SchemaGraph.
+        data_source_type = loaded_snapshot.schema_graph.get_element_by_class_name(
+            'DataPoint').properties['data_source'].type
+        self.assertIsInstance(data_source_type, GraphQLList)
+        self.assertIsInstance(data_source_type.of_type, GraphQLObjectType)
+        self.assertEqual('ExternalSource', data_source_type.of_type.name)
+
+        # The snapshot is usable in the same way as the generated schema.
+        self.assertEqual(set(), loaded_snapshot.schema_graph.get_default_property_values(
+            'Person')['alias'])
+        self.assertEqual(1, len(loaded_snapshot.schema_graph.get_unique_indexes_for_class(
+            'Person')))
+        person_type = loaded_snapshot.graphql_schema.get_type('Person')
+        self.assertIn(person_type, loaded_snapshot.type_equivalence_hints)
+        self.assertIn(loaded_snapshot.graphql_schema.get_type('Entity'), person_type.interfaces)
+
+    def test_schema_snapshot_is_regenerated_when_schema_data_changes(self):
+        schema_data = [
+            BASE_EDGE,
+            BASE_VERTEX,
+            BABY,
+            ENTITY,
+            LOCATION,
+            PERSON_LIVES_IN_EDGE,
+            PERSON,
+        ]
+        generated_snapshot = get_orientdb_schema_snapshot(self.snapshot_path, schema_data)
+        expected_graphql_schema, expected_type_equivalence_hints = (
+            get_graphql_schema_from_orientdb_schema_data(schema_data))
+        self.assertEqual(print_schema(expected_graphql_schema),
+                         print_schema(generated_snapshot.graphql_schema))
+        self.assertEqual(
+            {
+                (object_type.name, union_type.name)
+                for object_type, union_type in six.iteritems(expected_type_equivalence_hints)
+            },
+            {
+                (object_type.name, union_type.name)
+                for object_type, union_type in six.iteritems(
+                    generated_snapshot.type_equivalence_hints)
+            })
+        self.assertEqual(1, len(generated_snapshot.type_equivalence_hints))
+
+        # The snapshot is loaded rather than generated, since the schema data is the same.
+        loaded_snapshot = get_orientdb_schema_snapshot(self.snapshot_path, list(schema_data))
+        self.assertIsNot(generated_snapshot.graphql_schema, loaded_snapshot.graphql_schema)
+        self.assert_schema_snapshots_equal(generated_snapshot, loaded_snapshot)
+
+        # Hidden classes change the content hash, so the snapshot is generated again.
+        snapshot_without_location = get_orientdb_schema_snapshot(
+            self.snapshot_path, schema_data, hidden_classes={'Location'})
+        self.assertNotEqual(generated_snapshot.content_hash,
+                            snapshot_without_location.content_hash)
+        self.assertIsNone(snapshot_without_location.graphql_schema.get_type('Location'))
+        self.assertEqual(snapshot_without_location.content_hash,
+                         get_schema_snapshot_content_hash(self.snapshot_path))
+
+        # So does a change of the schema data.
+        changed_schema_data = [
+            class_definition
+            for class_definition in schema_data
+            if class_definition['name'] != 'Baby'
+        ]
+        changed_snapshot = get_orientdb_schema_snapshot(self.snapshot_path, changed_schema_data)
+        self.assertNotIn('Baby', changed_snapshot.schema_graph.class_names)
+        self.assertEqual(changed_snapshot.content_hash,
+                         get_schema_snapshot_content_hash(self.snapshot_path))
+
+    def test_schema_content_hash(self):
+        schema_data = [BASE_VERTEX, ENTITY]
+        content_hash = get_schema_content_hash(schema_data)
+
+        # The hash doesn't depend on the types or iteration order of mappings.
+        self.assertEqual(content_hash, get_schema_content_hash(
+            [dict(class_definition) for class_definition in schema_data]))
+        self.assertNotEqual(content_hash, get_schema_content_hash([BASE_VERTEX, PERSON]))
+        self.assertNotEqual(content_hash, get_schema_content_hash(
+            schema_data, class_to_field_type_overrides={'Entity': {'name': GraphQLString}}))
+
+        # Snapshots generated by another version of the compiler are out of date.
+        compiler_version = graphql_compiler.__version__
+        graphql_compiler.__version__ = compiler_version + '.dev0'
+        try:
+            self.assertNotEqual(content_hash, get_schema_content_hash(schema_data))
+        finally:
+            graphql_compiler.__version__ = compiler_version
+
+    def test_invalid_schema_snapshot_file(self):
+        self.assertIsNone(get_schema_snapshot_content_hash(self.snapshot_path))
+
+        with open(self.snapshot_path, 'wb') as snapshot_file:
+            snapshot_file.write(b'not a schema snapshot')
+        with self.assertRaises(ValueError):
+            get_schema_snapshot_content_hash(self.snapshot_path)
+        with self.assertRaises(ValueError):
+            load_schema_snapshot(self.snapshot_path)
@@ -1,14 +1,17 @@
 # Copyright 2019-present Kensho Technologies, LLC.
 from collections import OrderedDict
 
-from graphql import build_ast_schema, parse
+from graphql import GraphQLSchema, build_ast_schema, parse
 import six
 
+from ...cost_estimation.statistics import LocalStatistics
+from ...schema import DIRECTIVES
+from ...schema.schema_info import QueryPlanningSchemaInfo
 from ...schema_transformation.merge_schemas import (
     CrossSchemaEdgeDescriptor, FieldReference, MergedSchemaDescriptor, merge_schemas
 )
 from ...schema_transformation.rename_schema import rename_schema
-from ..test_helpers import SCHEMA_TEXT
+from ..test_helpers import SCHEMA_TEXT, get_schema
 
 
 basic_schema = parse(SCHEMA_TEXT)
@@ -60,6 +63,25 @@ basic_merged_schema = merge_schemas(
 )
 
 
+def get_basic_schema_id_to_schema_info(class_counts):
+    """Return the schema info of the schemas of basic_merged_schema, with the given class counts."""
+    additional_schema = build_ast_schema(parse(basic_additional_schema))
+    return {
+        'first': QueryPlanningSchemaInfo(
+            schema=get_schema(),
+            type_equivalence_hints=None,
+            schema_graph=None,
+            statistics=LocalStatistics(class_counts),
+            pagination_keys={}),
+        'second': QueryPlanningSchemaInfo(
+            schema=GraphQLSchema(additional_schema.get_query_type(), directives=DIRECTIVES),
+            type_equivalence_hints=None,
+            schema_graph=None,
+            statistics=LocalStatistics(class_counts),
+            pagination_keys={}),
+    }
+
+
 interface_additional_schema = '''
 schema {
   query: SchemaQuery
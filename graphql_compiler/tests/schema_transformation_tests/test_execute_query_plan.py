@@ -0,0 +1,402 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+from collections import OrderedDict
+from textwrap import dedent
+import unittest
+
+from graphql import parse
+import six
+
+from ...schema_transformation.execute_query_plan import execute_query_plan
+from ...schema_transformation.make_query_plan import make_query_plan
+from ...schema_transformation.merge_schemas import (
+    CrossSchemaEdgeDescriptor, FieldReference, merge_schemas
+)
+from ...schema_transformation.split_query import split_query
+from .example_schema import (
+    basic_additional_schema, basic_merged_schema, basic_schema, get_basic_schema_id_to_schema_info,
+    third_additional_schema, three_merged_schema
+)
+
+
+def _make_execution_func(rows, key_out_name, executed_queries):
+    """Return a function executing sub-queries over the given rows, without a database.
+
+    Args:
+        rows: list of dicts, all result rows of the sub-query without its in_collection filter.
+        key_out_name: str or None, the output on which the sub-query has an in_collection filter.
+        executed_queries: list, to which the (query string, parameters) of each call are appended.
+
+    Returns:
+        function taking a query string and parameters, and returning the matching rows.
+    """
+    def execute(query_string, parameters):
+        """Return the rows whose key output is in the in_collection parameter, if any."""
+        executed_queries.append((query_string, parameters))
+        collection_parameters = [
+            parameter_value
+            for parameter_name, parameter_value in parameters.items()
+            if parameter_name.startswith('__intermediate_output_')
+        ]
+        if key_out_name is None or not collection_parameters:
+            return list(rows)
+        return [row for row in rows if row[key_out_name] in collection_parameters[0]]
+    return execute
+
+
+class TestExecuteQueryPlan(unittest.TestCase):
+    def _get_query_plan(self, query_str, merged_schema_descriptor):
+        """Return the QueryPlanDescriptor of the query."""
+        query_node, intermediate_outputs = split_query(
+            parse(query_str), merged_schema_descriptor)
+        return make_query_plan(query_node, intermediate_outputs)
+
+    def test_basic_execute_query_plan(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                name @output(out_name: "name")
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        query_plan_descriptor = self._get_query_plan(query_str, basic_merged_schema)
+
+        first_queries = []
+        second_queries = []
+        schema_id_to_execution_func = {
+            'first': _make_execution_func([
+                {'name': 'A', '__intermediate_output_0': 'uuid_a'},
+                {'name': 'B', '__intermediate_output_0': 'uuid_b'},
+                {'name': 'C', '__intermediate_output_0': 'uuid_a'},
+                {'name': 'D', '__intermediate_output_0': None},
+            ], None, first_queries),
+            'second': _make_execution_func([
+                {'age': 1, '__intermediate_output_1': 'uuid_a'},
+                {'age': 2, '__intermediate_output_1': 'uuid_a'},
+                {'age': 3, '__intermediate_output_1': 'uuid_c'},
+            ], '__intermediate_output_1', second_queries),
+        }
+
+        rows = list(execute_query_plan(schema_id_to_execution_func, query_plan_descriptor, {}))
+        expected_rows = [
+            {'name': 'A', 'age': 1},
+            {'name': 'A', 'age': 2},
+            {'name': 'C', 'age': 1},
+            {'name': 'C', 'age': 2},
+        ]
+        six.assertCountEqual(self, expected_rows, rows)
+
+        # Spilling the join to disk produces the same rows.
+        rows = list(execute_query_plan(
+            schema_id_to_execution_func, query_plan_descriptor, {}, max_rows_in_memory=1))
+        six.assertCountEqual(self, expected_rows, rows)
+
+        # The child sub-query receives the distinct non-null values of the parent's output.
+        self.assertEqual(2, len(first_queries))
+        self.assertEqual(
+            [{'__intermediate_output_0': ['uuid_a', 'uuid_b']}] * 2,
+            [parameters for _, parameters in second_queries])
+
+    def test_execute_query_plan_with_optional_edge(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                name @output(out_name: "name")
+                out_Animal_Creature @optional {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        query_plan_descriptor = self._get_query_plan(query_str, basic_merged_schema)
+        self.assertTrue(query_plan_descriptor.output_join_descriptors[0].is_optional)
+
+        schema_id_to_execution_func = {
+            'first': _make_execution_func([
+                {'name': 'a', '__intermediate_output_0': 'u1'},
+                {'name': 'b', '__intermediate_output_0': 'u2'},
+                {'name': 'c', '__intermediate_output_0': None},
+            ], None, []),
+            'second': _make_execution_func([
+                {'age': 3, '__intermediate_output_1': 'u1'},
+            ], '__intermediate_output_1', []),
+        }
+
+        # Animals without a Creature are kept by the left outer join, without an age.
+        expected_rows = [
+            {'name': 'a', 'age': 3},
+            {'name': 'b', 'age': None},
+            {'name': 'c', 'age': None},
+        ]
+        for max_rows_in_memory in (1000, 1):
+            rows = list(execute_query_plan(
+                schema_id_to_execution_func, query_plan_descriptor, {},
+                max_rows_in_memory=max_rows_in_memory))
+            six.assertCountEqual(self, expected_rows, rows)
+
+    def test_execute_query_plan_with_sibling_sub_queries_and_parameters(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                name @output(out_name: "name") @filter(op_name: "=", value: ["$animal_name"])
+                out_Animal_Creature {
+                  age @output(out_name: "age") @filter(op_name: ">=", value: ["$min_age"])
+                }
+                out_Animal_Critter {
+                  size @output(out_name: "size")
+                }
+              }
+            }
+        ''')
+        query_plan_descriptor = self._get_query_plan(query_str, three_merged_schema)
+
+        executed_queries = {'first': [], 'second': [], 'third': []}
+        schema_id_to_execution_func = {
+            'first': _make_execution_func([
+                {'name': 'A', '__intermediate_output_0': 'uuid_a'},
+                {'name': 'B', '__intermediate_output_0': 'uuid_b'},
+            ], None, executed_queries['first']),
+            'second': _make_execution_func([
+                {'age': 1, '__intermediate_output_1': 'uuid_a'},
+                {'age': 2, '__intermediate_output_1': 'uuid_b'},
+            ], '__intermediate_output_1', executed_queries['second']),
+            'third': _make_execution_func([
+                {'size': 10, '__intermediate_output_2': 'uuid_a'},
+                {'size': 20, '__intermediate_output_2': 'uuid_a'},
+            ], '__intermediate_output_2', executed_queries['third']),
+        }
+
+        query_parameters = {'animal_name': 'A', 'min_age': 0}
+        rows = list(execute_query_plan(
+            schema_id_to_execution_func, query_plan_descriptor, query_parameters))
+
+        # Animal B has no Critter, so it is dropped by the inner join.
+        expected_rows = [
+            {'name': 'A', 'age': 1, 'size': 10},
+            {'name': 'A', 'age': 1, 'size': 20},
+        ]
+        six.assertCountEqual(self, expected_rows, rows)
+
+        # Each sub-query only receives the parameters it uses.
+        self.assertEqual([{'animal_name': 'A'}],
+                         [parameters for _, parameters in executed_queries['first']])
+        self.assertEqual(
+            [{'min_age': 0, '__intermediate_output_0': ['uuid_a', 'uuid_b']}],
+            [parameters for _, parameters in executed_queries['second']])
+        self.assertEqual(
+            [{'__intermediate_output_0': ['uuid_a', 'uuid_b']}],
+            [parameters for _, parameters in executed_queries['third']])
+
+    def test_execute_nested_query_plan(self):
+        nested_merged_schema = merge_schemas(
+            OrderedDict([
+                ('first', basic_schema),
+                ('second', parse(basic_additional_schema)),
+                ('third', parse(third_additional_schema)),
+            ]),
+            [
+                CrossSchemaEdgeDescriptor(
+                    edge_name='Animal_Creature',
+                    outbound_field_reference=FieldReference(
+                        schema_id='first',
+                        type_name='Animal',
+                        field_name='uuid',
+                    ),
+                    inbound_field_reference=FieldReference(
+                        schema_id='second',
+                        type_name='Creature',
+                        field_name='id'
+                    ),
+                    out_edge_only=False,
+                ),
+                CrossSchemaEdgeDescriptor(
+                    edge_name='Creature_Critter',
+                    outbound_field_reference=FieldReference(
+                        schema_id='second',
+                        type_name='Creature',
+                        field_name='id',
+                    ),
+                    inbound_field_reference=FieldReference(
+                        schema_id='third',
+                        type_name='Critter',
+                        field_name='ID'
+                    ),
+                    out_edge_only=False,
+                ),
+            ],
+        )
+        query_str = dedent('''\
+            {
+              Animal {
+                name @output(out_name: "name")
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                  out_Creature_Critter {
+                    size @output(out_name: "size")
+                  }
+                }
+              }
+            }
+        ''')
+        query_plan_descriptor = self._get_query_plan(query_str, nested_merged_schema)
+        creature_plan = query_plan_descriptor.root_sub_query_plan.child_query_plans[0]
+        critter_plan = creature_plan.child_query_plans[0]
+        _, creature_key_out_name = query_plan_descriptor.output_join_descriptors[0].output_names
+        creature_out_name, critter_key_out_name = (
+            query_plan_descriptor.output_join_descriptors[1].output_names)
+        self.assertEqual('third', critter_plan.schema_id)
+
+        third_queries = []
+        schema_id_to_execution_func = {
+            'first': _make_execution_func([
+                {'name': 'A', '__intermediate_output_0': 'uuid_a'},
+                {'name': 'B', '__intermediate_output_0': 'uuid_b'},
+            ], None, []),
+            'second': _make_execution_func([
+                {'age': 1, creature_key_out_name: 'uuid_a', creature_out_name: 'uuid_a'},
+                {'age': 2, creature_key_out_name: 'uuid_b', creature_out_name: 'uuid_b'},
+            ], creature_key_out_name, []),
+            'third': _make_execution_func([
+                {'size': 10, critter_key_out_name: 'uuid_b'},
+            ], critter_key_out_name, third_queries),
+        }
+
+        rows = list(execute_query_plan(schema_id_to_execution_func, query_plan_descriptor, {}))
+        self.assertEqual([{'name': 'B', 'age': 2, 'size': 10}], rows)
+        self.assertEqual(1, len(third_queries))
+
+    def test_execute_query_plan_in_collection_chunks(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                name @output(out_name: "name")
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        query_plan_descriptor = self._get_query_plan(query_str, basic_merged_schema)
+
+        second_queries = []
+        schema_id_to_execution_func = {
+            'first': _make_execution_func([
+                {'name': name, '__intermediate_output_0': 'uuid_' + name}
+                for name in ('A', 'B', 'C', 'D', 'E', 'A')
+            ], None, []),
+            'second': _make_execution_func([
+                {'age': age, '__intermediate_output_1': 'uuid_' + name}
+                for age, name in enumerate(('A', 'B', 'C', 'D', 'E'))
+            ], '__intermediate_output_1', second_queries),
+        }
+
+        rows = list(execute_query_plan(
+            schema_id_to_execution_func, query_plan_descriptor, {}, max_collection_size=2))
+        expected_rows = [
+            {'name': 'A', 'age': 0},
+            {'name': 'B', 'age': 1},
+            {'name': 'C', 'age': 2},
+            {'name': 'D', 'age': 3},
+            {'name': 'E', 'age': 4},
+            {'name': 'A', 'age': 0},
+        ]
+        six.assertCountEqual(self, expected_rows, rows)
+
+        # The five distinct values are split into chunks of at most two values.
+        self.assertEqual(
+            [
+                {'__intermediate_output_0': ['uuid_A', 'uuid_B']},
+                {'__intermediate_output_0': ['uuid_C', 'uuid_D']},
+                {'__intermediate_output_0': ['uuid_E']},
+            ],
+            sorted((parameters for _, parameters in second_queries),
+                   key=lambda parameters: parameters['__intermediate_output_0']))
+
+        with self.assertRaises(ValueError):
+            list(execute_query_plan(
+                schema_id_to_execution_func, query_plan_descriptor, {}, max_collection_size=0))
+
+    def test_child_sub_query_without_parent_values_is_not_executed(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                name @output(out_name: "name")
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        query_plan_descriptor = self._get_query_plan(query_str, basic_merged_schema)
+
+        second_queries = []
+        schema_id_to_execution_func = {
+            'first': _make_execution_func([], None, []),
+            'second': _make_execution_func(
+                [{'age': 1, '__intermediate_output_1': 'uuid_a'}],
+                '__intermediate_output_1', second_queries),
+        }
+        rows = list(execute_query_plan(schema_id_to_execution_func, query_plan_descriptor, {}))
+        self.assertEqual([], rows)
+        self.assertEqual([], second_queries)
+
+    def test_execute_cost_based_query_plan(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                name @output(out_name: "name")
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        query_node, intermediate_outputs = split_query(parse(query_str), basic_merged_schema)
+        schema_id_to_schema_info = get_basic_schema_id_to_schema_info(
+            {'Animal': 1000000, 'Creature': 10})
+        query_plan_descriptor = make_query_plan(
+            query_node, intermediate_outputs, schema_id_to_schema_info, {})
+        self.assertEqual('second', query_plan_descriptor.root_sub_query_plan.schema_id)
+
+        first_queries = []
+        schema_id_to_execution_func = {
+            'first': _make_execution_func([
+                {'name': 'A', '__intermediate_output_0': 'uuid_a'},
+                {'name': 'B', '__intermediate_output_0': 'uuid_b'},
+                {'name': 'C', '__intermediate_output_0': 'uuid_a'},
+            ], '__intermediate_output_0', first_queries),
+            'second': _make_execution_func([
+                {'age': 1, '__intermediate_output_1': 'uuid_a'},
+                {'age': 3, '__intermediate_output_1': 'uuid_c'},
+            ], None, []),
+        }
+
+        # The Animals are filtered by the values of the Creatures, with the same results.
+        rows = list(execute_query_plan(schema_id_to_execution_func, query_plan_descriptor, {}))
+        expected_rows = [
+            {'name': 'A', 'age': 1},
+            {'name': 'C', 'age': 1},
+        ]
+        six.assertCountEqual(self, expected_rows, rows)
+        self.assertEqual(
+            [{'__intermediate_output_1': ['uuid_a', 'uuid_c']}],
+            [parameters for _, parameters in first_queries])
+
+    def test_missing_execution_func(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        query_plan_descriptor = self._get_query_plan(query_str, basic_merged_schema)
+        schema_id_to_execution_func = {
+            'first': _make_execution_func([], None, []),
+        }
+        with self.assertRaises(ValueError):
+            list(execute_query_plan(schema_id_to_execution_func, query_plan_descriptor, {}))
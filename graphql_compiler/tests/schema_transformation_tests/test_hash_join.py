@@ -0,0 +1,184 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+# -*- coding: utf-8 -*-
+from datetime import date, datetime
+from decimal import Decimal
+import random
+import unittest
+
+import pytz
+import six
+
+from ...schema_transformation.hash_join import SpooledRows, hash_join_rows
+
+
+def _nested_loop_join(left_rows, left_out_name, right_rows, right_out_name):
+    """Return the inner join of the rows, computed by comparing every pair of rows."""
+    joined_rows = []
+    for left_row in left_rows:
+        for right_row in right_rows:
+            left_value = left_row[left_out_name]
+            if left_value is not None and left_value == right_row[right_out_name]:
+                joined_row = dict(left_row)
+                joined_row.update(right_row)
+                joined_rows.append(joined_row)
+    return joined_rows
+
+
+def _nested_loop_left_outer_join(left_rows, left_out_name, right_rows, right_out_name,
+                                 right_out_names):
+    """Return the left outer join of the rows, computed by comparing every pair of rows."""
+    joined_rows = []
+    for left_row in left_rows:
+        matching_rows = _nested_loop_join([left_row], left_out_name, right_rows, right_out_name)
+        if not matching_rows:
+            joined_row = dict(left_row)
+            joined_row.update(dict.fromkeys(right_out_names))
+            matching_rows = [joined_row]
+        joined_rows.extend(matching_rows)
+    return joined_rows
+
+
+class HashJoinTests(unittest.TestCase):
+    def setUp(self):
+        """Create parent and child rows with random join values, some of which are null."""
+        random_generator = random.Random(0)
+        self.parent_rows = [
+            {'parent_id': index, 'parent_key': random_generator.choice([None] + list(range(30)))}
+            for index in range(200)
+        ]
+        self.child_rows = [
+            {'child_id': index, 'child_key': random_generator.choice([None] + list(range(40)))}
+            for index in range(300)
+        ]
+        self.expected_rows = _nested_loop_join(
+            self.parent_rows, 'parent_key', self.child_rows, 'child_key')
+
+    def _join(self, left_rows, right_rows, **kwargs):
+        """Return the rows of the hash join of the parent and child rows, as a list."""
+        return list(hash_join_rows(left_rows, 'parent_key', right_rows, 'child_key', **kwargs))
+
+    def test_in_memory_hash_join(self):
+        six.assertCountEqual(
+            self, self.expected_rows, self._join(self.parent_rows, self.child_rows))
+
+    def test_hash_join_with_streamed_sides(self):
+        # Without a known length, the hash table is built on the right side.
+        six.assertCountEqual(
+            self, self.expected_rows,
+            self._join(iter(self.parent_rows), iter(self.child_rows)))
+
+    def test_hash_join_spills_to_disk(self):
+        for max_rows_in_memory, num_partitions in ((50, 4), (5, 2), (1, 2)):
+            six.assertCountEqual(
+                self, self.expected_rows,
+                self._join(self.parent_rows, iter(self.child_rows),
+                           max_rows_in_memory=max_rows_in_memory,
+                           num_partitions=num_partitions))
+
+    def test_hash_join_with_repeated_value_spills_to_disk(self):
+        # All rows share the same value, so partitioning can't split them up, and the partition
+        # has to be joined in chunks.
+        parent_rows = [{'parent_id': index, 'parent_key': 'a'} for index in range(20)]
+        child_rows = [{'child_id': index, 'child_key': 'a'} for index in range(30)]
+        joined_rows = self._join(parent_rows, child_rows, max_rows_in_memory=7)
+        six.assertCountEqual(
+            self, _nested_loop_join(parent_rows, 'parent_key', child_rows, 'child_key'),
+            joined_rows)
+        self.assertEqual(600, len(joined_rows))
+
+    def test_left_outer_hash_join(self):
+        right_out_names = ('child_id', 'child_key')
+        expected_rows = _nested_loop_left_outer_join(
+            self.parent_rows, 'parent_key', self.child_rows, 'child_key', right_out_names)
+        for max_rows_in_memory, num_partitions in ((1000, 16), (50, 4), (1, 2)):
+            six.assertCountEqual(
+                self, expected_rows,
+                self._join(self.parent_rows, self.child_rows,
+                           max_rows_in_memory=max_rows_in_memory,
+                           num_partitions=num_partitions,
+                           unmatched_right_out_names=right_out_names))
+
+    def test_left_outer_hash_join_with_repeated_value_spills_to_disk(self):
+        # The rows with value 'a' are joined in chunks, and the unmatched rows have to be
+        # produced once even though each chunk is probed separately.
+        parent_rows = [
+            {'parent_id': index, 'parent_key': 'a' if index % 2 else 'b'}
+            for index in range(20)
+        ]
+        child_rows = [{'child_id': index, 'child_key': 'a'} for index in range(30)]
+        joined_rows = self._join(parent_rows, child_rows, max_rows_in_memory=7, num_partitions=2,
+                                 unmatched_right_out_names=('child_id', 'child_key'))
+        six.assertCountEqual(
+            self, _nested_loop_left_outer_join(
+                parent_rows, 'parent_key', child_rows, 'child_key', ('child_id', 'child_key')),
+            joined_rows)
+        self.assertEqual(310, len(joined_rows))
+
+    def test_hash_join_spills_typed_values_to_disk(self):
+        parent_rows = [
+            {'parent_key': date(2000, 1, 1), 'net_worth': Decimal('1.5'), 'alias': ['Al']},
+            {'parent_key': date(2000, 1, 2), 'net_worth': None, 'alias': []},
+        ]
+        child_rows = [
+            {'child_key': date(2000, 1, 1), 'name': u'Ünicode', 'is_alive': True},
+            {'child_key': date(2000, 1, 2), 'name': 'Bob', 'is_alive': False},
+            {'child_key': date(2000, 1, 2), 'event_date': datetime(2000, 1, 1, 12, 30),
+             'timestamp': datetime(2000, 1, 1, tzinfo=pytz.utc), 'weight': 0.5, 'limbs': 4},
+        ]
+        six.assertCountEqual(
+            self, _nested_loop_join(parent_rows, 'parent_key', child_rows, 'child_key'),
+            self._join(parent_rows, child_rows, max_rows_in_memory=1, num_partitions=2))
+
+    def test_invalid_hash_join_arguments(self):
+        # The arguments are checked before any rows are joined.
+        with self.assertRaises(ValueError):
+            hash_join_rows(self.parent_rows, 'parent_key', self.child_rows, 'child_key',
+                           max_rows_in_memory=0)
+        with self.assertRaises(ValueError):
+            hash_join_rows(self.parent_rows, 'parent_key', self.child_rows, 'child_key',
+                           num_partitions=1)
+
+
+class SpooledRowsTests(unittest.TestCase):
+    def setUp(self):
+        """Create rows with values of each supported type."""
+        self.rows = [
+            {'name': u'Ünicode', 'birthday': date(2000, 1, 1), 'net_worth': Decimal('1e6')},
+            {'name': 'Bob', 'birthday': None, 'alias': ['Bobby', 'B'], 'is_alive': False},
+            {'event_date': datetime(2000, 1, 1, 12, 30), 'limbs': 4,
+             'timestamp': datetime(2001, 1, 1, tzinfo=pytz.utc), 'weight': 0.5},
+        ]
+
+    def test_rows_held_in_memory(self):
+        spooled_rows = SpooledRows(max_rows_in_memory=3)
+        spooled_rows.extend(self.rows)
+        self.assertEqual(3, len(spooled_rows))
+        self.assertEqual(self.rows, list(spooled_rows))
+        spooled_rows.close()
+
+    def test_rows_spilled_to_disk(self):
+        spooled_rows = SpooledRows(max_rows_in_memory=1)
+        spooled_rows.extend(self.rows)
+        self.assertEqual(3, len(spooled_rows))
+        self.assertEqual(self.rows, list(spooled_rows))
+
+        # Iterators over the rows are independent of each other.
+        first_iterator = iter(spooled_rows)
+        self.assertEqual(self.rows[0], next(first_iterator))
+        self.assertEqual(self.rows, list(spooled_rows))
+        self.assertEqual(self.rows[1:], list(first_iterator))
+
+        # Rows can't be appended once they were read.
+        with self.assertRaises(AssertionError):
+            spooled_rows.append(self.rows[0])
+        spooled_rows.close()
+
+    def test_unsupported_value_types(self):
+        spooled_rows = SpooledRows(max_rows_in_memory=1)
+        spooled_rows.append({'value': object()})
+        with self.assertRaises(ValueError):
+            spooled_rows.append({'value': object()})
+        spooled_rows.close()
+
+        with self.assertRaises(ValueError):
+            SpooledRows(max_rows_in_memory=0)
@@ -6,7 +6,7 @@ from graphql import parse, print_ast
 
 from ...schema_transformation.make_query_plan import make_query_plan
 from ...schema_transformation.split_query import split_query
-from .example_schema import basic_merged_schema
+from .example_schema import basic_merged_schema, get_basic_schema_id_to_schema_info
 
 
 class TestMakeQueryPlan(unittest.TestCase):
@@ -74,3 +74,100 @@ class TestMakeQueryPlan(unittest.TestCase):
             query_plan_descriptor.intermediate_output_names,
             {'__intermediate_output_0', '__intermediate_output_1'}
         )
+
+    def test_cost_based_make_query_plan(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        root_str = dedent('''\
+            {
+              Creature {
+                age @output(out_name: "age")
+                id @output(out_name: "__intermediate_output_1")
+              }
+            }
+        ''')
+        child_str_with_filter = dedent('''\
+            {
+              Animal {
+                uuid @output(out_name: "__intermediate_output_0") \
+@filter(op_name: "in_collection", value: ["$__intermediate_output_1"])
+              }
+            }
+        ''')
+        query_node, intermediate_outputs = split_query(parse(query_str), basic_merged_schema)
+
+        # There are far fewer Creatures than Animals, so the Creatures are fetched first.
+        query_plan_descriptor = make_query_plan(
+            query_node, intermediate_outputs,
+            get_basic_schema_id_to_schema_info({'Animal': 1000000, 'Creature': 10}), {})
+        root_sub_query_plan = query_plan_descriptor.root_sub_query_plan
+        self.assertEqual(root_str, print_ast(root_sub_query_plan.query_ast))
+        self.assertEqual('second', root_sub_query_plan.schema_id)
+        self.assertEqual(1, len(root_sub_query_plan.child_query_plans))
+        child_sub_query_plan = root_sub_query_plan.child_query_plans[0]
+        self.assertEqual(child_str_with_filter, print_ast(child_sub_query_plan.query_ast))
+        self.assertEqual('first', child_sub_query_plan.schema_id)
+        self.assertIs(root_sub_query_plan, child_sub_query_plan.parent_query_plan)
+        self.assertEqual(
+            [('__intermediate_output_1', '__intermediate_output_0')],
+            [
+                output_join_descriptor.output_names
+                for output_join_descriptor in query_plan_descriptor.output_join_descriptors
+            ]
+        )
+
+        # There are far fewer Animals than Creatures, so the original plan is kept.
+        query_plan_descriptor = make_query_plan(
+            query_node, intermediate_outputs,
+            get_basic_schema_id_to_schema_info({'Animal': 10, 'Creature': 1000000}), {})
+        self.assertEqual(print_ast(make_query_plan(query_node, intermediate_outputs)
+                                   .root_sub_query_plan.query_ast),
+                         print_ast(query_plan_descriptor.root_sub_query_plan.query_ast))
+        self.assertEqual(
+            [('__intermediate_output_0', '__intermediate_output_1')],
+            [
+                output_join_descriptor.output_names
+                for output_join_descriptor in query_plan_descriptor.output_join_descriptors
+            ]
+        )
+
+        schema_id_to_schema_info = get_basic_schema_id_to_schema_info({'Animal': 10})
+        del schema_id_to_schema_info['second']
+        with self.assertRaises(ValueError):
+            make_query_plan(query_node, intermediate_outputs, schema_id_to_schema_info, {})
+
+    def test_cost_based_make_query_plan_keeps_optional_edges(self):
+        query_str = dedent('''\
+            {
+              Animal {
+                out_Animal_Creature @optional {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        query_node, intermediate_outputs = split_query(parse(query_str), basic_merged_schema)
+
+        # Though there are far fewer Creatures than Animals, reversing the optional edge would
+        # drop the Animals without a Creature, so the original plan is kept.
+        query_plan_descriptor = make_query_plan(
+            query_node, intermediate_outputs,
+            get_basic_schema_id_to_schema_info({'Animal': 1000000, 'Creature': 10}), {})
+        root_sub_query_plan = query_plan_descriptor.root_sub_query_plan
+        self.assertEqual('first', root_sub_query_plan.schema_id)
+        self.assertEqual(print_ast(query_node.query_ast),
+                         print_ast(root_sub_query_plan.query_ast))
+        self.assertEqual(
+            [(('__intermediate_output_0', '__intermediate_output_1'), True)],
+            [
+                (output_join_descriptor.output_names, output_join_descriptor.is_optional)
+                for output_join_descriptor in query_plan_descriptor.output_join_descriptors
+            ]
+        )
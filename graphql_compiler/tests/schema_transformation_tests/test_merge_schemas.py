@@ -8,7 +8,8 @@ from graphql.language.printer import print_ast
 import six
 
 from ...schema_transformation.merge_schemas import (
-    CrossSchemaEdgeDescriptor, FieldReference, merge_schemas
+    CrossSchemaEdgeDescriptor, FieldReference, MergedSchemaDescriptor, add_schema, merge_schemas,
+    remove_schema, replace_schema
 )
 from ...schema_transformation.utils import InvalidCrossSchemaEdgeError, SchemaNameConflictError
 from .input_schema_strings import InputSchemaStrings as ISS
@@ -1898,3 +1899,191 @@ class TestMergeSchemasCrossSchemaEdgesWithSubclasses(unittest.TestCase):
             union PersonOrKid = Person | Kid
         ''')
         self.assertEqual(merged_schema_string, print_ast(merged_schema.schema_ast))
+
+
+class TestIncrementalMergeSchemas(unittest.TestCase):
+    def setUp(self):
+        """Create the schemas and cross-schema edges of a merged schema of three schemas."""
+        self.schema_id_to_ast = OrderedDict([
+            ('first', parse(ISS.basic_schema)),
+            ('second', parse(ISS.interface_with_subclasses_schema)),
+            ('third', parse(ISS.same_field_schema)),
+        ])
+        self.human_individual_edge = CrossSchemaEdgeDescriptor(
+            edge_name='example_edge',
+            outbound_field_reference=FieldReference(
+                schema_id='first',
+                type_name='Human',
+                field_name='id',
+            ),
+            inbound_field_reference=FieldReference(
+                schema_id='second',
+                type_name='Individual',
+                field_name='ID',
+            ),
+            out_edge_only=False,
+        )
+        self.individual_person_edge = CrossSchemaEdgeDescriptor(
+            edge_name='Individual_Person',
+            outbound_field_reference=FieldReference(
+                schema_id='second',
+                type_name='Individual',
+                field_name='ID',
+            ),
+            inbound_field_reference=FieldReference(
+                schema_id='third',
+                type_name='Person',
+                field_name='identifier',
+            ),
+            out_edge_only=False,
+        )
+
+    def assert_merged_schemas_equal(self, expected_merged_schema, merged_schema):
+        """Check that the merged schemas are identical, including their recorded inputs."""
+        self.assertEqual(print_ast(expected_merged_schema.schema_ast),
+                         print_ast(merged_schema.schema_ast))
+        self.assertEqual(expected_merged_schema.type_name_to_schema_id,
+                         merged_schema.type_name_to_schema_id)
+        self.assertEqual(list(expected_merged_schema.schema_id_to_ast),
+                         list(merged_schema.schema_id_to_ast))
+        self.assertEqual(expected_merged_schema.cross_schema_edges,
+                         merged_schema.cross_schema_edges)
+
+    def test_add_schema(self):
+        merged_schema = merge_schemas(
+            OrderedDict(list(self.schema_id_to_ast.items())[:2]),
+            [self.human_individual_edge],
+        )
+        merged_schema_string = print_ast(merged_schema.schema_ast)
+
+        updated_merged_schema = add_schema(
+            merged_schema, 'third', self.schema_id_to_ast['third'],
+            [self.individual_person_edge])
+        expected_merged_schema = merge_schemas(
+            self.schema_id_to_ast, [self.human_individual_edge, self.individual_person_edge])
+        self.assert_merged_schemas_equal(expected_merged_schema, updated_merged_schema)
+
+        # The original merged schema and the added schema are not modified.
+        self.assertEqual(merged_schema_string, print_ast(merged_schema.schema_ast))
+        self.assertEqual(self.schema_id_to_ast['third'], parse(ISS.same_field_schema))
+
+    def test_remove_schema(self):
+        merged_schema = merge_schemas(
+            self.schema_id_to_ast, [self.human_individual_edge, self.individual_person_edge])
+        merged_schema_string = print_ast(merged_schema.schema_ast)
+
+        expected_merged_schema = merge_schemas(
+            OrderedDict(list(self.schema_id_to_ast.items())[:2]),
+            [self.human_individual_edge],
+        )
+        self.assert_merged_schemas_equal(
+            expected_merged_schema, remove_schema(merged_schema, 'third'))
+
+        expected_merged_schema = merge_schemas(
+            OrderedDict(list(self.schema_id_to_ast.items())[1:]),
+            [self.individual_person_edge],
+        )
+        self.assert_merged_schemas_equal(
+            expected_merged_schema, remove_schema(merged_schema, 'first'))
+
+        # The original merged schema is not modified.
+        self.assertEqual(merged_schema_string, print_ast(merged_schema.schema_ast))
+
+    def test_remove_schema_with_scalar(self):
+        merged_schema = merge_schemas(
+            OrderedDict([
+                ('first', parse(ISS.enum_schema)),
+                ('second', parse(ISS.interface_with_subclasses_schema)),
+            ]),
+            [],
+        )
+        merged_schema_with_scalar = add_schema(merged_schema, 'third', parse(ISS.scalar_schema), [])
+        self.assertIn('scalar Date', print_ast(merged_schema_with_scalar.schema_ast))
+        self.assertEqual(print_ast(merged_schema.schema_ast),
+                         print_ast(remove_schema(merged_schema_with_scalar, 'third').schema_ast))
+
+    def test_replace_schema(self):
+        merged_schema = merge_schemas(
+            self.schema_id_to_ast, [self.human_individual_edge, self.individual_person_edge])
+        new_third_schema_string = dedent('''\
+            schema {
+              query: SchemaQuery
+            }
+
+            type Person {
+              identifier: String
+              name: String
+            }
+
+            type SchemaQuery {
+              Person: Person
+            }
+        ''')
+
+        # The edges of the replaced schema are kept by default.
+        updated_merged_schema = replace_schema(
+            merged_schema, 'third', parse(new_third_schema_string))
+        new_schema_id_to_ast = OrderedDict(self.schema_id_to_ast)
+        new_schema_id_to_ast['third'] = parse(new_third_schema_string)
+        expected_merged_schema = merge_schemas(
+            new_schema_id_to_ast, [self.human_individual_edge, self.individual_person_edge])
+        self.assert_merged_schemas_equal(expected_merged_schema, updated_merged_schema)
+
+        # Replacing the edges of the replaced schema removes the fields of its old edges.
+        updated_merged_schema = replace_schema(
+            merged_schema, 'third', parse(new_third_schema_string), [])
+        expected_merged_schema = merge_schemas(new_schema_id_to_ast, [self.human_individual_edge])
+        self.assert_merged_schemas_equal(expected_merged_schema, updated_merged_schema)
+
+    def test_replace_schema_invalidating_edge(self):
+        merged_schema = merge_schemas(
+            self.schema_id_to_ast, [self.human_individual_edge, self.individual_person_edge])
+        new_third_schema_string = dedent('''\
+            schema {
+              query: SchemaQuery
+            }
+
+            type Person {
+              name: String
+            }
+
+            type SchemaQuery {
+              Person: Person
+            }
+        ''')
+        with self.assertRaises(InvalidCrossSchemaEdgeError):
+            replace_schema(merged_schema, 'third', parse(new_third_schema_string))
+
+    def test_invalid_incremental_updates(self):
+        merged_schema = merge_schemas(
+            OrderedDict(list(self.schema_id_to_ast.items())[:2]),
+            [self.human_individual_edge],
+        )
+        with self.assertRaises(ValueError):
+            add_schema(merged_schema, 'second', self.schema_id_to_ast['third'], [])
+        with self.assertRaises(ValueError):
+            remove_schema(merged_schema, 'third')
+        with self.assertRaises(ValueError):
+            remove_schema(merged_schema, 'first')
+        with self.assertRaises(ValueError):
+            replace_schema(merged_schema, 'third', self.schema_id_to_ast['third'])
+        with self.assertRaises(ValueError):
+            add_schema(merged_schema._replace(schema_id_to_ast=None), 'third',
+                       self.schema_id_to_ast['third'], [])
+        # Descriptors constructed without the fields used for incremental updates can't be updated.
+        descriptor_without_update_fields = MergedSchemaDescriptor(
+            schema_ast=merged_schema.schema_ast,
+            schema=merged_schema.schema,
+            type_name_to_schema_id=merged_schema.type_name_to_schema_id,
+        )
+        self.assertIsNone(descriptor_without_update_fields.schema_id_to_ast)
+        self.assertIsNone(descriptor_without_update_fields.cross_schema_edges)
+        self.assertIsNone(descriptor_without_update_fields.type_equivalence_hints)
+        with self.assertRaises(ValueError):
+            add_schema(descriptor_without_update_fields, 'third',
+                       self.schema_id_to_ast['third'], [])
+        with self.assertRaises(SchemaNameConflictError):
+            add_schema(merged_schema, 'third', parse(ISS.basic_schema), [])
+        with self.assertRaises(InvalidCrossSchemaEdgeError):
+            add_schema(merged_schema, 'third', self.schema_id_to_ast['third'],
+                       [self.human_individual_edge])
@@ -0,0 +1,95 @@
+# Copyright 2019-present Kensho Technologies, LLC.
+from textwrap import dedent
+import unittest
+
+from graphql import print_ast
+
+from ...schema_transformation.execute_query_plan import execute_query_plan
+from ...schema_transformation.query_plan_cache import QueryPlanCache, QueryPlanCacheInfo
+from .example_schema import basic_merged_schema, three_merged_schema
+
+
+class TestQueryPlanCache(unittest.TestCase):
+    def setUp(self):
+        """Create queries with a plan in both the basic and the three schema merged schemas."""
+        self.query_str = dedent('''\
+            {
+              Animal {
+                name @output(out_name: "name")
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+        self.reformatted_query_str = (
+            '{ Animal { name @output(out_name: "name") '
+            'out_Animal_Creature { age @output(out_name: "age") } } }'
+        )
+        self.other_query_str = dedent('''\
+            {
+              Animal {
+                out_Animal_Creature {
+                  age @output(out_name: "age")
+                }
+              }
+            }
+        ''')
+
+    def test_query_plan_is_cached(self):
+        cache = QueryPlanCache()
+        cached_query_plan = cache.get_query_plan(self.query_str, basic_merged_schema)
+        self.assertEqual(QueryPlanCacheInfo(hits=0, misses=1, max_size=1000, current_size=1),
+                         cache.get_cache_info())
+
+        # Queries differing only in formatting share their plan.
+        self.assertIs(cached_query_plan,
+                      cache.get_query_plan(self.reformatted_query_str, basic_merged_schema))
+        self.assertEqual(QueryPlanCacheInfo(hits=1, misses=1, max_size=1000, current_size=1),
+                         cache.get_cache_info())
+
+        # Merged schemas are compared by identity.
+        self.assertIsNot(cached_query_plan,
+                         cache.get_query_plan(self.query_str, three_merged_schema))
+        self.assertEqual(QueryPlanCacheInfo(hits=1, misses=2, max_size=1000, current_size=2),
+                         cache.get_cache_info())
+
+        cache.clear()
+        self.assertEqual(0, cache.get_cache_info().current_size)
+
+    def test_cached_sub_query_strings(self):
+        cache = QueryPlanCache()
+        cached_query_plan = cache.get_query_plan(self.query_str, basic_merged_schema)
+        root_sub_query_plan = cached_query_plan.query_plan_descriptor.root_sub_query_plan
+        self.assertEqual(
+            (
+                print_ast(root_sub_query_plan.query_ast),
+                print_ast(root_sub_query_plan.child_query_plans[0].query_ast),
+            ),
+            cached_query_plan.sub_query_strings)
+
+        executed_query_strings = []
+
+        def execute(query_string, parameters):
+            """Record the executed query, returning a single Animal."""
+            executed_query_strings.append(query_string)
+            return [{'name': 'A', '__intermediate_output_0': 'uuid_a'}]
+
+        rows = list(execute_query_plan(
+            {'first': execute, 'second': lambda query_string, parameters: []},
+            cached_query_plan.query_plan_descriptor, {},
+            sub_query_strings=cached_query_plan.sub_query_strings))
+        self.assertEqual([], rows)
+        self.assertEqual([cached_query_plan.sub_query_strings[0]], executed_query_strings)
+
+    def test_least_recently_used_query_plan_is_evicted(self):
+        cache = QueryPlanCache(max_size=1)
+        cached_query_plan = cache.get_query_plan(self.query_str, basic_merged_schema)
+        cache.get_query_plan(self.other_query_str, basic_merged_schema)
+        self.assertIsNot(cached_query_plan,
+                         cache.get_query_plan(self.query_str, basic_merged_schema))
+        self.assertEqual(QueryPlanCacheInfo(hits=0, misses=3, max_size=1, current_size=1),
+                         cache.get_cache_info())
+
+        with self.assertRaises(ValueError):
+            QueryPlanCache(max_size=0)
@@ -1,20 +1,53 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-from datetime import date
+# -*- coding: utf-8 -*-
+from datetime import date, datetime
+from decimal import Decimal
+import os
+import shutil
+import tempfile
 import unittest
 
 import pytest
+import pytz
+import six
+import sqlalchemy
+from sqlalchemy.dialects import sqlite
 
 from .. import test_input_data
+from ...ast_manipulation import safe_parse_graphql
+from ...compiler.common import MATCH_LANGUAGE, SQL_LANGUAGE
+from ...compiler.compiler_frontend import graphql_to_ir
+from ...compiler.helpers import OUTBOUND_EDGE_DIRECTION
 from ...compiler.metadata import FilterInfo
-from ...cost_estimation.cardinality_estimator import estimate_query_result_cardinality
+from ...cost_estimation.cardinality_corrections import CardinalityCorrections
+from ...cost_estimation.cardinality_estimator import (
+    correct_cardinality_estimation_plan, estimate_number_of_pages,
+    estimate_number_of_pages_from_query_metadata,
+    estimate_query_result_cardinalities_for_parameter_batch, estimate_query_result_cardinality,
+    estimate_query_result_cardinality_from_ast,
+    estimate_query_result_cardinality_from_query_metadata,
+    estimate_query_result_cardinality_using_plan, make_cardinality_estimation_plan
+)
+from ...cost_estimation.execution_cost_estimator import (
+    ExecutionCostWeights, estimate_query_execution_cost
+)
 from ...cost_estimation.filter_selectivity_utils import (
     ABSOLUTE_SELECTIVITY, FRACTIONAL_SELECTIVITY, Selectivity, _combine_filter_selectivities,
     _create_integer_interval, _get_filter_selectivity, _get_intersection_of_intervals,
     adjust_counts_for_filters
 )
+from ...cost_estimation.sqlalchemy_statistics import collect_statistics_from_sqlalchemy_database
 from ...cost_estimation.statistics import LocalStatistics
+from ...cost_estimation.statistics_snapshot import SnapshotStatistics, save_statistics_snapshot
 from ...schema.schema_info import QueryPlanningSchemaInfo
 from ...schema_generation.graphql_schema import get_graphql_schema_from_schema_graph
+from ...schema_generation.orientdb.schema_graph_builder import get_orientdb_schema_graph
+from ...schema_generation.orientdb.schema_properties import (
+    ORDERED_UNIQUE_INDEX_TYPE, ORIENTDB_BASE_EDGE_CLASS_NAME, ORIENTDB_BASE_VERTEX_CLASS_NAME,
+    PROPERTY_TYPE_LINK_ID, PROPERTY_TYPE_STRING_ID
+)
+from ...schema_generation.sqlalchemy import get_sqlalchemy_schema_info_from_specified_metadata
+from ...schema_generation.sqlalchemy.edge_descriptors import DirectEdgeDescriptor
 from ..test_helpers import generate_schema_graph
 
 
@@ -509,9 +542,9 @@ class CostEstimationTests(unittest.TestCase):
         )
 
         # For each Animal, we expect 11.0 / 7.0 "child" Animals. Since recurse first explores
-        # depth=0, we add 1 to account for the parent. At the moment, we don't account for depths
-        # greater than 1, so we expect 7.0 * (11.0 / 7.0 + 1) results.
-        expected_cardinality_estimate = 7.0 * (11.0 / 7.0 + 1)
+        # depth=0, the parent itself is included, followed by (11.0 / 7.0) ** 2 Animals at depth 2,
+        # so we expect 7.0 * (1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2) results.
+        expected_cardinality_estimate = 7.0 * (1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2)
         self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
 
     @pytest.mark.usefixtures('snapshot_orientdb_client')
@@ -541,10 +574,9 @@ class CostEstimationTests(unittest.TestCase):
         )
 
         # For each Animal, we expect 11.0 / 7.0 "child" Animals. Since recurse first explores
-        # depth=0, we add 1 to account for the parent. At the moment, we don't account for depths
-        # greater than 1, so we exepct 11.0 / 7.0 + 1 total children, each of which has 13.0 / 7.0
-        # Animal_BornAt edges.
-        expected_cardinality_estimate = 7.0 * (11.0 / 7.0 + 1) * (13.0 / 7.0)
+        # depth=0 and continues until depth=2, we expect 1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2 total
+        # children, each of which has 13.0 / 7.0 Animal_BornAt edges.
+        expected_cardinality_estimate = 7.0 * (1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2) * (13.0 / 7.0)
         self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
 
     @pytest.mark.usefixtures('snapshot_orientdb_client')
@@ -875,9 +907,10 @@ class CostEstimationTests(unittest.TestCase):
             schema_graph, statistics, graphql_input, params
         )
 
-        # For each Animal, we expect 11.0 / 7.0 + 1 "child" Animals due to the recurse. Since
-        # there's a filter immediately following, we only expect 1 Animal to pass. We expect this to
-        # have 13.0 / 7.0 Animal_BornAt edges, giving a total of 7.0 * (13.0 / 7.0) results.
+        # For each Animal, we expect 1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2 "child" Animals due to the
+        # recurse. Since there's a filter immediately following, we only expect 1 Animal to pass.
+        # We expect this to have 13.0 / 7.0 Animal_BornAt edges, giving a total of
+        # 7.0 * (13.0 / 7.0) results.
         expected_cardinality_estimate = 7.0 * 1.0 * (13.0 / 7.0)
         self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
 
@@ -910,10 +943,10 @@ class CostEstimationTests(unittest.TestCase):
             schema_graph, statistics, graphql_input, params
         )
 
-        # For each Animal, we expect 11.0 / 7.0 + 1 "child" Animals due to the recurse. Since
-        # there's a filter immediately following, we only expect 1 Animal to pass. We expect this to
-        # have 13.0 / 7.0 Animal_BornAt edges, giving a total of 7.0 * (13.0 / 7.0) results.
-        expected_cardinality_estimate = 7.0 * (11.0 / 7.0 + 1.0) * 1.0
+        # For each Animal, we expect 1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2 "child" Animals due to the
+        # recurse. Each of them has 13.0 / 7.0 Animal_BornAt edges, but since there's a filter on
+        # the Animal_BornAt vertex, we only expect 1 of them to pass.
+        expected_cardinality_estimate = 7.0 * (1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2) * 1.0
         self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
 
 
@@ -1190,6 +1223,95 @@ class FilterSelectivityUtilsTests(unittest.TestCase):
         expected_counts = 0.0
         self.assertAlmostEqual(expected_counts, result_counts)
 
+    @pytest.mark.usefixtures('snapshot_orientdb_client')
+    def test_inequality_filters_with_field_quantiles(self):
+        schema_graph = generate_schema_graph(self.orientdb_client)
+        # The quantiles divide the Species' limbs values into four equally-sized groups: [0, 2],
+        # [2, 4], [4, 8] and [8, 1000]. The distribution of limbs values is heavily skewed, so
+        # assuming an even distribution between the smallest and largest value would be very
+        # inaccurate.
+        statistics = LocalStatistics(
+            dict(),
+            field_quantiles={
+                ('Species', 'limbs'): [0, 2, 4, 8, 1000],
+                ('Animal', 'birthday'): [date(2000, 1, 1), date(2000, 1, 31), date(2020, 1, 1)],
+                ('Animal', 'net_worth'): [0, 100, 200],
+            }
+        )
+
+        # Limbs values between 2 and 4 are exactly one of the four groups, but the value 2 is also
+        # counted in 1 / 3 of the [0, 2] group, and the value 4 in 1 / 5 of the [4, 8] group.
+        between_filter = FilterInfo(fields=('limbs',), op_name='between',
+                                    args=('$limbs_lower', '$limbs_upper'))
+        params = {
+            'limbs_lower': 2,
+            'limbs_upper': 4,
+        }
+        selectivity = _make_schema_info_and_get_filter_selectivity(
+            schema_graph, statistics, between_filter, params, 'Species'
+        )
+        expected_selectivity = Selectivity(
+            kind=FRACTIONAL_SELECTIVITY, value=(1.0 / 3.0 + 1.0 + 1.0 / 5.0) / 4.0
+        )
+        self.assertEqual(expected_selectivity.kind, selectivity.kind)
+        self.assertAlmostEqual(expected_selectivity.value, selectivity.value)
+
+        # Strict inequalities on integer fields exclude the parameter value itself.
+        less_than_filter = FilterInfo(fields=('limbs',), op_name='<', args=('$limbs_upper',))
+        params = {
+            'limbs_upper': 3,
+        }
+        selectivity = _make_schema_info_and_get_filter_selectivity(
+            schema_graph, statistics, less_than_filter, params, 'Species'
+        )
+        expected_selectivity = Selectivity(
+            kind=FRACTIONAL_SELECTIVITY, value=(1.0 + 1.0 / 3.0) / 4.0
+        )
+        self.assertEqual(expected_selectivity.kind, selectivity.kind)
+        self.assertAlmostEqual(expected_selectivity.value, selectivity.value)
+
+        # Half of the Animals were born in January 2000, so filtering for birthdays on or after
+        # February 1st 2000 should select roughly half of them.
+        greater_than_filter = FilterInfo(fields=('birthday',), op_name='>',
+                                         args=('$birthday_lower',))
+        params = {
+            'birthday_lower': date(2000, 1, 31),
+        }
+        selectivity = _make_schema_info_and_get_filter_selectivity(
+            schema_graph, statistics, greater_than_filter, params, 'Animal'
+        )
+        self.assertEqual(FRACTIONAL_SELECTIVITY, selectivity.kind)
+        self.assertAlmostEqual(0.5, selectivity.value, places=3)
+
+        # Decimal fields are treated as continuous, so a quarter of the Animals have a net worth of
+        # at least 150.
+        greater_or_equal_filter = FilterInfo(fields=('net_worth',), op_name='>=',
+                                             args=('$net_worth_lower',))
+        params = {
+            'net_worth_lower': 150,
+        }
+        selectivity = _make_schema_info_and_get_filter_selectivity(
+            schema_graph, statistics, greater_or_equal_filter, params, 'Animal'
+        )
+        expected_selectivity = Selectivity(kind=FRACTIONAL_SELECTIVITY, value=0.25)
+        self.assertEqual(expected_selectivity.kind, selectivity.kind)
+        self.assertAlmostEqual(expected_selectivity.value, selectivity.value)
+
+        # Values outside of the range of the quantiles are assumed not to exist.
+        selectivity = _make_schema_info_and_get_filter_selectivity(
+            schema_graph, statistics, greater_or_equal_filter, {'net_worth_lower': 300}, 'Animal'
+        )
+        expected_selectivity = Selectivity(kind=FRACTIONAL_SELECTIVITY, value=0.0)
+        self.assertEqual(expected_selectivity, selectivity)
+
+        # Empty 'between' filters select nothing.
+        selectivity = _make_schema_info_and_get_filter_selectivity(
+            schema_graph, statistics, between_filter, {'limbs_lower': 5, 'limbs_upper': 4},
+            'Species'
+        )
+        expected_selectivity = Selectivity(kind=ABSOLUTE_SELECTIVITY, value=0.0)
+        self.assertEqual(expected_selectivity, selectivity)
+
 
 # pylint: enable=no-member
 
@@ -1280,3 +1402,1124 @@ class IntegerIntervalTests(unittest.TestCase):
         expected_intersection = None
         received_intersection = _get_intersection_of_intervals(interval_a, interval_b)
         self.assertEqual(expected_intersection, received_intersection)
+
+
+def _make_person_knows_schema_graph(index_data=()):
+    """Return a SchemaGraph with a Person vertex class and a Person_Knows edge class."""
+    schema_data = [
+        {
+            'name': ORIENTDB_BASE_VERTEX_CLASS_NAME,
+            'abstract': False,
+            'properties': [],
+        },
+        {
+            'name': ORIENTDB_BASE_EDGE_CLASS_NAME,
+            'abstract': False,
+            'properties': [],
+        },
+        {
+            'name': 'Person',
+            'abstract': False,
+            'superClass': ORIENTDB_BASE_VERTEX_CLASS_NAME,
+            'properties': [
+                {
+                    'name': 'name',
+                    'type': PROPERTY_TYPE_STRING_ID,
+                },
+                {
+                    'name': 'uuid',
+                    'type': PROPERTY_TYPE_STRING_ID,
+                },
+            ],
+        },
+        {
+            'name': 'Person_Knows',
+            'abstract': False,
+            'superClass': ORIENTDB_BASE_EDGE_CLASS_NAME,
+            'properties': [
+                {
+                    'name': 'in',
+                    'type': PROPERTY_TYPE_LINK_ID,
+                    'linkedClass': 'Person',
+                },
+                {
+                    'name': 'out',
+                    'type': PROPERTY_TYPE_LINK_ID,
+                    'linkedClass': 'Person',
+                },
+            ],
+        },
+    ]
+    return get_orientdb_schema_graph(schema_data, index_data)
+
+
+def _make_degree_histogram(degrees):
+    """Return a degree histogram of the given degrees, using power-of-two bucket bounds."""
+    bucket_bounds = [(0, 0)]
+    while bucket_bounds[-1][1] < max(degrees):
+        min_degree = bucket_bounds[-1][1] + 1
+        bucket_bounds.append((min_degree, 2 * min_degree - 1))
+
+    return [
+        (min_degree, max_degree, sum(
+            1
+            for degree in degrees
+            if min_degree <= degree <= max_degree
+        ))
+        for min_degree, max_degree in bucket_bounds
+    ]
+
+
+class DegreeHistogramCostEstimationTests(unittest.TestCase):
+    """Compare estimates using degree histograms with estimates assuming uniform distributions."""
+
+    def setUp(self):
+        """Generate a synthetic graph whose out-degrees follow a power law."""
+        self.schema_graph = _make_person_knows_schema_graph()
+
+        # Most Person vertices know nobody, while a few know thousands of other Person vertices.
+        num_persons = 10000
+        self.out_degrees = [
+            int(5000.0 / (index ** 1.5))
+            for index in range(1, num_persons + 1)
+        ]
+        num_edges = sum(self.out_degrees)
+
+        class_counts = {
+            'Person': num_persons,
+            'Person_Knows': num_edges,
+        }
+        vertex_edge_vertex_counts = {
+            ('Person', 'Person_Knows', 'Person'): num_edges,
+        }
+        self.uniform_statistics = LocalStatistics(
+            class_counts, vertex_edge_vertex_counts=vertex_edge_vertex_counts)
+        self.histogram_statistics = LocalStatistics(
+            class_counts, vertex_edge_vertex_counts=vertex_edge_vertex_counts,
+            vertex_edge_vertex_degree_histograms={
+                ('Person', 'Person_Knows', 'Person', OUTBOUND_EDGE_DIRECTION):
+                    _make_degree_histogram(self.out_degrees),
+            }
+        )
+
+    def _get_estimate_errors(self, query, true_cardinality):
+        """Return the relative errors of the uniform and the histogram-based estimates."""
+        uniform_estimate = _make_schema_info_and_estimate_cardinality(
+            self.schema_graph, self.uniform_statistics, query, dict())
+        histogram_estimate = _make_schema_info_and_estimate_cardinality(
+            self.schema_graph, self.histogram_statistics, query, dict())
+        # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+        # pylint: disable=old-division
+        uniform_error = abs(uniform_estimate - true_cardinality) / true_cardinality
+        histogram_error = abs(histogram_estimate - true_cardinality) / true_cardinality
+        # pylint: enable=old-division
+        return uniform_error, histogram_error
+
+    def test_traverse(self):
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+                out_Person_Knows {
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        true_cardinality = float(sum(self.out_degrees))
+
+        # The mean number of edges per vertex does not depend on the distribution of the edges, so
+        # both estimates are exact.
+        uniform_error, histogram_error = self._get_estimate_errors(query, true_cardinality)
+        self.assertAlmostEqual(0.0, uniform_error)
+        self.assertAlmostEqual(0.0, histogram_error)
+
+    def test_optional(self):
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+                out_Person_Knows @optional {
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        # Each Person vertex produces one result per edge, or a single result if it has no edges.
+        true_cardinality = float(sum(max(degree, 1) for degree in self.out_degrees))
+
+        # The uniform model assumes every Person vertex has at least one edge, and misses the
+        # results produced by the vast majority of Person vertices that have none.
+        uniform_error, histogram_error = self._get_estimate_errors(query, true_cardinality)
+        self.assertGreater(uniform_error, 0.4)
+        self.assertLess(histogram_error, 0.05)
+
+    def test_fold(self):
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+                out_Person_Knows @fold {
+                    name @output(out_name: "friend_names")
+                }
+            }
+        }'''
+        # As with @optional, the estimator counts the result sets inside the fold, and at least one
+        # result set per Person vertex.
+        true_cardinality = float(sum(max(degree, 1) for degree in self.out_degrees))
+
+        uniform_error, histogram_error = self._get_estimate_errors(query, true_cardinality)
+        self.assertGreater(uniform_error, 0.4)
+        self.assertLess(histogram_error, 0.05)
+
+    def test_optional_with_filter(self):
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+                out_Person_Knows @optional {
+                    name @filter(op_name: "=", value: ["$name"])
+                         @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        # Assume 1 in 10 edges lead to a Person vertex with the given name. The optional traversal
+        # produces at least one result for each Person vertex.
+        distinct_names = 10
+        # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+        # pylint: disable=old-division
+        true_cardinality = sum(
+            max(float(degree) / distinct_names, 1.0)
+            for degree in self.out_degrees
+        )
+        # pylint: enable=old-division
+
+        self.uniform_statistics = LocalStatistics(
+            {'Person': len(self.out_degrees), 'Person_Knows': sum(self.out_degrees)},
+            distinct_field_values_counts={('Person', 'name'): distinct_names},
+        )
+        self.histogram_statistics = LocalStatistics(
+            {'Person': len(self.out_degrees), 'Person_Knows': sum(self.out_degrees)},
+            distinct_field_values_counts={('Person', 'name'): distinct_names},
+            vertex_edge_vertex_degree_histograms={
+                ('Person', 'Person_Knows', 'Person', OUTBOUND_EDGE_DIRECTION):
+                    _make_degree_histogram(self.out_degrees),
+            }
+        )
+        uniform_error, histogram_error = self._get_estimate_errors(query, true_cardinality)
+        self.assertLess(histogram_error, uniform_error)
+        self.assertLess(histogram_error, 0.05)
+
+
+class RecursionCostEstimationTests(unittest.TestCase):
+    """Test estimating the cardinality of queries with @recurse directives."""
+
+    def setUp(self):
+        """Initialize the schema graph and the query."""
+        self.schema_graph = _make_person_knows_schema_graph()
+
+    def _estimate_recursion_cardinality(self, statistics, depth):
+        """Estimate the cardinality of a recursion over Person_Knows edges up to the given depth."""
+        graphql_input = '''{
+            Person {
+                out_Person_Knows @recurse(depth: %d) {
+                    name @output(out_name: "name")
+                }
+            }
+        }''' % depth
+        return _make_schema_info_and_estimate_cardinality(
+            self.schema_graph, statistics, graphql_input, dict())
+
+    def test_recurse_geometric_sum(self):
+        statistics = LocalStatistics({'Person': 1000, 'Person_Knows': 2000})
+
+        # Each Person knows 2 other Persons, so the recursion reaches 1 + 2 + 4 + 8 Persons.
+        self.assertAlmostEqual(15.0 * 1000, self._estimate_recursion_cardinality(statistics, 3))
+        self.assertAlmostEqual(3.0 * 1000, self._estimate_recursion_cardinality(statistics, 1))
+
+    def test_recurse_with_one_edge_per_vertex(self):
+        statistics = LocalStatistics({'Person': 1000, 'Person_Knows': 1000})
+
+        # Each Person knows exactly 1 other Person, so each depth reaches 1 more Person.
+        self.assertAlmostEqual(6.0 * 1000, self._estimate_recursion_cardinality(statistics, 5))
+
+    def test_recurse_bounded_by_vertex_count(self):
+        statistics = LocalStatistics({'Person': 1000, 'Person_Knows': 2000})
+
+        # The geometric sum 2 ** 11 - 1 is larger than the number of Persons, but each Person can
+        # be reached at most once, in addition to the Person the recursion starts from.
+        self.assertAlmostEqual(1001.0 * 1000, self._estimate_recursion_cardinality(statistics, 10))
+
+    def test_recurse_with_recursive_traversal_vertex_count(self):
+        statistics = LocalStatistics(
+            {'Person': 1000, 'Person_Knows': 2000},
+            recursive_traversal_vertex_counts={
+                ('Person', 'Person_Knows', 'Person', OUTBOUND_EDGE_DIRECTION, 3): 6.5,
+            },
+        )
+
+        # The statistic is used for the depth it was computed for.
+        self.assertAlmostEqual(6.5 * 1000, self._estimate_recursion_cardinality(statistics, 3))
+        # Other depths fall back to the geometric sum.
+        self.assertAlmostEqual(7.0 * 1000, self._estimate_recursion_cardinality(statistics, 2))
+
+
+class StringAndNullFilterSelectivityTests(unittest.TestCase):
+    """Test estimating filter selectivities using null fractions, common values and samples."""
+
+    def setUp(self):
+        """Initialize the schema graph and the statistics."""
+        self.schema_graph = _make_person_knows_schema_graph()
+        self.statistics = LocalStatistics(
+            {'Person': 1000, 'Person_Knows': 0},
+            distinct_field_values_counts={
+                ('Person', 'name'): 102,
+            },
+            field_null_fractions={
+                ('Person', 'name'): 0.2,
+            },
+            field_most_common_values={
+                ('Person', 'name'): [('Alice', 0.4), ('Bob', 0.2)],
+            },
+            field_value_samples={
+                ('Person', 'name'): ['Alice', 'Alice', 'Bob', 'Alicia', 'Carol', 'Dave', 'Eve'],
+                ('Person', 'alias'): [['Al', 'Ally'], ['Bobby'], [], ['Al']],
+            },
+        )
+
+    def _estimate_cardinality(self, statistics, graphql_input, args):
+        """Estimate the cardinality of the query using the Person schema graph."""
+        return _make_schema_info_and_estimate_cardinality(
+            self.schema_graph, statistics, graphql_input, args)
+
+    def test_null_check_filters(self):
+        is_null_query = '''{
+            Person {
+                name @filter(op_name: "is_null", value: [])
+                uuid @output(out_name: "uuid")
+            }
+        }'''
+        is_not_null_query = '''{
+            Person {
+                name @filter(op_name: "is_not_null", value: [])
+                uuid @output(out_name: "uuid")
+            }
+        }'''
+        self.assertAlmostEqual(
+            200.0, self._estimate_cardinality(self.statistics, is_null_query, dict()))
+        self.assertAlmostEqual(
+            800.0, self._estimate_cardinality(self.statistics, is_not_null_query, dict()))
+
+        # Without the null fraction statistic, the filters are assumed to pass all vertices.
+        empty_statistics = LocalStatistics({'Person': 1000, 'Person_Knows': 0})
+        self.assertAlmostEqual(
+            1000.0, self._estimate_cardinality(empty_statistics, is_null_query, dict()))
+
+    def test_negated_equality_filters(self):
+        not_equal_query = '''{
+            Person {
+                name @filter(op_name: "!=", value: ["$name"])
+                uuid @output(out_name: "uuid")
+            }
+        }'''
+        # 20% of the names are null and 40% are 'Alice', neither of which pass the filter.
+        self.assertAlmostEqual(
+            400.0, self._estimate_cardinality(self.statistics, not_equal_query, {'name': 'Alice'}))
+        # The remaining 20% of the names are evenly distributed among the 100 uncommon names.
+        self.assertAlmostEqual(
+            798.0, self._estimate_cardinality(self.statistics, not_equal_query, {'name': 'Zed'}))
+
+        not_in_collection_query = '''{
+            Person {
+                name @filter(op_name: "not_in_collection", value: ["$names"])
+                uuid @output(out_name: "uuid")
+            }
+        }'''
+        # Duplicates in the collection are only excluded once.
+        parameters = {'names': ['Alice', 'Bob', 'Zed', 'Bob']}
+        self.assertAlmostEqual(
+            198.0, self._estimate_cardinality(self.statistics, not_in_collection_query, parameters))
+
+    def test_sampled_value_filters(self):
+        has_substring_query = '''{
+            Person {
+                name @filter(op_name: "has_substring", value: ["$substring"])
+                uuid @output(out_name: "uuid")
+            }
+        }'''
+        # 3 of the 7 sampled names contain 'lic', and 80% of the names are not null.
+        self.assertAlmostEqual(
+            1000.0 * 0.8 * 3.5 / 8.0,
+            self._estimate_cardinality(self.statistics, has_substring_query, {'substring': 'lic'}))
+        # Substrings not found in any sampled name are still estimated to match a few names.
+        self.assertAlmostEqual(
+            1000.0 * 0.8 * 0.5 / 8.0,
+            self._estimate_cardinality(self.statistics, has_substring_query, {'substring': 'xyz'}))
+
+        starts_with_query = '''{
+            Person {
+                name @filter(op_name: "starts_with", value: ["$prefix"])
+                uuid @output(out_name: "uuid")
+            }
+        }'''
+        self.assertAlmostEqual(
+            1000.0 * 0.8 * 1.5 / 8.0,
+            self._estimate_cardinality(self.statistics, starts_with_query, {'prefix': 'B'}))
+
+        ends_with_query = '''{
+            Person {
+                name @filter(op_name: "ends_with", value: ["$suffix"])
+                uuid @output(out_name: "uuid")
+            }
+        }'''
+        self.assertAlmostEqual(
+            1000.0 * 0.8 * 4.5 / 8.0,
+            self._estimate_cardinality(self.statistics, ends_with_query, {'suffix': 'e'}))
+
+        # Tagged parameters are only known during query execution.
+        tagged_query = '''{
+            Person {
+                name @tag(tag_name: "name")
+                uuid @output(out_name: "uuid")
+                out_Person_Knows @optional {
+                    name @filter(op_name: "has_substring", value: ["%name"])
+                }
+            }
+        }'''
+        self.assertAlmostEqual(
+            1000.0, self._estimate_cardinality(self.statistics, tagged_query, dict()))
+
+    def test_sampled_list_value_filters(self):
+        contains_filter = FilterInfo(fields=('alias',), op_name='contains', args=('$alias',))
+        selectivity = _make_schema_info_and_get_filter_selectivity(
+            self.schema_graph, self.statistics, contains_filter, {'alias': 'Al'}, 'Person')
+        self.assertEqual(FRACTIONAL_SELECTIVITY, selectivity.kind)
+        self.assertAlmostEqual(2.5 / 5.0, selectivity.value)
+
+        intersects_filter = FilterInfo(fields=('alias',), op_name='intersects', args=('$aliases',))
+        selectivity = _make_schema_info_and_get_filter_selectivity(
+            self.schema_graph, self.statistics, intersects_filter,
+            {'aliases': ['Ally', 'Bobby']}, 'Person')
+        self.assertEqual(FRACTIONAL_SELECTIVITY, selectivity.kind)
+        self.assertAlmostEqual(2.5 / 5.0, selectivity.value)
+
+    def test_parameter_batch_matches_individual_estimates(self):
+        graphql_input = '''{
+            Person {
+                name @filter(op_name: "!=", value: ["$name"])
+                     @filter(op_name: "has_substring", value: ["$substring"])
+                uuid @output(out_name: "uuid")
+            }
+        }'''
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(
+            self.schema_graph)
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=self.schema_graph,
+            statistics=self.statistics,
+            pagination_keys={'Person': 'uuid'})
+        query_metadata = graphql_to_ir(
+            graphql_schema, graphql_input, type_equivalence_hints=type_equivalence_hints
+        ).query_metadata_table
+        plan = make_cardinality_estimation_plan(schema_info, query_metadata)
+
+        parameter_columns = {
+            'name': ['Alice', 'Zed', 'Bob'],
+            'substring': ['lic', 'o', 'xyz'],
+        }
+        cardinality_estimates = estimate_query_result_cardinalities_for_parameter_batch(
+            schema_info, plan, parameter_columns)
+
+        self.assertEqual(3, len(cardinality_estimates))
+        for index in six.moves.xrange(3):
+            parameters = {
+                parameter_name: column[index]
+                for parameter_name, column in six.iteritems(parameter_columns)
+            }
+            self.assertAlmostEqual(
+                cardinality_estimates[index],
+                estimate_query_result_cardinality_using_plan(schema_info, plan, parameters))
+
+
+class ExecutionCostEstimationTests(unittest.TestCase):
+    """Test estimating the execution cost of queries, in addition to their cardinality."""
+
+    def setUp(self):
+        """Initialize the schema info, with a unique index on the uuid field of Person."""
+        index_data = [
+            {
+                'name': 'Person.uuid',
+                'type': ORDERED_UNIQUE_INDEX_TYPE,
+                'indexDefinition': {
+                    'className': 'Person',
+                    'field': 'uuid',
+                    'nullValuesIgnored': False,
+                },
+            },
+        ]
+        schema_graph = _make_person_knows_schema_graph(index_data=index_data)
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        statistics = LocalStatistics(
+            {'Person': 1000, 'Person_Knows': 5000},
+            distinct_field_values_counts={('Person', 'name'): 100})
+        self.schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys={'Person': 'uuid'})
+
+    def test_scan_and_traverse(self):
+        graphql_input = '''{
+            Person {
+                name @output(out_name: "name")
+                out_Person_Knows {
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        execution_cost = estimate_query_execution_cost(
+            self.schema_info, graphql_input, dict(), MATCH_LANGUAGE)
+
+        root_cost, child_cost = execution_cost.location_costs
+        # All 1000 Persons are scanned, since there are no filters.
+        self.assertEqual('Person', root_cost.location_name)
+        self.assertIsNone(root_cost.index)
+        self.assertAlmostEqual(1000.0, root_cost.intermediate_tuples)
+        self.assertAlmostEqual(1000.0, root_cost.result_sets)
+        self.assertAlmostEqual(1000.0, root_cost.cost)
+        # Each Person knows 5 other Persons.
+        self.assertEqual('Person', child_cost.location_name)
+        self.assertEqual(('Person', 'out_Person_Knows'), child_cost.location.query_path)
+        self.assertAlmostEqual(5000.0, child_cost.intermediate_tuples)
+        self.assertAlmostEqual(5000.0, child_cost.result_sets)
+        self.assertAlmostEqual(5000.0, child_cost.cost)
+
+        self.assertAlmostEqual(5000.0, execution_cost.result_cardinality)
+        self.assertAlmostEqual(1000.0 + 5000.0 + 5000.0, execution_cost.total_cost)
+
+    def test_unique_index_lookup(self):
+        graphql_input = '''{
+            Person {
+                uuid @filter(op_name: "=", value: ["$uuid"])
+                out_Person_Knows {
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        params = {'uuid': '00000000-0000-0000-0000-000000000000'}
+        execution_cost = estimate_query_execution_cost(
+            self.schema_info, graphql_input, params, MATCH_LANGUAGE)
+
+        root_cost, child_cost = execution_cost.location_costs
+        # Only the Person with the given uuid is looked up using the index.
+        self.assertEqual('Person.uuid', root_cost.index.name)
+        self.assertAlmostEqual(1.0, root_cost.intermediate_tuples)
+        self.assertAlmostEqual(1.0, root_cost.result_sets)
+        self.assertAlmostEqual(2.0, root_cost.cost)
+        self.assertAlmostEqual(5.0, child_cost.intermediate_tuples)
+
+        self.assertAlmostEqual(5.0, execution_cost.result_cardinality)
+        self.assertAlmostEqual(2.0 + 5.0 + 5.0, execution_cost.total_cost)
+
+    def test_filter_after_traversal(self):
+        graphql_input = '''{
+            Person {
+                out_Person_Knows {
+                    name @filter(op_name: "=", value: ["$name"])
+                         @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        params = {'name': 'Alice'}
+        execution_cost = estimate_query_execution_cost(
+            self.schema_info, graphql_input, params, MATCH_LANGUAGE)
+
+        _, child_cost = execution_cost.location_costs
+        # All 5000 edges are traversed, but only 1 in 100 of the Persons reached passes the filter.
+        self.assertIsNone(child_cost.index)
+        self.assertAlmostEqual(5000.0, child_cost.intermediate_tuples)
+        self.assertAlmostEqual(50.0, child_cost.result_sets)
+        self.assertAlmostEqual(50.0, execution_cost.result_cardinality)
+        self.assertAlmostEqual(1000.0 + 5000.0 + 50.0, execution_cost.total_cost)
+
+    def test_backend_cost_weights(self):
+        graphql_input = '''{
+            Person {
+                out_Person_Knows {
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        sql_execution_cost = estimate_query_execution_cost(
+            self.schema_info, graphql_input, dict(), SQL_LANGUAGE)
+        self.assertAlmostEqual(
+            1000.0 * 0.2 + 5000.0 * 2.0 + 5000.0, sql_execution_cost.total_cost)
+
+        cost_weights = ExecutionCostWeights(
+            scanned_vertex_cost=1.0, index_lookup_cost=1.0, traversed_edge_cost=0.0,
+            result_row_cost=0.0)
+        custom_execution_cost = estimate_query_execution_cost(
+            self.schema_info, graphql_input, dict(), 'custom', cost_weights=cost_weights)
+        self.assertAlmostEqual(1000.0, custom_execution_cost.total_cost)
+
+        with self.assertRaises(ValueError):
+            estimate_query_execution_cost(self.schema_info, graphql_input, dict(), 'custom')
+
+
+class CardinalityCorrectionsTests(unittest.TestCase):
+    """Test learning corrections to cardinality estimates from observed result sizes."""
+
+    def setUp(self):
+        """Initialize outdated statistics, and plans for queries whose true cardinality is known."""
+        schema_graph = _make_person_knows_schema_graph()
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        # Since the statistics were collected, the number of Persons doubled to 2000, while the
+        # number of Person_Knows edges dropped to 4000, i.e. 2 per Person.
+        self.schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=LocalStatistics({'Person': 1000, 'Person_Knows': 5000}),
+            pagination_keys={'Person': 'uuid'})
+
+        persons_query = '''{
+            Person {
+                name @output(out_name: "name")
+            }
+        }'''
+        friends_query = '''{
+            Person {
+                out_Person_Knows {
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        friends_of_friends_query = '''{
+            Person {
+                out_Person_Knows {
+                    out_Person_Knows {
+                        name @output(out_name: "friend_name")
+                    }
+                }
+            }
+        }'''
+        self.plans_and_true_cardinalities = [
+            (self._make_plan(persons_query), 2000),
+            (self._make_plan(friends_query), 4000),
+            (self._make_plan(friends_of_friends_query), 8000),
+        ]
+
+    def _make_plan(self, graphql_query):
+        """Return the CardinalityEstimationPlan of a query."""
+        query_metadata = graphql_to_ir(
+            self.schema_info.schema, graphql_query,
+            type_equivalence_hints=self.schema_info.type_equivalence_hints
+        ).query_metadata_table
+        return make_cardinality_estimation_plan(self.schema_info, query_metadata)
+
+    def _record_observations(self, cardinality_corrections, num_rounds):
+        """Record the true cardinality of each query the given number of times."""
+        for _ in range(num_rounds):
+            for plan, true_cardinality in self.plans_and_true_cardinalities:
+                cardinality_corrections.record_observation(
+                    self.schema_info, plan, dict(), true_cardinality)
+
+    def _get_corrected_estimate(self, cardinality_corrections, plan):
+        """Return the estimated cardinality of a plan, with the corrections applied."""
+        return estimate_query_result_cardinality_using_plan(
+            self.schema_info, correct_cardinality_estimation_plan(plan, cardinality_corrections),
+            dict())
+
+    def test_corrections_converge(self):
+        cardinality_corrections = CardinalityCorrections()
+        self._record_observations(cardinality_corrections, 30)
+
+        for plan, true_cardinality in self.plans_and_true_cardinalities:
+            corrected_estimate = self._get_corrected_estimate(cardinality_corrections, plan)
+            # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+            # pylint: disable=old-division
+            #
+            ratio = corrected_estimate / float(true_cardinality)
+            # pylint: enable=old-division
+            self.assertAlmostEqual(1.0, ratio, delta=0.05)
+
+        error_report = cardinality_corrections.get_error_report()
+        self.assertEqual(90, error_report.num_observations)
+        # The uncorrected estimate of the last query is 25000 instead of 8000.
+        self.assertAlmostEqual(25001.0 / 8001.0, error_report.uncorrected_max_q_error)
+        self.assertLess(error_report.corrected_mean_q_error, 1.1)
+        self.assertLess(error_report.corrected_mean_q_error, error_report.uncorrected_mean_q_error)
+
+    def test_corrections_are_bounded_and_decay(self):
+        cardinality_corrections = CardinalityCorrections(max_adjustment=1.5, decay_rate=0.5)
+        persons_plan, _ = self.plans_and_true_cardinalities[0]
+        for _ in range(10):
+            cardinality_corrections.record_observation(
+                self.schema_info, persons_plan, dict(), 1000000)
+        self.assertAlmostEqual(1.5, cardinality_corrections.get_vertex_adjustment('Person'))
+
+        # Once the uncorrected estimates are accurate, the adjustment decays back to 1.
+        friends_plan, _ = self.plans_and_true_cardinalities[1]
+        for _ in range(50):
+            cardinality_corrections.record_observation(
+                self.schema_info, friends_plan, dict(), 5000)
+        self.assertAlmostEqual(1.0, cardinality_corrections.get_vertex_adjustment('Person'))
+
+    def test_save_and_load_corrections(self):
+        cardinality_corrections = CardinalityCorrections()
+        self._record_observations(cardinality_corrections, 3)
+
+        temporary_directory = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(temporary_directory, 'corrections.json')
+            cardinality_corrections.save(file_path)
+            loaded_corrections = CardinalityCorrections.load(file_path)
+        finally:
+            shutil.rmtree(temporary_directory)
+
+        for plan, _ in self.plans_and_true_cardinalities:
+            self.assertAlmostEqual(
+                self._get_corrected_estimate(cardinality_corrections, plan),
+                self._get_corrected_estimate(loaded_corrections, plan))
+        self.assertEqual(cardinality_corrections.get_error_report(),
+                         loaded_corrections.get_error_report())
+
+
+class CostEstimationEntryPointTests(unittest.TestCase):
+    """Ensure estimates are the same regardless of whether a query string, AST or IR is given."""
+
+    def test_estimates_from_ast_and_query_metadata(self):
+        schema_graph = _make_person_knows_schema_graph()
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        statistics = LocalStatistics({
+            'Person': 12,
+            'Person_Knows': 30,
+        })
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys={'Person': 'uuid'})
+        graphql_query = '''{
+            Person {
+                name @output(out_name: "name")
+                out_Person_Knows {
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        query_ast = safe_parse_graphql(graphql_query)
+        query_metadata = graphql_to_ir(
+            graphql_schema, graphql_query, type_equivalence_hints=type_equivalence_hints
+        ).query_metadata_table
+
+        expected_cardinality_estimate = 30.0
+        self.assertAlmostEqual(expected_cardinality_estimate, estimate_query_result_cardinality(
+            schema_info, graphql_query, dict()))
+        self.assertAlmostEqual(
+            expected_cardinality_estimate,
+            estimate_query_result_cardinality_from_ast(schema_info, query_ast, dict()))
+        self.assertAlmostEqual(
+            expected_cardinality_estimate,
+            estimate_query_result_cardinality_from_query_metadata(
+                schema_info, query_metadata, dict()))
+
+        expected_number_of_pages = 4
+        self.assertEqual(expected_number_of_pages, estimate_number_of_pages(
+            schema_info, graphql_query, dict(), 8))
+        self.assertEqual(expected_number_of_pages, estimate_number_of_pages_from_query_metadata(
+            schema_info, query_metadata, dict(), 8))
+
+    def test_estimation_plan_reuse(self):
+        schema_graph = _make_person_knows_schema_graph()
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        statistics = LocalStatistics({
+            'Person': 12,
+            'Person_Knows': 30,
+        })
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys={'Person': 'uuid'})
+        graphql_query = '''{
+            Person {
+                uuid @filter(op_name: "<", value: ["$uuid_upper"])
+                name @output(out_name: "name")
+                out_Person_Knows @optional {
+                    uuid @filter(op_name: ">=", value: ["$uuid_lower"])
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        query_metadata = graphql_to_ir(
+            graphql_schema, graphql_query, type_equivalence_hints=type_equivalence_hints
+        ).query_metadata_table
+        plan = make_cardinality_estimation_plan(schema_info, query_metadata)
+
+        all_parameters = [
+            {
+                'uuid_upper': '80000000-0000-0000-0000-000000000000',
+                'uuid_lower': '00000000-0000-0000-0000-000000000000',
+            },
+            {
+                'uuid_upper': '40000000-0000-0000-0000-000000000000',
+                'uuid_lower': 'c0000000-0000-0000-0000-000000000000',
+            },
+        ]
+        # 12 * 1/2 Person vertices pass the root filter, and each of them has 30 / 12 outbound
+        # edges, all of which pass the second filter.
+        # 12 * 1/4 Person vertices pass the root filter. Each of them has 30 / 12 * 1/4 outbound
+        # edges passing the second filter, but since the traversal is optional, each of them
+        # produces at least one result.
+        expected_cardinality_estimates = [12.0 / 2.0 * 30.0 / 12.0, 12.0 / 4.0]
+        for parameters, expected_cardinality_estimate in zip(
+                all_parameters, expected_cardinality_estimates):
+            self.assertAlmostEqual(
+                expected_cardinality_estimate,
+                estimate_query_result_cardinality_using_plan(schema_info, plan, parameters))
+            self.assertAlmostEqual(
+                expected_cardinality_estimate,
+                estimate_query_result_cardinality(schema_info, graphql_query, parameters))
+
+    def test_estimation_for_parameter_batch(self):
+        schema_graph = _make_person_knows_schema_graph()
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        statistics = LocalStatistics(
+            {
+                'Person': 12,
+                'Person_Knows': 30,
+            },
+            distinct_field_values_counts={
+                ('Person', 'name'): 6,
+            }
+        )
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys={'Person': 'uuid'})
+        graphql_query = '''{
+            Person {
+                uuid @filter(op_name: "between", value: ["$uuid_lower", "$uuid_upper"])
+                name @output(out_name: "name")
+                out_Person_Knows @fold {
+                    name @filter(op_name: "in_collection", value: ["$names"])
+                         @output(out_name: "friend_names")
+                }
+            }
+        }'''
+        query_metadata = graphql_to_ir(
+            graphql_schema, graphql_query, type_equivalence_hints=type_equivalence_hints
+        ).query_metadata_table
+        plan = make_cardinality_estimation_plan(schema_info, query_metadata)
+
+        parameter_columns = {
+            'uuid_lower': [
+                '00000000-0000-0000-0000-000000000000',
+                '40000000-0000-0000-0000-000000000000',
+                'c0000000-0000-0000-0000-000000000000',
+            ],
+            'uuid_upper': [
+                'ffffffff-ffff-ffff-ffff-ffffffffffff',
+                '7fffffff-ffff-ffff-ffff-ffffffffffff',
+                '40000000-0000-0000-0000-000000000000',
+            ],
+            'names': [
+                ['Alice', 'Bob', 'Carol', 'Dave', 'Eve'],
+                ['Alice'],
+                ['Alice', 'Bob'],
+            ],
+        }
+        cardinality_estimates = estimate_query_result_cardinalities_for_parameter_batch(
+            schema_info, plan, parameter_columns)
+
+        # Each Person vertex has 30 / 12 outbound edges, of which 5 / 6 lead to Person vertices
+        # whose name is in the collection. A quarter of the Person vertices pass the second set
+        # of parameters, and each of them has at least one folded result. No Person vertex passes
+        # the third set of parameters.
+        expected_cardinality_estimates = [12.0 * 30.0 / 12.0 * 5.0 / 6.0, 12.0 / 4.0, 0.0]
+        self.assertEqual(len(expected_cardinality_estimates), len(cardinality_estimates))
+        for index, expected_cardinality_estimate in enumerate(expected_cardinality_estimates):
+            self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimates[index])
+
+            parameters = {
+                parameter_name: column[index]
+                for parameter_name, column in six.iteritems(parameter_columns)
+            }
+            self.assertAlmostEqual(
+                cardinality_estimates[index],
+                estimate_query_result_cardinality_using_plan(schema_info, plan, parameters))
+
+        with self.assertRaises(ValueError):
+            estimate_query_result_cardinalities_for_parameter_batch(schema_info, plan, {
+                'uuid_lower': parameter_columns['uuid_lower'],
+                'uuid_upper': parameter_columns['uuid_upper'][:2],
+                'names': parameter_columns['names'],
+            })
+
+
+class SQLAlchemyStatisticsCollectionTests(unittest.TestCase):
+    """Test collecting statistics from a SQL database, using a SQLite database file."""
+
+    def setUp(self):
+        """Create a database of people, the cities they live in, and their pets."""
+        metadata = sqlalchemy.MetaData()
+        city_table = sqlalchemy.Table(
+            'City', metadata,
+            sqlalchemy.Column('city_id', sqlalchemy.Integer, primary_key=True),
+            sqlalchemy.Column('name', sqlalchemy.String),
+        )
+        person_table = sqlalchemy.Table(
+            'Person', metadata,
+            sqlalchemy.Column('person_id', sqlalchemy.Integer, primary_key=True),
+            sqlalchemy.Column('name', sqlalchemy.String),
+            sqlalchemy.Column('birthday', sqlalchemy.Date),
+            sqlalchemy.Column('city_id', sqlalchemy.Integer),
+        )
+        vertex_name_to_table = {
+            'City': city_table,
+            'Person': person_table,
+        }
+        direct_edges = {
+            'Person_LivesIn': DirectEdgeDescriptor('Person', 'city_id', 'City', 'city_id'),
+        }
+        self.sqlalchemy_schema_info = get_sqlalchemy_schema_info_from_specified_metadata(
+            vertex_name_to_table, direct_edges, sqlite.dialect())
+
+        self.temporary_directory = tempfile.mkdtemp()
+        self.engine = sqlalchemy.create_engine(
+            'sqlite:///' + os.path.join(self.temporary_directory, 'statistics.db'))
+        metadata.create_all(self.engine)
+
+        # City 1 has 8 residents, cities 2 and 3 have 1 resident each and city 4 has none.
+        person_city_ids = [1] * 8 + [2, 3]
+        with self.engine.connect() as connection:
+            connection.execute(sqlalchemy.insert(city_table), [
+                {'city_id': city_id, 'name': name}
+                for city_id, name in enumerate(['A', 'B', 'C', None], start=1)
+            ])
+            connection.execute(sqlalchemy.insert(person_table), [
+                {
+                    'person_id': person_id,
+                    'name': u'Person {}'.format(person_id % 5),
+                    'birthday': date(2000, 1, person_id),
+                    'city_id': city_id,
+                }
+                for person_id, city_id in enumerate(person_city_ids, start=1)
+            ])
+
+    def tearDown(self):
+        """Remove the database file."""
+        self.engine.dispose()
+        shutil.rmtree(self.temporary_directory)
+
+    def test_collect_statistics(self):
+        statistics = collect_statistics_from_sqlalchemy_database(
+            self.sqlalchemy_schema_info, self.engine, num_quantiles=2)
+
+        self.assertEqual(4, statistics.get_class_count('City'))
+        self.assertEqual(10, statistics.get_class_count('Person'))
+        self.assertEqual(10, statistics.get_class_count('Person_LivesIn'))
+        self.assertEqual(
+            10, statistics.get_vertex_edge_vertex_count('Person', 'Person_LivesIn', 'City'))
+
+        self.assertEqual(3, statistics.get_distinct_field_values_count('City', 'name'))
+        self.assertEqual(5, statistics.get_distinct_field_values_count('Person', 'name'))
+        self.assertEqual(10, statistics.get_distinct_field_values_count('Person', 'birthday'))
+
+        # Every person lives in exactly one city.
+        self.assertEqual(
+            [(0, 0, 0), (1, 1, 10)],
+            statistics.get_vertex_edge_vertex_degree_histogram(
+                'Person', 'Person_LivesIn', 'City', 'out'))
+        self.assertEqual(
+            [(0, 0, 1), (1, 1, 2), (8, 15, 1)],
+            statistics.get_vertex_edge_vertex_degree_histogram(
+                'Person', 'Person_LivesIn', 'City', 'in'))
+
+        self.assertEqual(
+            [date(2000, 1, 1), date(2000, 1, 5), date(2000, 1, 10)],
+            statistics.get_field_quantiles('Person', 'birthday'))
+        self.assertEqual(
+            [1, 2, 4], statistics.get_field_quantiles('City', 'city_id'))
+        self.assertIsNone(statistics.get_field_quantiles('Person', 'name'))
+
+        self.assertAlmostEqual(0.25, statistics.get_field_null_fraction('City', 'name'))
+        self.assertAlmostEqual(0.0, statistics.get_field_null_fraction('Person', 'name'))
+        self.assertIsNone(statistics.get_field_most_common_values('Person', 'name'))
+
+    def test_collect_most_common_values(self):
+        statistics = collect_statistics_from_sqlalchemy_database(
+            self.sqlalchemy_schema_info, self.engine, num_most_common_values=2)
+
+        # All names occur twice, so ties are broken by the name itself.
+        self.assertEqual(
+            [(u'Person 0', 0.2), (u'Person 1', 0.2)],
+            statistics.get_field_most_common_values('Person', 'name'))
+        self.assertEqual(
+            [(1, 0.8), (2, 0.1)], statistics.get_field_most_common_values('Person', 'city_id'))
+        # Null values are not among the most common values.
+        self.assertEqual(
+            [(u'A', 0.25), (u'B', 0.25)],
+            statistics.get_field_most_common_values('City', 'name'))
+
+    def test_collect_statistics_without_quantiles(self):
+        statistics = collect_statistics_from_sqlalchemy_database(
+            self.sqlalchemy_schema_info, self.engine, num_quantiles=0, num_workers=1)
+
+        self.assertEqual(10, statistics.get_class_count('Person'))
+        self.assertIsNone(statistics.get_field_quantiles('Person', 'birthday'))
+
+    def test_invalid_collection_arguments(self):
+        with self.assertRaises(ValueError):
+            collect_statistics_from_sqlalchemy_database(
+                self.sqlalchemy_schema_info, self.engine, num_quantiles=1)
+        with self.assertRaises(ValueError):
+            collect_statistics_from_sqlalchemy_database(
+                self.sqlalchemy_schema_info, self.engine, sample_percent=0)
+        with self.assertRaises(ValueError):
+            collect_statistics_from_sqlalchemy_database(
+                self.sqlalchemy_schema_info, self.engine, num_most_common_values=-1)
+
+
+class StatisticsSnapshotTests(unittest.TestCase):
+    """Test saving statistics to a snapshot file and lazily loading them from it."""
+
+    def setUp(self):
+        """Create a temporary directory for snapshot files."""
+        self.temporary_directory = tempfile.mkdtemp()
+        self.snapshot_path = os.path.join(self.temporary_directory, 'statistics.snapshot')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temporary_directory)
+
+    def test_snapshot_round_trip(self):
+        statistics_data = {
+            'class_counts': {
+                'Animal': 1000,
+                'Species': 100,
+                'Animal_OfSpecies': 1000,
+                u'Ünicode': 1,
+            },
+            'vertex_edge_vertex_counts': {
+                ('Animal', 'Animal_OfSpecies', 'Species'): 1000,
+            },
+            'distinct_field_values_counts': {
+                ('Animal', 'name'): 900,
+                ('Species', 'name'): 100,
+            },
+            'field_quantiles': {
+                ('Animal', 'birthday'): [date(2000, 1, 1), date(2010, 6, 15), date(2019, 12, 31)],
+                ('Animal', 'net_worth'): [Decimal('0.5'), Decimal('100'), Decimal('1e6')],
+                ('Species', 'limbs'): [0, 2, 4, 1000],
+                ('Event', 'event_date'): [
+                    datetime(2000, 1, 1, 12, 30), datetime(2001, 1, 1, 0, 0, 0, 5)],
+                ('Event', 'timestamp'): [
+                    datetime(2000, 1, 1, tzinfo=pytz.utc), datetime(2001, 1, 1, tzinfo=pytz.utc)],
+                ('Species', 'weight'): [0.5, 2.25],
+            },
+            'vertex_edge_vertex_degree_histograms': {
+                ('Animal', 'Animal_OfSpecies', 'Species', 'out'): [(1, 1, 1000)],
+                ('Animal', 'Animal_OfSpecies', 'Species', 'in'): [
+                    (0, 0, 10), (1, 1, 20), (2, 3, 30), (4, 7, 25), (8, 15, 10), (16, 31, 5)],
+            },
+            'recursive_traversal_vertex_counts': {
+                ('Animal', 'Animal_OfSpecies', 'Species', 'out', 1): 2.0,
+                ('Animal', 'Animal_OfSpecies', 'Species', 'in', 3): 10.5,
+            },
+            'field_null_fractions': {
+                ('Animal', 'name'): 0.0,
+                ('Animal', 'net_worth'): 0.25,
+            },
+            'field_most_common_values': {
+                ('Animal', 'name'): [(u'Ünicode', 0.5), ('Alice', 0.25)],
+                ('Species', 'limbs'): [(4, 0.75), (2, 0.125)],
+            },
+            'field_value_samples': {
+                ('Animal', 'name'): ['Alice', 'Bob', u'Ünicode'],
+                ('Animal', 'alias'): [['Al', 'Ally'], [], ['Bobby']],
+            },
+        }
+        save_statistics_snapshot(self.snapshot_path, **statistics_data)
+        local_statistics = LocalStatistics(**statistics_data)
+        snapshot_statistics = SnapshotStatistics(self.snapshot_path)
+
+        for class_name in statistics_data['class_counts']:
+            self.assertEqual(local_statistics.get_class_count(class_name),
+                             snapshot_statistics.get_class_count(class_name))
+        with self.assertRaises(AssertionError):
+            snapshot_statistics.get_class_count('Location')
+
+        vertex_edge_vertex_keys = [
+            ('Animal', 'Animal_OfSpecies', 'Species'),
+            ('Species', 'Animal_OfSpecies', 'Animal'),
+            ('Animal', 'Animal_ParentOf', 'Animal'),
+        ]
+        for source_class_name, edge_class_name, target_class_name in vertex_edge_vertex_keys:
+            statistic_key = (source_class_name, edge_class_name, target_class_name)
+            self.assertEqual(local_statistics.get_vertex_edge_vertex_count(*statistic_key),
+                             snapshot_statistics.get_vertex_edge_vertex_count(*statistic_key))
+            for edge_direction in ('out', 'in'):
+                self.assertEqual(
+                    local_statistics.get_vertex_edge_vertex_degree_histogram(
+                        source_class_name, edge_class_name, target_class_name, edge_direction),
+                    snapshot_statistics.get_vertex_edge_vertex_degree_histogram(
+                        source_class_name, edge_class_name, target_class_name, edge_direction))
+                for depth in (1, 2, 3):
+                    self.assertEqual(
+                        local_statistics.get_recursive_traversal_vertex_count(
+                            source_class_name, edge_class_name, target_class_name,
+                            edge_direction, depth),
+                        snapshot_statistics.get_recursive_traversal_vertex_count(
+                            source_class_name, edge_class_name, target_class_name,
+                            edge_direction, depth))
+
+        field_keys = (
+            list(statistics_data['distinct_field_values_counts']) +
+            list(statistics_data['field_quantiles']) +
+            list(statistics_data['field_value_samples']) +
+            [('Animal', 'uuid')]
+        )
+        for field_key in field_keys:
+            self.assertEqual(local_statistics.get_distinct_field_values_count(*field_key),
+                             snapshot_statistics.get_distinct_field_values_count(*field_key))
+            self.assertEqual(local_statistics.get_field_quantiles(*field_key),
+                             snapshot_statistics.get_field_quantiles(*field_key))
+            self.assertEqual(local_statistics.get_field_null_fraction(*field_key),
+                             snapshot_statistics.get_field_null_fraction(*field_key))
+            self.assertEqual(local_statistics.get_field_most_common_values(*field_key),
+                             snapshot_statistics.get_field_most_common_values(*field_key))
+            self.assertEqual(local_statistics.get_field_value_sample(*field_key),
+                             snapshot_statistics.get_field_value_sample(*field_key))
+
+    def test_snapshot_estimates_match_local_statistics(self):
+        schema_graph = _make_person_knows_schema_graph()
+        statistics_data = {
+            'class_counts': {'Person': 10000, 'Person_Knows': 50000},
+            'vertex_edge_vertex_degree_histograms': {
+                ('Person', 'Person_Knows', 'Person', 'out'): [
+                    (0, 0, 9000), (1, 1, 500), (2, 3, 250), (64, 127, 250)],
+            },
+        }
+        save_statistics_snapshot(self.snapshot_path, **statistics_data)
+
+        graphql_input = '''{
+            Person {
+                name @output(out_name: "name")
+                out_Person_Knows @optional {
+                    name @output(out_name: "friend_name")
+                }
+            }
+        }'''
+        self.assertAlmostEqual(
+            _make_schema_info_and_estimate_cardinality(
+                schema_graph, LocalStatistics(**statistics_data), graphql_input, dict()),
+            _make_schema_info_and_estimate_cardinality(
+                schema_graph, SnapshotStatistics(self.snapshot_path), graphql_input, dict()))
+
+    def test_invalid_snapshot_file(self):
+        with open(self.snapshot_path, 'wb') as snapshot_file:
+            snapshot_file.write(b'not a statistics snapshot')
+        with self.assertRaises(ValueError):
+            SnapshotStatistics(self.snapshot_path)
@@ -1,13 +1,83 @@
 # Copyright 2019-present Kensho Technologies, LLC.
+import json
+import random
 import unittest
+from uuid import UUID
 
 import pytest
 
 from ...cost_estimation.statistics import LocalStatistics
-from ...query_pagination import QueryStringWithParameters, paginate_query
+from ...query_pagination import QueryStringWithParameters, paginate_query, split_into_pages
+from ...query_pagination.adaptive_pagination import (
+    PaginationCursor, execute_adaptively_paginated_query
+)
 from ...schema.schema_info import QueryPlanningSchemaInfo
 from ...schema_generation.graphql_schema import get_graphql_schema_from_schema_graph
-from ..test_helpers import generate_schema_graph
+from ...schema_generation.orientdb.schema_graph_builder import get_orientdb_schema_graph
+from ...schema_generation.orientdb.schema_properties import (
+    ORIENTDB_BASE_VERTEX_CLASS_NAME, PROPERTY_TYPE_INTEGER_ID, PROPERTY_TYPE_STRING_ID
+)
+from ..test_helpers import compare_graphql, generate_schema_graph
+
+
+def _compare_paginated_queries(test_case, expected_query_list, received_query_list):
+    """Compare the page and remainder queries and their parameters produced by pagination."""
+    test_case.assertEqual(len(expected_query_list), len(received_query_list))
+    for expected_query, received_query in zip(expected_query_list, received_query_list):
+        if expected_query is None:
+            test_case.assertIsNone(received_query)
+        else:
+            compare_graphql(test_case, expected_query.query_string, received_query.query_string)
+            test_case.assertEqual(expected_query.parameters, received_query.parameters)
+
+
+def _make_schema_info(statistics):
+    """Return a QueryPlanningSchemaInfo with Person vertices paginated by uuid, and Events by id."""
+    schema_data = [
+        {
+            'name': ORIENTDB_BASE_VERTEX_CLASS_NAME,
+            'abstract': False,
+            'properties': [],
+        },
+        {
+            'name': 'Person',
+            'abstract': False,
+            'superClass': ORIENTDB_BASE_VERTEX_CLASS_NAME,
+            'properties': [
+                {
+                    'name': 'name',
+                    'type': PROPERTY_TYPE_STRING_ID,
+                },
+                {
+                    'name': 'uuid',
+                    'type': PROPERTY_TYPE_STRING_ID,
+                },
+            ],
+        },
+        {
+            'name': 'Event',
+            'abstract': False,
+            'superClass': ORIENTDB_BASE_VERTEX_CLASS_NAME,
+            'properties': [
+                {
+                    'name': 'event_id',
+                    'type': PROPERTY_TYPE_INTEGER_ID,
+                },
+                {
+                    'name': 'name',
+                    'type': PROPERTY_TYPE_STRING_ID,
+                },
+            ],
+        },
+    ]
+    schema_graph = get_orientdb_schema_graph(schema_data, [])
+    graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+    return QueryPlanningSchemaInfo(
+        schema=graphql_schema,
+        type_equivalence_hints=type_equivalence_hints,
+        schema_graph=schema_graph,
+        statistics=statistics,
+        pagination_keys={'Person': 'uuid', 'Event': 'event_id'})
 
 
 # The following TestCase class uses the 'snapshot_orientdb_client' fixture
@@ -43,16 +113,9 @@ class QueryPaginationTests(unittest.TestCase):
             statistics=statistics,
             pagination_keys=pagination_keys)
 
-        # Since query pagination is still a skeleton, we expect a NotImplementedError for this test.
-        # Once query pagination is fully implemented, the result of this call should be equal to
-        # expected_query_list.
-        # pylint: disable=unused-variable
-        with self.assertRaises(NotImplementedError):
-            paginated_queries = paginate_query(                     # noqa: unused-variable
-                schema_info, test_data, parameters, 1
-            )
+        paginated_queries = paginate_query(schema_info, test_data, parameters, 1)
 
-        expected_query_list = (                                     # noqa: unused-variable
+        expected_query_list = (
             QueryStringWithParameters(
                 '''{
                     Animal {
@@ -76,4 +139,378 @@ class QueryPaginationTests(unittest.TestCase):
                 },
             ),
         )
-        # pylint: enable=unused-variable
+        _compare_paginated_queries(self, expected_query_list, paginated_queries)
+
+
+class QueryPaginationParameterizationTests(unittest.TestCase):
+    """Test paginating queries using statistics, without a database."""
+
+    def test_query_smaller_than_page_is_not_split(self):
+        schema_info = _make_schema_info(LocalStatistics({'Person': 10, 'Event': 10}))
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+            }
+        }'''
+        paginated_queries = paginate_query(schema_info, query, dict(), 100)
+        expected_query_list = (
+            QueryStringWithParameters(query, dict()),
+            None,
+        )
+        _compare_paginated_queries(self, expected_query_list, paginated_queries)
+
+    def test_pagination_merges_with_user_filters(self):
+        schema_info = _make_schema_info(LocalStatistics({'Person': 1000, 'Event': 10}))
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+                uuid @filter(op_name: ">=", value: ["$uuid_lower"])
+            }
+        }'''
+        parameters = {
+            'uuid_lower': '80000000-0000-0000-0000-000000000000',
+        }
+
+        # Half of the uuids pass the user's filter, so splitting the 500 remaining Persons into
+        # five pages of 100 splits off the first fifth of the upper half of uuids.
+        paginated_queries = paginate_query(schema_info, query, parameters, 100)
+        expected_query_list = (
+            QueryStringWithParameters(
+                '''{
+                    Person {
+                        name @output(out_name: "name")
+                        uuid @filter(op_name: ">=", value: ["$uuid_lower"])
+                             @filter(op_name: "<", value: ["$_paged_upper_param_on_Person_uuid"])
+                    }
+                }''',
+                {
+                    'uuid_lower': '80000000-0000-0000-0000-000000000000',
+                    '_paged_upper_param_on_Person_uuid': '99999999-9999-9999-9999-999999999999',
+                },
+            ),
+            QueryStringWithParameters(
+                '''{
+                    Person {
+                        name @output(out_name: "name")
+                        uuid @filter(op_name: ">=", value: ["$uuid_lower"])
+                             @filter(op_name: ">=", value: ["$_paged_lower_param_on_Person_uuid"])
+                    }
+                }''',
+                {
+                    'uuid_lower': '80000000-0000-0000-0000-000000000000',
+                    '_paged_lower_param_on_Person_uuid': '99999999-9999-9999-9999-999999999999',
+                },
+            ),
+        )
+        _compare_paginated_queries(self, expected_query_list, paginated_queries)
+
+    def test_repeated_pagination_reuses_pagination_filters(self):
+        schema_info = _make_schema_info(LocalStatistics({'Person': 4, 'Event': 10}))
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+            }
+        }'''
+        _, remainder_query = paginate_query(schema_info, query, dict(), 1)
+
+        # The remainder query's pagination filter is reused when paginating it again, so that its
+        # lower bound is moved forward instead of adding another filter.
+        paginated_queries = paginate_query(
+            schema_info, remainder_query.query_string, remainder_query.parameters, 1)
+        expected_query_list = (
+            QueryStringWithParameters(
+                '''{
+                    Person {
+                        uuid @filter(op_name: ">=", value: ["$_paged_lower_param_on_Person_uuid"])
+                             @filter(op_name: "<", value: ["$_paged_upper_param_on_Person_uuid"])
+                        name @output(out_name: "name")
+                    }
+                }''',
+                {
+                    '_paged_lower_param_on_Person_uuid': '40000000-0000-0000-0000-000000000000',
+                    '_paged_upper_param_on_Person_uuid': '80000000-0000-0000-0000-000000000000',
+                },
+            ),
+            QueryStringWithParameters(
+                '''{
+                    Person {
+                        uuid @filter(op_name: ">=", value: ["$_paged_lower_param_on_Person_uuid"])
+                        name @output(out_name: "name")
+                    }
+                }''',
+                {
+                    '_paged_lower_param_on_Person_uuid': '80000000-0000-0000-0000-000000000000',
+                },
+            ),
+        )
+        _compare_paginated_queries(self, expected_query_list, paginated_queries)
+
+    def test_int_pagination_key_uses_quantiles(self):
+        statistics = LocalStatistics(
+            {'Person': 10, 'Event': 1000},
+            field_quantiles={
+                # Half of the Events have an id of at most 10, and the other half is spread out
+                # between 10 and 1000.
+                ('Event', 'event_id'): [1, 10, 1000],
+            },
+        )
+        schema_info = _make_schema_info(statistics)
+        query = '''{
+            Event {
+                name @output(out_name: "name")
+            }
+        }'''
+
+        paginated_queries = paginate_query(schema_info, query, dict(), 500)
+        expected_query_list = (
+            QueryStringWithParameters(
+                '''{
+                    Event {
+                        event_id @filter(op_name: "<",
+                                         value: ["$_paged_upper_param_on_Event_event_id"])
+                        name @output(out_name: "name")
+                    }
+                }''',
+                {
+                    '_paged_upper_param_on_Event_event_id': 11,
+                },
+            ),
+            QueryStringWithParameters(
+                '''{
+                    Event {
+                        event_id @filter(op_name: ">=",
+                                         value: ["$_paged_lower_param_on_Event_event_id"])
+                        name @output(out_name: "name")
+                    }
+                }''',
+                {
+                    '_paged_lower_param_on_Event_event_id': 11,
+                },
+            ),
+        )
+        _compare_paginated_queries(self, expected_query_list, paginated_queries)
+
+    def test_int_pagination_key_without_statistics(self):
+        schema_info = _make_schema_info(LocalStatistics({'Person': 10, 'Event': 1000}))
+        query = '''{
+            Event {
+                event_id @filter(op_name: "between", value: ["$lower", "$upper"])
+                name @output(out_name: "name")
+            }
+        }'''
+
+        # The user's filter bounds the ids, so they are assumed to be evenly distributed.
+        _, remainder_query = paginate_query(
+            schema_info, query, {'lower': 100, 'upper': 199}, 250)
+        self.assertEqual(
+            {'lower': 100, 'upper': 199, '_paged_lower_param_on_Event_event_id': 125},
+            remainder_query.parameters)
+
+        # Without the filter, there is no way to choose a split point.
+        unbounded_query = '''{
+            Event {
+                name @output(out_name: "name")
+            }
+        }'''
+        with self.assertRaises(ValueError):
+            paginate_query(schema_info, unbounded_query, dict(), 250)
+
+
+@pytest.mark.slow
+class QuerySplittingTests(unittest.TestCase):
+    """Test splitting queries into many disjoint pages at once, without a database."""
+
+    def test_split_uuid_pagination_key_into_pages(self):
+        schema_info = _make_schema_info(LocalStatistics({'Person': 1000, 'Event': 10}))
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+            }
+        }'''
+        first_page_query = '''{
+            Person {
+                uuid @filter(op_name: "<", value: ["$_paged_upper_param_on_Person_uuid"])
+                name @output(out_name: "name")
+            }
+        }'''
+        bounded_page_query = '''{
+            Person {
+                uuid @filter(op_name: ">=", value: ["$_paged_lower_param_on_Person_uuid"])
+                     @filter(op_name: "<", value: ["$_paged_upper_param_on_Person_uuid"])
+                name @output(out_name: "name")
+            }
+        }'''
+        last_page_query = '''{
+            Person {
+                uuid @filter(op_name: ">=", value: ["$_paged_lower_param_on_Person_uuid"])
+                name @output(out_name: "name")
+            }
+        }'''
+
+        # Uuids are assumed to be uniformly distributed, so each page covers a quarter of them.
+        page_queries = split_into_pages(schema_info, query, dict(), 4)
+        expected_query_list = (
+            QueryStringWithParameters(first_page_query, {
+                '_paged_upper_param_on_Person_uuid': '40000000-0000-0000-0000-000000000000',
+            }),
+            QueryStringWithParameters(bounded_page_query, {
+                '_paged_lower_param_on_Person_uuid': '40000000-0000-0000-0000-000000000000',
+                '_paged_upper_param_on_Person_uuid': '80000000-0000-0000-0000-000000000000',
+            }),
+            QueryStringWithParameters(bounded_page_query, {
+                '_paged_lower_param_on_Person_uuid': '80000000-0000-0000-0000-000000000000',
+                '_paged_upper_param_on_Person_uuid': 'c0000000-0000-0000-0000-000000000000',
+            }),
+            QueryStringWithParameters(last_page_query, {
+                '_paged_lower_param_on_Person_uuid': 'c0000000-0000-0000-0000-000000000000',
+            }),
+        )
+        _compare_paginated_queries(self, expected_query_list, page_queries)
+
+    def test_split_int_pagination_key_using_quantiles(self):
+        statistics = LocalStatistics(
+            {'Person': 10, 'Event': 1000},
+            field_quantiles={
+                # Half of the Events have an id of at most 10, and the other half is spread out
+                # between 10 and 1000.
+                ('Event', 'event_id'): [1, 10, 1000],
+            },
+        )
+        schema_info = _make_schema_info(statistics)
+        query = '''{
+            Event {
+                name @output(out_name: "name")
+            }
+        }'''
+
+        page_queries = split_into_pages(schema_info, query, dict(), 4)
+        self.assertEqual([
+            {'_paged_upper_param_on_Event_event_id': 6},
+            {'_paged_lower_param_on_Event_event_id': 6, '_paged_upper_param_on_Event_event_id': 11},
+            {'_paged_lower_param_on_Event_event_id': 11,
+             '_paged_upper_param_on_Event_event_id': 506},
+            {'_paged_lower_param_on_Event_event_id': 506},
+        ], [page_query.parameters for page_query in page_queries])
+
+    def test_split_into_more_pages_than_allowed_values(self):
+        schema_info = _make_schema_info(LocalStatistics({'Person': 10, 'Event': 1000}))
+        query = '''{
+            Event {
+                event_id @filter(op_name: "between", value: ["$lower", "$upper"])
+                name @output(out_name: "name")
+            }
+        }'''
+        parameters = {'lower': 100, 'upper': 102}
+
+        # Only three ids pass the user's filter, so there is one page per id.
+        page_queries = split_into_pages(schema_info, query, parameters, 5)
+        self.assertEqual([
+            {'lower': 100, 'upper': 102, '_paged_upper_param_on_Event_event_id': 101},
+            {'lower': 100, 'upper': 102, '_paged_lower_param_on_Event_event_id': 101,
+             '_paged_upper_param_on_Event_event_id': 102},
+            {'lower': 100, 'upper': 102, '_paged_lower_param_on_Event_event_id': 102},
+        ], [page_query.parameters for page_query in page_queries])
+
+    def test_split_into_single_page(self):
+        schema_info = _make_schema_info(LocalStatistics({'Person': 1000, 'Event': 10}))
+        query = '''{
+            Person {
+                name @output(out_name: "name")
+            }
+        }'''
+        page_queries = split_into_pages(schema_info, query, dict(), 1)
+        _compare_paginated_queries(
+            self, [QueryStringWithParameters(query, dict())], page_queries)
+
+        with self.assertRaises(ValueError):
+            split_into_pages(schema_info, query, dict(), 0)
+
+
+def _make_person_uuid_executor(uuids):
+    """Return a function executing Person page queries over the given uuids, without a database."""
+    def execute_query(query_string, parameters):
+        """Return the uuids within the bounds given by the query's pagination parameters."""
+        lower_bound = parameters.get('_paged_lower_param_on_Person_uuid')
+        upper_bound = parameters.get('_paged_upper_param_on_Person_uuid')
+        return [
+            {'uuid': uuid}
+            for uuid in uuids
+            if ((lower_bound is None or UUID(uuid).int >= UUID(lower_bound).int) and
+                (upper_bound is None or UUID(uuid).int < UUID(upper_bound).int))
+        ]
+    return execute_query
+
+
+@pytest.mark.slow
+class AdaptivePaginationTests(unittest.TestCase):
+    """Test paginating queries using the observed page sizes, without a database."""
+
+    def setUp(self):
+        """Create 1000 Person uuids, all of which are in the first sixteenth of the uuid range."""
+        random_generator = random.Random(0)
+        self.uuids = [
+            str(UUID(int=random_generator.getrandbits(124)))
+            for _ in range(1000)
+        ]
+        self.schema_info = _make_schema_info(LocalStatistics({'Person': 1000, 'Event': 10}))
+        self.query = '''{
+            Person {
+                name @output(out_name: "name")
+            }
+        }'''
+
+    def _get_uuids_of_pages(self, pages):
+        """Return the sorted uuids of all rows of the given pages."""
+        return sorted(row['uuid'] for page in pages for row in page.rows)
+
+    def test_skewed_pages_are_rebalanced(self):
+        pages = list(execute_adaptively_paginated_query(
+            self.schema_info, self.query, dict(), 100, _make_person_uuid_executor(self.uuids),
+            max_page_size=200))
+
+        # The estimator expects uuids to be spread over the whole range, so the first pages are
+        # much too large. They are bisected, and later pages are sized using the observed density.
+        self.assertEqual(sorted(self.uuids), self._get_uuids_of_pages(pages))
+        for page in pages:
+            self.assertLessEqual(len(page.rows), 200)
+        self.assertLessEqual(len(pages), 20)
+
+        # The first page has no lower bound, and the last page has no upper bound, so that values
+        # outside the statistics' range are not lost.
+        self.assertNotIn('_paged_lower_param_on_Person_uuid', pages[0].query.parameters)
+        self.assertNotIn('_paged_upper_param_on_Person_uuid', pages[-1].query.parameters)
+
+        final_progress = pages[-1].progress
+        self.assertEqual(len(pages), final_progress.num_pages)
+        self.assertEqual(1000, final_progress.num_rows)
+        self.assertEqual(1.0, final_progress.fraction_done)
+        self.assertEqual(0.0, final_progress.estimated_num_rows_remaining)
+
+    def test_undersized_pages_are_merged(self):
+        # Only 10 of the uuids exist, so pages grow until the remainder is covered by one page.
+        uuids = self.uuids[:10]
+        pages = list(execute_adaptively_paginated_query(
+            self.schema_info, self.query, dict(), 100, _make_person_uuid_executor(uuids)))
+        self.assertEqual(sorted(uuids), self._get_uuids_of_pages(pages))
+        self.assertLessEqual(len(pages), 3)
+
+    def test_pagination_resumes_from_cursor(self):
+        execute_query = _make_person_uuid_executor(self.uuids)
+        first_pages = []
+        for page in execute_adaptively_paginated_query(
+            self.schema_info, self.query, dict(), 100, execute_query, max_page_size=200
+        ):
+            first_pages.append(page)
+            if len(first_pages) == 3:
+                # Simulate a failure after processing three pages.
+                break
+
+        serialized_cursor = json.dumps(first_pages[-1].cursor._asdict())
+        cursor = PaginationCursor(**json.loads(serialized_cursor))
+        remaining_pages = list(execute_adaptively_paginated_query(
+            self.schema_info, self.query, dict(), 100, execute_query, max_page_size=200,
+            cursor=cursor))
+
+        self.assertEqual(
+            sorted(self.uuids), self._get_uuids_of_pages(first_pages + remaining_pages))
+        self.assertEqual(4, remaining_pages[0].progress.num_pages)
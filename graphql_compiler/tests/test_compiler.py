@@ -881,7 +881,23 @@ class CompilerTests(unittest.TestCase):
                 )
             )
         '''
-        expected_gremlin = NotImplementedError
+        expected_gremlin = '''
+            g.V('@class', 'Species')
+            .as('Species___1')
+            .ifThenElse{it.in_Animal_OfSpecies == null}{null}{it.in('Animal_OfSpecies')}
+            .filter{it, m -> ((it == null) || (it.name == $animal_name))}
+            .as('Species__in_Animal_OfSpecies___1')
+            .optional('Species___1')
+            .as('Species___2')
+            .filter{it, m -> (
+                ((m.Species___2.in_Species_Eats == null) ? 0 : (
+                    m.Species___2.in_Species_Eats.size()
+                )) >= $predators
+            )}
+            .transform{it, m -> new com.orientechnologies.orient.core.record.impl.ODocument([
+                species_name: m.Species___1.name
+            ])}
+        '''
         expected_sql = NotImplementedError
         expected_cypher = SKIP_TEST
 
@@ -2101,7 +2117,16 @@ class CompilerTests(unittest.TestCase):
             ])}
         '''
         expected_sql = NotImplementedError
-        expected_cypher = SKIP_TEST
+        expected_cypher = '''
+            MATCH (Food___1:Food)
+            MATCH (Food___1)<-[:Entity_Related]-(Food__in_Entity_Related___1:Animal)
+            MATCH (Food__in_Entity_Related___1)-[:Animal_ParentOf*0..3]->
+                (Food__in_Entity_Related__out_Animal_ParentOf___1:Animal)
+            RETURN
+                Food__in_Entity_Related___1.name AS `animal_name`,
+                Food___1.name AS `food_name`,
+                Food__in_Entity_Related__out_Animal_ParentOf___1.name AS `relation_name`
+        '''
 
         check_test_data(self, test_data, expected_match, expected_gremlin, expected_sql,
                         expected_cypher)
@@ -2175,7 +2200,13 @@ class CompilerTests(unittest.TestCase):
             WHERE
                 anon_1.color = :wanted
         '''
-        expected_cypher = SKIP_TEST
+        expected_cypher = '''
+            MATCH (Animal___1:Animal)
+            MATCH (Animal___1)-[:Animal_ParentOf*0..3]->(Animal__out_Animal_ParentOf___1:Animal)
+                WHERE (Animal__out_Animal_ParentOf___1.color = $wanted)
+            RETURN
+                Animal__out_Animal_ParentOf___1.name AS `relation_name`
+        '''
 
         check_test_data(self, test_data, expected_match, expected_gremlin, expected_sql,
                         expected_cypher)
@@ -2218,7 +2249,12 @@ class CompilerTests(unittest.TestCase):
             ])}
         '''
         expected_sql = NotImplementedError
-        expected_cypher = SKIP_TEST
+        expected_cypher = '''
+            MATCH (Animal___1:Animal)
+            MATCH (Animal___1)<-[:Entity_Related*0..4]-(Animal__in_Entity_Related___1:Animal)
+            RETURN
+                Animal__in_Entity_Related___1.name AS `name`
+        '''
 
         check_test_data(self, test_data, expected_match, expected_gremlin, expected_sql,
                         expected_cypher)
@@ -2261,7 +2297,13 @@ class CompilerTests(unittest.TestCase):
             ])}
         '''
         expected_sql = NotImplementedError
-        expected_cypher = SKIP_TEST
+        expected_cypher = '''
+            MATCH (Animal___1:Animal)
+            MATCH (Animal___1)<-[:Entity_Related*0..4]-(Animal__in_Entity_Related___1:Animal)
+                WHERE (Animal__in_Entity_Related___1.color = $color)
+            RETURN
+                Animal__in_Entity_Related___1.name AS `name`
+        '''
 
         check_test_data(self, test_data, expected_match, expected_gremlin, expected_sql,
                         expected_cypher)
@@ -5278,7 +5320,25 @@ class CompilerTests(unittest.TestCase):
             LET
                 $Animal___1___out_Animal_ParentOf = Animal___1.out("Animal_ParentOf").asList()
         '''
-        expected_gremlin = NotImplementedError
+        expected_gremlin = '''
+            g.V('@class', 'Animal')
+            .as('Animal___1')
+            .transform{it, m -> new com.orientechnologies.orient.core.record.impl.ODocument([
+                child_names: (
+                    (m.Animal___1.out_Animal_ParentOf == null) ? [] : (
+                        m.Animal___1.out_Animal_ParentOf.collect{
+                            entry -> entry.inV.next().name
+                        }
+                    )
+                ),
+                name: m.Animal___1.name,
+                number_of_children: (
+                    (m.Animal___1.out_Animal_ParentOf == null) ? 0 : (
+                        m.Animal___1.out_Animal_ParentOf.size()
+                    )
+                )
+            ])}
+        '''
 
         expected_sql = NotImplementedError
         expected_cypher = SKIP_TEST  # _x_count not implemented for Cypher
@@ -5305,7 +5365,25 @@ class CompilerTests(unittest.TestCase):
             WHERE
                 ($Animal___1___out_Animal_ParentOf.size() >= {min_children})
         '''
-        expected_gremlin = NotImplementedError
+        expected_gremlin = '''
+            g.V('@class', 'Animal')
+            .as('Animal___1')
+            .filter{it, m -> (
+                ((m.Animal___1.out_Animal_ParentOf == null) ? 0 : (
+                    m.Animal___1.out_Animal_ParentOf.size()
+                )) >= $min_children
+            )}
+            .transform{it, m -> new com.orientechnologies.orient.core.record.impl.ODocument([
+                child_names: (
+                    (m.Animal___1.out_Animal_ParentOf == null) ? [] : (
+                        m.Animal___1.out_Animal_ParentOf.collect{
+                            entry -> entry.inV.next().name
+                        }
+                    )
+                ),
+                name: m.Animal___1.name
+            ])}
+        '''
 
         expected_sql = NotImplementedError
         expected_cypher = SKIP_TEST  # _x_count not implemented for Cypher
@@ -5335,7 +5413,28 @@ class CompilerTests(unittest.TestCase):
             WHERE
                 ($Animal___1___out_Animal_ParentOf.size() >= Animal__out_Animal_OfSpecies___1.limbs)
         '''
-        expected_gremlin = NotImplementedError
+        expected_gremlin = '''
+            g.V('@class', 'Animal')
+            .as('Animal___1')
+            .out('Animal_OfSpecies')
+            .as('Animal__out_Animal_OfSpecies___1')
+            .back('Animal___1')
+            .filter{it, m -> (
+                ((m.Animal___1.out_Animal_ParentOf == null) ? 0 : (
+                    m.Animal___1.out_Animal_ParentOf.size()
+                )) >= m.Animal__out_Animal_OfSpecies___1.limbs
+            )}
+            .transform{it, m -> new com.orientechnologies.orient.core.record.impl.ODocument([
+                child_names: (
+                    (m.Animal___1.out_Animal_ParentOf == null) ? [] : (
+                        m.Animal___1.out_Animal_ParentOf.collect{
+                            entry -> entry.inV.next().name
+                        }
+                    )
+                ),
+                name: m.Animal___1.name
+            ])}
+        '''
 
         expected_sql = NotImplementedError
         expected_cypher = SKIP_TEST  # _x_count not implemented for Cypher
@@ -5363,7 +5462,29 @@ class CompilerTests(unittest.TestCase):
             WHERE
                 ($Animal___1___out_Animal_ParentOf.size() >= {min_children})
         '''
-        expected_gremlin = NotImplementedError
+        expected_gremlin = '''
+            g.V('@class', 'Animal')
+            .as('Animal___1')
+            .filter{it, m -> (
+                ((m.Animal___1.out_Animal_ParentOf == null) ? 0 : (
+                    m.Animal___1.out_Animal_ParentOf
+                        .collect{entry -> entry.inV.next()}
+                        .findAll{entry -> entry.alias.contains($expected_alias)}
+                        .size()
+                )) >= $min_children
+            )}
+            .transform{it, m -> new com.orientechnologies.orient.core.record.impl.ODocument([
+                name: m.Animal___1.name,
+                number_of_children: (
+                    (m.Animal___1.out_Animal_ParentOf == null) ? 0 : (
+                        m.Animal___1.out_Animal_ParentOf
+                            .collect{entry -> entry.inV.next()}
+                            .findAll{entry -> entry.alias.contains($expected_alias)}
+                            .size()
+                    )
+                )
+            ])}
+        '''
         expected_sql = NotImplementedError
         expected_cypher = SKIP_TEST  # _x_count not implemented for Cypher
 
@@ -5394,7 +5515,24 @@ class CompilerTests(unittest.TestCase):
                     ($Animal___1___out_Entity_Related.size() >= {min_related})
                 )
         '''
-        expected_gremlin = NotImplementedError
+        expected_gremlin = '''
+            g.V('@class', 'Animal')
+            .as('Animal___1')
+            .filter{it, m -> (
+                (
+                    ((m.Animal___1.out_Animal_ParentOf == null) ? 0 : (
+                        m.Animal___1.out_Animal_ParentOf.size()
+                    )) >= $min_children
+                ) && (
+                    ((m.Animal___1.out_Entity_Related == null) ? 0 : (
+                        m.Animal___1.out_Entity_Related.size()
+                    )) >= $min_related
+                )
+            )}
+            .transform{it, m -> new com.orientechnologies.orient.core.record.impl.ODocument([
+                name: m.Animal___1.name
+            ])}
+        '''
 
         expected_sql = NotImplementedError
         expected_cypher = SKIP_TEST
@@ -5421,7 +5559,25 @@ class CompilerTests(unittest.TestCase):
             WHERE
                 ($Species___1___in_Animal_OfSpecies.size() = {num_animals})
         '''
-        expected_gremlin = NotImplementedError
+        expected_gremlin = '''
+            g.V('@class', 'Species')
+            .as('Species___1')
+            .filter{it, m -> (
+                ((m.Species___1.in_Animal_OfSpecies == null) ? 0 : (
+                    m.Species___1.in_Animal_OfSpecies
+                        .collect{entry -> entry.outV.next()}
+                        .collectMany{
+                            entry -> entry.out_Animal_LivesIn
+                                .collect{edge -> edge.inV.next()}
+                        }
+                        .findAll{entry -> (entry.name == $location)}
+                        .size()
+                )) == $num_animals
+            )}
+            .transform{it, m -> new com.orientechnologies.orient.core.record.impl.ODocument([
+                name: m.Species___1.name
+            ])}
+        '''
 
         expected_sql = NotImplementedError
         expected_cypher = SKIP_TEST
@@ -6809,7 +6965,22 @@ class CompilerTests(unittest.TestCase):
             WHERE
                 anon_1.__cte_key IS NOT NULL OR [Animal_1].parent IS NULL
         '''
-        expected_cypher = SKIP_TEST
+        expected_cypher = '''
+            MATCH (Animal___1:Animal)
+            OPTIONAL MATCH (Animal___1)<-[:Animal_ParentOf]-(Animal__in_Animal_ParentOf___1:Animal)
+            OPTIONAL MATCH (Animal__in_Animal_ParentOf___1)-[:Animal_ParentOf*0..3]->
+                (Animal__in_Animal_ParentOf__out_Animal_ParentOf___1:Animal)
+            RETURN
+                (CASE WHEN (Animal__in_Animal_ParentOf___1 IS NOT null)
+                    THEN Animal__in_Animal_ParentOf___1.name
+                    ELSE null
+                END) AS `child_name`,
+                Animal___1.name AS `name`,
+                (CASE WHEN (Animal__in_Animal_ParentOf__out_Animal_ParentOf___1 IS NOT null)
+                    THEN Animal__in_Animal_ParentOf__out_Animal_ParentOf___1.name
+                    ELSE null
+                END) AS `self_and_ancestor_name`
+        '''
 
         check_test_data(self, test_data, expected_match, expected_gremlin, expected_sql,
                         expected_cypher)
@@ -18,6 +18,7 @@ from ..compiler.ir_lowering_common.common import OutputContextVertex
 from ..compiler.ir_lowering_match.utils import CompoundMatchQuery
 from ..compiler.match_query import convert_to_match_query
 from ..compiler.metadata import LocationInfo, QueryMetadataTable
+from ..compiler.subclass import compute_subclass_sets
 from ..schema import GraphQLDateTime
 from .test_helpers import (
     compare_cypher, compare_gremlin, compare_match, get_common_schema_info, get_schema
@@ -656,3 +657,45 @@ class EmitCypherTests(unittest.TestCase):
           '''
 
         compare_cypher(self, expected_cypher, received_cypher)
+
+    def test_immediate_output_with_supertype_labels(self):
+        # corresponds to:
+        # graphql_string = '''{
+        #     Animal {
+        #         name @output(out_name: "animal_name")
+        #     }
+        # }'''
+        base_location = Location(('Animal',))
+        base_name_location = base_location.navigate_to_field('name')
+        schema = get_schema()
+        base_location_info = LocationInfo(
+            parent_location=None,
+            type=schema.get_type(base_name_location.field),
+            coerced_from_type=None,
+            optional_scopes_depth=0,
+            recursive_scopes_depth=0,
+            is_within_fold=False,
+        )
+
+        ir_blocks = [
+            QueryRoot({'Animal'}),
+            MarkLocation(base_location),
+            GlobalOperationsStart(),
+            ConstructResult({'animal_name': OutputContextField(base_name_location, GraphQLString)}),
+        ]
+        query_metadata_table = QueryMetadataTable(
+            root_location=base_location, root_location_info=base_location_info
+        )
+
+        subclass_sets = compute_subclass_sets(schema)
+        cypher_query = convert_to_cypher_query(
+            ir_blocks, query_metadata_table, subclass_sets=subclass_sets)
+        received_cypher = emit_cypher.emit_code_from_ir(self.schema_info, cypher_query)
+
+        # Animal implements both the Entity and UniquelyIdentifiable interfaces.
+        expected_cypher = '''
+            MATCH (Animal___1:Animal:Entity:UniquelyIdentifiable)
+            RETURN Animal___1.name AS `animal_name`
+        '''
+
+        compare_cypher(self, expected_cypher, received_cypher)